@@ -179,6 +179,33 @@ export const saveResponse = async (
   return response.data;
 };
 
+export interface SaveAnswersResponse {
+  message: string;
+  saved_count: number;
+  results: Array<{
+    question_id: string;
+    status: 'saved' | 'invalid';
+    detail?: string | null;
+  }>;
+}
+
+/**
+ * Save several answers in one request (for debounced answer batches)
+ * The backend upserts the whole batch in a single transaction; when a question
+ * appears more than once, the last value wins.
+ * Uses apiClient to benefit from automatic token refresh on 401 errors
+ */
+export const saveAnswers = async (
+  assessmentId: number,
+  answers: Array<{ question_id: string; answer_value: string }>
+): Promise<SaveAnswersResponse> => {
+  const response = await apiClient.post(
+    `/v1/assessments/${assessmentId}/answers`,
+    { answers }
+  );
+  return response.data as SaveAnswersResponse;
+};
+
 /**
  * Submit an assessment for scoring
  * Uses apiClient to benefit from automatic token refresh on 401 errors
@@ -0,0 +1,75 @@
+"""add unique (assessment_id, question_id) to assessment_answers
+
+Revision ID: 037
+Revises: 036
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '037'
+down_revision = '036'
+branch_labels = None
+depends_on = None
+
+CONSTRAINT_NAME = 'uq_assessment_answers_assessment_question'
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    # Check if assessment_answers table exists
+    tables = inspector.get_table_names()
+    if 'assessment_answers' not in tables:
+        print("⚠️  assessment_answers table does not exist, skipping")
+        return
+
+    # Check if a unique constraint already covers (assessment_id, question_id)
+    # (databases created from migrations/assessment_tables.sql have an unnamed one)
+    for constraint in inspector.get_unique_constraints('assessment_answers'):
+        if sorted(constraint['column_names']) == ['assessment_id', 'question_id']:
+            print(f"✅ Unique constraint {constraint['name']} already exists")
+            return
+
+    # Remove duplicate answers, keeping the most recent row per question
+    print("📝 Removing duplicate answers from assessment_answers...")
+    conn.execute(sa.text("""
+        DELETE FROM assessment_answers
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY assessment_id, question_id
+                           ORDER BY id DESC
+                       ) AS row_number
+                FROM assessment_answers
+            ) ranked
+            WHERE ranked.row_number > 1
+        )
+    """))
+
+    # Required by the bulk answers endpoint (INSERT ... ON CONFLICT)
+    op.create_unique_constraint(
+        CONSTRAINT_NAME,
+        'assessment_answers',
+        ['assessment_id', 'question_id'],
+    )
+    print(f"✅ Added {CONSTRAINT_NAME}")
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    tables = inspector.get_table_names()
+    if 'assessment_answers' not in tables:
+        return
+
+    constraints = [c['name'] for c in inspector.get_unique_constraints('assessment_answers')]
+    if CONSTRAINT_NAME in constraints:
+        print(f"📝 Dropping {CONSTRAINT_NAME}...")
+        op.drop_constraint(CONSTRAINT_NAME, 'assessment_answers', type_='unique')
+        print(f"✅ Dropped {CONSTRAINT_NAME}")
@@ -1,5 +1,6 @@
 ﻿"""File upload endpoints."""
 
+import asyncio
 import os
 import re
 from uuid import UUID
@@ -12,6 +13,7 @@ from app.database import get_db
 from app.dependencies import get_current_user
 from app.models import User, File as FileModel
 from app.schemas.file import FileResponse, FileUploadResponse
+from app.services.presigned_url_cache import presigned_url_cache
 from app.services.s3_service import S3Service
 
 router = APIRouter(prefix="/api/upload", tags=["upload"])
@@ -258,12 +260,12 @@ async def get_file(
         )
 
     # Regenerate presigned URL if needed
-    if S3Service.is_configured():
+    if presigned_url_cache.enabled:
         try:
-            s3_service = S3Service()
-            file_record.url = s3_service.generate_presigned_url(
+            file_record.url = await asyncio.to_thread(
+                presigned_url_cache.get_url,
                 file_record.file_key,
-                expiration=3600,  # 1 hour
+                3600,  # 1 hour
             )
             await db.commit()
             await db.refresh(file_record)
@@ -291,18 +293,15 @@ async def list_files(
     )
     files = result.scalars().all()
 
-    # Regenerate presigned URLs if needed
-    if S3Service.is_configured():
-        s3_service = S3Service()
+    # Regenerate presigned URLs if needed (cached, misses signed in one batch)
+    if presigned_url_cache.enabled:
+        urls = await presigned_url_cache.get_urls_async(
+            [file_record.file_key for file_record in files],
+            expires_in=3600,  # 1 hour
+        )
         for file_record in files:
-            try:
-                file_record.url = s3_service.generate_presigned_url(
-                    file_record.file_key,
-                    expiration=3600,  # 1 hour
-                )
-            except Exception:
-                # If URL generation fails, use existing URL
-                pass
+            # If URL generation fails, use existing URL
+            file_record.url = urls.get(file_record.file_key, file_record.url)
 
     return files
 
@@ -337,6 +336,7 @@ async def delete_file(
         try:
             s3_service = S3Service()
             s3_service.delete_file(file_record.file_key)
+            presigned_url_cache.invalidate(file_record.file_key)
         except ValueError as e:
             # Log error but continue with database deletion
             pass
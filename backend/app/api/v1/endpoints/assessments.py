@@ -8,12 +8,13 @@ import json
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, File, UploadFile, Form, Request
 from pydantic import BaseModel, Field, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, UniqueConstraint, text
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, UniqueConstraint, text, or_
+from sqlalchemy.orm import selectinload, aliased
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from datetime import datetime, timezone
 
 from app.core.database import get_db
+from app.core.conditional import Validator, conditional
 from app.dependencies import get_current_user, require_admin_or_superadmin
 from app.models.user import User
 from app.models.assessment import (
@@ -28,9 +29,13 @@ from app.models.assessment import (
 )
 from app.config.assessment_config import get_total_questions
 from app.config.assessment_questions import get_questions_for_type
+from app.services.pdf_cache_service import invalidate_pdf_cache
 
 router = APIRouter()
 
+# Upper bound for one batched answer save (largest questionnaire is 30 questions)
+MAX_ANSWERS_PER_BATCH = 100
+
 
 # ============================================================================
 # Pydantic Schemas
@@ -68,6 +73,30 @@ class AssessmentAnswerRequest(BaseModel):
     answer_value: str = Field(..., description="Answer value (integer 1-5 or string 'A'/'B')")
 
 
+class AssessmentAnswersBatchRequest(BaseModel):
+    """Request to save several answers at once (debounced client batches)"""
+    answers: List[AssessmentAnswerRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_ANSWERS_PER_BATCH,
+        description="Answers to upsert; the last value wins when a question appears twice"
+    )
+
+
+class AnswerSaveStatus(BaseModel):
+    """Per-question outcome of a batched answer save"""
+    question_id: str
+    status: str  # "saved" or "invalid"
+    detail: Optional[str] = None
+
+
+class AssessmentAnswersBatchResponse(BaseModel):
+    """Response after saving a batch of answers"""
+    message: str
+    saved_count: int
+    results: List[AnswerSaveStatus]
+
+
 class EvaluatorAnswerRequest(BaseModel):
     """Request for a single evaluator answer"""
     question_id: str = Field(..., description="Question ID")
@@ -183,6 +212,55 @@ class AssessmentQuestionUpdate(BaseModel):
     question_metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
 
 
+# ============================================================================
+# Listing helpers
+# ============================================================================
+
+def _answer_count_subquery(assessment_entity):
+    """
+    Correlated COUNT of answers for the given assessment entity.
+
+    Evaluated per row inside the listing query (index lookup on
+    assessment_answers.assessment_id) so the answer count no longer costs
+    one round trip per assessment.
+    """
+    return (
+        select(func.count(AssessmentAnswer.id))
+        .where(AssessmentAnswer.assessment_id == assessment_entity.id)
+        .correlate(assessment_entity)
+        .scalar_subquery()
+    )
+
+
+def _score_summary(assessment: Assessment) -> Optional[Dict[str, Any]]:
+    """Extract the list summary from an assessment's processed score"""
+    if not assessment.processed_score:
+        return None
+    if assessment.assessment_type == AssessmentType.WELLNESS:
+        return {
+            "total_score": assessment.processed_score.get("total_score"),
+            "percentage": assessment.processed_score.get("percentage"),
+        }
+    if assessment.assessment_type == AssessmentType.TKI:
+        return {
+            "dominant_mode": assessment.processed_score.get("dominant_mode"),
+        }
+    if assessment.assessment_type == AssessmentType.THREE_SIXTY_SELF:
+        return {
+            "total_score": assessment.processed_score.get("total_score"),
+        }
+    return None
+
+
+def _display_name(user: User) -> Optional[str]:
+    """Full name of a user, falling back to the local part of the email"""
+    if user.first_name or user.last_name:
+        return f"{user.first_name or ''} {user.last_name or ''}".strip()
+    if user.email:
+        return user.email.split("@")[0]
+    return None
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
@@ -196,184 +274,136 @@ async def list_assessments(
     """
     Get list of all assessments for the current user
     Includes both self-assessments and evaluator assessments (where user is a contributor)
+
+    Runs a constant number of queries regardless of how many assessments or
+    360 evaluator records the user has: one for self-assessments and one for
+    contributor assessments, each carrying its answer count and user data.
     """
-    # First, get all evaluator assessment IDs where current user is the evaluator
-    # This will help us exclude them from self-assessments
-    evaluator_assessment_ids_result = await db.execute(
+    from app.core.logging import logger
+
+    # Evaluator assessments have the same user_id as the person being evaluated,
+    # so they are excluded from self-assessments with a subquery instead of a
+    # separate fetch of their IDs.
+    own_evaluator_assessment_ids = (
         select(Assessment360Evaluator.evaluator_assessment_id)
         .where(
             Assessment360Evaluator.evaluator_email == current_user.email,
             Assessment360Evaluator.evaluator_assessment_id.isnot(None)
         )
     )
-    evaluator_assessment_ids = [row[0] for row in evaluator_assessment_ids_result.fetchall() if row[0] is not None]
-
-    # Get self-assessments (excluding evaluator assessments)
-    # Evaluator assessments have the same user_id as the person being evaluated, so we exclude them
-    where_clause = (
-        Assessment.user_id == current_user.id,
-        Assessment.assessment_type != AssessmentType.THREE_SIXTY_EVALUATOR
+    # Use case-insensitive email comparison to handle email variations
+    contributor_match = (
+        (func.lower(Assessment360Evaluator.evaluator_email) == func.lower(current_user.email))
+        & Assessment360Evaluator.evaluator_assessment_id.isnot(None)
     )
-    if evaluator_assessment_ids:
-        where_clause = where_clause + (Assessment.id.notin_(evaluator_assessment_ids),)
-    
+    is_contributor_flag = (
+        select(Assessment360Evaluator.id)
+        .where(
+            contributor_match,
+            Assessment360Evaluator.evaluator_assessment_id == Assessment.id
+        )
+        .correlate(Assessment)
+        .exists()
+    )
+
+    # Self-assessments with answer count and contributor flag in one query
     result = await db.execute(
-        select(Assessment, User)
+        select(
+            Assessment,
+            User,
+            _answer_count_subquery(Assessment).label("answer_count"),
+            is_contributor_flag.label("is_contributor"),
+        )
         .join(User, Assessment.user_id == User.id)
-        .where(*where_clause)
+        .where(
+            Assessment.user_id == current_user.id,
+            Assessment.assessment_type != AssessmentType.THREE_SIXTY_EVALUATOR,
+            Assessment.id.notin_(own_evaluator_assessment_ids)
+        )
         .order_by(Assessment.created_at.desc())
     )
     results = result.all()
 
-    # Get evaluator assessments (where user is a contributor)
-    # Find all evaluator records where current user is the evaluator
-    # Use case-insensitive email comparison to handle email variations
-    from app.core.logging import logger
-    evaluator_records_result = await db.execute(
-        select(Assessment360Evaluator)
+    # Evaluator assessments (where user is a contributor): evaluator record,
+    # completed evaluator assessment, parent 360 assessment and evaluated user
+    # are resolved with joins instead of three lookups per evaluator record.
+    evaluator_assessment = aliased(Assessment, name="evaluator_assessment")
+    parent_assessment = aliased(Assessment, name="parent_assessment")
+    evaluated_user = aliased(User, name="evaluated_user")
+    evaluator_rows_result = await db.execute(
+        select(
+            evaluator_assessment,
+            evaluated_user,
+            _answer_count_subquery(evaluator_assessment).label("answer_count"),
+        )
+        .select_from(Assessment360Evaluator)
+        .join(
+            evaluator_assessment,
+            evaluator_assessment.id == Assessment360Evaluator.evaluator_assessment_id
+        )
+        .join(parent_assessment, parent_assessment.id == Assessment360Evaluator.assessment_id)
+        .join(evaluated_user, evaluated_user.id == parent_assessment.user_id)
         .where(
-            func.lower(Assessment360Evaluator.evaluator_email) == func.lower(current_user.email),
-            Assessment360Evaluator.evaluator_assessment_id.isnot(None)
+            contributor_match,
+            evaluator_assessment.status == AssessmentStatus.COMPLETED
         )
+        .order_by(Assessment360Evaluator.id)
     )
-    evaluator_records = evaluator_records_result.scalars().all()
-    logger.info(f"[my-assessments] Found {len(evaluator_records)} evaluator records for user {current_user.email} (case-insensitive match)")
-    
-    evaluator_results = []
-    for evaluator_record in evaluator_records:
-        # Get the evaluator's assessment
-        if evaluator_record.evaluator_assessment_id:
-            assessment_result = await db.execute(
-                select(Assessment)
-                .where(Assessment.id == evaluator_record.evaluator_assessment_id)
-            )
-            evaluator_assessment = assessment_result.scalar_one_or_none()
-            
-            if evaluator_assessment and evaluator_assessment.status == AssessmentStatus.COMPLETED:
-                # Get the parent assessment (the THREE_SIXTY_SELF assessment)
-                parent_assessment_result = await db.execute(
-                    select(Assessment)
-                    .where(Assessment.id == evaluator_record.assessment_id)
-                )
-                parent_assessment = parent_assessment_result.scalar_one_or_none()
-                
-                if parent_assessment:
-                    # Get the user being evaluated (owner of the parent assessment)
-                    evaluated_user_result = await db.execute(
-                        select(User)
-                        .where(User.id == parent_assessment.user_id)
-                    )
-                    evaluated_user = evaluated_user_result.scalar_one_or_none()
-                    
-                    if evaluated_user:
-                        logger.info(f"[my-assessments] Adding evaluator assessment {evaluator_assessment.id} for evaluated user {evaluated_user.email}")
-                        evaluator_results.append((evaluator_record, evaluator_assessment, evaluated_user))
+    evaluator_results = evaluator_rows_result.all()
+    logger.info(f"[my-assessments] Found {len(evaluator_results)} completed evaluator assessments for user {current_user.email} (case-insensitive match)")
 
     # Format response
     response = []
-    
-    # Create a set of evaluator assessment IDs for quick lookup
-    evaluator_assessment_id_set = {evaluator_record.evaluator_assessment_id for evaluator_record in evaluator_records if evaluator_record.evaluator_assessment_id}
-    
-    # Add self-assessments
-    for assessment, user in results:
-        score_summary = None
-        if assessment.processed_score:
-            # Extract summary based on type
-            if assessment.assessment_type == AssessmentType.WELLNESS:
-                score_summary = {
-                    "total_score": assessment.processed_score.get("total_score"),
-                    "percentage": assessment.processed_score.get("percentage"),
-                }
-            elif assessment.assessment_type == AssessmentType.TKI:
-                score_summary = {
-                    "dominant_mode": assessment.processed_score.get("dominant_mode"),
-                }
-            elif assessment.assessment_type == AssessmentType.THREE_SIXTY_SELF:
-                score_summary = {
-                    "total_score": assessment.processed_score.get("total_score"),
-                }
-
-        # Count answers for this assessment
-        answer_count_result = await db.execute(
-            select(func.count(AssessmentAnswer.id))
-            .where(AssessmentAnswer.assessment_id == assessment.id)
-        )
-        answer_count = answer_count_result.scalar() or 0
-
-        # Get total questions from configuration (replaces hardcoded value)
-        total_questions = get_total_questions(assessment.assessment_type)
 
-        # Get user name
-        user_name = None
-        if user.first_name or user.last_name:
-            user_name = f"{user.first_name or ''} {user.last_name or ''}".strip()
-        elif user.email:
-            user_name = user.email.split("@")[0]
-
-        # Check if this assessment is a contributor assessment
-        # Use the database field if available, otherwise fall back to checking evaluator_assessment_id_set
-        is_contributor = getattr(assessment, 'is_contributor_assessment', False) or assessment.id in evaluator_assessment_id_set
-        
+    # Add self-assessments
+    for assessment, user, answer_count, is_contributor in results:
         response.append(AssessmentListItem(
             id=assessment.id,
             user_id=assessment.user_id,
             user_email=user.email,
-            user_name=user_name,
+            user_name=_display_name(user),
             assessment_type=assessment.assessment_type.value,
             status=assessment.status.value,
             started_at=assessment.started_at,
             completed_at=assessment.completed_at,
-            score_summary=score_summary,
-            answer_count=answer_count,
-            total_questions=total_questions,
+            score_summary=_score_summary(assessment),
+            answer_count=answer_count or 0,
+            # Get total questions from configuration (replaces hardcoded value)
+            total_questions=get_total_questions(assessment.assessment_type),
             created_at=assessment.created_at,
             user_being_evaluated=None,
-            is_contributor_assessment=is_contributor
+            # Use the database field if available, otherwise fall back to the evaluator records
+            is_contributor_assessment=bool(getattr(assessment, 'is_contributor_assessment', False) or is_contributor)
         ))
-    
+
     # Add evaluator assessments (where user is a contributor)
-    for evaluator, assessment, evaluated_user in evaluator_results:
+    for assessment, evaluated, answer_count in evaluator_results:
         score_summary = None
         if assessment.processed_score:
             score_summary = {
                 "total_score": assessment.processed_score.get("total_score"),
             }
 
-        # Count answers for this assessment
-        answer_count_result = await db.execute(
-            select(func.count(AssessmentAnswer.id))
-            .where(AssessmentAnswer.assessment_id == assessment.id)
-        )
-        answer_count = answer_count_result.scalar() or 0
-
-        # Get total questions from configuration
-        total_questions = get_total_questions(assessment.assessment_type)
-
         # Get name of the person being evaluated
-        evaluated_user_name = None
-        if evaluated_user.first_name or evaluated_user.last_name:
-            evaluated_user_name = f"{evaluated_user.first_name or ''} {evaluated_user.last_name or ''}".strip()
-        elif evaluated_user.email:
-            evaluated_user_name = evaluated_user.email.split("@")[0]
+        evaluated_user_name = _display_name(evaluated)
 
         # Convert to THREE_SIXTY_SELF type for display purposes (it's actually an evaluator assessment)
         response.append(AssessmentListItem(
             id=assessment.id,
             user_id=assessment.user_id,
-            user_email=evaluated_user.email,
+            user_email=evaluated.email,
             user_name=evaluated_user_name,
             assessment_type=AssessmentType.THREE_SIXTY_SELF.value,  # Display as 360 feedback
             status=assessment.status.value,
             started_at=assessment.started_at,
             completed_at=assessment.completed_at,
             score_summary=score_summary,
-            answer_count=answer_count,
-            total_questions=total_questions,
+            answer_count=answer_count or 0,
+            total_questions=get_total_questions(assessment.assessment_type),
             created_at=assessment.created_at,
             user_being_evaluated={
                 "name": evaluated_user_name,
-                "email": evaluated_user.email
+                "email": evaluated.email
             },
             is_contributor_assessment=True  # These are always contributor assessments
         ))
@@ -394,7 +424,7 @@ async def admin_list_all_assessments(
     Get list of all assessments for all users (admin only)
     """
     result = await db.execute(
-        select(Assessment, User)
+        select(Assessment, User, _answer_count_subquery(Assessment).label("answer_count"))
         .join(User, Assessment.user_id == User.id)
         .where(
             Assessment.assessment_type != AssessmentType.THREE_SIXTY_EVALUATOR  # Exclude evaluator assessments
@@ -405,53 +435,20 @@ async def admin_list_all_assessments(
 
     # Format response
     response = []
-    for assessment, user in results:
-        score_summary = None
-        if assessment.processed_score:
-            # Extract summary based on type
-            if assessment.assessment_type == AssessmentType.WELLNESS:
-                score_summary = {
-                    "total_score": assessment.processed_score.get("total_score"),
-                    "percentage": assessment.processed_score.get("percentage"),
-                }
-            elif assessment.assessment_type == AssessmentType.TKI:
-                score_summary = {
-                    "dominant_mode": assessment.processed_score.get("dominant_mode"),
-                }
-            elif assessment.assessment_type == AssessmentType.THREE_SIXTY_SELF:
-                score_summary = {
-                    "total_score": assessment.processed_score.get("total_score"),
-                }
-
-        # Count answers for this assessment
-        answer_count_result = await db.execute(
-            select(func.count(AssessmentAnswer.id))
-            .where(AssessmentAnswer.assessment_id == assessment.id)
-        )
-        answer_count = answer_count_result.scalar() or 0
-
-        # Get total questions from configuration (replaces hardcoded value)
-        total_questions = get_total_questions(assessment.assessment_type)
-
-        # Get user name
-        user_name = None
-        if user.first_name or user.last_name:
-            user_name = f"{user.first_name or ''} {user.last_name or ''}".strip()
-        elif user.email:
-            user_name = user.email.split("@")[0]
-
+    for assessment, user, answer_count in results:
         response.append(AssessmentListItem(
             id=assessment.id,
             user_id=assessment.user_id,
             user_email=user.email,
-            user_name=user_name,
+            user_name=_display_name(user),
             assessment_type=assessment.assessment_type.value,
             status=assessment.status.value,
             started_at=assessment.started_at,
             completed_at=assessment.completed_at,
-            score_summary=score_summary,
-            answer_count=answer_count,
-            total_questions=total_questions,
+            score_summary=_score_summary(assessment),
+            answer_count=answer_count or 0,
+            # Get total questions from configuration (replaces hardcoded value)
+            total_questions=get_total_questions(assessment.assessment_type),
             created_at=assessment.created_at
         ))
 
@@ -670,6 +667,106 @@ async def save_answer(
         )
 
 
+@router.post("/{assessment_id}/answers", response_model=AssessmentAnswersBatchResponse)
+async def save_answers_batch(
+    assessment_id: int,
+    request: AssessmentAnswersBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Save several answers in one request
+
+    Performs one ownership check and upserts every valid answer with a single
+    INSERT ... ON CONFLICT statement in one transaction. Intended for
+    client-side debounced batches instead of one POST /answer per question.
+    """
+    from app.core.logging import logger
+
+    # Get assessment (single ownership check for the whole batch)
+    result = await db.execute(
+        select(Assessment)
+        .where(
+            Assessment.id == assessment_id,
+            Assessment.user_id == current_user.id
+        )
+    )
+    assessment = result.scalar_one_or_none()
+
+    if not assessment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assessment not found"
+        )
+
+    if assessment.status == AssessmentStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Assessment is already completed"
+        )
+
+    # Later entries for the same question win (debounced batches may repeat a question)
+    answers_by_question: Dict[str, str] = {}
+    statuses: Dict[str, AnswerSaveStatus] = {}
+    for answer in request.answers:
+        question_id = str(answer.question_id or "").strip()
+        answer_value = str(answer.answer_value or "")
+        if not question_id or not answer_value:
+            statuses[question_id] = AnswerSaveStatus(
+                question_id=question_id,
+                status="invalid",
+                detail="question_id and answer_value are required"
+            )
+            answers_by_question.pop(question_id, None)
+            continue
+        answers_by_question[question_id] = answer_value
+        statuses[question_id] = AnswerSaveStatus(question_id=question_id, status="saved")
+
+    if answers_by_question:
+        answered_at = datetime.now(timezone.utc)
+        rows = [
+            {
+                "assessment_id": assessment_id,
+                "question_id": question_id,
+                "answer_value": answer_value,
+                "answered_at": answered_at,
+            }
+            for question_id, answer_value in answers_by_question.items()
+        ]
+        if db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        insert_stmt = dialect_insert(AssessmentAnswer).values(rows)
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[AssessmentAnswer.assessment_id, AssessmentAnswer.question_id],
+            set_={
+                "answer_value": insert_stmt.excluded.answer_value,
+                "answered_at": insert_stmt.excluded.answered_at,
+            },
+        )
+        try:
+            await db.execute(upsert_stmt)
+            await db.commit()
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Error saving {len(rows)} answers for assessment {assessment_id}: {type(e).__name__}: {e}",
+                exc_info=True
+            )
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to save answers"
+            )
+
+    return AssessmentAnswersBatchResponse(
+        message="Answers saved successfully",
+        saved_count=len(answers_by_question),
+        results=list(statuses.values())
+    )
+
+
 @router.post("/{assessment_id}/submit", response_model=AssessmentSubmitResponse)
 async def submit_assessment(
     assessment_id: int,
@@ -814,6 +911,7 @@ async def submit_assessment(
                 "scores": scores_json
             }
         )
+        invalidate_pdf_cache(db, assessment.id)
 
         # Ensure assessment status is saved before committing
         # This ensures the status update is persisted
@@ -893,11 +991,50 @@ async def get_assessment_answers(
     }
 
 
+async def assessment_results_validator(
+    assessment_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[Validator]:
+    """
+    Version of an assessment's results, read in one query that also applies
+    the access rules of get_assessment_results (own assessment, or evaluator
+    assessment of an owned 360° parent). None when missing or not accessible.
+    """
+    parent = aliased(Assessment)
+    owns_parent = (
+        select(Assessment360Evaluator.id)
+        .join(parent, parent.id == Assessment360Evaluator.assessment_id)
+        .where(
+            Assessment360Evaluator.evaluator_assessment_id == Assessment.id,
+            parent.user_id == current_user.id,
+        )
+        .exists()
+    )
+    row = (await db.execute(
+        select(AssessmentResult.id, AssessmentResult.generated_at, AssessmentResult.updated_at)
+        .join(Assessment, Assessment.id == AssessmentResult.assessment_id)
+        .where(
+            AssessmentResult.assessment_id == assessment_id,
+            or_(Assessment.user_id == current_user.id, owns_parent),
+        )
+    )).first()
+    if row is None:
+        return None
+    last_modified = row.updated_at or row.generated_at
+    return Validator.for_version(
+        "assessment-results", current_user.id, row.id, row.generated_at, row.updated_at,
+        last_modified=last_modified,
+        private=True,
+    )
+
+
 @router.get("/{assessment_id}/results", response_model=AssessmentResultResponse)
 async def get_assessment_results(
     assessment_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    _validator: Optional[Validator] = Depends(conditional(assessment_results_validator)),
 ):
     """
     Get results for a completed assessment.
@@ -905,6 +1042,8 @@ async def get_assessment_results(
     Allows access if:
     1. The assessment belongs to the current user, OR
     2. The assessment is an evaluator assessment (360°) and the current user owns the parent 360° assessment
+
+    Conditional requests are answered 304 before the results are loaded.
     """
     from app.core.logging import logger
 
@@ -1945,6 +2084,7 @@ async def submit_360_evaluator_assessment(
                     "scores": scores_json
                 }
             )
+            invalidate_pdf_cache(db, evaluator_assessment.id)
         except Exception as e:
             logger.error(f"Error creating assessment result for evaluator assessment {evaluator_assessment.id}: {e}", exc_info=True)
             # Don't fail the whole submission if result creation fails, but log it
@@ -2056,8 +2196,14 @@ async def upload_mbti_pdf(
     """
     import logging
     from app.services.pdf_ocr_service import PDFOCRService
+    from app.services.mbti_extraction_cache import (
+        content_cache_key,
+        get_mbti_extraction_cache,
+        url_cache_key,
+    )
     
     logger = logging.getLogger(__name__)
+    extraction_cache = get_mbti_extraction_cache()
     
     # Validate input - must have either file or profile_url
     if not file and not profile_url:
@@ -2168,7 +2314,11 @@ async def upload_mbti_pdf(
             pdf_error_msg = None
             
             try:
-                extracted_data = await ocr_service.extract_mbti_from_html_url(profile_url)
+                # Resubmitted URLs are served from the extraction cache
+                extracted_data = await extraction_cache.get_or_extract(
+                    url_cache_key(profile_url),
+                    lambda: ocr_service.extract_mbti_from_html_url(profile_url),
+                )
                 logger.info(f"Successfully extracted MBTI data from HTML: {extracted_data.get('mbti_type', 'unknown')}")
             except Exception as html_error:
                 html_error_msg = str(html_error)
@@ -2206,8 +2356,15 @@ async def upload_mbti_pdf(
         if pdf_bytes and not extracted_data:
             logger.info(f"Extracting MBTI results from PDF for user {current_user.id} (PDF size: {len(pdf_bytes)} bytes)")
             try:
-                extracted_data = await ocr_service.extract_mbti_results(pdf_bytes)
+                # Identical PDFs (re-uploads or the same profile download) are extracted once
+                extracted_data = await extraction_cache.get_or_extract(
+                    content_cache_key("pdf", pdf_bytes),
+                    lambda: ocr_service.extract_mbti_results(pdf_bytes),
+                )
                 logger.info(f"Successfully extracted MBTI data from PDF: {extracted_data.get('mbti_type', 'unknown')}")
+                if profile_url:
+                    # Next submission of this URL skips the HTML attempt and the download
+                    await extraction_cache.set(url_cache_key(profile_url), extracted_data)
             except Exception as extract_error:
                 logger.error(f"Failed to extract MBTI results from PDF: {extract_error}", exc_info=True)
                 raise HTTPException(
@@ -2445,6 +2602,7 @@ async def upload_mbti_pdf(
                         }
                     )
             
+            invalidate_pdf_cache(db, assessment.id)
             await db.commit()
             logger.debug(f"Assessment result saved successfully for assessment {assessment.id}")
         except Exception as result_error:
@@ -2526,6 +2684,7 @@ async def upload_mbti_image(
     """
     import logging
     from app.services.pdf_ocr_service import PDFOCRService
+    from app.services.mbti_extraction_cache import content_cache_key, get_mbti_extraction_cache
     
     logger = logging.getLogger(__name__)
     
@@ -2609,7 +2768,10 @@ async def upload_mbti_image(
             # Default to png if not found
             if not image_format:
                 image_format = 'png'
-            extracted_data = await ocr_service.extract_mbti_results_from_image(file_content, image_format)
+            extracted_data = await get_mbti_extraction_cache().get_or_extract(
+                content_cache_key(f"image:{image_format}", file_content),
+                lambda: ocr_service.extract_mbti_results_from_image(file_content, image_format),
+            )
             logger.info(f"Successfully extracted MBTI data: {extracted_data.get('mbti_type', 'unknown')}")
         except Exception as extract_error:
             logger.error(f"Failed to extract MBTI results from image: {extract_error}", exc_info=True)
@@ -2857,6 +3019,7 @@ async def upload_mbti_image(
                         }
                     )
             
+            invalidate_pdf_cache(db, assessment.id)
             await db.commit()
             logger.debug(f"Assessment result saved/updated successfully")
         except Exception as result_error:
@@ -2994,6 +3157,7 @@ async def delete_all_my_assessments(
                 """),
                 params
             )
+            invalidate_pdf_cache(db, *assessment_ids)
             
             # 4. Delete assessments themselves using raw SQL
             # This avoids triggering ORM cascade which tries to load answers with answered_at column
@@ -3082,6 +3246,7 @@ async def delete_assessment(
             """),
             {"assessment_id": assessment_id}
         )
+        invalidate_pdf_cache(db, assessment_id)
         
         # 4. Delete assessment itself using raw SQL
         # This avoids triggering ORM cascade which tries to load answers with answered_at column
@@ -3164,6 +3329,7 @@ async def reset_assessment(
             """),
             {"assessment_id": assessment_id}
         )
+        invalidate_pdf_cache(db, assessment_id)
         
         # 3. Reset assessment status and metadata
         # Note: We keep evaluators for 360° assessments as they can be reused
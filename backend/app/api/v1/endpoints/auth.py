@@ -392,7 +392,7 @@ async def login(
                 metadata={"reason": "invalid_credentials"}
             )
             if audit_log:
-                logger.info(f"✅ Login failure audit log created successfully (ID: {audit_log.id})")
+                logger.info("✅ Login failure audit log recorded")
             else:
                 logger.error("❌ Login failure audit log returned None - logging may have failed silently")
         except Exception as e:
@@ -848,7 +848,7 @@ async def logout(
             success="success"
         )
         if audit_log:
-            logger.info(f"✅ Logout audit log created successfully (ID: {audit_log.id})")
+            logger.info("✅ Logout audit log recorded")
         else:
             logger.error("❌ Logout audit log returned None - logging may have failed silently")
     except Exception as e:
@@ -21,7 +21,7 @@ router = APIRouter()
 
 class ExportRequest(BaseModel):
     """Export request model"""
-    format: str = Field(..., description="Export format: csv, excel, json, pdf")
+    format: str = Field(..., description="Export format: csv, excel, json, ndjson, parquet, arrow, pdf")
     data: List[Dict[str, Any]] = Field(..., description="Data to export")
     headers: Optional[List[str]] = Field(None, description="Column headers (optional)")
     filename: Optional[str] = Field(None, description="Custom filename (optional)")
@@ -36,7 +36,8 @@ async def export_data(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Export data to various formats (CSV, Excel, JSON, PDF)
+    Export data to various formats (CSV, Excel, JSON, NDJSON, Parquet, Arrow IPC, PDF)
+    All formats but PDF are encoded while the response is streamed.
     """
     try:
         # Validate format
@@ -48,27 +49,7 @@ async def export_data(
             )
         
         # Export based on format
-        if request.format == 'csv':
-            buffer, filename = ExportService.export_to_csv(
-                data=request.data,
-                headers=request.headers,
-                filename=request.filename
-            )
-            media_type = 'text/csv'
-        elif request.format == 'excel':
-            buffer, filename = ExportService.export_to_excel(
-                data=request.data,
-                headers=request.headers,
-                filename=request.filename
-            )
-            media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        elif request.format == 'json':
-            buffer, filename = ExportService.export_to_json(
-                data=request.data,
-                filename=request.filename
-            )
-            media_type = 'application/json'
-        elif request.format == 'pdf':
+        if request.format == 'pdf':
             buffer, filename = ExportService.export_to_pdf(
                 data=request.data,
                 headers=request.headers,
@@ -76,11 +57,17 @@ async def export_data(
                 title=request.title or "Data Export"
             )
             media_type = 'application/pdf'
+            content = buffer
         else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unsupported format: {request.format}"
+            export = await ExportService.open_stream(
+                request.data,
+                request.format,
+                headers=request.headers,
+                filename=request.filename,
             )
+            filename = export.filename
+            media_type = export.media_type
+            content = export
         
         logger.info(f"User {current_user.id} exported {len(request.data)} rows as {request.format}")
         
@@ -104,7 +91,7 @@ async def export_data(
             pass  # Don't fail request if audit logging fails
         
         return StreamingResponse(
-            buffer,
+            content,
             media_type=media_type,
             headers={
                 "Content-Disposition": f"attachment; filename={filename}"
@@ -143,6 +130,9 @@ async def get_export_formats(
             "csv": "Comma-separated values",
             "excel": "Microsoft Excel (.xlsx)",
             "json": "JSON format",
+            "ndjson": "Newline-delimited JSON (one object per line)",
+            "parquet": "Apache Parquet (typed, columnar)",
+            "arrow": "Apache Arrow IPC file (.arrow, readable as Feather)",
             "pdf": "PDF document"
         }
     }
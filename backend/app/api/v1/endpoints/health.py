@@ -5,6 +5,7 @@ Comprehensive health checks for deployment verification
 
 from datetime import datetime, timezone
 from typing import Dict, Any
+import importlib
 import os
 import sys
 
@@ -25,12 +26,33 @@ except Exception as e:
     _database_import_error = str(e)
 
 try:
-    from app.core.cache import cache_backend
+    from app.core.cache import cache_backend, stampede_guard
     CACHE_AVAILABLE = True
 except Exception:
     cache_backend = None
+    stampede_guard = None
     CACHE_AVAILABLE = False
 
+
+def _optional_stats_source(module: str, name: str) -> Any:
+    """
+    Stats provider from an optional module, or None if it can't be imported:
+    a broken module only hides its own section of the cache report
+    """
+    try:
+        return getattr(importlib.import_module(module), name)
+    except Exception:
+        return None
+
+
+cache_query_stats = _optional_stats_source("app.core.cache_enhanced", "cache_query_stats")
+principal_cache = _optional_stats_source("app.core.principal_cache", "principal_cache")
+permission_set_cache = _optional_stats_source("app.services.permission_cache", "permission_set_cache")
+verified_key_cache = _optional_stats_source("app.services.api_key_usage", "verified_key_cache")
+api_key_usage_tracker = _optional_stats_source("app.services.api_key_usage", "api_key_usage_tracker")
+presigned_url_cache = _optional_stats_source("app.services.presigned_url_cache", "presigned_url_cache")
+compressed_variant_cache = _optional_stats_source("app.core.compression", "compressed_variant_cache")
+
 from app.core.config import settings
 
 router = APIRouter()
@@ -333,8 +355,50 @@ async def detailed_health_check() -> Dict[str, Any]:
         cache_status["configured"] = True
         # Cache is optional
     
+    # In-process tier: hit/miss counters and sizes per namespace
+    if cache_backend is not None and cache_backend.local is not None:
+        cache_status["local_tier"] = cache_backend.stats()
+    # Single-flight / stale-while-revalidate: recomputations avoided
+    if stampede_guard is not None:
+        cache_status["stampede"] = stampede_guard.snapshot()
+    # cache_query endpoints: hit ratio per endpoint
+    if cache_query_stats is not None:
+        cache_status["query_endpoints"] = cache_query_stats()
+    # get_current_user: principals authenticated without a database query
+    if principal_cache is not None:
+        cache_status["principals"] = principal_cache.snapshot()
+    # RBACService: compiled permission sets
+    if permission_set_cache is not None:
+        cache_status["permission_sets"] = permission_set_cache.snapshot()
+    # API key authentication: verified keys and write-behind usage
+    if verified_key_cache is not None and api_key_usage_tracker is not None:
+        cache_status["api_keys"] = {
+            "verified": verified_key_cache.snapshot(),
+            "usage": api_key_usage_tracker.snapshot(),
+        }
+    # S3 presigned URLs reused across listings
+    if presigned_url_cache is not None:
+        cache_status["presigned_urls"] = presigned_url_cache.snapshot()
+    # Compressed bodies of static-ish JSON (themes, menus, SEO settings)
+    if compressed_variant_cache is not None:
+        cache_status["compressed_variants"] = compressed_variant_cache.snapshot()
+    
     health_status["components"]["cache"] = cache_status
     
+    # WebSocket connections and fan-out of this worker
+    try:
+        from app.api.v1.endpoints.websocket import manager as websocket_manager
+        health_status["components"]["websockets"] = websocket_manager.snapshot()
+    except Exception as e:
+        health_status["components"]["websockets"] = {"status": "unknown", "error": str(e)}
+    
+    # Security audit: batched writer queue
+    try:
+        from app.core.security_audit import audit_log_writer
+        health_status["components"]["audit_writer"] = audit_log_writer.snapshot()
+    except Exception as e:
+        health_status["components"]["audit_writer"] = {"status": "unknown", "error": str(e)}
+    
     # Application info
     health_status["components"]["application"] = {
         "status": "healthy",
@@ -33,14 +33,14 @@ async def import_data(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Import data from various formats (CSV, Excel, JSON).
+    Import data from various formats (CSV, Excel, JSON, Parquet, Arrow IPC).
     
-    Format can be 'auto' (detected from filename) or explicit: 'csv', 'excel', 'json'.
+    Format can be 'auto' (detected from filename) or explicit: 'csv', 'excel', 'json', 'parquet', 'arrow'.
     File is validated for size (max 10MB) and format before processing.
     
     Args:
-        file: File to import (CSV, Excel, or JSON)
-        format: File format ('auto', 'csv', 'excel', or 'json')
+        file: File to import (CSV, Excel, JSON, Parquet, or Arrow)
+        format: File format ('auto', 'csv', 'excel', 'json', 'parquet', or 'arrow')
         encoding: File encoding (default: utf-8)
         has_headers: Whether first row contains headers (default: True)
         current_user: Authenticated user
@@ -76,6 +76,10 @@ async def import_data(
                 format = 'excel'
             elif filename_lower.endswith('.json'):
                 format = 'json'
+            elif filename_lower.endswith('.parquet'):
+                format = 'parquet'
+            elif filename_lower.endswith(('.arrow', '.arrows', '.feather')):
+                format = 'arrow'
             else:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -99,10 +103,14 @@ async def import_data(
                 file_content=file_content,
                 encoding=encoding
             )
+        elif format == 'parquet':
+            result = ImportService.import_from_parquet(file_content=file_content)
+        elif format == 'arrow':
+            result = ImportService.import_from_arrow(file_content=file_content)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unsupported format: {format}. Supported: csv, excel, json"
+                detail=f"Unsupported format: {format}. Supported: csv, excel, json, parquet, arrow"
             )
         
         logger.info(f"User {current_user.id} imported {result['total_rows']} rows ({result['valid_rows']} valid, {result['invalid_rows']} invalid)")
@@ -140,7 +148,9 @@ async def get_import_formats(
         "details": {
             "csv": "Comma-separated values",
             "excel": "Microsoft Excel (.xlsx, .xls)",
-            "json": "JSON format"
+            "json": "JSON format",
+            "parquet": "Apache Parquet (.parquet)",
+            "arrow": "Apache Arrow IPC file or stream (.arrow, .arrows, .feather)"
         }
     }
 
@@ -14,6 +14,7 @@ from app.models.user import User
 from app.dependencies import get_current_user, get_db, is_superadmin
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
 from app.core.tenancy_helpers import apply_tenant_scope
+from app.core.conditional import Validator, conditional
 from fastapi import Request
 
 router = APIRouter()
@@ -113,13 +114,24 @@ async def list_pages(
     return [PageResponse.model_validate(page) for page in pages]
 
 
+async def page_validator(slug: str, db: AsyncSession = Depends(get_db)) -> Optional[Validator]:
+    """Version of a page (id, updated_at), without loading its content"""
+    query = select(Page.id, Page.updated_at).where(Page.slug == slug)
+    query = apply_tenant_scope(query, Page)
+    row = (await db.execute(query)).first()
+    if row is None:
+        return None
+    return Validator.for_version("page", row.id, row.updated_at, last_modified=row.updated_at)
+
+
 @router.get("/pages/{slug}", response_model=PageResponse, tags=["pages"])
 async def get_page(
     slug: str,
     current_user: Optional[User] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    _validator: Optional[Validator] = Depends(conditional(page_validator)),
 ):
-    """Get a page by slug"""
+    """Get a page by slug (304 when the client's copy is current)"""
     query = select(Page).where(Page.slug == slug)
     # Apply tenant scoping if tenancy is enabled
     query = apply_tenant_scope(query, Page)
@@ -2,53 +2,94 @@
 PDF Export Endpoints
 
 Endpoints pour exporter les résultats d'assessments en PDF.
+
+Les PDF rendus sont mis en cache par contenu (voir pdf_cache_service) et
+servis avec un ETag : un téléchargement répété ne relance pas le rendu.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import secrets
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, List
+from typing import Awaitable, Callable, Dict, Any, List
 
 from app.core.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.models.assessment import Assessment, AssessmentResult, AssessmentType
-from app.services.pdf_export_service import generate_assessment_pdf
-from app.services.export_service import ExportService
+from app.models.assessment import Assessment, AssessmentAnswer, AssessmentResult, AssessmentType
+from app.core.exceptions import AppException
+from app.services.pdf_cache_service import (
+    compute_pdf_cache_key,
+    etag_for_key,
+    etag_matches,
+    get_pdf_cache,
+)
+from app.services.pdf_render_pool import get_pdf_render_pool
 from app.config.assessment_questions import get_questions_for_type
 
 router = APIRouter()
 
 
+def _user_display_name(user: User) -> str:
+    """Nom affiché dans le rapport (prénom + nom, sinon l'email)"""
+    full_name = f"{user.first_name or ''} {user.last_name or ''}".strip()
+    return full_name or user.email
+
+
+async def _cached_pdf_response(
+    request: Request,
+    assessment_id: int,
+    cache_key: str,
+    render: Callable[[], Awaitable[bytes]],
+    content_disposition: str,
+) -> Response:
+    """
+    Sert un PDF depuis le cache, ou le rend puis le met en cache.
+
+    Répond 304 sans rendu ni lecture disque quand If-None-Match correspond.
+    """
+    etag = etag_for_key(cache_key)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+    }
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    pdf_content = await get_pdf_cache().get_or_render(assessment_id, cache_key, render)
+    headers["Content-Disposition"] = content_disposition
+    return Response(content=pdf_content, media_type="application/pdf", headers=headers)
+
+
 @router.get("/{assessment_id}/pdf")
 async def export_assessment_pdf(
     assessment_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Exporte les résultats d'un assessment en PDF.
     """
-    # Vérifier que l'assessment appartient à l'utilisateur
-    assessment = db.query(Assessment).filter(
-        Assessment.id == assessment_id,
-        Assessment.user_id == current_user.id
-    ).first()
+    # Vérifier que l'assessment appartient à l'utilisateur et récupérer les résultats
+    row = (await db.execute(
+        select(Assessment, AssessmentResult)
+        .outerjoin(AssessmentResult, AssessmentResult.assessment_id == Assessment.id)
+        .where(
+            Assessment.id == assessment_id,
+            Assessment.user_id == current_user.id
+        )
+    )).first()
     
-    if not assessment:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assessment not found"
         )
-    
-    # Récupérer les résultats
-    result = db.query(AssessmentResult).filter(
-        AssessmentResult.assessment_id == assessment_id
-    ).first()
+    assessment, result = row
     
     if not result:
         raise HTTPException(
@@ -57,33 +98,40 @@ async def export_assessment_pdf(
         )
     
     # Préparer les données pour le PDF
+    assessment_type_str = assessment.assessment_type.value
     results_data = {
         'scores': result.scores,
         'insights': result.insights,
         'recommendations': result.recommendations,
     }
+    user_name = _user_display_name(current_user)
+    user_email = current_user.email
+    cache_key = compute_pdf_cache_key(assessment_type_str, results_data, user_name)
     
-    try:
-        # Générer le PDF
-        pdf_bytes = generate_assessment_pdf(
-            assessment_type=assessment.type.value,
+    async def render() -> bytes:
+        # Générer le PDF dans le pool de rendu (hors de la boucle d'événements)
+        return await get_pdf_render_pool().render_assessment_pdf(
+            assessment_type=assessment_type_str,
             results=results_data,
-            user_name=current_user.full_name,
-            user_email=current_user.email
+            user_name=user_name,
+            user_email=user_email
         )
-        
+    
+    try:
         # Nom du fichier
-        filename = f"{assessment.type.value}_report_{assessment_id}.pdf"
+        filename = f"{assessment_type_str}_report_{assessment_id}.pdf"
         
-        # Retourner le PDF
-        return StreamingResponse(
-            pdf_bytes,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
+        return await _cached_pdf_response(
+            request,
+            assessment_id,
+            cache_key,
+            render,
+            f"attachment; filename={filename}",
         )
         
+    except AppException:
+        # Pool saturé (503) ou timeout (504)
+        raise
     except ImportError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -100,16 +148,18 @@ async def export_assessment_pdf(
 async def create_pdf_share_link(
     assessment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Crée un lien partageable pour le PDF d'un assessment.
     """
     # Vérifier que l'assessment appartient à l'utilisateur
-    assessment = db.query(Assessment).filter(
-        Assessment.id == assessment_id,
-        Assessment.user_id == current_user.id
-    ).first()
+    assessment = (await db.execute(
+        select(Assessment).where(
+            Assessment.id == assessment_id,
+            Assessment.user_id == current_user.id
+        )
+    )).scalar_one_or_none()
     
     if not assessment:
         raise HTTPException(
@@ -118,9 +168,9 @@ async def create_pdf_share_link(
         )
     
     # Vérifier que les résultats existent
-    result = db.query(AssessmentResult).filter(
-        AssessmentResult.assessment_id == assessment_id
-    ).first()
+    result = (await db.execute(
+        select(AssessmentResult).where(AssessmentResult.assessment_id == assessment_id)
+    )).scalar_one_or_none()
     
     if not result:
         raise HTTPException(
@@ -136,11 +186,9 @@ async def create_pdf_share_link(
         # Use ORM to update the result
         result.report_url = share_token
         result.updated_at = datetime.now(timezone.utc)
-        db.add(result)
-        db.commit()
-        db.refresh(result)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create share link: {str(e)}"
@@ -161,81 +209,59 @@ async def create_pdf_share_link(
     }
 
 
-def get_assessment_answers_for_pdf(assessment_id: int, db: Session) -> Dict[str, str]:
+async def get_assessment_answers_for_pdf(assessment_id: int, db: AsyncSession) -> Dict[str, str]:
     """
     Helper function to get all answers for an assessment (for PDF generation).
     """
-    answers_result = db.execute(
-        text("""
-            SELECT question_id, answer_value
-            FROM assessment_answers
-            WHERE assessment_id = :assessment_id
-            ORDER BY question_id
-        """),
-        {"assessment_id": assessment_id}
-    ).fetchall()
-    return {row[0]: row[1] for row in answers_result}
+    answers_result = await db.execute(
+        select(AssessmentAnswer.question_id, AssessmentAnswer.answer_value)
+        .where(AssessmentAnswer.assessment_id == assessment_id)
+        .order_by(AssessmentAnswer.question_id)
+    )
+    return {row[0]: row[1] for row in answers_result.all()}
 
 
 @router.get("/share/{token}")
 async def get_shared_pdf(
     token: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Récupère le PDF d'un assessment via un token de partage (endpoint public).
     Génère le PDF avec le même format détaillé que le téléchargement direct.
     """
-    # Trouver le résultat par token
-    result_row = db.execute(
-        text("""
-            SELECT ar.id, ar.assessment_id, ar.user_id, ar.scores, ar.insights, ar.recommendations,
-                   a.type as assessment_type
-            FROM assessment_results ar
-            JOIN assessments a ON a.id = ar.assessment_id
-            WHERE ar.report_url = :token
-        """),
-        {"token": token}
-    ).fetchone()
+    # Trouver le résultat par token, avec l'assessment et son propriétaire
+    row = (await db.execute(
+        select(AssessmentResult, Assessment, User)
+        .join(Assessment, Assessment.id == AssessmentResult.assessment_id)
+        .join(User, User.id == AssessmentResult.user_id)
+        .where(AssessmentResult.report_url == token)
+    )).first()
     
-    if not result_row:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Invalid or expired share link"
         )
     
-    assessment_id = result_row.assessment_id
-    user_id = result_row.user_id
-    assessment_type_str = result_row.assessment_type
-    
-    # Récupérer l'utilisateur pour le nom et email
-    user = db.query(User).filter(User.id == user_id).first()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Get assessment type enum
-    try:
-        assessment_type = AssessmentType(assessment_type_str)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid assessment type: {assessment_type_str}"
-        )
+    result, assessment, user = row
+    assessment_id = assessment.id
+    assessment_type = assessment.assessment_type
+    assessment_type_str = assessment_type.value
+    user_name = _user_display_name(user)
+    user_email = user.email
     
     # For wellness assessments, generate detailed PDF with questions/answers
     if assessment_type == AssessmentType.WELLNESS:
         # Get all answers
-        answers = get_assessment_answers_for_pdf(assessment_id, db)
+        answers = await get_assessment_answers_for_pdf(assessment_id, db)
         
         # Get questions
         questions = get_questions_for_type(assessment_type)
         
         # Get scores
-        scores = result_row.scores if isinstance(result_row.scores, dict) else {}
+        scores = result.scores if isinstance(result.scores, dict) else {}
         pillar_scores = scores.get('pillar_scores', {})
         total_score = scores.get('total_score', 0)
         max_score = scores.get('max_score', 150)
@@ -314,25 +340,37 @@ async def get_shared_pdf(
         # Combine summary and detailed rows
         export_data = summary_rows + detailed_rows
         
-        # Create report title with overall score
-        report_date = datetime.now().strftime('%B %d, %Y')
+        # Create report title with overall score. The date is the assessment's,
+        # not today's, so the cache key (and ETag) stays stable across days
+        report_date = (assessment.completed_at or result.generated_at or datetime.now(timezone.utc)).strftime('%B %d, %Y')
         report_title = f"Wellness Assessment Report - {report_date}\nOverall Score: {total_score}/{max_score} ({percentage:.1f}%)"
         
-        try:
-            # Generate PDF using ExportService (same as frontend)
-            pdf_buffer, filename = ExportService.export_to_pdf(
+        headers = ['Question', 'Answer', 'Score']
+        cache_key = compute_pdf_cache_key(
+            "wellness_table",
+            {"rows": export_data, "headers": headers, "title": report_title},
+            user_name,
+        )
+        
+        async def render_table() -> bytes:
+            # Generate PDF using ExportService (same as frontend), off the event loop
+            pdf_content, _ = await get_pdf_render_pool().render_table_pdf(
                 data=export_data,
-                headers=['Question', 'Answer', 'Score'],
+                headers=headers,
                 title=report_title
             )
-            
-            return StreamingResponse(
-                pdf_buffer,
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f"inline; filename={filename}"
-                }
+            return pdf_content
+        
+        try:
+            return await _cached_pdf_response(
+                request,
+                assessment_id,
+                cache_key,
+                render_table,
+                f"inline; filename=wellness_report_{assessment_id}.pdf",
             )
+        except AppException:
+            raise
         except ImportError as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -345,37 +383,40 @@ async def get_shared_pdf(
             )
     else:
         # For other assessment types, use the old HTML-based PDF generation
-        scores = result_row.scores if isinstance(result_row.scores, dict) else {}
-        insights = result_row.insights if isinstance(result_row.insights, dict) else {}
-        recommendations = result_row.recommendations if isinstance(result_row.recommendations, (dict, list)) else {}
+        scores = result.scores if isinstance(result.scores, dict) else {}
+        insights = result.insights if isinstance(result.insights, dict) else {}
+        recommendations = result.recommendations if isinstance(result.recommendations, (dict, list)) else {}
         
         results_data = {
             'scores': scores,
             'insights': insights,
             'recommendations': recommendations,
         }
+        cache_key = compute_pdf_cache_key(assessment_type_str, results_data, user_name)
         
-        try:
-            # Générer le PDF
-            pdf_bytes = generate_assessment_pdf(
+        async def render() -> bytes:
+            # Générer le PDF dans le pool de rendu (hors de la boucle d'événements)
+            return await get_pdf_render_pool().render_assessment_pdf(
                 assessment_type=assessment_type_str,
                 results=results_data,
-                user_name=user.full_name,
-                user_email=user.email
+                user_name=user_name,
+                user_email=user_email
             )
-            
+        
+        try:
             # Nom du fichier
             filename = f"{assessment_type_str}_report_{assessment_id}.pdf"
             
-            # Retourner le PDF
-            return StreamingResponse(
-                pdf_bytes,
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f"inline; filename={filename}"
-                }
+            return await _cached_pdf_response(
+                request,
+                assessment_id,
+                cache_key,
+                render,
+                f"inline; filename={filename}",
             )
             
+        except AppException:
+            raise
         except ImportError as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -7,7 +7,7 @@ contacts logic to avoid code duplication while maintaining isolation.
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, Request, UploadFile, File
+from fastapi import APIRouter, Depends, Query, Request, UploadFile, File, Header
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -147,9 +147,11 @@ async def export_contacts(
 async def stream_import_logs(
     import_id: str,
     current_user: User = Depends(get_current_user),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
 ):
     """Stream import logs via Server-Sent Events (SSE) for network module"""
     return await commercial_contacts.stream_import_logs(
         import_id=import_id,
         current_user=current_user,
+        last_event_id=last_event_id,
     )
@@ -1,6 +1,7 @@
 """
 API endpoints for theme font management.
 """
+import asyncio
 from typing import List, Dict
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Body
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,6 +11,7 @@ from app.models.theme_font import ThemeFont
 from app.models.user import User
 from app.core.database import get_db
 from app.dependencies import get_current_user, require_superadmin
+from app.services.presigned_url_cache import presigned_url_cache
 from app.services.s3_service import S3Service
 import os
 import re
@@ -257,16 +259,13 @@ async def list_fonts(
     fonts = result.scalars().all()
     
     # Regenerate presigned URLs if needed
-    if S3Service.is_configured():
-        s3_service = S3Service()
+    if presigned_url_cache.enabled:
+        urls = await presigned_url_cache.get_urls_async(
+            [font.file_key for font in fonts],
+            expires_in=31536000,  # 1 year
+        )
         for font in fonts:
-            try:
-                font.url = s3_service.generate_presigned_url(
-                    font.file_key,
-                    expiration=31536000,  # 1 year
-                )
-            except Exception:
-                pass
+            font.url = urls.get(font.file_key, font.url)
     
     return ThemeFontListResponse(
         fonts=[ThemeFontResponse.model_validate(font) for font in fonts],
@@ -297,12 +296,12 @@ async def get_font(
         )
     
     # Regenerate presigned URL if needed
-    if S3Service.is_configured():
+    if presigned_url_cache.enabled:
         try:
-            s3_service = S3Service()
-            font.url = s3_service.generate_presigned_url(
+            font.url = await asyncio.to_thread(
+                presigned_url_cache.get_url,
                 font.file_key,
-                expiration=31536000,  # 1 year
+                31536000,  # 1 year
             )
         except Exception:
             pass
@@ -377,6 +376,7 @@ async def delete_font(
         try:
             s3_service = S3Service()
             s3_service.delete_file(font.file_key)
+            presigned_url_cache.invalidate(font.file_key)
         except Exception:
             pass
     
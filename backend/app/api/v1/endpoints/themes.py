@@ -1,7 +1,7 @@
 """
 API endpoints for theme management.
 """
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,6 +18,7 @@ from app.schemas.theme import (
 from app.models.theme import Theme
 from app.core.database import get_db
 from app.core.cache import cached, invalidate_cache_pattern
+from app.core.conditional import Validator, conditional
 from app.dependencies import get_current_user, require_superadmin
 
 router = APIRouter()
@@ -137,14 +138,27 @@ async def ensure_default_theme(db: AsyncSession, created_by: int = 1) -> Theme:
     return template_theme
 
 
+async def active_theme_validator(db: AsyncSession = Depends(get_db)) -> Optional[Validator]:
+    """Version of the active theme (id, updated_at), without loading its config"""
+    result = await db.execute(select(Theme.id, Theme.updated_at).where(Theme.is_active == True))
+    row = result.first()
+    if row is None:
+        return None
+    return Validator.for_version("theme", row.id, row.updated_at, last_modified=row.updated_at)
+
+
 @router.get("/active", response_model=ThemeConfigResponse, tags=["themes"])
-async def get_active_theme(db: AsyncSession = Depends(get_db)):
+async def get_active_theme(
+    db: AsyncSession = Depends(get_db),
+    _validator: Optional[Validator] = Depends(conditional(active_theme_validator)),
+):
     """
     Get the currently active theme configuration.
     Public endpoint - no authentication required.
     Returns the global theme that applies to all users.
     Creates a default theme if none exists.
     Note: Cache disabled to ensure theme is always created in DB when needed.
+    Conditional requests are answered 304 from the theme version alone.
     """
     result = await db.execute(select(Theme).where(Theme.is_active == True))
     theme = result.scalar_one_or_none()
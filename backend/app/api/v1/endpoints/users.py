@@ -14,7 +14,7 @@ import json
 from app.core.database import get_db
 from app.core.pagination import PaginationParams, paginate_query, PaginatedResponse, get_pagination_params
 from app.core.query_optimization import QueryOptimizer
-from app.core.cache_enhanced import cache_query
+from app.core.cache_enhanced import cache_query, enhanced_cache
 from app.core.rate_limit import rate_limit_decorator
 from app.core.logging import logger
 from app.models.user import User
@@ -29,7 +29,7 @@ router = APIRouter()
 
 @router.get("/", response_model=PaginatedResponse[UserResponse])
 @rate_limit_decorator("100/hour")
-@cache_query(expire=300, tags=["users"])
+@cache_query(expire=300, tags=["users"], key_params=["pagination"])
 async def list_users(
     request: Request,
     pagination: Annotated[PaginationParams, Depends(get_pagination_params)],
@@ -418,6 +418,7 @@ async def delete_user(
         from app.core.cache import invalidate_cache_pattern_async
         await invalidate_cache_pattern_async("users:*")
         await invalidate_cache_pattern_async(f"user:{user_id}:*")
+        await enhanced_cache.invalidate_by_tags(["users"])
     except Exception as cache_error:
         logger.warning(f"Failed to invalidate cache after user deletion: {cache_error}")
     
@@ -645,6 +646,7 @@ async def update_user(
             from app.core.cache import invalidate_cache_pattern_async
             await invalidate_cache_pattern_async(f"user:{user_id}:*")
             await invalidate_cache_pattern_async("users:*")
+            await enhanced_cache.invalidate_by_tags(["users"])
         except Exception as cache_error:
             logger.warning(f"Failed to invalidate cache after user update: {cache_error}")
         
@@ -3,14 +3,17 @@ WebSocket endpoints for real-time features.
 Supports real-time notifications, live updates, and chat functionality.
 """
 
-from typing import Dict, List, Set
+from typing import Any, Dict, List, Set
 import json
+import uuid
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, status
 from fastapi.exceptions import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.logging import logger
+from app.core.websocket_fanout import WebSocketClient, default_fanout_bus, encode_message
 from app.models.user import User
 from typing import Optional
 
@@ -18,89 +21,119 @@ router = APIRouter()
 
 
 class ConnectionManager:
-    """Manages WebSocket connections."""
+    """
+    Manages WebSocket connections.
+    
+    Messages are queued per connection (see app.core.websocket_fanout) and
+    relayed to the other workers through the fan-out bus.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        bus: Optional[Any] = None,
+        queue_size: int = settings.WEBSOCKET_SEND_QUEUE_SIZE,
+        send_timeout: float = settings.WEBSOCKET_SEND_TIMEOUT,
+    ):
         # Active connections: {user_id: [WebSocket, ...]}
         self.active_connections: Dict[str, List[WebSocket]] = {}
         # Room connections: {room_id: Set[WebSocket]}
         self.rooms: Dict[str, Set[WebSocket]] = {}
+        # Send queue of each connection
+        self.clients: Dict[WebSocket, WebSocketClient] = {}
+        self.bus = bus
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.instance_id = uuid.uuid4().hex
+        self.stats = {"queued": 0, "evicted": 0, "published": 0, "received": 0, "publish_errors": 0}
+        self._started = False
+    
+    async def start(self) -> None:
+        """Start receiving messages published by the other workers."""
+        if self._started:
+            return
+        if self.bus is None:
+            self.bus = default_fanout_bus()
+        if self.bus is not None:
+            await self.bus.start(self.handle_fanout_message)
+        self._started = True
+    
+    async def stop(self) -> None:
+        """Stop the fan-out listener and every send queue."""
+        if self._started and self.bus is not None:
+            await self.bus.stop(self.handle_fanout_message)
+        self._started = False
+        for client in list(self.clients.values()):
+            client.stop()
+        self.clients.clear()
     
     async def connect(self, websocket: WebSocket, user_id: str = None):
         """Accept a WebSocket connection."""
         await websocket.accept()
         
+        user_key = user_id or "anonymous"
+        self.active_connections.setdefault(user_key, []).append(websocket)
+        self.clients[websocket] = WebSocketClient(
+            websocket,
+            user_key,
+            on_evict=self._evicted,
+            queue_size=self.queue_size,
+            send_timeout=self.send_timeout,
+        )
         if user_id:
-            if user_id not in self.active_connections:
-                self.active_connections[user_id] = []
-            self.active_connections[user_id].append(websocket)
-            logger.info(f"WebSocket connected: user_id={user_id}, total={len(self.active_connections.get(user_id, []))}")
-        else:
-            # Anonymous connection
-            if "anonymous" not in self.active_connections:
-                self.active_connections["anonymous"] = []
-            self.active_connections["anonymous"].append(websocket)
+            logger.info(f"WebSocket connected: user_id={user_id}, total={len(self.active_connections[user_key])}")
     
     def disconnect(self, websocket: WebSocket, user_id: str = None):
         """Remove a WebSocket connection."""
-        if user_id and user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.stop()
+            self._forget(client)
+        if user_id:
             logger.info(f"WebSocket disconnected: user_id={user_id}")
-        else:
-            # Remove from anonymous
-            if "anonymous" in self.active_connections and websocket in self.active_connections["anonymous"]:
-                self.active_connections["anonymous"].remove(websocket)
+    
+    def _forget(self, client: WebSocketClient) -> None:
+        self.clients.pop(client.websocket, None)
+        connections = self.active_connections.get(client.user_key)
+        if connections is not None and client.websocket in connections:
+            connections.remove(client.websocket)
+            if not connections:
+                del self.active_connections[client.user_key]
+        for room_id in client.rooms:
+            self.leave_room(client.websocket, room_id)
+    
+    def _evicted(self, client: WebSocketClient, reason: str) -> None:
+        self.stats["evicted"] += 1
+        logger.warning(f"WebSocket evicted ({reason}): user_id={client.user_key}")
+        self._forget(client)
+    
+    async def send(self, websocket: WebSocket, message: dict):
+        """Send a message to one connection, after the messages already queued for it."""
+        client = self.clients.get(websocket)
+        if client is None:
+            await websocket.send_json(message)
+        elif client.offer(encode_message(message)):
+            self.stats["queued"] += 1
     
     async def send_personal_message(self, message: dict, user_id: str):
         """Send a message to a specific user."""
-        if user_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending message to {user_id}: {e}")
-                    disconnected.append(connection)
-            
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.active_connections[user_id].remove(conn)
+        text = encode_message(message)
+        self._deliver("user", user_id, text)
+        await self._publish("user", user_id, text)
     
     async def broadcast(self, message: dict, exclude_user_id: str = None):
         """Broadcast a message to all connected users."""
-        disconnected_users = []
-        
-        for user_id, connections in self.active_connections.items():
-            if exclude_user_id and user_id == exclude_user_id:
-                continue
-            
-            disconnected = []
-            for connection in connections:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {user_id}: {e}")
-                    disconnected.append(connection)
-            
-            # Remove disconnected connections
-            for conn in disconnected:
-                connections.remove(conn)
-            
-            if not connections:
-                disconnected_users.append(user_id)
-        
-        # Clean up empty user connections
-        for user_id in disconnected_users:
-            del self.active_connections[user_id]
+        text = encode_message(message)
+        self._deliver("all", None, text, exclude_user_id=exclude_user_id)
+        await self._publish("all", None, text, exclude_user_id=exclude_user_id)
     
     async def join_room(self, websocket: WebSocket, room_id: str):
         """Join a WebSocket to a room."""
         if room_id not in self.rooms:
             self.rooms[room_id] = set()
         self.rooms[room_id].add(websocket)
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.rooms.add(room_id)
         logger.info(f"WebSocket joined room: {room_id}, total={len(self.rooms[room_id])}")
     
     def leave_room(self, websocket: WebSocket, room_id: str):
@@ -113,20 +146,84 @@ class ConnectionManager:
     
     async def send_to_room(self, message: dict, room_id: str, exclude_websocket: WebSocket = None):
         """Send a message to all WebSockets in a room."""
-        if room_id in self.rooms:
-            disconnected = []
-            for websocket in self.rooms[room_id]:
-                if websocket == exclude_websocket:
-                    continue
-                try:
-                    await websocket.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending to room {room_id}: {e}")
-                    disconnected.append(websocket)
-            
-            # Remove disconnected websockets
-            for ws in disconnected:
-                self.rooms[room_id].discard(ws)
+        text = encode_message(message)
+        self._deliver("room", room_id, text, exclude_websocket=exclude_websocket)
+        await self._publish("room", room_id, text)
+    
+    def _deliver(
+        self,
+        scope: str,
+        target: Optional[str],
+        text: str,
+        exclude_user_id: Optional[str] = None,
+        exclude_websocket: Optional[WebSocket] = None,
+    ) -> int:
+        """Queue a frame for the matching local connections, without waiting on any of them."""
+        if scope == "user":
+            recipients = list(self.active_connections.get(target, ()))
+        elif scope == "room":
+            recipients = list(self.rooms.get(target, ()))
+        else:
+            recipients = [
+                websocket
+                for user_key, connections in self.active_connections.items()
+                if user_key != exclude_user_id
+                for websocket in connections
+            ]
+        queued = 0
+        for websocket in recipients:
+            client = self.clients.get(websocket)
+            if websocket is not exclude_websocket and client is not None and client.offer(text):
+                queued += 1
+        self.stats["queued"] += queued
+        return queued
+    
+    async def _publish(self, scope: str, target: Optional[str], text: str, exclude_user_id: Optional[str] = None):
+        if self.bus is None:
+            # Publishing needs no listener: processes that never start the
+            # manager (Celery workers) still fan out to the API workers
+            self.bus = default_fanout_bus()
+            if self.bus is None:
+                return
+        envelope = json.dumps({
+            "origin": self.instance_id,
+            "scope": scope,
+            "target": target,
+            "exclude_user_id": exclude_user_id,
+            "text": text,
+        })
+        try:
+            await self.bus.publish(envelope)
+            self.stats["published"] += 1
+        except Exception as e:
+            self.stats["publish_errors"] += 1
+            logger.warning(f"WebSocket fan-out publish error: {e}")
+    
+    def handle_fanout_message(self, data: Any) -> None:
+        """Deliver a message published by another worker to the local connections."""
+        try:
+            envelope = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed WebSocket fan-out message")
+            return
+        if envelope.get("origin") == self.instance_id:
+            return
+        self.stats["received"] += 1
+        self._deliver(
+            envelope.get("scope"),
+            envelope.get("target"),
+            envelope["text"],
+            exclude_user_id=envelope.get("exclude_user_id"),
+        )
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "connections": len(self.clients),
+            "rooms": len(self.rooms),
+            "pending": sum(client.pending for client in self.clients.values()),
+            "fanout": type(self.bus).__name__ if self.bus is not None else None,
+        }
 
 
 # Global connection manager instance
@@ -152,22 +249,22 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 # Echo back or handle different message types
                 if message_type == "ping":
-                    await websocket.send_json({"type": "pong", "timestamp": message.get("timestamp")})
+                    await manager.send(websocket, {"type": "pong", "timestamp": message.get("timestamp")})
                 elif message_type == "message":
                     # Echo the message back
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "echo",
                         "data": message.get("data", ""),
                         "timestamp": message.get("timestamp")
                     })
                 else:
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "error",
                         "message": f"Unknown message type: {message_type}"
                     })
                     
             except json.JSONDecodeError:
-                await websocket.send_json({
+                await manager.send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format"
                 })
@@ -231,7 +328,7 @@ async def websocket_notifications(websocket: WebSocket):
     
     try:
         # Send welcome message
-        await websocket.send_json({
+        await manager.send(websocket, {
             "type": "connected",
             "message": "Connected to notifications",
             "user_id": user_id
@@ -246,17 +343,17 @@ async def websocket_notifications(websocket: WebSocket):
                 message_type = message.get("type", "ping")
                 
                 if message_type == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    await manager.send(websocket, {"type": "pong"})
                 elif message_type == "subscribe":
                     # Handle subscription to notification types
                     notification_types = message.get("types", [])
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "subscribed",
                         "notification_types": notification_types
                     })
                     
             except json.JSONDecodeError:
-                await websocket.send_json({
+                await manager.send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format"
                 })
@@ -307,7 +404,7 @@ async def websocket_room(
                     }, room_id, exclude_websocket=websocket)
                     
                 except json.JSONDecodeError:
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "error",
                         "message": "Invalid JSON format"
                     })
@@ -72,46 +72,48 @@ async def get_user_from_api_key(
     # Hash the provided API key
     hashed_key = hash_api_key(api_key)
     
-    # Query API key by hash
-    from app.models.api_key import APIKey
     from app.services.api_key_service import APIKeyService
+    from app.services.api_key_usage import VerifiedAPIKey, api_key_usage_tracker, verified_key_cache
     
     try:
-        api_key_model = await APIKeyService.find_api_key_by_hash(db, hashed_key)
-        
-        if not api_key_model:
-            return None
-        
-        # Check if key is valid
-        if not api_key_model.is_valid():
-            return None
-        
-        # Update usage tracking
-        await APIKeyService.update_usage(db, api_key_model)
-        
-        # Get user
-        result = await db.execute(
-            select(User).where(User.id == api_key_model.user_id)
-        )
-        user = result.scalar_one_or_none()
-        
-        if user and user.is_active:
-            # Log API key usage
-            from app.core.security_audit import SecurityAuditLogger, SecurityEventType
-            await SecurityAuditLogger.log_api_key_event(
-                db=db,
-                event_type=SecurityEventType.API_KEY_USED,
-                api_key_id=api_key_model.id,
-                description=f"API key '{api_key_model.name}' used",
-                user_id=user.id,
-                user_email=user.email,
+        # Recently verified keys skip the key and user lookups
+        verified = verified_key_cache.get(hashed_key)
+        if verified is not None:
+            if verified.is_expired():
+                verified_key_cache.invalidate(hashed_key)
+                return None
+            user = await db.merge(verified.principal.to_user(), load=False)
+        else:
+            # Query API key by hash
+            api_key_model = await APIKeyService.find_api_key_by_hash(db, hashed_key)
+            
+            if not api_key_model:
+                return None
+            
+            # Check if key is valid
+            if not api_key_model.is_valid():
+                return None
+            
+            # Get user
+            result = await db.execute(
+                select(User).where(User.id == api_key_model.user_id)
             )
-            return user
+            user = result.scalar_one_or_none()
+            
+            if not user or not user.is_active:
+                return None
+            
+            verified = VerifiedAPIKey.from_models(api_key_model, user)
+            if verified is None:
+                return user
+            verified_key_cache.set(hashed_key, verified)
+        
+        # Usage counters and API_KEY_USED audit events are written in batches
+        api_key_usage_tracker.record(verified)
+        return user
     except Exception as e:
         logger.warning(f"Error validating API key: {e}")
         return None
-    
-    return None
 
 
 async def require_api_key(
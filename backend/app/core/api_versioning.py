@@ -4,24 +4,28 @@ Handles API versioning through headers and URL paths
 """
 
 from typing import Optional
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
 
 from app.core.logging import logger
+from app.core.pipeline import Stage, StageMiddleware
 
 
-class APIVersioningMiddleware(BaseHTTPMiddleware):
-    """Middleware to handle API versioning"""
-    
-    def __init__(self, app, default_version: str = "v1", supported_versions: list = None):
-        super().__init__(app)
+class APIVersioningStage(Stage):
+    """Pipeline stage resolving the API version of each request"""
+
+    name = "api_versioning"
+
+    def __init__(self, default_version: str = "v1", supported_versions: list = None, enabled: bool = True):
+        super().__init__(enabled)
         self.default_version = default_version
         self.supported_versions = supported_versions or ["v1"]
-    
+
     def get_version_from_header(self, request: Request) -> Optional[str]:
         """Get API version from Accept header"""
         accept_header = request.headers.get("Accept", "")
-        
+
         # Check for version in Accept header: application/vnd.api+json;version=v1
         if "version=" in accept_header:
             try:
@@ -31,61 +35,68 @@ class APIVersioningMiddleware(BaseHTTPMiddleware):
                     return version
             except (IndexError, ValueError):
                 pass
-        
+
         # Check for vendor-specific Accept header: application/vnd.api.v1+json
         for version in self.supported_versions:
             if f"application/vnd.api.{version}" in accept_header:
                 return version
-        
+
         return None
-    
+
     def get_version_from_path(self, request: Request) -> Optional[str]:
         """Get API version from URL path"""
         path = str(request.url.path)
-        
+
         # Check for /api/v1/, /api/v2/, etc.
         for version in self.supported_versions:
             if f"/api/{version}/" in path:
                 return version
-        
+
         return None
-    
+
     def get_api_version(self, request: Request) -> str:
         """Get API version from request (header, path, or default)"""
         # Priority: path > header > default
         version = self.get_version_from_path(request)
         if version:
             return version
-        
+
         version = self.get_version_from_header(request)
         if version:
             return version
-        
+
         return self.default_version
-    
-    async def dispatch(self, request: Request, call_next):
-        """Process request and add version info"""
-        version = self.get_api_version(request)
-        
-        # Store version in request state
-        request.state.api_version = version
-        
-        # Add version to response headers
-        response = await call_next(request)
-        response.headers["X-API-Version"] = version
-        
-        return response
-
-
-def setup_api_versioning(app, default_version: str = "v1", supported_versions: list = None) -> None:
-    """Setup API versioning middleware"""
+
+    async def on_request(self, request: Request) -> Optional[Response]:
+        """Store version in request state"""
+        request.state.api_version = self.get_api_version(request)
+        return None
+
+    def on_response(self, request: Request, status: int, headers: MutableHeaders) -> None:
+        """Add version to response headers"""
+        headers["X-API-Version"] = request.state.api_version
+
+
+class APIVersioningMiddleware(StageMiddleware):
+    """Middleware to handle API versioning"""
+
+    def __init__(self, app, default_version: str = "v1", supported_versions: list = None):
+        super().__init__(app, APIVersioningStage(default_version, supported_versions))
+
+
+def setup_api_versioning(
+    app, default_version: str = "v1", supported_versions: list = None, pipeline: bool = False
+) -> Optional[APIVersioningStage]:
+    """
+    Setup API versioning middleware. With pipeline=True the stage is
+    returned for the caller's MiddlewarePipeline instead of being added.
+    """
     supported_versions = supported_versions or ["v1"]
-    
-    app.add_middleware(
-        APIVersioningMiddleware,
-        default_version=default_version,
-        supported_versions=supported_versions,
-    )
-    
+    stage = APIVersioningStage(default_version=default_version, supported_versions=supported_versions)
+
     logger.info(f"✅ API versioning enabled: default={default_version}, supported={supported_versions}")
 
+    if pipeline:
+        return stage
+    app.add_middleware(StageMiddleware, stage=stage)
+    return None
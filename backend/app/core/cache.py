@@ -2,10 +2,26 @@
 Redis Cache Configuration
 Cache backend pour améliorer les performances
 Utilise MessagePack pour sérialisation binaire rapide
+
+Cache à deux niveaux :
+- un LRU/TTL local au processus (LocalCacheTier), borné par namespace,
+  consulté avant Redis et seul niveau disponible quand Redis n'est pas configuré
+- Redis, partagé par tous les workers
+
+Les écritures et invalidations sont publiées sur un canal Redis pub/sub pour
+que les autres workers retirent leur copie locale. Le TTL local (court) borne
+la durée pendant laquelle une copie peut rester obsolète si un message est perdu.
 """
 
-from typing import Optional, Any
+from typing import Optional, Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Set, Tuple
+from collections import OrderedDict
+import asyncio
+import fnmatch
 import json
+import math
+import random
+import time
+import uuid
 import zlib
 from functools import wraps
 import hashlib
@@ -28,13 +44,205 @@ from app.core.config import settings
 from app.core.logging import logger
 
 
+def parse_namespace_limits(spec: str) -> Dict[str, int]:
+    """Parser "query=2000,tag=500" en {"query": 2000, "tag": 500}"""
+    limits: Dict[str, int] = {}
+    for item in (spec or "").split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip() and value.strip().isdigit():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class LocalCacheTier:
+    """
+    Cache LRU/TTL en mémoire du processus
+
+    Premier niveau de CacheBackend : les valeurs y sont conservées
+    sérialisées (MessagePack/JSON, sans zlib), un hit renvoie exactement les
+    mêmes types qu'une lecture Redis et un appelant ne peut pas modifier la
+    copie partagée.
+
+    Les caches locaux des services (principaux, permissions, clés API, URLs
+    présignées, corps compressés...) l'utilisent directement avec des objets
+    immuables ; `sizeof=None` désactive alors le calcul des tailles.
+
+    Chaque namespace (préfixe de la clé avant le premier ':') a sa propre
+    limite d'entrées, pour qu'un namespace volumineux (ex. "query") n'évince
+    pas les petites valeurs très lues (thème actif, plans...).
+
+    Args:
+        ttl: durée de vie maximale d'une entrée (None : celle passée à set())
+        max_entries: limite d'entrées par namespace (sauf namespace_limits)
+        max_item_bytes: taille maximale d'une valeur (None : sans limite)
+        max_bytes: taille totale maximale (None : sans limite)
+        sizeof: taille d'une valeur (None : tailles non calculées)
+        clock: horloge des expirations (time.monotonic par défaut)
+        on_remove: appelé avec (clé, valeur) pour chaque entrée qui quitte le
+            cache (éviction, expiration, suppression ou remplacement)
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 30,
+        max_entries: int = 1000,
+        namespace_limits: Optional[Dict[str, int]] = None,
+        max_item_bytes: Optional[int] = 256 * 1024,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = len,
+        clock: Optional[Callable[[], float]] = None,
+        on_remove: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.namespace_limits = namespace_limits or {}
+        self.max_item_bytes = max_item_bytes
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._clock = clock
+        self._on_remove = on_remove
+        # clé -> (expiration, valeur, taille)
+        self._namespaces: Dict[str, "OrderedDict[Hashable, Tuple[float, Any, int]]"] = {}
+        self.total_bytes = 0
+        self.evictions: Dict[str, int] = {}
+
+    @staticmethod
+    def namespace(key: Hashable) -> str:
+        """Namespace d'une clé : préfixe avant le premier ':'"""
+        if not isinstance(key, str):
+            return "default"
+        prefix, sep, _ = key.partition(":")
+        return prefix if sep and prefix else "default"
+
+    def limit(self, namespace: str) -> int:
+        return self.namespace_limits.get(namespace, self.max_entries)
+
+    def _now(self) -> float:
+        return self._clock() if self._clock is not None else time.monotonic()
+
+    def _remove(self, entries: "OrderedDict", key: Hashable) -> Tuple[float, Any, int]:
+        entry = entries.pop(key)
+        self.total_bytes -= entry[2]
+        if self._on_remove is not None:
+            self._on_remove(key, entry[1])
+        return entry
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entries = self._namespaces.get(self.namespace(key))
+        if not entries:
+            return None
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._now():
+            self._remove(entries, key)
+            return None
+        entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, expire: Optional[float] = None) -> bool:
+        namespace = self.namespace(key)
+        limit = self.limit(namespace)
+        entries = self._namespaces.setdefault(namespace, OrderedDict())
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        if key in entries:
+            self._remove(entries, key)
+        too_large = (self.max_item_bytes is not None and size > self.max_item_bytes) or (
+            self.max_bytes is not None and size > self.max_bytes
+        )
+        if limit <= 0 or too_large:
+            return False
+        lifetimes = [lifetime for lifetime in (expire, self.ttl) if lifetime is not None]
+        expires_at = self._now() + min(lifetimes) if lifetimes else math.inf
+        entries[key] = (expires_at, value, size)
+        self.total_bytes += size
+        while len(entries) > limit or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+            self._remove(entries, next(iter(entries)))
+            self.evictions[namespace] = self.evictions.get(namespace, 0) + 1
+        return True
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Retirer une entrée et retourner sa valeur (None si absente ou expirée)"""
+        entries = self._namespaces.get(self.namespace(key))
+        if not entries or key not in entries:
+            return None
+        expires_at, value, _ = self._remove(entries, key)
+        return value if expires_at > self._now() else None
+
+    def delete(self, key: Hashable) -> bool:
+        entries = self._namespaces.get(self.namespace(key))
+        if not entries or key not in entries:
+            return False
+        self._remove(entries, key)
+        return True
+
+    def clear_pattern(self, pattern: str) -> int:
+        """Supprimer les clés correspondant à un pattern glob (même syntaxe que SCAN MATCH)"""
+        deleted = 0
+        for entries in self._namespaces.values():
+            for key in [key for key in entries if isinstance(key, str) and fnmatch.fnmatchcase(key, pattern)]:
+                self._remove(entries, key)
+                deleted += 1
+        return deleted
+
+    def contains(self, key: Hashable) -> bool:
+        entries = self._namespaces.get(self.namespace(key))
+        if not entries or key not in entries:
+            return False
+        return entries[key][0] > self._now()
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Entrées non expirées, de la moins récemment utilisée à la plus récente (par namespace)"""
+        now = self._now()
+        return [
+            (key, entry[1])
+            for entries in self._namespaces.values()
+            for key, entry in entries.items()
+            if entry[0] > now
+        ]
+
+    def keys(self) -> List[Hashable]:
+        return [key for key, _ in self.items()]
+
+    def clear(self) -> None:
+        for entries in self._namespaces.values():
+            while entries:
+                self._remove(entries, next(iter(entries)))
+        self._namespaces.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._namespaces.values())
+
+    def sizes(self) -> Dict[str, int]:
+        return {namespace: len(entries) for namespace, entries in self._namespaces.items()}
+
+
 class CacheBackend:
-    """Backend de cache abstrait"""
+    """Backend de cache à deux niveaux : LRU local puis Redis"""
     
     def __init__(self):
         self.redis_client: Optional[redis.Redis] = None
         self.use_redis = REDIS_AVAILABLE and hasattr(settings, 'REDIS_URL')
         self.use_msgpack = MSGPACK_AVAILABLE
+        self.local: Optional[LocalCacheTier] = None
+        if settings.CACHE_LOCAL_ENABLED:
+            self.local = LocalCacheTier(
+                ttl=settings.CACHE_LOCAL_TTL,
+                max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+                namespace_limits=parse_namespace_limits(settings.CACHE_LOCAL_NAMESPACE_LIMITS),
+                max_item_bytes=settings.CACHE_LOCAL_MAX_ITEM_BYTES,
+            )
+        # Compteurs par namespace : hits locaux, hits Redis, misses
+        self.counters: Dict[str, Dict[str, int]] = {}
+        # Identifiant du processus, pour ignorer ses propres messages d'invalidation
+        self.instance_id = uuid.uuid4().hex
+        self.invalidation_channel = settings.CACHE_INVALIDATION_CHANNEL
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+        # Caches hors CacheBackend (ex. principal_cache) notifiés des invalidations reçues
+        self._invalidation_hooks: List[Callable[[Iterable[str], Optional[str]], None]] = []
+        # Index des tags sans Redis : tag -> clés
+        self._local_tags: Dict[str, Set[str]] = {}
         
         if self.use_redis and settings.REDIS_URL:
             try:
@@ -49,48 +257,82 @@ class CacheBackend:
                 logger.warning(f"Failed to initialize Redis: {e}")
                 self.use_redis = False
     
+    @property
+    def redis_enabled(self) -> bool:
+        return bool(self.use_redis and self.redis_client)
+    
+    def _count(self, key: str, counter: str) -> None:
+        namespace = LocalCacheTier.namespace(key)
+        counters = self.counters.setdefault(namespace, {"local_hits": 0, "redis_hits": 0, "misses": 0})
+        counters[counter] += 1
+    
+    def _dumps(self, value: Any) -> bytes:
+        """Sérialiser avec MessagePack (plus rapide) ou JSON (fallback)"""
+        if self.use_msgpack:
+            return msgpack.packb(value, default=str, use_bin_type=True)
+        return json.dumps(value, default=str).encode('utf-8')
+    
+    def _loads(self, payload: bytes) -> Any:
+        if self.use_msgpack:
+            return msgpack.unpackb(payload, raw=False)
+        return json.loads(payload.decode('utf-8'))
+    
+    def _decode(self, value: bytes) -> Any:
+        """Désérialiser une valeur lue dans Redis (préfixe zlib: si compressée)"""
+        if value.startswith(b"zlib:"):
+            value = zlib.decompress(value[len(b"zlib:"):])
+        return self._loads(value)
+    
     async def get(self, key: str) -> Optional[Any]:
-        """Récupérer une valeur du cache avec décompression automatique"""
-        if not self.use_redis or not self.redis_client:
+        """Récupérer une valeur : niveau local, puis Redis (décompression automatique)"""
+        if self.local is not None:
+            payload = self.local.get(key)
+            if payload is not None:
+                try:
+                    value = self._loads(payload)
+                    self._count(key, "local_hits")
+                    return value
+                except Exception as e:
+                    logger.error(f"Local cache decode error: {e}")
+                    self.local.delete(key)
+        
+        if not self.redis_enabled:
+            self._count(key, "misses")
             return None
         
         try:
             value = await self.redis_client.get(key)
             if not value:
+                self._count(key, "misses")
                 return None
             
             # Vérifier si compressé (préfixe binaire)
             if value.startswith(b"zlib:"):
-                # DÃ©compresser
-                compressed = value[len(b"zlib:"):]
-                decompressed = zlib.decompress(compressed)
-                # Désérialiser avec MessagePack ou JSON
-                if self.use_msgpack:
-                    return msgpack.unpackb(decompressed, raw=False)
-                else:
-                    return json.loads(decompressed.decode('utf-8'))
-            else:
-                # Non compressé, désérialiser directement
-                if self.use_msgpack:
-                    return msgpack.unpackb(value, raw=False)
-                else:
-                    return json.loads(value.decode('utf-8'))
+                # Décompresser
+                value = zlib.decompress(value[len(b"zlib:"):])
+            result = self._loads(value)
+            self._count(key, "redis_hits")
+            if self.local is not None:
+                self.local.set(key, value, settings.CACHE_LOCAL_TTL)
+            return result
         except Exception as e:
             logger.error(f"Cache get error: {e}")
+        self._count(key, "misses")
         return None
     
     async def set(self, key: str, value: Any, expire: int = 300, compress: bool = True) -> bool:
-        """Stocker une valeur dans le cache avec MessagePack et compression optionnelle"""
-        if not self.use_redis or not self.redis_client:
+        """Stocker une valeur dans les deux niveaux avec MessagePack et compression optionnelle"""
+        try:
+            serialized = self._dumps(value)
+        except Exception as e:
+            logger.error(f"Cache set error: {e}")
             return False
         
+        stored_locally = self.local.set(key, serialized, expire) if self.local is not None else False
+        if not self.redis_enabled:
+            return stored_locally
+        
         try:
-            # Sérialiser avec MessagePack (plus rapide) ou JSON (fallback)
-            if self.use_msgpack:
-                serialized = msgpack.packb(value, default=str, use_bin_type=True)
-            else:
-                serialized = json.dumps(value, default=str).encode('utf-8')
-            
             # Compresser si activé et si la valeur est grande (>1KB)
             if compress and len(serialized) > 1024:
                 compressed = zlib.compress(serialized)
@@ -100,19 +342,27 @@ class CacheBackend:
             else:
                 final_value = serialized
             
-            await self.redis_client.setex(key, expire, final_value)
+            # Écriture et invalidation des copies locales des autres workers en un aller-retour
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, expire, final_value)
+            self._queue_invalidation(pipe, keys=[key])
+            await pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Cache set error: {e}")
-            return False
+            return stored_locally
     
     async def delete(self, key: str) -> bool:
         """Supprimer une clé du cache"""
-        if not self.use_redis or not self.redis_client:
-            return False
+        deleted_locally = self.local.delete(key) if self.local is not None else False
+        if not self.redis_enabled:
+            return deleted_locally
         
         try:
-            await self.redis_client.delete(key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.delete(key)
+            self._queue_invalidation(pipe, keys=[key])
+            await pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Cache delete error: {e}")
@@ -120,14 +370,15 @@ class CacheBackend:
     
     async def clear_pattern(self, pattern: str) -> int:
         """Supprimer toutes les clés correspondant à un pattern (non-bloquant avec SCAN)"""
-        if not self.use_redis or not self.redis_client:
-            return 0
+        deleted_locally = self.local.clear_pattern(pattern) if self.local is not None else 0
+        if not self.redis_enabled:
+            return deleted_locally
         
         try:
             deleted_count = 0
             cursor = 0
             
-            # Utiliser SCAN au lieu de KEYS pour Ã©viter de bloquer Redis
+            # Utiliser SCAN au lieu de KEYS pour éviter de bloquer Redis
             while True:
                 cursor, keys = await self.redis_client.scan(
                     cursor=cursor,
@@ -141,10 +392,293 @@ class CacheBackend:
                 if cursor == 0:  # SCAN terminé
                     break
             
+            await self._publish_invalidation(pattern=pattern)
             return deleted_count
         except Exception as e:
             logger.error(f"Cache clear_pattern error: {e}")
-        return 0
+        return deleted_locally
+    
+    # Libération atomique : le verrou n'est supprimé que s'il appartient encore au détenteur
+    _RELEASE_LOCK_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+    
+    async def acquire_lock(self, name: str, ttl_ms: int) -> Optional[str]:
+        """
+        Prendre un verrou Redis (SET NX PX). Retourne un jeton, ou None si le
+        verrou est déjà pris. Sans Redis, le verrou est toujours accordé.
+        """
+        token = uuid.uuid4().hex
+        if not self.redis_enabled:
+            return token
+        try:
+            acquired = await self.redis_client.set(f"lock:{name}", token, nx=True, px=ttl_ms)
+            return token if acquired else None
+        except Exception as e:
+            logger.error(f"Cache lock error: {e}")
+            # Redis indisponible : ne pas bloquer le calcul
+            return token
+    
+    async def release_lock(self, name: str, token: str) -> None:
+        if not self.redis_enabled:
+            return
+        try:
+            await self.redis_client.eval(self._RELEASE_LOCK_SCRIPT, 1, f"lock:{name}", token)
+        except Exception as e:
+            logger.error(f"Cache unlock error: {e}")
+    
+    # ------------------------------------------------------------------
+    # Index des tags (ensembles Redis tagset:{tag} -> clés de cache)
+    # ------------------------------------------------------------------
+    
+    # Durée de vie minimale d'un ensemble de tag
+    TAG_TTL = 86400
+    # Taille au-delà de laquelle l'index local est purgé des clés expirées
+    LOCAL_TAG_PRUNE_SIZE = 1024
+    
+    # Suppression atomique de toutes les clés des tags, puis des tags eux-mêmes.
+    # KEYS : les ensembles tagset:{tag}, puis les anciens index tag:{tag}.
+    # Retourne les clés supprimées (pour retirer les copies locales des workers)
+    # et les valeurs des anciens index, à décoder côté Python.
+    _INVALIDATE_TAGS_SCRIPT = """
+    local count = #KEYS / 2
+    local deleted = {}
+    for index = 1, count do
+        local tag_key = KEYS[index]
+        if redis.call("TYPE", tag_key).ok == "set" then
+            local members = redis.call("SMEMBERS", tag_key)
+            for i = 1, #members, 500 do
+                redis.call("UNLINK", unpack(members, i, math.min(i + 499, #members)))
+            end
+            for _, member in ipairs(members) do
+                deleted[#deleted + 1] = member
+            end
+        end
+        redis.call("UNLINK", tag_key)
+    end
+    local legacy = {}
+    for index = count + 1, #KEYS do
+        if redis.call("TYPE", KEYS[index]).ok == "string" then
+            legacy[#legacy + 1] = redis.call("GET", KEYS[index])
+            redis.call("UNLINK", KEYS[index])
+        end
+    end
+    return {deleted, legacy}
+    """
+    
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"tagset:{tag}"
+    
+    @staticmethod
+    def _legacy_tag_key(tag: str) -> str:
+        # Ancien index : liste sérialisée de hash de requêtes (24h de TTL),
+        # à retirer une fois ces clés expirées après le déploiement
+        return f"tag:{tag}"
+    
+    def _legacy_tag_keys(self, payloads: Iterable[bytes]) -> List[str]:
+        """Clés query:{hash} listées par d'anciens index tag:{tag}"""
+        keys = []
+        for payload in payloads:
+            try:
+                hashes = self._decode(payload)
+            except Exception as e:
+                logger.error(f"Legacy cache tag decode error: {e}")
+                continue
+            if isinstance(hashes, list):
+                keys.extend(f"query:{query_hash}" for query_hash in hashes)
+        return keys
+    
+    def _add_local_tags(self, key: str, tags: Iterable[str]) -> None:
+        for tag in tags:
+            members = self._local_tags.setdefault(tag, set())
+            members.add(key)
+            if len(members) > self.LOCAL_TAG_PRUNE_SIZE and self.local is not None:
+                members.intersection_update({member for member in members if self.local.contains(member)})
+    
+    async def add_tags(self, key: str, tags: Iterable[str], expire: int = 300) -> bool:
+        """Rattacher une clé à des tags (SADD + EXPIRE en un seul aller-retour)"""
+        tags = list(tags)
+        if not tags:
+            return True
+        if not self.redis_enabled:
+            self._add_local_tags(key, tags)
+            return True
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, key)
+                pipe.expire(tag_key, max(expire, self.TAG_TTL))
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Cache tag error: {e}")
+            return False
+    
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Supprimer toutes les clés rattachées aux tags (un seul aller-retour, atomique)"""
+        tags = list(tags)
+        if not tags:
+            return 0
+        if not self.redis_enabled:
+            deleted = set()
+            for tag in tags:
+                deleted |= self._local_tags.pop(tag, set())
+            for key in deleted:
+                if self.local is not None:
+                    self.local.delete(key)
+            return len(deleted)
+        
+        try:
+            deleted_keys, legacy_payloads = await self.redis_client.eval(
+                self._INVALIDATE_TAGS_SCRIPT,
+                2 * len(tags),
+                *[self._tag_key(tag) for tag in tags],
+                *[self._legacy_tag_key(tag) for tag in tags],
+            )
+            keys = [key.decode('utf-8') if isinstance(key, bytes) else key for key in deleted_keys or []]
+            legacy_keys = self._legacy_tag_keys(legacy_payloads or [])
+            if legacy_keys:
+                deleted = await self.redis_client.delete(*legacy_keys)
+                keys.extend(legacy_keys)
+                logger.info(f"Invalidated {deleted} entries from legacy cache tag indexes")
+            if keys and self.local is not None:
+                for key in keys:
+                    self.local.delete(key)
+                if settings.CACHE_PUBSUB_INVALIDATION:
+                    await self.redis_client.publish(
+                        self.invalidation_channel, self._invalidation_message(keys=keys)
+                    )
+            return len(keys)
+        except Exception as e:
+            logger.error(f"Cache tag invalidation error: {e}")
+            return 0
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Compteurs hits/misses, taille et évictions par namespace"""
+        sizes = self.local.sizes() if self.local is not None else {}
+        evictions = self.local.evictions if self.local is not None else {}
+        result: Dict[str, Dict[str, int]] = {}
+        for namespace in set(self.counters) | set(sizes):
+            counters = self.counters.get(namespace, {"local_hits": 0, "redis_hits": 0, "misses": 0})
+            result[namespace] = {
+                **counters,
+                "local_size": sizes.get(namespace, 0),
+                "local_limit": self.local.limit(namespace) if self.local is not None else 0,
+                "evictions": evictions.get(namespace, 0),
+            }
+        return result
+    
+    # ------------------------------------------------------------------
+    # Invalidation des niveaux locaux des autres workers (Redis pub/sub)
+    # ------------------------------------------------------------------
+    
+    def _invalidation_message(self, keys: Optional[Iterable[str]] = None, pattern: Optional[str] = None) -> bytes:
+        message: Dict[str, Any] = {"origin": self.instance_id}
+        if keys is not None:
+            message["keys"] = list(keys)
+        if pattern is not None:
+            message["pattern"] = pattern
+        return json.dumps(message).encode('utf-8')
+    
+    def _queue_invalidation(self, pipe, keys: Iterable[str]) -> None:
+        if self.local is not None and settings.CACHE_PUBSUB_INVALIDATION:
+            pipe.publish(self.invalidation_channel, self._invalidation_message(keys=keys))
+    
+    async def _publish_invalidation(self, pattern: str) -> None:
+        if self.local is not None and settings.CACHE_PUBSUB_INVALIDATION:
+            await self.redis_client.publish(self.invalidation_channel, self._invalidation_message(pattern=pattern))
+    
+    async def publish_invalidation(
+        self,
+        keys: Optional[Iterable[str]] = None,
+        pattern: Optional[str] = None,
+    ) -> None:
+        """Diffuser une invalidation aux autres workers (no-op sans Redis)"""
+        if not (self.redis_enabled and settings.CACHE_PUBSUB_INVALIDATION):
+            return
+        try:
+            await self.redis_client.publish(
+                self.invalidation_channel, self._invalidation_message(keys=keys, pattern=pattern)
+            )
+        except Exception as e:
+            logger.warning(f"Cache invalidation publish error: {e}")
+    
+    def add_invalidation_hook(self, hook: Callable[[Iterable[str], Optional[str]], None]) -> None:
+        """Enregistrer hook(keys, pattern), appelé pour chaque invalidation reçue d'un autre worker"""
+        self._invalidation_hooks.append(hook)
+    
+    def _run_invalidation_hooks(self, keys: Iterable[str], pattern: Optional[str]) -> None:
+        for hook in self._invalidation_hooks:
+            try:
+                hook(keys, pattern)
+            except Exception as e:
+                logger.warning(f"Cache invalidation hook error: {e}")
+    
+    def handle_invalidation_message(self, data: bytes) -> None:
+        """Appliquer un message d'invalidation publié par un autre worker"""
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed cache invalidation message")
+            return
+        if message.get("origin") == self.instance_id:
+            return
+        keys = message.get("keys", [])
+        pattern = message.get("pattern")
+        if self.local is not None:
+            for key in keys:
+                self.local.delete(key)
+            if pattern:
+                self.local.clear_pattern(pattern)
+        self._run_invalidation_hooks(keys, pattern)
+    
+    async def _listen_for_invalidations(self) -> None:
+        while True:
+            try:
+                self._pubsub = self.redis_client.pubsub()
+                await self._pubsub.subscribe(self.invalidation_channel)
+                # Des messages ont pu être perdus pendant la déconnexion
+                if self.local is not None:
+                    self.local.clear()
+                self._run_invalidation_hooks([], "*")
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        self.handle_invalidation_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error, reconnecting: {e}")
+                await asyncio.sleep(1)
+    
+    def start_invalidation_listener(self) -> None:
+        """Démarrer l'écoute des invalidations (no-op sans Redis, ou sans niveau local ni hook)"""
+        if self._listener_task is not None or (self.local is None and not self._invalidation_hooks):
+            return
+        if not (self.redis_enabled and settings.CACHE_PUBSUB_INVALIDATION):
+            return
+        self._listener_task = asyncio.create_task(self._listen_for_invalidations())
+        logger.info(f"Listening for cache invalidations on {self.invalidation_channel}")
+    
+    async def stop_invalidation_listener(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception as e:
+                logger.debug(f"Error closing cache pubsub: {e}")
+            self._pubsub = None
 
 
 # Instance globale
@@ -157,10 +691,257 @@ def cache_key(*args, **kwargs) -> str:
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def cached(expire: int = 300, key_prefix: str = ""):
+# Marqueur des valeurs enveloppées avec leur expiration logique (SWR / expiration anticipée)
+_ENVELOPE_MARKER = "__swr__"
+
+
+class StampedeGuard:
+    """
+    Protection contre les « thundering herds » à l'expiration d'une clé chaude
+
+    - single-flight : un seul calcul par clé et par processus (les appels
+      concurrents attendent la même tâche), et un verrou Redis par clé pour
+      qu'un seul worker recalcule ; les autres attendent que la valeur arrive
+    - expiration anticipée probabiliste (XFetch) : avec early_refresh_beta > 0,
+      une requête peut déclencher le rafraîchissement en arrière-plan un peu
+      avant l'expiration, d'autant plus tôt que le calcul est long
+    - stale-while-revalidate : avec stale_ttl > 0, une valeur expirée reste
+      servie pendant stale_ttl secondes pendant qu'une tâche la rafraîchit
+
+    Sans ces deux options, les valeurs sont stockées telles quelles (même
+    format qu'avant) ; avec, elles sont enveloppées avec leur expiration
+    logique et la durée du dernier calcul.
+    """
+
+    # Attente maximale d'un calcul fait par un autre worker avant de calculer soi-même
+    LOCK_WAIT_SECONDS = 5.0
+    LOCK_POLL_SECONDS = 0.05
+
+    def __init__(self, backend: Any):
+        self.backend = backend
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self.stats = {
+            "computations": 0,
+            "coalesced": 0,
+            "lock_waits_served": 0,
+            "early_refreshes": 0,
+            "stale_served": 0,
+            "refresh_failures": 0,
+        }
+
+    @property
+    def recomputations_avoided(self) -> int:
+        """Calculs évités : appels fusionnés, servis après attente du verrou, ou servis périmés"""
+        return self.stats["coalesced"] + self.stats["lock_waits_served"] + self.stats["stale_served"]
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**self.stats, "recomputations_avoided": self.recomputations_avoided}
+
+    @property
+    def _distributed(self) -> bool:
+        # Verrous Redis uniquement quand le backend est connecté à Redis
+        return getattr(self.backend, "redis_enabled", False) is True
+
+    @staticmethod
+    def _unwrap(raw: Any) -> Tuple[Any, Optional[float], float]:
+        """(valeur, expiration logique ou None, durée du calcul)"""
+        if isinstance(raw, dict) and raw.get(_ENVELOPE_MARKER) == 1:
+            return raw.get("value"), raw.get("expires_at"), raw.get("delta", 0.0)
+        return raw, None, 0.0
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int = 300,
+        compress: bool = True,
+        stale_ttl: int = 0,
+        early_refresh_beta: float = 0.0,
+    ) -> Any:
+        raw = await self.backend.get(key)
+        if raw is not None:
+            value, expires_at, delta = self._unwrap(raw)
+            if expires_at is None:
+                return value
+            now = time.time()
+            if now < expires_at:
+                # XFetch : now - delta * beta * ln(rand) >= expiration
+                if early_refresh_beta > 0 and delta > 0 and (
+                    now - delta * early_refresh_beta * math.log(random.random() or 1e-12) >= expires_at
+                ):
+                    if self._refresh_in_background(key, compute, expire, compress, stale_ttl, early_refresh_beta):
+                        self.stats["early_refreshes"] += 1
+                return value
+            if stale_ttl > 0:
+                self.stats["stale_served"] += 1
+                self._refresh_in_background(key, compute, expire, compress, stale_ttl, early_refresh_beta)
+                return value
+
+        return await self._single_flight(key, compute, expire, compress, stale_ttl, early_refresh_beta)
+
+    async def _single_flight(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int,
+        compress: bool,
+        stale_ttl: int,
+        early_refresh_beta: float,
+        wait_for_lock: bool = True,
+    ) -> Any:
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            try:
+                value = await asyncio.shield(in_flight)
+            except _RefreshAlreadyRunning:
+                if not wait_for_lock:
+                    raise
+                # Le rafraîchissement en arrière-plan a laissé la main à un autre worker
+                return await self._single_flight(
+                    key, compute, expire, compress, stale_ttl, early_refresh_beta
+                )
+            self.stats["coalesced"] += 1
+            return value
+
+        # Le calcul tourne dans sa propre tâche : annuler l'appel qui l'a lancé
+        # (client déconnecté, timeout) n'annule pas les appels fusionnés
+        task = asyncio.ensure_future(self._compute_with_lock(
+            key, compute, expire, compress, stale_ttl, early_refresh_beta, wait_for_lock
+        ))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._flight_done(key, done))
+        return await asyncio.shield(task)
+
+    def _flight_done(self, key: str, task: "asyncio.Future") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Personne n'attend plus forcément la tâche : éviter l'avertissement « never retrieved »
+            task.exception()
+
+    async def _compute_with_lock(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int,
+        compress: bool,
+        stale_ttl: int,
+        early_refresh_beta: float,
+        wait_for_lock: bool,
+    ) -> Any:
+        if not self._distributed:
+            return await self._compute_and_store(key, compute, expire, compress, stale_ttl, early_refresh_beta)
+
+        lock_ttl_ms = int(self.LOCK_WAIT_SECONDS * 2 * 1000)
+        token = await self.backend.acquire_lock(key, lock_ttl_ms)
+        if token is None:
+            if not wait_for_lock:
+                # Rafraîchissement en arrière-plan : un autre worker s'en charge déjà
+                raise _RefreshAlreadyRunning()
+            # Un autre worker calcule : attendre sa valeur plutôt que recalculer
+            deadline = time.monotonic() + self.LOCK_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.LOCK_POLL_SECONDS)
+                raw = await self.backend.get(key)
+                if raw is not None:
+                    value, expires_at, _ = self._unwrap(raw)
+                    if expires_at is None or time.time() < expires_at:
+                        self.stats["lock_waits_served"] += 1
+                        return value
+            logger.warning(f"Timed out waiting for cache lock on {key}, computing locally")
+            return await self._compute_and_store(key, compute, expire, compress, stale_ttl, early_refresh_beta)
+
+        try:
+            # La valeur a pu être écrite entre notre miss et la prise du verrou
+            raw = await self.backend.get(key)
+            if raw is not None:
+                value, expires_at, _ = self._unwrap(raw)
+                if expires_at is None or time.time() < expires_at:
+                    return value
+            return await self._compute_and_store(key, compute, expire, compress, stale_ttl, early_refresh_beta)
+        finally:
+            await self.backend.release_lock(key, token)
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int,
+        compress: bool,
+        stale_ttl: int,
+        early_refresh_beta: float,
+    ) -> Any:
+        self.stats["computations"] += 1
+        start = time.perf_counter()
+        value = await compute()
+        delta = time.perf_counter() - start
+
+        if stale_ttl > 0 or early_refresh_beta > 0:
+            envelope = {
+                _ENVELOPE_MARKER: 1,
+                "value": value,
+                "expires_at": time.time() + expire,
+                "delta": delta,
+            }
+            await self.backend.set(key, envelope, expire + stale_ttl, compress)
+        else:
+            await self.backend.set(key, value, expire, compress)
+        return value
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int,
+        compress: bool,
+        stale_ttl: int,
+        early_refresh_beta: float,
+    ) -> bool:
+        """Lancer un rafraîchissement (un seul par clé et par processus)"""
+        if key in self._in_flight:
+            return False
+
+        async def refresh() -> None:
+            try:
+                await self._single_flight(
+                    key, compute, expire, compress, stale_ttl, early_refresh_beta, wait_for_lock=False
+                )
+            except _RefreshAlreadyRunning:
+                pass
+            except Exception as e:
+                self.stats["refresh_failures"] += 1
+                logger.warning(f"Background cache refresh failed for {key}: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return True
+
+
+class _RefreshAlreadyRunning(Exception):
+    """Le verrou de rafraîchissement est détenu par un autre worker"""
+
+
+stampede_guard = StampedeGuard(cache_backend)
+
+
+def cached(
+    expire: int = 300,
+    key_prefix: str = "",
+    stale_ttl: int = 0,
+    early_refresh_beta: float = 0.0,
+):
     """
     Décorateur pour mettre en cache le résultat d'une fonction
     
+    Les appels concurrents sur une clé absente ne déclenchent qu'un calcul
+    (voir StampedeGuard). stale_ttl active le stale-while-revalidate et
+    early_refresh_beta (1.0 recommandé) l'expiration anticipée probabiliste.
+    Ces deux options rappellent la fonction dans une tâche d'arrière-plan,
+    après la fin de la requête : à réserver aux fonctions qui n'utilisent pas
+    de ressources liées à la requête (session DB injectée par Depends, etc.).
+    
     Usage:
         @cached(expire=600, key_prefix="users")
         async def get_users():
@@ -172,20 +953,16 @@ def cached(expire: int = 300, key_prefix: str = ""):
             # Générer la clé de cache
             cache_key_str = f"{key_prefix}:{func.__name__}:{cache_key(*args, **kwargs)}"
             
-            # VÃ©rifier le cache
-            cached_value = await cache_backend.get(cache_key_str)
-            if cached_value is not None:
-                logger.debug(f"Cache hit: {cache_key_str}")
-                return cached_value
-            
-            # Exécuter la fonction
-            logger.debug(f"Cache miss: {cache_key_str}")
-            result = await func(*args, **kwargs)
-            
-            # Mettre en cache (compression automatique si > 1KB)
-            await cache_backend.set(cache_key_str, result, expire, compress=True)
-            
-            return result
+            # Cache, ou un seul calcul pour tous les appels concurrents
+            # (compression automatique si > 1KB)
+            return await stampede_guard.get_or_compute(
+                cache_key_str,
+                lambda: func(*args, **kwargs),
+                expire=expire,
+                compress=True,
+                stale_ttl=stale_ttl,
+                early_refresh_beta=early_refresh_beta,
+            )
         
         # Ajouter mÃ©thode d'invalidation
         async def invalidate(*args, **kwargs):
@@ -237,13 +1014,17 @@ async def invalidate_cache_pattern_async(pattern: str) -> int:
 async def init_cache():
     """Initialiser le cache"""
     if cache_backend.use_redis:
+        cache_backend.start_invalidation_listener()
         logger.info("Cache backend ready")
+    elif cache_backend.local is not None:
+        logger.warning("Redis not configured, using the in-process cache only")
     else:
         logger.warning("Cache backend not available (Redis not configured)")
 
 
 async def close_cache():
     """Fermer les connexions cache"""
+    await cache_backend.stop_invalidation_listener()
     if cache_backend.redis_client:
         await cache_backend.redis_client.close()
         logger.info("Cache connections closed")
@@ -3,21 +3,31 @@ Enhanced Redis Cache Layer
 Advanced caching with query result caching, cache warming, and invalidation strategies
 """
 
-from typing import Optional, Any, Callable
+from typing import Optional, Any, Callable, Dict, List, Sequence, Union, Annotated, get_args, get_origin
+from types import UnionType
+from datetime import date, datetime
+from enum import Enum
 from functools import wraps
+from uuid import UUID
 import hashlib
+import inspect
 import json
 import asyncio
 
-from app.core.cache import cache_backend, CacheBackend
+from fastapi import params as fastapi_params
+from fastapi.encoders import jsonable_encoder
+
+from app.core.cache import cache_backend, stampede_guard, CacheBackend, StampedeGuard
 from app.core.logging import logger
 
 
 class EnhancedCache:
     """Enhanced caching layer with advanced features"""
     
-    def __init__(self, cache_backend: CacheBackend):
+    def __init__(self, cache_backend: CacheBackend, stampede_guard: Optional[StampedeGuard] = None):
         self.cache = cache_backend
+        # The app-wide instance shares app.core.cache.stampede_guard (reported by /health)
+        self.stampede_guard = stampede_guard or StampedeGuard(cache_backend)
     
     async def get_or_set(
         self,
@@ -26,38 +36,43 @@ class EnhancedCache:
         expire: int = 300,
         compress: bool = True,
         *args,
+        stale_ttl: int = 0,
+        early_refresh_beta: float = 0.0,
         **kwargs
     ) -> Any:
         """
         Get value from cache or set it using callable
         
+        Concurrent misses on the same key run callable_fn once (per process,
+        and across workers through a Redis lock).
+        
         Args:
             key: Cache key
             callable_fn: Function to call if cache miss
             expire: Cache expiration in seconds
             compress: Whether to compress large values
             *args, **kwargs: Arguments to pass to callable_fn
+            stale_ttl: Serve an expired value for this many seconds while one
+                background task refreshes it (stale-while-revalidate)
+            early_refresh_beta: Probabilistic early refresh factor (XFetch);
+                0 disables it, 1.0 is the usual setting
         
         Returns:
             Cached or computed value
         """
-        # Try to get from cache
-        cached_value = await self.cache.get(key)
-        if cached_value is not None:
-            logger.debug(f"Cache hit: {key}")
-            return cached_value
-        
-        # Cache miss - compute value
-        logger.debug(f"Cache miss: {key}")
-        if asyncio.iscoroutinefunction(callable_fn):
-            value = await callable_fn(*args, **kwargs)
-        else:
-            value = callable_fn(*args, **kwargs) if args or kwargs else callable_fn()
-        
-        # Store in cache
-        await self.cache.set(key, value, expire, compress)
-        
-        return value
+        async def compute() -> Any:
+            if asyncio.iscoroutinefunction(callable_fn):
+                return await callable_fn(*args, **kwargs)
+            return callable_fn(*args, **kwargs) if args or kwargs else callable_fn()
+        
+        return await self.stampede_guard.get_or_compute(
+            key,
+            compute,
+            expire=expire,
+            compress=compress,
+            stale_ttl=stale_ttl,
+            early_refresh_beta=early_refresh_beta,
+        )
     
     async def cache_query_result(
         self,
@@ -69,6 +84,9 @@ class EnhancedCache:
         """
         Cache database query result with tags for invalidation
         
+        Tag membership is kept in sets (Redis SADD, or an in-memory index
+        without Redis), so concurrent writers never overwrite each other.
+        
         Args:
             query_hash: Hash of the query
             result: Query result to cache
@@ -78,17 +96,13 @@ class EnhancedCache:
         Returns:
             True if cached successfully
         """
+        key = f"query:{query_hash}"
         # Store result
-        success = await self.cache.set(f"query:{query_hash}", result, expire)
+        success = await self.cache.set(key, result, expire)
         
         # Store tags for invalidation
         if tags and success:
-            for tag in tags:
-                tag_key = f"tag:{tag}"
-                existing_queries = await self.cache.get(tag_key) or []
-                if query_hash not in existing_queries:
-                    existing_queries.append(query_hash)
-                    await self.cache.set(tag_key, existing_queries, expire=86400)  # 24h
+            await self.cache.add_tags(key, tags, expire)
         
         return success
     
@@ -96,26 +110,16 @@ class EnhancedCache:
         """
         Invalidate cache entries by tags
         
+        All entries of all tags are removed in one atomic round trip,
+        whatever the number of entries.
+        
         Args:
             tags: List of tags to invalidate
         
         Returns:
             Number of cache entries invalidated
         """
-        invalidated = 0
-        
-        for tag in tags:
-            tag_key = f"tag:{tag}"
-            query_hashes = await self.cache.get(tag_key) or []
-            
-            for query_hash in query_hashes:
-                if await self.cache.delete(f"query:{query_hash}"):
-                    invalidated += 1
-            
-            # Clear tag
-            await self.cache.delete(tag_key)
-        
-        return invalidated
+        return await self.cache.invalidate_tags(tags)
     
     async def warm_cache(self, keys_and_callables: dict[str, Callable]) -> dict[str, bool]:
         """
@@ -142,42 +146,179 @@ class EnhancedCache:
 
 
 # Enhanced cache instance
-enhanced_cache = EnhancedCache(cache_backend)
+enhanced_cache = EnhancedCache(cache_backend, stampede_guard)
 
 
-def cache_query(expire: int = 300, tags: Optional[list[str]] = None):
+# ----------------------------------------------------------------------
+# Semantic cache keys for cache_query
+# ----------------------------------------------------------------------
+
+CACHE_SCOPES = ("public", "tenant", "user")
+
+_SCALAR_TYPES = (str, int, float, bool, type(None), date, datetime, UUID)
+
+# Per-endpoint hit/miss counters
+_query_cache_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _is_scalar_annotation(annotation: Any) -> bool:
+    """True for str/int/bool/... annotations, Optional[...] and lists of them, and Enums"""
+    if annotation is inspect.Parameter.empty:
+        return False
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        return _is_scalar_annotation(get_args(annotation)[0])
+    if origin in (Union, UnionType, list, List, tuple, set):
+        return all(_is_scalar_annotation(arg) for arg in get_args(annotation) if arg is not Ellipsis)
+    return isinstance(annotation, type) and (issubclass(annotation, _SCALAR_TYPES) or issubclass(annotation, Enum))
+
+
+def declared_key_params(func: Callable, extra: Sequence[str] = ()) -> List[str]:
+    """
+    Parameters of an endpoint that go into its cache key.
+
+    These are the query/path parameters FastAPI takes from the URL: explicit
+    Query()/Path() declarations and scalar-annotated parameters without
+    Depends(). The request, the DB session, the current user and other
+    dependencies are excluded; dependencies that do change the result (e.g.
+    pagination) must be listed in `extra`.
+    """
+    names = []
+    for name, parameter in inspect.signature(func).parameters.items():
+        if name in extra:
+            names.append(name)
+            continue
+        markers = [parameter.default]
+        if get_origin(parameter.annotation) is Annotated:
+            markers.extend(get_args(parameter.annotation)[1:])
+        if any(isinstance(marker, fastapi_params.Depends) for marker in markers):
+            continue
+        if any(isinstance(marker, (fastapi_params.Query, fastapi_params.Path)) for marker in markers):
+            names.append(name)
+        elif _is_scalar_annotation(parameter.annotation):
+            names.append(name)
+    unknown = set(extra) - set(names)
+    if unknown:
+        raise ValueError(f"{func.__qualname__}: unknown cache key parameters {sorted(unknown)}")
+    return names
+
+
+def _principal_scope(scope: str, bound: Dict[str, Any], principal_param: str) -> str:
+    if scope == "public":
+        return "public"
+    if scope == "tenant":
+        from app.core.tenancy import get_current_tenant
+        return f"tenant:{get_current_tenant()}"
+    principal = bound.get(principal_param)
+    principal_id = getattr(principal, "id", None)
+    if principal_id is None:
+        raise ValueError(f"User-scoped cache key needs an authenticated '{principal_param}'")
+    return f"user:{principal_id}"
+
+
+def build_query_cache_key(
+    endpoint: str,
+    signature: inspect.Signature,
+    key_params: Sequence[str],
+    scope: str,
+    principal_param: str,
+    args: tuple,
+    kwargs: dict,
+) -> str:
+    """{endpoint}:{scope}:{digest of the declared parameter values}"""
+    bound = signature.bind_partial(*args, **kwargs)
+    bound.apply_defaults()
+    values = {}
+    for name in key_params:
+        value = bound.arguments.get(name)
+        # Unresolved Query()/Path() defaults when called outside FastAPI
+        if isinstance(value, fastapi_params.Param):
+            value = value.default
+        values[name] = jsonable_encoder(value)
+    canonical = json.dumps(values, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(canonical.encode()).hexdigest()[:32]
+    return f"{endpoint}:{_principal_scope(scope, bound.arguments, principal_param)}:{digest}"
+
+
+def _record_query_cache(endpoint: str, outcome: str) -> None:
+    stats = _query_cache_stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+    stats[outcome] += 1
+
+
+def cache_query_stats() -> Dict[str, Dict[str, Any]]:
+    """Hits, misses and hit ratio for each cache_query endpoint"""
+    return {
+        endpoint: {
+            **stats,
+            "hit_ratio": round(stats["hits"] / (stats["hits"] + stats["misses"]), 3)
+            if stats["hits"] + stats["misses"] else None,
+        }
+        for endpoint, stats in _query_cache_stats.items()
+    }
+
+
+def cache_query(
+    expire: int = 300,
+    tags: Optional[list[str]] = None,
+    key_params: Sequence[str] = (),
+    scope: str = "tenant",
+    principal_param: str = "current_user",
+):
     """
     Decorator to cache database query results
     
+    The cache key only depends on the endpoint, its declared query/path
+    parameters (see declared_key_params) and the principal scope:
+    - "public": shared by every caller
+    - "tenant": one entry per tenant (same as public in single-tenant mode)
+    - "user": one entry per authenticated user (`principal_param`)
+    
+    Results are stored JSON-encoded; cache hits return that encoded form,
+    which FastAPI validates against the response model.
+    
     Args:
         expire: Cache expiration in seconds
         tags: Optional tags for cache invalidation
+        key_params: Dependency parameters that change the result (e.g. pagination)
+        scope: Principal scope of the cached result
+        principal_param: Parameter holding the current user (scope="user")
     
     Usage:
-        @cache_query(expire=600, tags=["users"])
-        async def get_users():
+        @cache_query(expire=600, tags=["users"], key_params=["pagination"])
+        async def list_users(request: Request, pagination: ... = Depends(...), search: str = Query(None)):
             ...
     """
+    if scope not in CACHE_SCOPES:
+        raise ValueError(f"Invalid cache scope {scope!r}, expected one of {CACHE_SCOPES}")
+    
     def decorator(func: Callable):
+        signature = inspect.signature(func)
+        names = declared_key_params(func, key_params)
+        if scope == "user" and principal_param not in signature.parameters:
+            raise ValueError(f"{func.__qualname__}: scope='user' needs a '{principal_param}' parameter")
+        endpoint = f"{func.__module__}.{func.__qualname__}"
+        
+        def query_hash_for(args: tuple, kwargs: dict) -> str:
+            return build_query_cache_key(endpoint, signature, names, scope, principal_param, args, kwargs)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Generate cache key from function and arguments
-            key_data = f"{func.__name__}:{args}:{sorted(kwargs.items())}"
-            query_hash = hashlib.md5(key_data.encode()).hexdigest()
-            cache_key = f"query:{query_hash}"
+            query_hash = query_hash_for(args, kwargs)
             
             # Try cache
-            cached = await cache_backend.get(cache_key)
+            cached = await cache_backend.get(f"query:{query_hash}")
             if cached is not None:
+                _record_query_cache(endpoint, "hits")
                 return cached
+            _record_query_cache(endpoint, "misses")
             
             # Execute query
             result = await func(*args, **kwargs)
             
-            # Cache result
+            # Cache result (JSON-encoded so Pydantic models round-trip)
             await enhanced_cache.cache_query_result(
                 query_hash,
-                result,
+                jsonable_encoder(result),
                 expire,
                 tags,
             )
@@ -187,11 +328,9 @@ def cache_query(expire: int = 300, tags: Optional[list[str]] = None):
         # Add invalidation method
         async def invalidate(*args, **kwargs):
             """Invalidate cache for this query"""
-            key_data = f"{func.__name__}:{args}:{sorted(kwargs.items())}"
-            query_hash = hashlib.md5(key_data.encode()).hexdigest()
-            await cache_backend.delete(f"query:{query_hash}")
+            await cache_backend.delete(f"query:{query_hash_for(args, kwargs)}")
         
         wrapper.invalidate = invalidate
+        wrapper.cache_key_params = names
         return wrapper
     return decorator
-
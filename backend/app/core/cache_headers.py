@@ -1,83 +1,43 @@
 """
 Cache Headers Middleware
 Adds Cache-Control and ETag headers to API responses
+
+Pure ASGI: the response start message is held only as long as needed.
+Validators declared by the endpoint (see app.core.conditional) are copied
+onto the response, streaming responses included. Without one, single-message
+bodies get an ETag hashed from the body; streamed bodies are never buffered.
 """
 
-from fastapi import Request
-from fastapi.responses import Response
-from starlette.middleware.base import BaseHTTPMiddleware
 import hashlib
-import json
-from typing import Callable
 from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.conditional import get_validator, etag_matches, not_modified_response
 
+NO_CACHE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+VARY_TOKENS = ("Accept", "Accept-Encoding")
 
-class CacheHeadersMiddleware(BaseHTTPMiddleware):
+
+class CacheHeadersMiddleware:
     """Middleware for adding cache headers to responses"""
 
-    def __init__(self, app, default_max_age: int = 30):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, default_max_age: int = 30):
+        self.app = app
         self.default_max_age = default_max_age
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip cache headers for non-GET requests
-        if request.method != "GET":
-            response = await call_next(request)
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-            return response
-        
-        # Call the next middleware/endpoint
-        response = await call_next(request)
-        
-        # Skip cache headers for error responses
-        if response.status_code >= 400:
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-            return response
-        
-        # Get path from request URL (works with both Request and _CachedRequest)
-        path = request.url.path if hasattr(request, 'url') else getattr(request, 'path', '/')
-        
-        # Skip ETag generation for responses without body attribute (e.g., StreamingResponse, RedirectResponse)
-        if not hasattr(response, 'body'):
-            # Still add cache headers but skip ETag
-            max_age = self._get_cache_max_age(path)
-            response.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
-            response.headers["Vary"] = "Accept, Accept-Encoding"
-            expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
-            response.headers["Expires"] = expires.strftime("%a, %d %b %Y %H:%M:%S GMT")
-            return response
-        
-        # Generate ETag from response body
-        try:
-            body = response.body
-            etag = hashlib.md5(body).hexdigest()
-            response.headers["ETag"] = f'"{etag}"'
-            
-            # Check if client sent If-None-Match header
-            if_none_match = request.headers.get("If-None-Match")
-            if if_none_match and if_none_match.strip() == f'"{etag}"':
-                # Response hasn't changed, return 304 Not Modified
-                return Response(status_code=304, headers=response.headers)
-        except AttributeError:
-            # Response doesn't have body attribute, skip ETag
-            pass
-        
-        # Determine cache max-age based on endpoint
-        max_age = self._get_cache_max_age(path)
-        
-        # Add cache headers
-        response.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
-        response.headers["Vary"] = "Accept, Accept-Encoding"
-        
-        # Add Expires header
-        expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
-        response.headers["Expires"] = expires.strftime("%a, %d %b %Y %H:%M:%S GMT")
-        
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        responder = _CacheHeadersResponder(self, scope, send)
+        await self.app(scope, receive, responder.send)
 
     def _get_cache_max_age(self, path: str) -> int:
         """Determine cache max-age based on endpoint"""
@@ -86,23 +46,118 @@ class CacheHeadersMiddleware(BaseHTTPMiddleware):
             return 0  # No cache for frequently changing data
         if "/dashboard" in path or "/reports" in path:
             return 0  # No cache for dashboard data
-        
+
         # Static/rarely changing data - longer cache
         if "/health" in path or "/docs" in path:
             return 60  # 1 minute
-        
+
         # User data - shorter cache
         if "/users/me" in path:
             return 30  # 30 seconds
-        
+
         # List endpoints - shorter cache
         if "/users" in path and path.endswith("/users"):
             return 30  # 30 seconds (reduced from 5 minutes)
-        
+
         # Individual resources - shorter cache
         if "/users/" in path or "/resources/" in path:
             return 30  # 30 seconds (reduced from 5 minutes)
-        
+
         # Default cache (30 seconds)
         return self.default_max_age
 
+
+class _CacheHeadersResponder:
+    """Per-request send wrapper"""
+
+    def __init__(self, middleware: CacheHeadersMiddleware, scope: Scope, send: Send):
+        self.middleware = middleware
+        self.scope = scope
+        self.downstream = send
+        self.request_headers = Headers(scope=scope)
+        self.start: Optional[Message] = None
+        self.held = False
+        self.skip_body = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            await self._on_start(message)
+            return
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+        if self.skip_body:
+            return
+        if not self.held:
+            await self.downstream(message)
+            return
+
+        # Start held until the first body message: hash single-message bodies
+        self.held = False
+        start = self.start
+        headers = MutableHeaders(scope=start)
+        if not message.get("more_body", False):
+            etag = f'"{hashlib.md5(message.get("body", b"")).hexdigest()}"'
+            headers["ETag"] = etag
+            if etag_matches(self.request_headers.get("if-none-match"), etag):
+                await self._send_not_modified(headers)
+                return
+        await self.downstream(start)
+        await self.downstream(message)
+
+    async def _on_start(self, message: Message) -> None:
+        headers = MutableHeaders(scope=message)
+        status = message["status"]
+
+        # Skip cache headers for non-GET requests and error responses
+        if self.scope["method"] != "GET" or status >= 400:
+            for name, value in NO_CACHE_HEADERS.items():
+                headers[name] = value
+            await self.downstream(message)
+            return
+
+        validator = get_validator(self.scope)
+        if validator is not None:
+            for name, value in validator.headers().items():
+                if name not in headers:
+                    headers[name] = value
+        self._add_cache_headers(headers, private=bool(validator and validator.private))
+
+        if status != 200:
+            await self.downstream(message)
+            return
+        if "etag" in headers:
+            if etag_matches(self.request_headers.get("if-none-match"), headers["etag"]):
+                self.skip_body = True
+                await self._send_not_modified(headers)
+                return
+            await self.downstream(message)
+            return
+        self.start = message
+        self.held = True
+
+    def _add_cache_headers(self, headers: MutableHeaders, private: bool = False) -> None:
+        vary = [token.strip() for token in headers.get("vary", "").split(",") if token.strip()]
+        for token in VARY_TOKENS:
+            if token.lower() not in {existing.lower() for existing in vary}:
+                vary.append(token)
+        headers["Vary"] = ", ".join(vary)
+
+        # Cache-Control set by the endpoint wins
+        if "cache-control" in headers:
+            return
+        path = self.scope.get("path", "/")
+        max_age = self.middleware._get_cache_max_age(path)
+        scope = "private" if private else "public"
+        headers["Cache-Control"] = f"{scope}, max-age={max_age}, must-revalidate"
+        expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
+        headers["Expires"] = expires.strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+    async def _send_not_modified(self, headers: MutableHeaders) -> None:
+        response = not_modified_response(dict(headers.items()))
+        await self.downstream({
+            "type": "http.response.start",
+            "status": 304,
+            "headers": response.raw_headers,
+        })
+        await self.downstream({"type": "http.response.body", "body": b"", "more_body": False})
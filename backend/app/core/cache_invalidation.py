@@ -0,0 +1,95 @@
+"""
+ORM-driven Cache Invalidation
+Keeps in-process caches consistent with changes made through the ORM
+
+In-process caches (principals, compiled permission sets, verified API keys)
+express their invalidations as cache-channel keys and patterns, applied by
+their `apply_invalidation_keys(keys, pattern)` hook. An OrmCacheInvalidation
+applies them in three steps:
+
+- at flush, from the model's ORM event, so the writing session stops
+  serving the old value right away
+- again after commit, so a request that re-read the old row between the
+  flush and the commit cannot keep a stale copy
+- then broadcasts them over the cache backend's invalidation channel so the
+  other workers drop their copies
+
+Invalidations of a transaction that is rolled back are discarded after the
+flush-time step (dropping a valid entry only costs a database read).
+
+Caches whose invalidation is expensive (removing files) can skip the
+flush-time step with `at_flush=False`. Writes that bypass the ORM (raw SQL)
+record their invalidations with `schedule_in(session, ...)`.
+"""
+
+import asyncio
+from typing import Callable, Iterable, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import cache_backend
+from app.core.logging import logger
+
+InvalidationHook = Callable[[Iterable[str], Optional[str]], None]
+
+
+class OrmCacheInvalidation:
+    """Invalidates one in-process cache at flush and after commit, then broadcasts"""
+
+    def __init__(self, name: str, apply: InvalidationHook, at_flush: bool = True):
+        self.name = name
+        self.apply = apply
+        self.at_flush = at_flush
+        self._pending_key = f"{name}_cache_pending"
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def schedule(self, target, keys: Iterable[str] = (), pattern: Optional[str] = None) -> None:
+        """Invalidate now and again once the session owning `target` commits"""
+        self.schedule_in(object_session(target), keys, pattern)
+
+    def schedule_in(self, session, keys: Iterable[str] = (), pattern: Optional[str] = None) -> None:
+        """Same as schedule() for a Session or AsyncSession, without a mapped object"""
+        keys = set(keys)
+        if self.at_flush:
+            self.apply(keys, pattern)
+
+        session = getattr(session, "sync_session", session)
+        if session is not None:
+            pending = session.info.setdefault(self._pending_key, {"keys": set(), "patterns": set()})
+            pending["keys"] |= keys
+            if pattern is not None:
+                pending["patterns"].add(pattern)
+
+    def _after_commit(self, session: Session) -> None:
+        pending = session.info.pop(self._pending_key, None)
+        if not pending:
+            return
+        keys: Set[str] = pending["keys"]
+        if keys:
+            self.apply(keys, None)
+        for pattern in pending["patterns"]:
+            self.apply((), pattern)
+
+        if not cache_backend.redis_enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if keys:
+            self._publish(loop, keys=sorted(keys))
+        for pattern in sorted(pending["patterns"]):
+            self._publish(loop, pattern=pattern)
+
+    def _after_rollback(self, session: Session) -> None:
+        session.info.pop(self._pending_key, None)
+
+    def _publish(self, loop: asyncio.AbstractEventLoop, **invalidation) -> None:
+        task = loop.create_task(cache_backend.publish_invalidation(**invalidation))
+        task.add_done_callback(self._log_publish_failure)
+
+    def _log_publish_failure(self, task: "asyncio.Task") -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Could not broadcast {self.name} cache invalidation: {task.exception()}")
@@ -1,160 +1,344 @@
 """
 HTTP Compression Middleware
-Enhanced GZip/Brotli compression for API responses with streaming support
+Pure ASGI response compression (zstd / Brotli / GZip) that streams
+
+The middleware wraps `send` instead of buffering whole responses:
+
+- the encoding is negotiated from Accept-Encoding with q-values; on equal
+  preference zstd beats Brotli, which beats GZip (zstd only when the
+  optional `zstandard` package is installed);
+- a response sent in one body message is compressed at once, unless it is
+  smaller than `min_size` or compressing it does not make it smaller;
+- a streamed response (StreamingResponse, FileResponse, exports) is
+  compressed incrementally as its chunks arrive, with Content-Length removed;
+- chunks or bodies larger than `offload_size` are compressed in a worker
+  thread so the event loop keeps serving other requests;
+- compressed bodies of cacheable paths (themes, menus, SEO settings by
+  default) are kept in a small LRU keyed by encoding and body digest, so an
+  unchanged payload is compressed once per worker.
+
+Error responses, already-encoded responses, non-text content types and
+Server-Sent Events are passed through untouched.
 """
 
-from fastapi import Request
-from fastapi.responses import Response, StreamingResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+import asyncio
 import gzip
+import hashlib
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
 import brotli
-from typing import Callable, AsyncGenerator, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import LocalCacheTier
+from app.core.config import settings
 from app.core.logging import logger
 
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/javascript",
+    "application/xml",
+    "application/xhtml+xml",
+)
+# Streamed to the browser event by event: buffering in a compressor would delay them
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+# Server preference when the client gives several encodings the same q-value
+ENCODING_PREFERENCE = ("zstd", "br", "gzip")
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q-value}; malformed q-values count as 0"""
+    codings: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def negotiate_encoding(header: str, available: Iterable[str]) -> Optional[str]:
+    """Best available encoding accepted by the client, None for identity"""
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get("*")
+    best: Optional[str] = None
+    best_q = 0.0
+    for encoding in available:
+        q = codings.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class StreamEncoder:
+    """Incremental compressor for one response"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            # wbits=31: gzip container
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_body(data: bytes, encoding: str, level: int) -> bytes:
+    """Compress a complete body"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level)
+
+
+class CompressedVariantCache:
+    """LRU of compressed bodies keyed by (encoding, level, body digest)"""
+
+    def __init__(
+        self,
+        max_entries: int = settings.COMPRESSION_CACHE_MAX_ENTRIES,
+        max_bytes: int = settings.COMPRESSION_CACHE_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0}
+        # Keyed by body digest: entries never go stale, they are only evicted
+        self._entries = LocalCacheTier(
+            ttl=None, max_entries=max_entries, max_item_bytes=None, max_bytes=max_bytes
+        )
+
+    @property
+    def size(self) -> int:
+        return self._entries.total_bytes
+
+    @staticmethod
+    def key(body: bytes, encoding: str, level: int) -> Tuple[str, int, bytes]:
+        return encoding, level, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: Tuple[str, int, bytes]) -> Optional[bytes]:
+        compressed = self._entries.get(key)
+        if compressed is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return compressed
+
+    def put(self, key: Tuple[str, int, bytes], compressed: bytes) -> None:
+        self._entries.set(key, compressed)
+
+    def clear(self) -> None:
+        self._entries.clear()
 
-class CompressionMiddleware(BaseHTTPMiddleware):
-    """Enhanced middleware for response compression (GZip/Brotli) with streaming support"""
+    def snapshot(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "bytes": self.size, **self.stats}
 
-    def __init__(self, app, min_size: int = 1024, compress_level: int = 6, use_brotli: bool = True):
-        super().__init__(app)
+
+compressed_variant_cache = CompressedVariantCache()
+
+
+class CompressionMiddleware:
+    """Streaming response compression (zstd / Brotli / GZip) as a pure ASGI middleware"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        min_size: int = 1024,
+        compress_level: int = 6,
+        use_brotli: bool = True,
+        use_zstd: bool = True,
+        offload_size: int = settings.COMPRESSION_OFFLOAD_SIZE,
+        cache_paths: Optional[Iterable[str]] = None,
+        variant_cache: Optional[CompressedVariantCache] = None,
+    ):
+        self.app = app
         self.min_size = min_size  # Minimum size to compress (bytes)
         self.compress_level = compress_level  # Compression level (1-9)
         self.use_brotli = use_brotli  # Use Brotli if available
-    
+        self.offload_size = offload_size
+        if cache_paths is None:
+            cache_paths = [path.strip() for path in settings.COMPRESSION_CACHE_PATHS.split(",") if path.strip()]
+        self.cache_paths = tuple(cache_paths)
+        self.variant_cache = variant_cache if variant_cache is not None else compressed_variant_cache
+        self.encodings: List[str] = [
+            encoding for encoding in ENCODING_PREFERENCE
+            if (encoding != "zstd" or (use_zstd and ZSTD_AVAILABLE)) and (encoding != "br" or use_brotli)
+        ]
+
     def _supports_compression(self, accept_encoding: str) -> tuple[bool, bool]:
         """Check if client supports compression"""
-        accept_encoding_lower = accept_encoding.lower()
-        supports_gzip = "gzip" in accept_encoding_lower
-        supports_brotli = "br" in accept_encoding_lower and self.use_brotli
+        codings = parse_accept_encoding(accept_encoding)
+        supports_gzip = codings.get("gzip", 0) > 0
+        supports_brotli = codings.get("br", 0) > 0 and self.use_brotli
         return supports_gzip, supports_brotli
-    
+
     def _compress_gzip(self, data: bytes) -> bytes:
         """Compress data using GZip"""
-        return gzip.compress(data, compresslevel=self.compress_level)
-    
+        return compress_body(data, "gzip", self.compress_level)
+
     def _compress_brotli(self, data: bytes) -> Optional[bytes]:
         """Compress data using Brotli"""
         try:
-            return brotli.compress(data, quality=self.compress_level)
+            return compress_body(data, "br", self.compress_level)
         except Exception:
             return None
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Check if client accepts compression
-        accept_encoding = request.headers.get("Accept-Encoding", "")
-        supports_gzip, supports_brotli = self._supports_compression(accept_encoding)
-        
-        # Call the next middleware/endpoint
-        response = await call_next(request)
-        
-        # Skip compression for certain status codes
-        if response.status_code >= 400:
-            return response
-        
-        # Skip compression for streaming responses or responses without body
-        if not hasattr(response, 'body'):
-            return response
-        
-        # Get content type
-        content_type = response.headers.get("Content-Type", "")
-        
-        # Only compress JSON, text, and JavaScript responses
-        compressible_types = [
-            "application/json",
-            "text/",
-            "application/javascript",
-            "application/xml",
-            "application/xhtml+xml",
-        ]
-        
-        if not any(ct in content_type for ct in compressible_types):
-            return response
-        
-        # Skip if already compressed
-        if response.headers.get("Content-Encoding"):
-            return response
-        
-        try:
-            body = response.body
-            
-            # Skip if too small (compression overhead not worth it)
-            if len(body) < self.min_size:
-                return response
-            
-            # Choose compression algorithm (Brotli preferred, fallback to GZip)
-            compressed_body: Optional[bytes] = None
-            encoding: Optional[str] = None
-            
-            if supports_brotli:
-                compressed_body = self._compress_brotli(body)
-                if compressed_body and len(compressed_body) < len(body):
-                    encoding = "br"
-            
-            if not encoding and supports_gzip:
-                compressed_body = self._compress_gzip(body)
-                if compressed_body and len(compressed_body) < len(body):
-                    encoding = "gzip"
-            
-            # Apply compression if beneficial
-            if encoding and compressed_body:
-                # For very large responses (>500KB), use streaming
-                if len(body) > 500 * 1024:
-                    async def compress_stream() -> AsyncGenerator[bytes, None]:
-                        if encoding == "br":
-                            compressor = brotli.Compressor(quality=self.compress_level)
-                        else:
-                            compressor = gzip.GzipFile(mode='wb', compresslevel=self.compress_level)
-                        
-                        chunk_size = 8192
-                        for i in range(0, len(body), chunk_size):
-                            chunk = body[i:i + chunk_size]
-                            if encoding == "br":
-                                compressed_chunk = compressor.process(chunk)
-                            else:
-                                compressed_chunk = compressor.compress(chunk)
-                            
-                            if compressed_chunk:
-                                yield compressed_chunk
-                        
-                        # Flush remaining data
-                        if encoding == "br":
-                            final = compressor.finish()
-                        else:
-                            final = compressor.flush()
-                        
-                        if final:
-                            yield final
-                    
-                    return StreamingResponse(
-                        compress_stream(),
-                        status_code=response.status_code,
-                        headers={
-                            **response.headers,
-                            "Content-Encoding": encoding,
-                            "Vary": "Accept-Encoding",
-                        },
-                        media_type=content_type
-                    )
+
+    def _level(self, encoding: str) -> int:
+        # zstd levels go to 22; its default (3) is faster than gzip -6 with a better ratio
+        return 3 if encoding == "zstd" else self.compress_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        path = scope.get("path", "")
+        cacheable = any(path.startswith(prefix) for prefix in self.cache_paths)
+        responder = _CompressionResponder(self, send, encoding, self._level(encoding), cacheable)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request `send` wrapper deciding on the first body message"""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str, level: int, cacheable: bool):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.cacheable = cacheable
+        self.start_message: Optional[Message] = None
+        self.encoder: Optional[StreamEncoder] = None
+        self.passthrough = False
+
+    def _should_compress(self, headers: Headers) -> bool:
+        if self.start_message["status"] >= 400:
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if any(content_type.startswith(excluded) for excluded in UNCOMPRESSED_TYPES):
+            return False
+        return any(compressible in content_type for compressible in COMPRESSIBLE_TYPES)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        if self.encoder is not None:
+            await self._send_chunk(message)
+            return
+
+        # First body message: decide
+        headers = Headers(raw=self.start_message["headers"])
+        if not self._should_compress(headers):
+            await self._start_passthrough(message)
+            return
+        body = message.get("body", b"")
+        if not message.get("more_body", False):
+            await self._send_whole(body)
+            return
+
+        self.encoder = StreamEncoder(self.encoding, self.level)
+        response_headers = MutableHeaders(scope=self.start_message)
+        del response_headers["content-length"]
+        self._mark_encoded(response_headers)
+        await self._send(self.start_message)
+        await self._send_chunk(message)
+
+    async def _start_passthrough(self, message: Message) -> None:
+        self.passthrough = True
+        await self._send(self.start_message)
+        await self._send(message)
+
+    async def _send_whole(self, body: bytes) -> None:
+        """Single-message body: compress it at once (from the variant cache when possible)"""
+        if len(body) < self.middleware.min_size:
+            await self._start_passthrough({"type": "http.response.body", "body": body})
+            return
+
+        cache = self.middleware.variant_cache if self.cacheable else None
+        key = cache.key(body, self.encoding, self.level) if cache is not None else None
+        compressed = cache.get(key) if cache is not None else None
+        if compressed is None:
+            try:
+                if len(body) >= self.middleware.offload_size:
+                    compressed = await asyncio.to_thread(compress_body, body, self.encoding, self.level)
                 else:
-                    # In-memory compression for smaller responses
-                    response.body = compressed_body
-                    response.headers["Content-Encoding"] = encoding
-                    response.headers["Content-Length"] = str(len(compressed_body))
-                    
-                    # Update Vary header
-                    vary = response.headers.get("Vary", "")
-                    if "Accept-Encoding" not in vary:
-                        response.headers["Vary"] = (
-                            f"{vary}, Accept-Encoding".strip(", ") if vary else "Accept-Encoding"
-                        )
-                    
-                    logger.debug(
-                        f"Compressed response: {len(body)} -> {len(compressed_body)} bytes "
-                        f"({(1 - len(compressed_body)/len(body))*100:.1f}% reduction)"
-                    )
-        
-        except Exception as e:
-            logger.error(f"Compression error: {e}")
-            # Return uncompressed response on error
-        
-        return response
+                    compressed = compress_body(body, self.encoding, self.level)
+            except Exception as e:
+                logger.error(f"Compression error: {e}")
+                compressed = None
+            if compressed is not None and cache is not None:
+                cache.put(key, compressed)
+
+        if compressed is None or len(compressed) >= len(body):
+            # Not worth it: send the original body
+            await self._start_passthrough({"type": "http.response.body", "body": body})
+            return
+
+        response_headers = MutableHeaders(scope=self.start_message)
+        response_headers["Content-Length"] = str(len(compressed))
+        self._mark_encoded(response_headers)
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": compressed})
+        logger.debug(
+            f"Compressed response ({self.encoding}): {len(body)} -> {len(compressed)} bytes "
+            f"({(1 - len(compressed) / len(body)) * 100:.1f}% reduction)"
+        )
+
+    async def _send_chunk(self, message: Message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if len(body) >= self.middleware.offload_size:
+            compressed = await asyncio.to_thread(self.encoder.compress, body)
+        else:
+            compressed = self.encoder.compress(body) if body else b""
+        if not more_body:
+            compressed += self.encoder.finish()
+        if compressed or not more_body:
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _mark_encoded(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        vary = headers.get("Vary", "")
+        if "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
@@ -0,0 +1,155 @@
+"""
+Conditional GET
+Answers If-None-Match / If-Modified-Since before the handler does its work
+
+A validator is a cheap version token for a resource (its id and updated_at,
+read with one narrow query) turned into a weak ETag and a Last-Modified
+date. Endpoints declare one with ``Depends(conditional(resolver))``: the
+resolver runs as an ordinary FastAPI dependency, before the handler body.
+When the request's preconditions match, NotModified is raised and a 304 is
+sent without loading or serializing the resource. Otherwise the validator is
+kept in the request state and CacheHeadersMiddleware copies it onto the
+response, streaming responses included.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Depends, Request
+from fastapi.responses import Response
+
+VALIDATOR_STATE_KEY = "conditional_validator"
+
+# Headers a 304 carries over from the full response (RFC 9110, 15.4.5)
+NOT_MODIFIED_HEADERS = ("cache-control", "content-location", "date", "etag", "expires", "last-modified", "vary")
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from version parts (ids, timestamps, hashes)"""
+    token = "|".join("" if part is None else str(part) for part in parts)
+    return f'W/"{hashlib.blake2b(token.encode(), digest_size=16).hexdigest()}"'
+
+
+def parse_etags(header: str) -> List[str]:
+    """Entity tags of an If-None-Match header ("*" included as is)"""
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match or not etag:
+        return False
+    tags = parse_etags(if_none_match)
+    if "*" in tags:
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in tags}
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+@dataclass(frozen=True)
+class Validator:
+    """Version of a resource: ETag and/or Last-Modified"""
+
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    private: bool = False
+
+    @classmethod
+    def for_version(cls, *parts: Any, last_modified: Optional[datetime] = None, private: bool = False) -> "Validator":
+        return cls(etag=make_etag(*parts), last_modified=last_modified, private=private)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["ETag"] = self.etag
+        if self.last_modified:
+            headers["Last-Modified"] = http_date(self.last_modified)
+        return headers
+
+    def is_fresh(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """
+        Whether the client's copy is current. If-Modified-Since is only
+        looked at without If-None-Match, at one second granularity.
+        """
+        if if_none_match:
+            return etag_matches(if_none_match, self.etag)
+        since = parse_http_date(if_modified_since)
+        if since is None or self.last_modified is None:
+            return False
+        last_modified = self.last_modified
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+
+
+class NotModified(Exception):
+    """Raised by conditional() when the client's copy is current"""
+
+    def __init__(self, validator: Validator):
+        super().__init__("Not Modified")
+        self.validator = validator
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """Bodyless 304 keeping only the headers allowed on it"""
+    kept = {name: value for name, value in headers.items() if name.lower() in NOT_MODIFIED_HEADERS}
+    return Response(status_code=304, headers=kept)
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return not_modified_response(exc.validator.headers())
+
+
+def get_validator(scope: Dict[str, Any]) -> Optional[Validator]:
+    """Validator declared for the current request, if any"""
+    return scope.get("state", {}).get(VALIDATOR_STATE_KEY)
+
+
+def evaluate_preconditions(request: Request, validator: Validator) -> None:
+    """Remember the validator for the response and raise NotModified when fresh"""
+    setattr(request.state, VALIDATOR_STATE_KEY, validator)
+    if request.method not in ("GET", "HEAD"):
+        return
+    if validator.is_fresh(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        raise NotModified(validator)
+
+
+def conditional(resolver: Callable[..., Awaitable[Optional[Validator]]]) -> Callable[..., Awaitable[Optional[Validator]]]:
+    """
+    Dependency running `resolver` (itself a dependency, so it may take a
+    path parameter, the db session or the current user) and answering 304
+    before the handler when the request's preconditions match. A resolver
+    returning None (e.g. resource missing or not accessible) lets the
+    handler run and produce its usual response.
+    """
+
+    async def dependency(request: Request, validator: Optional[Validator] = Depends(resolver)) -> Optional[Validator]:
+        if validator is not None:
+            evaluate_preconditions(request, validator)
+        return validator
+
+    return dependency
@@ -194,6 +194,82 @@ class Settings(BaseSettings):
         description="Redis connection URL for caching",
     )
 
+    # In-process cache tier (in front of Redis, or alone when Redis is not configured)
+    CACHE_LOCAL_ENABLED: bool = Field(
+        default=True,
+        description="Keep a per-process LRU/TTL copy of cached values in front of Redis",
+    )
+    CACHE_LOCAL_TTL: int = Field(
+        default=30,
+        ge=1,
+        le=3600,
+        description="Maximum lifetime of an in-process cache entry (seconds)",
+    )
+    CACHE_LOCAL_MAX_ENTRIES: int = Field(
+        default=1000,
+        ge=0,
+        description="Default maximum number of in-process entries per cache namespace",
+    )
+    CACHE_LOCAL_NAMESPACE_LIMITS: str = Field(
+        default="",
+        description="Per-namespace entry limits, e.g. 'query=2000,tag=500,themes=50'",
+    )
+    CACHE_LOCAL_MAX_ITEM_BYTES: int = Field(
+        default=256 * 1024,
+        ge=0,
+        description="Values larger than this (serialized) are only stored in Redis",
+    )
+    CACHE_PUBSUB_INVALIDATION: bool = Field(
+        default=True,
+        description="Broadcast cache writes/invalidations over Redis pub/sub to drop other workers' local copies",
+    )
+    CACHE_INVALIDATION_CHANNEL: str = Field(
+        default="cache:invalidate",
+        description="Redis pub/sub channel used for cache invalidation messages",
+    )
+
+    # Authenticated principal cache (get_current_user)
+    PRINCIPAL_CACHE_TTL: int = Field(
+        default=30,
+        ge=0,
+        le=3600,
+        description="Seconds an authenticated user snapshot is reused without a database query (0 disables)",
+    )
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum number of cached principals per process",
+    )
+
+    # Compiled RBAC permission sets (RBACService)
+    RBAC_PERMISSION_CACHE_TTL: int = Field(
+        default=10,
+        ge=0,
+        le=300,
+        description="Seconds a compiled permission set is reused; bounds staleness when an invalidation is missed (0 disables)",
+    )
+    RBAC_PERMISSION_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum number of compiled permission sets per process",
+    )
+
+    # WebSocket fan-out (ConnectionManager)
+    WEBSOCKET_SEND_QUEUE_SIZE: int = Field(
+        default=256,
+        ge=1,
+        description="Messages buffered per WebSocket before the client is evicted as a slow consumer",
+    )
+    WEBSOCKET_SEND_TIMEOUT: float = Field(
+        default=10.0,
+        gt=0,
+        description="Seconds a single WebSocket send may take before the client is evicted",
+    )
+    WEBSOCKET_FANOUT_CHANNEL: str = Field(
+        default="ws:fanout",
+        description="Redis pub/sub channel relaying WebSocket messages between workers",
+    )
+
     # SendGrid Email Configuration
     SENDGRID_API_KEY: str = Field(
         default="",
@@ -249,6 +325,255 @@ class Settings(BaseSettings):
         description="Threshold in seconds to log slow queries",
     )
 
+    # PDF Render Pool Configuration
+    PDF_RENDER_WORKERS: int = Field(
+        default=0,
+        ge=0,
+        le=32,
+        description="Number of PDF render worker processes (0 = one per CPU core)",
+    )
+    PDF_RENDER_QUEUE_SIZE: int = Field(
+        default=16,
+        ge=0,
+        le=256,
+        description="PDF renders allowed to wait for a worker before requests get 503",
+    )
+    PDF_RENDER_TIMEOUT: float = Field(
+        default=60.0,
+        ge=1.0,
+        le=600.0,
+        description="Timeout for a single PDF render (seconds)",
+    )
+
+    PDF_CACHE_DIR: str = Field(
+        default="",
+        description="Directory for cached assessment PDFs (empty = system temp directory)",
+    )
+    PDF_CACHE_MAX_BYTES: int = Field(
+        default=512 * 1024 * 1024,
+        ge=0,
+        description="Total size of cached assessment PDFs; least recently used files are evicted beyond it (0 = no limit)",
+    )
+
+    # Security audit log writer
+    AUDIT_ASYNC_WRITES: bool = Field(
+        default=True,
+        description="Queue security audit events and insert them in batches (critical events stay synchronous)",
+    )
+    AUDIT_QUEUE_SIZE: int = Field(
+        default=10000,
+        ge=1,
+        description="Audit events held in memory before new events are spilled to disk",
+    )
+    AUDIT_BATCH_SIZE: int = Field(
+        default=500,
+        ge=1,
+        le=10000,
+        description="Maximum audit events per multi-row INSERT",
+    )
+    AUDIT_FLUSH_INTERVAL: float = Field(
+        default=1.0,
+        gt=0,
+        le=60.0,
+        description="Maximum time an audit event waits in the queue (seconds)",
+    )
+    AUDIT_WRITE_TIMEOUT: float = Field(
+        default=5.0,
+        gt=0,
+        le=120.0,
+        description="Batches slower than this are spilled to disk and retried later (seconds)",
+    )
+    AUDIT_SPILL_DIR: str = Field(
+        default="",
+        description="Directory for audit events that could not be written yet (empty = system temp directory)",
+    )
+    AUDIT_SYNC_SEVERITIES: str = Field(
+        default="critical",
+        description="Comma-separated severities always written synchronously",
+    )
+
+    # Request pipeline (app.core.pipeline)
+    MIDDLEWARE_DISABLED_STAGES: str = Field(
+        default="",
+        description="Comma-separated names of middleware pipeline stages to turn off",
+    )
+
+    # Response compression
+    COMPRESSION_OFFLOAD_SIZE: int = Field(
+        default=256 * 1024,
+        ge=0,
+        description="Bodies or chunks at least this large are compressed in a worker thread (bytes)",
+    )
+    COMPRESSION_CACHE_PATHS: str = Field(
+        default="/api/v1/themes,/api/v1/menus,/api/v1/seo",
+        description="Comma-separated path prefixes whose compressed bodies are cached",
+    )
+    COMPRESSION_CACHE_MAX_ENTRIES: int = Field(
+        default=256,
+        ge=0,
+        description="Maximum number of cached compressed bodies per process",
+    )
+    COMPRESSION_CACHE_MAX_BYTES: int = Field(
+        default=16 * 1024 * 1024,
+        ge=0,
+        description="Maximum total size of cached compressed bodies per process (bytes)",
+    )
+
+    # API key authentication
+    API_KEY_CACHE_TTL: int = Field(
+        default=60,
+        ge=0,
+        le=3600,
+        description="Seconds a verified API key is reused without a database query (0 disables)",
+    )
+    API_KEY_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum number of cached verified API keys per process",
+    )
+    API_KEY_USAGE_FLUSH_INTERVAL: float = Field(
+        default=10.0,
+        gt=0,
+        le=3600.0,
+        description="Interval between batched API key usage writes (seconds)",
+    )
+    API_KEY_USAGE_MAX_PENDING: int = Field(
+        default=5000,
+        ge=1,
+        description="Keys with unwritten usage that trigger an early flush",
+    )
+    API_KEY_AUDIT_WINDOW: float = Field(
+        default=300.0,
+        ge=0,
+        description="At most one API_KEY_USED audit event per key per window (seconds)",
+    )
+
+    # Presigned S3 URLs
+    PRESIGNED_URL_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum number of cached presigned URLs per process",
+    )
+    PRESIGNED_URL_REFRESH_MARGIN: int = Field(
+        default=3600,
+        ge=0,
+        description="Presigned URLs are re-signed this long before they expire (seconds)",
+    )
+
+    # Imports
+    IMPORT_PROGRESS_MAX_EVENTS: int = Field(
+        default=1000,
+        ge=1,
+        description="Progress events kept per import for reconnecting clients",
+    )
+    IMPORT_PROGRESS_TTL: int = Field(
+        default=600,
+        ge=1,
+        description="How long a finished import's progress stays available (seconds)",
+    )
+    IMPORT_PROGRESS_IDLE_TTL: int = Field(
+        default=6 * 3600,
+        ge=1,
+        description="Imports without progress for this long are considered abandoned (seconds)",
+    )
+    IMPORT_PROGRESS_STATUS_INTERVAL: float = Field(
+        default=0.25,
+        ge=0,
+        le=60.0,
+        description="Minimum interval between progress status events (seconds)",
+    )
+    IMPORT_PROGRESS_KEEPALIVE: float = Field(
+        default=15.0,
+        gt=0,
+        le=300.0,
+        description="Keepalive interval of the import progress stream (seconds)",
+    )
+    CONTACT_IMPORT_CHUNK_SIZE: int = Field(
+        default=500,
+        ge=1,
+        le=10000,
+        description="Contacts imported per chunk (one bulk write each)",
+    )
+    CONTACT_IMPORT_PHOTO_CONCURRENCY: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="Concurrent photo uploads during a contact import",
+    )
+    IMPORT_COLUMNAR_BATCH_SIZE: int = Field(
+        default=10000,
+        ge=1,
+        description="Rows per record batch read from Parquet / Arrow imports",
+    )
+
+    # Exports
+    EXPORT_STREAM_BATCH_SIZE: int = Field(
+        default=1000,
+        ge=1,
+        description="Rows fetched and encoded per batch by streaming exports",
+    )
+    EXPORT_STREAM_CHUNK_SIZE: int = Field(
+        default=64 * 1024,
+        ge=1,
+        description="Approximate size of the chunks sent by streaming exports (bytes)",
+    )
+    EXPORT_COLUMNAR_BATCH_SIZE: int = Field(
+        default=10000,
+        ge=1,
+        description="Rows per record batch (Parquet row group) in Parquet / Arrow exports",
+    )
+
+    # MBTI PDF extraction / OCR
+    MBTI_EXTRACTION_CACHE_TTL: int = Field(
+        default=24 * 3600,
+        ge=0,
+        description="How long an MBTI PDF extraction result is reused (seconds, 0 disables)",
+    )
+    MBTI_EXTRACTION_CACHE_MAX_ENTRIES: int = Field(
+        default=512,
+        ge=0,
+        description="Maximum number of cached MBTI extraction results per process",
+    )
+    OCR_PAGE_CONCURRENCY: int = Field(
+        default=4,
+        ge=1,
+        le=32,
+        description="Maximum number of pages sent to the vision API at the same time",
+    )
+    OCR_RASTER_TEXT_DPI: int = Field(
+        default=150,
+        ge=72,
+        le=600,
+        description="Rasterization DPI of pages with a text layer",
+    )
+    OCR_RASTER_SCAN_DPI: int = Field(
+        default=200,
+        ge=72,
+        le=600,
+        description="Rasterization DPI of scanned pages",
+    )
+    OCR_RASTER_COLOR_MODE: str = Field(
+        default="auto",
+        pattern="^(auto|color|grayscale)$",
+        description="'auto' (grayscale unless the page uses color), 'color' or 'grayscale'",
+    )
+    OCR_RASTER_FORMAT: str = Field(
+        default="auto",
+        pattern="^(auto|webp|jpeg|jpg|png)$",
+        description="Page image format: 'auto' (WebP when available, else JPEG), 'webp', 'jpeg' or 'png'",
+    )
+    OCR_RASTER_QUALITY: int = Field(
+        default=80,
+        ge=1,
+        le=100,
+        description="Lossy encoding quality of page images",
+    )
+    OCR_RASTER_MAX_BYTES: int = Field(
+        default=400 * 1024,
+        ge=0,
+        description="Encoded size budget per page image (bytes, 0 disables)",
+    )
+
     # Multi-Tenancy Configuration
     TENANCY_MODE: str = Field(
         default="single",
@@ -7,9 +7,12 @@ import os
 from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, Request
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.pipeline import Stage, StageMiddleware
 
 
 def validate_origin(origin: str, allowed_origins: List[str]) -> bool:
@@ -70,8 +73,80 @@ def get_cors_origins() -> List[str]:
     return cors_origins
 
 
-def setup_cors(app: FastAPI) -> None:
-    """Setup CORS middleware with tightened security"""
+class CORSHeadersStage(Stage):
+    """
+    Pipeline stage ensuring CORS headers are always present, even on errors,
+    and answering OPTIONS preflight requests.
+    """
+
+    name = "cors_headers"
+    ALLOW_METHODS = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
+
+    def __init__(self, cors_origins: List[str], allowed_headers: List[str], is_production: bool, enabled: bool = True):
+        super().__init__(enabled)
+        self.cors_origins = cors_origins
+        self.allow_headers = ", ".join(allowed_headers)
+        self.is_production = is_production
+
+    def get_allowed_origin(self, origin: str) -> Optional[str]:
+        """Determine allowed origin"""
+        cors_origins = self.cors_origins
+        # In production, be more permissive if origin matches Railway domain pattern
+        if origin and cors_origins and validate_origin(origin, cors_origins):
+            return origin
+        elif "*" in cors_origins:
+            return "*"
+        elif cors_origins:
+            # Check if origin matches any Railway domain pattern
+            if origin and (".up.railway.app" in origin or ".railway.app" in origin):
+                # Allow Railway domains if any Railway domain is in allowed origins
+                for allowed in cors_origins:
+                    if ".railway.app" in allowed or ".up.railway.app" in allowed:
+                        logger.info(f"CORS: Allowing Railway origin {origin} (matched pattern {allowed})")
+                        return origin
+            return cors_origins[0]
+        elif not self.is_production:
+            return origin or "*"
+        else:
+            # In production, allow Railway domains even if not explicitly configured
+            if origin and (".up.railway.app" in origin or ".railway.app" in origin):
+                logger.info(f"CORS: Allowing Railway origin {origin} (production fallback)")
+                return origin
+            logger.warning(f"CORS: Origin {origin} not in allowed list {cors_origins}")
+            return None
+
+    def _add_cors_headers(self, headers: MutableHeaders, allowed_origin: str) -> None:
+        headers["Access-Control-Allow-Origin"] = allowed_origin
+        headers["Access-Control-Allow-Credentials"] = "true"
+        headers["Access-Control-Allow-Methods"] = self.ALLOW_METHODS
+        headers["Access-Control-Allow-Headers"] = self.allow_headers
+
+    async def on_request(self, request: Request) -> Optional[Response]:
+        request.state.cors_allowed_origin = self.get_allowed_origin(request.headers.get("Origin", ""))
+
+        # Handle OPTIONS preflight requests explicitly
+        if request.method == "OPTIONS":
+            response = Response()
+            allowed_origin = request.state.cors_allowed_origin
+            if allowed_origin:
+                self._add_cors_headers(response.headers, allowed_origin)
+                response.headers["Access-Control-Max-Age"] = "3600"
+            return response
+        return None
+
+    def on_response(self, request: Request, status: int, headers: MutableHeaders) -> None:
+        # Ensure CORS headers are present on every response
+        allowed_origin = request.state.cors_allowed_origin
+        if allowed_origin and "access-control-allow-origin" not in headers:
+            self._add_cors_headers(headers, allowed_origin)
+
+
+def setup_cors(app: FastAPI, pipeline: bool = False) -> Optional[CORSHeadersStage]:
+    """
+    Setup CORS middleware with tightened security. With pipeline=True the
+    CORS headers stage is returned for the caller's MiddlewarePipeline
+    instead of being added as its own middleware.
+    """
     cors_origins = get_cors_origins()
     
     # Determine if we're in production
@@ -120,80 +195,14 @@ def setup_cors(app: FastAPI) -> None:
         max_age=3600,  # Cache preflight requests for 1 hour
     )
     
-    # Add a middleware to ensure CORS headers are always present
-    # This middleware runs AFTER CORSMiddleware but BEFORE routes
-    # Note: In FastAPI, middlewares are executed in reverse order of addition
-    # So this middleware (added after CORSMiddleware) runs BEFORE CORSMiddleware
+    # Add a stage to ensure CORS headers are always present
+    # Added after CORSMiddleware, so it runs BEFORE CORSMiddleware
     # This ensures we can add CORS headers even if CORSMiddleware doesn't
-    @app.middleware("http")
-    async def add_cors_headers_middleware(request: Request, call_next):
-        """Ensure CORS headers are always present, even on errors"""
-        # Get origin from request
-        origin = request.headers.get("Origin", "")
-        
-        # Determine allowed origin
-        def get_allowed_origin():
-            # In production, be more permissive if origin matches Railway domain pattern
-            if origin and cors_origins and validate_origin(origin, cors_origins):
-                return origin
-            elif "*" in cors_origins:
-                return "*"
-            elif cors_origins:
-                # Check if origin matches any Railway domain pattern
-                if origin and (".up.railway.app" in origin or ".railway.app" in origin):
-                    # Allow Railway domains if any Railway domain is in allowed origins
-                    for allowed in cors_origins:
-                        if ".railway.app" in allowed or ".up.railway.app" in allowed:
-                            logger.info(f"CORS: Allowing Railway origin {origin} (matched pattern {allowed})")
-                            return origin
-                return cors_origins[0]
-            elif not is_production:
-                return origin or "*"
-            else:
-                # In production, allow Railway domains even if not explicitly configured
-                if origin and (".up.railway.app" in origin or ".railway.app" in origin):
-                    logger.info(f"CORS: Allowing Railway origin {origin} (production fallback)")
-                    return origin
-                logger.warning(f"CORS: Origin {origin} not in allowed list {cors_origins}")
-                return None
-        
-        allowed_origin = get_allowed_origin()
-        
-        # Helper function to add CORS headers to any response
-        def add_cors_to_response(resp):
-            from starlette.responses import Response
-            # Ensure resp is a Response instance before accessing headers
-            if not isinstance(resp, Response):
-                return resp
-            if allowed_origin and "Access-Control-Allow-Origin" not in resp.headers:
-                resp.headers["Access-Control-Allow-Origin"] = allowed_origin
-                resp.headers["Access-Control-Allow-Credentials"] = "true"
-                resp.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
-                resp.headers["Access-Control-Allow-Headers"] = ", ".join(allowed_headers)
-            return resp
-        
-        # Handle OPTIONS preflight requests explicitly
-        if request.method == "OPTIONS":
-            from starlette.responses import Response
-            response = Response()
-            if allowed_origin:
-                response.headers["Access-Control-Allow-Origin"] = allowed_origin
-                response.headers["Access-Control-Allow-Credentials"] = "true"
-                response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
-                response.headers["Access-Control-Allow-Headers"] = ", ".join(allowed_headers)
-                response.headers["Access-Control-Max-Age"] = "3600"
-            return response
-        
-        # Process the request
-        try:
-            response = await call_next(request)
-            # Ensure CORS headers are present on successful response
-            return add_cors_to_response(response)
-        except Exception as e:
-            # Don't intercept exceptions - let them propagate to error handlers
-            # The error handlers will create proper responses, and CORSMiddleware
-            # will add CORS headers automatically
-            raise
-    
+    stage = CORSHeadersStage(cors_origins, allowed_headers, is_production)
+
     logger.info("✅ CORS middleware configured with tightened security")
 
+    if pipeline:
+        return stage
+    app.add_middleware(StageMiddleware, stage=stage)
+    return None
@@ -3,59 +3,40 @@ CSRF Protection Middleware
 Implements double-submit cookie pattern for CSRF protection
 """
 
+import http.cookies
 import secrets
 from typing import Optional
 from fastapi import Request, HTTPException, status
 from fastapi.responses import Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 
+from app.core.pipeline import Stage, StageMiddleware
 
-class CSRFMiddleware(BaseHTTPMiddleware):
-    """CSRF protection middleware using double-submit cookie pattern"""
-    
-    def __init__(self, app, secret_key: str, cookie_name: str = "csrf_token"):
-        super().__init__(app)
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+CSRF_EXEMPT_PREFIXES = ("/api/", "/docs", "/redoc", "/openapi.json")
+
+
+class CSRFStage(Stage):
+    """Pipeline stage for CSRF protection using double-submit cookie pattern"""
+
+    name = "csrf"
+
+    def __init__(self, secret_key: str, cookie_name: str = "csrf_token", enabled: bool = True):
+        super().__init__(enabled)
         self.secret_key = secret_key
         self.cookie_name = cookie_name
         self.header_name = "X-CSRF-Token"
-    
-    async def dispatch(self, request: Request, call_next):
-        """Process request and validate CSRF token"""
-        
-        # Skip CSRF check for safe methods (GET, HEAD, OPTIONS)
-        if request.method in ("GET", "HEAD", "OPTIONS"):
-            response = await call_next(request)
-            # Generate and set CSRF token cookie for safe methods
-            csrf_token = secrets.token_urlsafe(32)
-            response.set_cookie(
-                key=self.cookie_name,
-                value=csrf_token,
-                httponly=False,  # Must be readable by JavaScript for double-submit
-                secure=request.url.scheme == "https",
-                samesite="strict",
-                max_age=3600,  # 1 hour
-            )
-            return response
-        
-        # Skip CSRF for API endpoints that use JWT authentication
-        # CSRF protection is not needed for API endpoints using Bearer tokens
-        # as they are protected by CORS and JWT validation
-        path = request.url.path
-        if path.startswith("/api/") or path.startswith("/docs") or path.startswith("/redoc") or path.startswith("/openapi.json"):
-            # For API endpoints, skip CSRF check but still set cookie for browser-based requests
-            response = await call_next(request)
-            # Optionally set CSRF token cookie for API endpoints too
-            csrf_token = secrets.token_urlsafe(32)
-            response.set_cookie(
-                key=self.cookie_name,
-                value=csrf_token,
-                httponly=False,
-                secure=request.url.scheme == "https",
-                samesite="strict",
-                max_age=3600,
-            )
-            return response
-        
+
+    def _issues_cookie(self, request: Request) -> bool:
+        # Safe methods, and API endpoints that use JWT authentication
+        # (protected by CORS and JWT validation, so not checked)
+        return request.method in SAFE_METHODS or request.url.path.startswith(CSRF_EXEMPT_PREFIXES)
+
+    async def on_request(self, request: Request) -> Optional[Response]:
+        """Validate CSRF token"""
+        if self._issues_cookie(request):
+            return None
+
         # For unsafe methods (POST, PUT, DELETE, PATCH) on non-API endpoints, validate CSRF token
         csrf_token_cookie = request.cookies.get(self.cookie_name)
         csrf_token_header = request.headers.get(self.header_name)
@@ -74,8 +55,28 @@ class CSRFMiddleware(BaseHTTPMiddleware):
             )
         
         # CSRF validation passed, continue
-        response = await call_next(request)
-        return response
+        return None
+
+    def on_response(self, request: Request, status: int, headers: MutableHeaders) -> None:
+        """Generate and set a fresh CSRF token cookie"""
+        if not self._issues_cookie(request):
+            return
+        cookie = http.cookies.SimpleCookie()
+        cookie[self.cookie_name] = generate_csrf_token()
+        cookie[self.cookie_name]["max-age"] = 3600  # 1 hour
+        cookie[self.cookie_name]["path"] = "/"
+        if request.url.scheme == "https":
+            cookie[self.cookie_name]["secure"] = True
+        # Not httponly: must be readable by JavaScript for double-submit
+        cookie[self.cookie_name]["samesite"] = "strict"
+        headers.append("set-cookie", cookie.output(header="").strip())
+
+
+class CSRFMiddleware(StageMiddleware):
+    """CSRF protection middleware using double-submit cookie pattern"""
+
+    def __init__(self, app, secret_key: str, cookie_name: str = "csrf_token"):
+        super().__init__(app, CSRFStage(secret_key, cookie_name))
 
 
 def generate_csrf_token() -> str:
@@ -156,7 +156,7 @@ def validate_document_file(file: UploadFile, max_size: int = MAX_FILE_SIZE_DOCUM
 
 def validate_import_file(file: UploadFile, max_size: int = MAX_FILE_SIZE_DOCUMENT) -> Tuple[bool, Optional[str]]:
     """
-    Validate import file (CSV, Excel, JSON).
+    Validate import file (CSV, Excel, JSON, Parquet, Arrow).
     
     Args:
         file: UploadFile to validate
@@ -170,13 +170,19 @@ def validate_import_file(file: UploadFile, max_size: int = MAX_FILE_SIZE_DOCUMEN
     if not is_valid:
         return False, error
     
-    # Validate type - allow CSV, Excel, JSON
-    allowed_extensions = [".csv", ".xls", ".xlsx", ".json"]
+    # Validate type - allow CSV, Excel, JSON, Parquet, Arrow
+    allowed_extensions = [".csv", ".xls", ".xlsx", ".json", ".parquet", ".arrow", ".arrows", ".feather"]
     allowed_types = [
         "text/csv",
         "application/vnd.ms-excel",
         "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        "application/json"
+        "application/json",
+        "application/vnd.apache.parquet",
+        "application/x-parquet",
+        "application/vnd.apache.arrow.file",
+        "application/vnd.apache.arrow.stream",
+        # Browsers send binary formats they don't know as octet-stream
+        "application/octet-stream"
     ]
     
     is_valid, error = validate_file_type(
@@ -6,9 +6,10 @@ Restricts admin endpoints to whitelisted IP addresses
 import os
 from typing import List, Optional
 from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
 
 from app.core.logging import logger
+from app.core.pipeline import Stage, StageMiddleware
 
 
 def get_client_ip(request: Request) -> str:
@@ -46,11 +47,13 @@ def parse_ip_whitelist(whitelist_str: Optional[str]) -> List[str]:
     return ips
 
 
-class IPWhitelistMiddleware(BaseHTTPMiddleware):
-    """Middleware to restrict endpoints to whitelisted IPs"""
-    
-    def __init__(self, app, whitelist: List[str], admin_paths: List[str] = None):
-        super().__init__(app)
+class IPWhitelistStage(Stage):
+    """Pipeline stage restricting admin endpoints to whitelisted IPs"""
+
+    name = "ip_whitelist"
+
+    def __init__(self, whitelist: List[str], admin_paths: List[str] = None, enabled: bool = True):
+        super().__init__(enabled)
         self.whitelist = whitelist
         self.admin_paths = admin_paths or ["/api/v1/admin"]
     
@@ -83,12 +86,12 @@ class IPWhitelistMiddleware(BaseHTTPMiddleware):
         
         return False
     
-    async def dispatch(self, request: Request, call_next):
+    async def on_request(self, request: Request) -> Optional[Response]:
         """Check IP whitelist for admin endpoints"""
         
         # Only check whitelist for admin paths
         if not self.is_admin_path(str(request.url.path)):
-            return await call_next(request)
+            return None
         
         # Get client IP
         client_ip = get_client_ip(request)
@@ -101,23 +104,36 @@ class IPWhitelistMiddleware(BaseHTTPMiddleware):
                 detail="Access denied: IP address not whitelisted"
             )
         
-        response = await call_next(request)
-        return response
+        return None
+
+
+class IPWhitelistMiddleware(StageMiddleware):
+    """Middleware to restrict endpoints to whitelisted IPs"""
+
+    def __init__(self, app, whitelist: List[str], admin_paths: List[str] = None):
+        super().__init__(app, IPWhitelistStage(whitelist, admin_paths))
 
 
-def setup_ip_whitelist(app, admin_paths: List[str] = None) -> None:
-    """Setup IP whitelist middleware"""
+def setup_ip_whitelist(app, admin_paths: List[str] = None, pipeline: bool = False) -> Optional[IPWhitelistStage]:
+    """
+    Setup IP whitelist middleware. With pipeline=True the stage (None when
+    no whitelist is configured) is returned for the caller's
+    MiddlewarePipeline instead of being added.
+    """
     # Get whitelist from environment
     whitelist_str = os.getenv("ADMIN_IP_WHITELIST", "")
     whitelist = parse_ip_whitelist(whitelist_str)
     
-    if whitelist:
-        app.add_middleware(
-            IPWhitelistMiddleware,
-            whitelist=whitelist,
-            admin_paths=admin_paths or ["/api/v1/admin"],
-        )
-        logger.info(f"✅ IP whitelist enabled for admin endpoints: {whitelist}")
-    else:
+    if not whitelist:
         logger.warning("⚠️ ADMIN_IP_WHITELIST not set - admin endpoints accessible from any IP")
+        return None
 
+    logger.info(f"✅ IP whitelist enabled for admin endpoints: {whitelist}")
+    if pipeline:
+        return IPWhitelistStage(whitelist=whitelist, admin_paths=admin_paths or ["/api/v1/admin"])
+    app.add_middleware(
+        IPWhitelistMiddleware,
+        whitelist=whitelist,
+        admin_paths=admin_paths or ["/api/v1/admin"],
+    )
+    return None
@@ -0,0 +1,161 @@
+"""
+Middleware Pipeline
+Runs the request/response middleware stages in a single pure ASGI layer
+
+Each BaseHTTPMiddleware layer costs a task, a memory stream and a response
+wrapper per request. Stages instead get plain hooks on one shared Request:
+
+- on_request(request): runs outermost first; returning a response (or
+  raising HTTPException) short-circuits the rest of the pipeline and the app
+- on_response(request, status, headers): runs innermost first on the
+  response start message, so streamed bodies are never buffered
+- on_finish(request, exc): always runs once the response is done (cleanup)
+
+A short-circuit response only goes through the on_response hooks of the
+stages before the one that produced it, like a nested middleware stack.
+Stages are switched off with their ``enabled`` flag (set from the existing
+environment toggles) or by name in MIDDLEWARE_DISABLED_STAGES.
+"""
+
+import time
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import logger
+
+ErrorHandler = Callable[[Request, HTTPException], Awaitable[Response]]
+
+
+class Stage:
+    """One middleware step; hooks left as is are skipped by the pipeline"""
+
+    name = "stage"
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+
+    async def on_request(self, request: Request) -> Optional[Response]:
+        return None
+
+    def on_response(self, request: Request, status: int, headers: MutableHeaders) -> None:
+        return None
+
+    def on_finish(self, request: Request, exc: Optional[BaseException]) -> None:
+        return None
+
+
+def _overrides(stage: Stage, hook: str) -> bool:
+    return getattr(type(stage), hook) is not getattr(Stage, hook)
+
+
+async def default_error_handler(request: Request, exc: HTTPException) -> Response:
+    """FastAPI's default rendering of an HTTPException"""
+    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=getattr(exc, "headers", None))
+
+
+class MiddlewarePipeline:
+    """Pure ASGI middleware running `stages` in order (outermost first)"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        stages: Sequence[Stage],
+        error_handler: Optional[ErrorHandler] = None,
+        disabled: Optional[Sequence[str]] = None,
+    ):
+        self.app = app
+        if disabled is None:
+            disabled = settings.MIDDLEWARE_DISABLED_STAGES.split(",")
+        disabled_names = {name.strip() for name in disabled if name.strip()}
+        self.stages: List[Stage] = [
+            stage for stage in stages if stage.enabled and stage.name not in disabled_names
+        ]
+        self.error_handler = error_handler or default_error_handler
+        self._plan = [(stage, _overrides(stage, "on_request")) for stage in self.stages]
+        self._has_response_hooks = any(_overrides(stage, "on_response") for stage in self.stages)
+        self._has_finish_hooks = any(_overrides(stage, "on_finish") for stage in self.stages)
+
+    @property
+    def stage_names(self) -> List[str]:
+        return [stage.name for stage in self.stages]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.stages:
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        passed: List[Stage] = []
+        started: List[Stage] = []
+        response: Optional[Response] = None
+        error: Optional[BaseException] = None
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self._has_response_hooks:
+                headers = MutableHeaders(scope=message)
+                for stage in reversed(passed):
+                    stage.on_response(request, message["status"], headers)
+            await send(message)
+
+        try:
+            for stage, has_request_hook in self._plan:
+                started.append(stage)
+                if has_request_hook:
+                    try:
+                        response = await stage.on_request(request)
+                    except HTTPException as exc:
+                        response = await self.error_handler(request, exc)
+                    if response is not None:
+                        break
+                passed.append(stage)
+
+            if response is not None:
+                await response(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            if self._has_finish_hooks:
+                for stage in reversed(started):
+                    stage.on_finish(request, error)
+
+
+class StageMiddleware(MiddlewarePipeline):
+    """A single stage used as its own middleware (app.add_middleware)"""
+
+    def __init__(self, app: ASGIApp, stage: Stage, error_handler: Optional[ErrorHandler] = None):
+        super().__init__(app, [stage], error_handler=error_handler, disabled=())
+        self.stage = stage
+
+
+class RequestLoggingStage(Stage):
+    """Logs each request and its status and duration"""
+
+    name = "request_log"
+
+    async def on_request(self, request: Request) -> Optional[Response]:
+        request.state.log_started_at = time.time()
+        client = request.client.host if request.client else "unknown"
+        logger.info(f"Incoming request: {request.method} {request.url.path} from {client}")
+        return None
+
+    def on_response(self, request: Request, status: int, headers: MutableHeaders) -> None:
+        process_time = time.time() - request.state.log_started_at
+        logger.info(f"Request completed: {request.method} {request.url.path} - {status} ({process_time:.4f}s)")
+
+    def on_finish(self, request: Request, exc: Optional[BaseException]) -> None:
+        if exc is None or not isinstance(exc, Exception):
+            return
+        process_time = time.time() - getattr(request.state, "log_started_at", time.time())
+        logger.error(
+            f"Request failed: {request.method} {request.url.path} - {str(exc)} ({process_time:.4f}s)",
+            exc_info=True,
+        )
@@ -0,0 +1,175 @@
+"""
+Authenticated Principal Cache
+Lets get_current_user authenticate without a database round trip
+
+Entries are keyed by the token subject (the user's email) and hold an
+immutable snapshot of the user's columns plus their active role slugs. They
+live for a short TTL and are invalidated as soon as a user, one of their role
+assignments or a role is changed through the ORM: once at flush, and again
+after commit so a request that re-read the old row in between cannot keep a
+stale copy. Committed invalidations are broadcast to other workers over the
+cache backend's invalidation channel.
+"""
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.cache import LocalCacheTier, cache_backend
+from app.core.cache_invalidation import OrmCacheInvalidation
+from app.core.config import settings
+from app.models.role import Role, UserRole
+from app.models.user import User
+
+# Keys published on the cache invalidation channel: principal:<email>,
+# principal:user:<id> (role assignment changes) or the pattern principal:*
+PRINCIPAL_KEY_PREFIX = "principal:"
+PRINCIPAL_USER_KEY_PREFIX = "principal:user:"
+
+_USER_COLUMNS: Tuple[str, ...] = tuple(attr.key for attr in inspect(User).column_attrs)
+
+
+@dataclass(frozen=True)
+class PrincipalSnapshot:
+    """Immutable copy of an authenticated user"""
+
+    user_id: int
+    email: str
+    is_active: bool
+    columns: Mapping[str, Any]
+    role_slugs: FrozenSet[str]
+
+    @classmethod
+    def from_user(cls, user: User, role_slugs: Iterable[str]) -> Optional["PrincipalSnapshot"]:
+        """Snapshot a loaded user, or None if some column is not loaded"""
+        state = inspect(user).dict
+        if any(column not in state for column in _USER_COLUMNS):
+            return None
+        return cls(
+            user_id=user.id,
+            email=user.email,
+            is_active=user.is_active,
+            columns=MappingProxyType({column: state[column] for column in _USER_COLUMNS}),
+            role_slugs=frozenset(role_slugs),
+        )
+
+    def to_user(self) -> User:
+        """Detached User carrying the snapshot's columns, ready for Session.merge(load=False)"""
+        user = User(**self.columns)
+        make_transient_to_detached(user)
+        return user
+
+
+class PrincipalCache:
+    """In-process LRU/TTL cache of PrincipalSnapshot by token subject"""
+
+    def __init__(
+        self,
+        ttl: int = settings.PRINCIPAL_CACHE_TTL,
+        max_entries: int = settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._subjects_by_user_id: Dict[int, str] = {}
+        self._entries = LocalCacheTier(
+            ttl=ttl, max_entries=max_entries, max_item_bytes=None, sizeof=None, on_remove=self._forget
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, subject: str) -> Optional[PrincipalSnapshot]:
+        snapshot = self._entries.get(subject)
+        if snapshot is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return snapshot
+
+    def set(self, subject: str, snapshot: PrincipalSnapshot) -> None:
+        if not self.enabled:
+            return
+        if self._entries.set(subject, snapshot):
+            self._subjects_by_user_id[snapshot.user_id] = subject
+
+    def role_slugs(self, user_id: int) -> Optional[FrozenSet[str]]:
+        """Cached active role slugs of a user, or None when not cached"""
+        subject = self._subjects_by_user_id.get(user_id)
+        snapshot = self._entries.get(subject) if subject is not None else None
+        return snapshot.role_slugs if snapshot is not None else None
+
+    def _forget(self, subject: str, snapshot: PrincipalSnapshot) -> None:
+        if self._subjects_by_user_id.get(snapshot.user_id) == subject:
+            del self._subjects_by_user_id[snapshot.user_id]
+
+    def invalidate(self, subject: str) -> None:
+        if self._entries.delete(subject):
+            self.stats["invalidations"] += 1
+
+    def invalidate_user_id(self, user_id: int) -> None:
+        subject = self._subjects_by_user_id.get(user_id)
+        if subject is not None:
+            self.invalidate(subject)
+
+    def clear(self) -> None:
+        self.stats["invalidations"] += len(self._entries)
+        self._entries.clear()
+
+    def apply_invalidation_keys(self, keys: Iterable[str], pattern: Optional[str] = None) -> None:
+        """Apply invalidations published on the cache channel (this worker's ORM events or another worker)"""
+        if pattern is not None and (pattern == "*" or pattern.startswith(PRINCIPAL_KEY_PREFIX)):
+            self.clear()
+            return
+        for key in keys:
+            if key.startswith(PRINCIPAL_USER_KEY_PREFIX):
+                self.invalidate_user_id(int(key[len(PRINCIPAL_USER_KEY_PREFIX):]))
+            elif key.startswith(PRINCIPAL_KEY_PREFIX):
+                self.invalidate(key[len(PRINCIPAL_KEY_PREFIX):])
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+principal_cache = PrincipalCache()
+cache_backend.add_invalidation_hook(principal_cache.apply_invalidation_keys)
+principal_invalidation = OrmCacheInvalidation("principal", principal_cache.apply_invalidation_keys)
+
+
+# ----------------------------------------------------------------------
+# ORM events: invalidate at flush, again after commit, then broadcast
+# ----------------------------------------------------------------------
+
+def _user_subjects(target: User) -> Set[str]:
+    history = inspect(target).attrs.email.history
+    return {email for email in (*history.deleted, target.email) if email}
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal_on_user_change(mapper, connection, target: User) -> None:
+    principal_invalidation.schedule(target, keys=[PRINCIPAL_KEY_PREFIX + subject for subject in _user_subjects(target)])
+
+
+@event.listens_for(UserRole, "after_insert")
+@event.listens_for(UserRole, "after_update")
+@event.listens_for(UserRole, "after_delete")
+def _invalidate_principal_on_role_assignment(mapper, connection, target: UserRole) -> None:
+    history = inspect(target).attrs.user_id.history
+    user_ids = {user_id for user_id in (target.user_id, *history.deleted) if user_id is not None}
+    principal_invalidation.schedule(target, keys=[f"{PRINCIPAL_USER_KEY_PREFIX}{user_id}" for user_id in user_ids])
+
+
+@event.listens_for(Role, "after_update")
+@event.listens_for(Role, "after_delete")
+def _invalidate_principals_on_role_change(mapper, connection, target: Role) -> None:
+    principal_invalidation.schedule(target, pattern=PRINCIPAL_KEY_PREFIX + "*")
@@ -3,51 +3,65 @@ Request Size Limits Middleware
 Prevents DoS attacks by limiting request body size
 """
 
+from typing import Optional
+
 from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
 
+from app.core.pipeline import Stage, StageMiddleware
+
+
+class RequestSizeLimitStage(Stage):
+    """Pipeline stage limiting request body size"""
+
+    name = "request_size_limit"
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware to limit request body size"""
-    
     # Default limits (in bytes)
     DEFAULT_LIMIT = 10 * 1024 * 1024  # 10 MB
     JSON_LIMIT = 1 * 1024 * 1024  # 1 MB for JSON
     FILE_UPLOAD_LIMIT = 50 * 1024 * 1024  # 50 MB for file uploads
-    
-    def __init__(self, app, default_limit: int = None, json_limit: int = None, file_upload_limit: int = None):
-        super().__init__(app)
+
+    def __init__(self, default_limit: int = None, json_limit: int = None, file_upload_limit: int = None, enabled: bool = True):
+        super().__init__(enabled)
         self.default_limit = default_limit or self.DEFAULT_LIMIT
         self.json_limit = json_limit or self.JSON_LIMIT
         self.file_upload_limit = file_upload_limit or self.FILE_UPLOAD_LIMIT
-    
-    async def dispatch(self, request: Request, call_next):
+
+    def limit_for(self, content_type: str) -> int:
+        """Determine limit based on content type"""
+        if "multipart/form-data" in content_type or "application/octet-stream" in content_type:
+            return self.file_upload_limit
+        if "application/json" in content_type:
+            return self.json_limit
+        return self.default_limit
+
+    async def on_request(self, request: Request) -> Optional[Response]:
         """Check request size before processing"""
-        
         content_length = request.headers.get("content-length")
-        
-        if content_length:
-            try:
-                size = int(content_length)
-                content_type = request.headers.get("content-type", "").lower()
-                
-                # Determine limit based on content type
-                if "multipart/form-data" in content_type or "application/octet-stream" in content_type:
-                    limit = self.file_upload_limit
-                elif "application/json" in content_type:
-                    limit = self.json_limit
-                else:
-                    limit = self.default_limit
-                
-                if size > limit:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"Request body too large. Maximum size: {limit / (1024 * 1024):.1f} MB"
-                    )
-            except ValueError:
-                # Invalid content-length header, continue
-                pass
-        
-        response = await call_next(request)
-        return response
+        if not content_length:
+            return None
+
+        try:
+            size = int(content_length)
+        except ValueError:
+            # Invalid content-length header, continue
+            return None
+
+        limit = self.limit_for(request.headers.get("content-type", "").lower())
+        if size > limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Request body too large. Maximum size: {limit / (1024 * 1024):.1f} MB"
+            )
+        return None
+
 
+class RequestSizeLimitMiddleware(StageMiddleware):
+    """Middleware to limit request body size"""
+
+    DEFAULT_LIMIT = RequestSizeLimitStage.DEFAULT_LIMIT
+    JSON_LIMIT = RequestSizeLimitStage.JSON_LIMIT
+    FILE_UPLOAD_LIMIT = RequestSizeLimitStage.FILE_UPLOAD_LIMIT
+
+    def __init__(self, app, default_limit: int = None, json_limit: int = None, file_upload_limit: int = None):
+        super().__init__(app, RequestSizeLimitStage(default_limit, json_limit, file_upload_limit))
@@ -8,17 +8,20 @@ import hashlib
 import time
 from typing import Optional
 from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.pipeline import Stage, StageMiddleware
 
 
-class RequestSigningMiddleware(BaseHTTPMiddleware):
-    """Middleware to verify request signatures"""
-    
-    def __init__(self, app, secret_key: str, header_name: str = "X-Signature", timestamp_header: str = "X-Timestamp", max_age: int = 300):
-        super().__init__(app)
+class RequestSigningStage(Stage):
+    """Pipeline stage verifying request signatures"""
+
+    name = "request_signing"
+
+    def __init__(self, secret_key: str, header_name: str = "X-Signature", timestamp_header: str = "X-Timestamp", max_age: int = 300, enabled: bool = True):
+        super().__init__(enabled)
         self.secret_key = secret_key
         self.header_name = header_name
         self.timestamp_header = timestamp_header
@@ -70,12 +73,12 @@ class RequestSigningMiddleware(BaseHTTPMiddleware):
         # Use constant-time comparison to prevent timing attacks
         return hmac.compare_digest(signature, expected_signature)
     
-    async def dispatch(self, request: Request, call_next):
-        """Process request and verify signature"""
+    async def on_request(self, request: Request) -> Optional[Response]:
+        """Verify the request signature"""
         
         # Skip signature verification for safe methods (GET, HEAD, OPTIONS)
         if request.method in ("GET", "HEAD", "OPTIONS"):
-            return await call_next(request)
+            return None
         
         # Get signature and timestamp from headers
         signature = request.headers.get(self.header_name)
@@ -97,8 +100,14 @@ class RequestSigningMiddleware(BaseHTTPMiddleware):
                     detail="Invalid request signature"
                 )
         
-        response = await call_next(request)
-        return response
+        return None
+
+
+class RequestSigningMiddleware(StageMiddleware):
+    """Middleware to verify request signatures"""
+
+    def __init__(self, app, secret_key: str, header_name: str = "X-Signature", timestamp_header: str = "X-Timestamp", max_age: int = 300):
+        super().__init__(app, RequestSigningStage(secret_key, header_name, timestamp_header, max_age))
 
 
 def compute_request_signature(method: str, path: str, body: str, timestamp: str, secret_key: str) -> str:
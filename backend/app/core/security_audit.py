@@ -1,14 +1,27 @@
 """
 Security Audit Logging
 Comprehensive security event logging for audit trails
+
+Events are queued in memory and bulk-inserted by AuditLogWriter (one
+multi-row INSERT per batch). Batches the database cannot take in time are
+spilled to JSON-lines files and replayed later, and the queue is flushed on
+shutdown. Critical events, and callers passing sync=True, are still written
+synchronously before log_event returns.
 """
 
-from datetime import datetime
-from typing import Optional, Dict, Any
+import asyncio
+import glob
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
 from enum import Enum
-from sqlalchemy import Column, DateTime, Integer, String, Text, JSON, Index, func
+from sqlalchemy import Column, DateTime, Integer, String, Text, JSON, Index, func, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import Base, AsyncSessionLocal
 from app.core.logging import logger
 
@@ -93,6 +106,202 @@ class SecurityAuditLog(Base):
         return f"<SecurityAuditLog(id={self.id}, event_type={self.event_type}, user_id={self.user_id}, timestamp={self.timestamp})>"
 
 
+class AuditLogWriter:
+    """Bounded in-process queue of audit rows, written in multi-row INSERT batches"""
+    
+    SPILL_SUFFIX = ".jsonl"
+    # How often spilled files are retried while the writer runs (seconds)
+    REPLAY_INTERVAL = 30.0
+    
+    def __init__(
+        self,
+        queue_size: int = settings.AUDIT_QUEUE_SIZE,
+        batch_size: int = settings.AUDIT_BATCH_SIZE,
+        flush_interval: float = settings.AUDIT_FLUSH_INTERVAL,
+        write_timeout: float = settings.AUDIT_WRITE_TIMEOUT,
+        spill_dir: Optional[str] = None,
+        session_factory=None,
+    ):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_timeout = write_timeout
+        self.spill_dir = spill_dir or settings.AUDIT_SPILL_DIR or os.path.join(
+            tempfile.gettempdir(), "audit-spill"
+        )
+        self.session_factory = session_factory
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0, "write_errors": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_replay = 0.0
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Start the writer loop on the running event loop (spilled files are replayed first)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the writer loop, then write (or spill) everything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            await self._write_or_spill(self._drain(self.batch_size))
+    
+    def enqueue(self, row: Dict[str, Any]) -> None:
+        """Queue one row; when the queue is full the row goes straight to disk"""
+        self.stats["queued"] += 1
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self._spill([row])
+    
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        rows = []
+        while len(rows) < limit and not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        return rows
+    
+    async def _run(self) -> None:
+        await self.replay_spilled()
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=self.REPLAY_INTERVAL)
+            except asyncio.TimeoutError:
+                await self.replay_spilled()
+                continue
+            # Give concurrent events a moment to join the batch
+            if self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+            await self._write_or_spill([first, *self._drain(self.batch_size - 1)])
+            if loop.time() - self._last_replay >= self.REPLAY_INTERVAL:
+                await self.replay_spilled()
+    
+    def _get_session_factory(self):
+        if self.session_factory is None:
+            from app.core.database import get_async_session_local
+            return get_async_session_local()
+        return self.session_factory
+    
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        session_factory = self._get_session_factory()
+        if session_factory is None:
+            raise RuntimeError("Database not initialized")
+        async with session_factory() as session:
+            # executemany: emitted as multi-row INSERT ... VALUES batches
+            await session.execute(insert(SecurityAuditLog.__table__), rows)
+            await session.commit()
+    
+    async def _write_or_spill(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        try:
+            await asyncio.wait_for(self._insert(rows), timeout=self.write_timeout)
+        except asyncio.CancelledError:
+            self._spill(rows)
+            raise
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.warning(f"Audit batch of {len(rows)} events spilled to disk: {e}")
+            self._spill(rows)
+            return
+        self.stats["batches"] += 1
+        self.stats["written"] += len(rows)
+    
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        """Append rows to a new spill file, fsynced before returning"""
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"audit-{os.getpid()}-{uuid.uuid4().hex}{self.SPILL_SUFFIX}")
+            with open(path, "w", encoding="utf-8") as spill_file:
+                for row in rows:
+                    spill_file.write(json.dumps({**row, "timestamp": row["timestamp"].isoformat()}, default=str) + "\n")
+                spill_file.flush()
+                os.fsync(spill_file.fileno())
+            self.stats["spilled"] += len(rows)
+        except Exception as e:
+            logger.error(f"❌ Could not spill {len(rows)} audit events to {self.spill_dir}: {e}", exc_info=True)
+    
+    async def replay_spilled(self) -> int:
+        """Insert spilled events; stops at the first file the database still refuses"""
+        self._last_replay = asyncio.get_running_loop().time()
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, f"*{self.SPILL_SUFFIX}"))):
+            # Claim the file so another worker does not replay it too
+            claimed = f"{path}.{os.getpid()}.replaying"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                with open(claimed, encoding="utf-8") as spill_file:
+                    rows = [json.loads(line) for line in spill_file if line.strip()]
+                for row in rows:
+                    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+            except (OSError, ValueError, KeyError) as e:
+                # Set unreadable files aside instead of retrying them forever
+                os.rename(claimed, f"{path}.corrupt")
+                logger.error(f"❌ Unreadable audit spill file {os.path.basename(path)}: {e}")
+                continue
+            written = 0
+            try:
+                while written < len(rows):
+                    batch = rows[written:written + self.batch_size]
+                    await asyncio.wait_for(self._insert(batch), timeout=self.write_timeout)
+                    written += len(batch)
+            except Exception as e:
+                # Keep only the rows that were not inserted
+                if written:
+                    self._spill(rows[written:])
+                    self.stats["spilled"] -= len(rows) - written
+                    os.remove(claimed)
+                else:
+                    os.rename(claimed, path)
+                replayed += written
+                logger.warning(f"Audit spill replay postponed ({os.path.basename(path)}): {e}")
+                break
+            os.remove(claimed)
+            replayed += len(rows)
+        self.stats["replayed"] += replayed
+        return replayed
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+audit_log_writer = AuditLogWriter()
+
+_SYNC_SEVERITIES = frozenset(
+    severity.strip() for severity in settings.AUDIT_SYNC_SEVERITIES.split(",") if severity.strip()
+)
+
+
+def _log_to_application_logger(description: str, severity: str, log_context: Dict[str, Any]) -> None:
+    if severity == "critical":
+        logger.critical(f"Security audit: {description}", context=log_context)
+    elif severity == "error":
+        logger.error(f"Security audit: {description}", context=log_context)
+    elif severity == "warning":
+        logger.warning(f"Security audit: {description}", context=log_context)
+    else:
+        logger.info(f"Security audit: {description}", context=log_context)
+
+
 class SecurityAuditLogger:
     """Security audit logger"""
     
@@ -111,10 +320,16 @@ class SecurityAuditLogger:
         severity: str = "info",
         success: str = "unknown",
         metadata: Optional[Dict[str, Any]] = None,
+        sync: Optional[bool] = None,
     ) -> Optional[SecurityAuditLog]:
         """
         Log a security event
         
+        Unless `sync` is True or the severity is listed in
+        AUDIT_SYNC_SEVERITIES, the event is queued for the batched writer and
+        the returned record is not persisted yet (its id is None). Events are
+        written synchronously whenever the writer is not running.
+        
         Args:
             db: Database session
             event_type: Type of security event
@@ -129,10 +344,41 @@ class SecurityAuditLogger:
             severity: Event severity (info, warning, error, critical)
             success: Event result (success, failure, unknown)
             metadata: Additional structured data
+            sync: Force (True) or skip (False) the synchronous write
         
         Returns:
             Created SecurityAuditLog record, or None if logging failed
         """
+        if sync is None:
+            sync = severity in _SYNC_SEVERITIES
+        if not sync and audit_log_writer.running:
+            row = {
+                "timestamp": datetime.now(timezone.utc),
+                "event_type": event_type.value,
+                "severity": severity,
+                "user_id": user_id,
+                "user_email": user_email,
+                "api_key_id": api_key_id,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "request_method": request_method,
+                "request_path": request_path,
+                "description": description,
+                "metadata": metadata or {},
+                "success": success,
+            }
+            audit_log_writer.enqueue(row)
+            _log_to_application_logger(description, severity, {
+                "event_type": event_type.value,
+                "user_id": user_id,
+                "severity": severity,
+                "queued": True,
+            })
+            return SecurityAuditLog(
+                **{key: value for key, value in row.items() if key != "metadata"},
+                event_metadata=row["metadata"],
+            )
+        
         # Use provided session or create a new one for audit logging
         # Creating a separate session ensures the log is saved even if the main transaction fails
         use_separate_session = db is None
@@ -175,14 +421,7 @@ class SecurityAuditLogger:
                 "severity": severity,
             }
             
-            if severity == "critical":
-                logger.critical(f"Security audit: {description}", context=log_context)
-            elif severity == "error":
-                logger.error(f"Security audit: {description}", context=log_context)
-            elif severity == "warning":
-                logger.warning(f"Security audit: {description}", context=log_context)
-            else:
-                logger.info(f"Security audit: {description}", context=log_context)
+            _log_to_application_logger(description, severity, log_context)
             
             return audit_log
         except Exception as e:
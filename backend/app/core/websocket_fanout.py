@@ -0,0 +1,190 @@
+"""
+WebSocket Fan-out
+Per-connection send queues and cross-worker delivery for ConnectionManager
+
+Every accepted socket gets a bounded send queue drained by its own task, so
+sending to many sockets only enqueues one pre-encoded frame per recipient and
+never waits on a slow client. A client whose queue is full, or whose send
+takes longer than WEBSOCKET_SEND_TIMEOUT, is evicted: it is closed with code
+1013 ("try again later") and forgotten, and can reconnect.
+
+Messages are delivered to the sockets of the current worker first, then
+published on a fan-out bus so the other workers deliver them to theirs:
+RedisFanoutBus when Redis is configured, InProcessFanoutBus between managers
+living in one process (tests and load tests).
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, List, Optional, Set
+
+from fastapi import WebSocket
+
+from app.core.cache import cache_backend
+from app.core.config import settings
+from app.core.logging import logger
+
+# Close code sent to evicted slow consumers (RFC 6455 "Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+CLOSE_TIMEOUT = 1.0
+
+FanoutHandler = Callable[[Any], None]
+
+# Close tasks of evicted clients, referenced until they finish
+_closing: Set[asyncio.Task] = set()
+
+
+def encode_message(message: Any) -> str:
+    """Encode a message once for every recipient, exactly as WebSocket.send_json does"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class WebSocketClient:
+    """An accepted WebSocket with a bounded send queue drained by its own task"""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_key: str,
+        on_evict: Callable[["WebSocketClient", str], None],
+        queue_size: int = settings.WEBSOCKET_SEND_QUEUE_SIZE,
+        send_timeout: float = settings.WEBSOCKET_SEND_TIMEOUT,
+    ):
+        self.websocket = websocket
+        self.user_key = user_key
+        self.rooms: Set[str] = set()
+        self.send_timeout = send_timeout
+        self.closed = False
+        self._on_evict = on_evict
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task = asyncio.create_task(self._drain())
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def offer(self, text: str) -> bool:
+        """Queue a frame without waiting; a full queue evicts the client"""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.evict("send queue full")
+            return False
+        return True
+
+    async def _drain(self) -> None:
+        while True:
+            text = await self._queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                self.evict("send timed out")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The socket is already gone: nothing to close
+                logger.debug(f"WebSocket send failed for {self.user_key}: {e}")
+                self.evict("send failed", close=False)
+                return
+
+    def evict(self, reason: str, close: bool = True) -> None:
+        """Stop delivering to this client and close it"""
+        if self.closed:
+            return
+        self.stop()
+        self._on_evict(self, reason)
+        if close:
+            task = asyncio.get_running_loop().create_task(self._close(reason))
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+
+    async def _close(self, reason: str) -> None:
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason=reason),
+                timeout=CLOSE_TIMEOUT,
+            )
+        except Exception as e:
+            logger.debug(f"Error closing evicted WebSocket: {e}")
+
+    def stop(self) -> None:
+        """Stop the send task (pending frames are dropped)"""
+        self.closed = True
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+class InProcessFanoutBus:
+    """Relays messages between the managers sharing this bus, within one process"""
+
+    def __init__(self):
+        self._handlers: List[FanoutHandler] = []
+
+    async def start(self, handler: FanoutHandler) -> None:
+        self._handlers.append(handler)
+
+    async def stop(self, handler: FanoutHandler) -> None:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    async def publish(self, data: str) -> None:
+        for handler in list(self._handlers):
+            handler(data)
+
+
+class RedisFanoutBus:
+    """Relays messages between workers over a Redis pub/sub channel"""
+
+    def __init__(self, redis_client: Any, channel: str = settings.WEBSOCKET_FANOUT_CHANNEL):
+        self.redis_client = redis_client
+        self.channel = channel
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: FanoutHandler) -> None:
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen(handler))
+            logger.info(f"Listening for WebSocket fan-out on {self.channel}")
+
+    async def _listen(self, handler: FanoutHandler) -> None:
+        while True:
+            try:
+                self._pubsub = self.redis_client.pubsub()
+                await self._pubsub.subscribe(self.channel)
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        handler(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket fan-out listener error, reconnecting: {e}")
+                await asyncio.sleep(1)
+
+    async def stop(self, handler: FanoutHandler) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception as e:
+                logger.debug(f"Error closing WebSocket fan-out pubsub: {e}")
+            self._pubsub = None
+
+    async def publish(self, data: str) -> None:
+        await self.redis_client.publish(self.channel, data)
+
+
+def default_fanout_bus() -> Optional[RedisFanoutBus]:
+    """Redis bus when Redis is configured; None keeps delivery local to the worker"""
+    if cache_backend.redis_enabled:
+        return RedisFanoutBus(cache_backend.redis_client)
+    return None
+
@@ -5,10 +5,11 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, select
 
 from app.core.database import get_db
-from app.models import User
+from app.core.principal_cache import PrincipalSnapshot, principal_cache
+from app.models import Role, User, UserRole
 from app.core.security import decode_token
 from app.services.subscription_service import SubscriptionService
 from app.services.stripe_service import StripeService
@@ -67,9 +68,26 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Fetch user from database by email
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
+    # Recently authenticated principals are served from memory; the snapshot
+    # is attached to the session without a query so it can still be updated
+    snapshot = principal_cache.get(email)
+    if snapshot is not None:
+        if not snapshot.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User is inactive",
+            )
+        return await db.merge(snapshot.to_user(), load=False)
+
+    # Fetch user from database by email, with the slugs of its active roles
+    result = await db.execute(
+        select(User, Role.slug)
+        .outerjoin(UserRole, UserRole.user_id == User.id)
+        .outerjoin(Role, and_(Role.id == UserRole.role_id, Role.is_active == True))
+        .where(User.email == email)
+    )
+    rows = result.all()
+    user = rows[0][0] if rows else None
 
     if not user:
         raise HTTPException(
@@ -78,6 +96,10 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    snapshot = PrincipalSnapshot.from_user(user, (slug for _, slug in rows if slug))
+    if snapshot is not None:
+        principal_cache.set(email, snapshot)
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -111,7 +133,9 @@ async def is_superadmin(
     Check if a user has the superadmin role.
     Returns True if user has superadmin role, False otherwise.
     """
-    from app.models import Role, UserRole
+    role_slugs = principal_cache.role_slugs(user.id)
+    if role_slugs is not None:
+        return "superadmin" in role_slugs
     
     result = await db.execute(
         select(UserRole)
@@ -137,7 +161,9 @@ async def is_admin(
     Note: Superadmins are automatically considered admins,
     but this function specifically checks for the "admin" role.
     """
-    from app.models import Role, UserRole
+    role_slugs = principal_cache.role_slugs(user.id)
+    if role_slugs is not None:
+        return "admin" in role_slugs
     
     result = await db.execute(
         select(UserRole)
@@ -176,21 +202,7 @@ async def require_superadmin(
     db: AsyncSession = Depends(get_db),
 ) -> None:
     """Dependency to require superadmin role."""
-    from app.models import Role, UserRole
-    
-    # Check if user has superadmin role via UserRole
-    result = await db.execute(
-        select(Role)
-        .join(UserRole, Role.id == UserRole.role_id)
-        .where(
-            UserRole.user_id == current_user.id,
-            Role.slug == "superadmin",
-            Role.is_active == True
-        )
-    )
-    superadmin_role = result.scalar_one_or_none()
-    
-    if not superadmin_role:
+    if not await is_superadmin(current_user, db):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Superadmin access required"
@@ -18,6 +18,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.core.config import settings
 from app.core.database import init_db, close_db
 from app.core.cache import init_cache, close_cache
+from app.services.pdf_render_pool import close_pdf_render_pool
 from app.core.migrations import ensure_theme_preference_column, ensure_avatar_column
 from app.core.exceptions import AppException
 from app.core.error_handler import (
@@ -30,12 +31,16 @@ from app.core.error_handler import (
 from app.core.rate_limit import setup_rate_limiting
 from app.core.compression import CompressionMiddleware
 from app.core.cache_headers import CacheHeadersMiddleware
-from app.core.csrf import CSRFMiddleware
-from app.core.request_limits import RequestSizeLimitMiddleware
+from app.core.conditional import NotModified, not_modified_handler
+from app.core.csrf import CSRFStage
+from app.core.request_limits import RequestSizeLimitStage
 from app.core.cors import setup_cors
 from app.core.api_versioning import setup_api_versioning
 from app.core.ip_whitelist import setup_ip_whitelist
-from app.core.request_signing import RequestSigningMiddleware
+from app.core.request_signing import RequestSigningStage
+from app.core.pipeline import MiddlewarePipeline, RequestLoggingStage
+from app.core.security_headers import SecurityHeadersStage
+from app.core.tenancy_middleware import TenancyStage
 from app.api.v1.router import api_router
 from app.api import email as email_router
 from app.api.webhooks import stripe as stripe_webhook_router
@@ -186,6 +191,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Note: In FastAPI lifespan, the event loop is always running, so create_task should work
     init_task = asyncio.create_task(background_init())
     
+    # Security audit events are queued and inserted in batches
+    if settings.AUDIT_ASYNC_WRITES:
+        from app.core.security_audit import audit_log_writer
+        audit_log_writer.start()
+    
+    # WebSocket messages published by the other workers
+    try:
+        from app.api.v1.endpoints.websocket import manager as websocket_manager
+        await websocket_manager.start()
+    except Exception as e:
+        print(f"WebSocket fan-out not started: {e}", file=sys.stderr)
+    
     # CRITICAL: Print before yielding to confirm we're about to start serving
     print("=" * 50, file=sys.stderr)
     print("YIELDING - App is now ready to serve requests", file=sys.stderr)
@@ -214,6 +231,29 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     # Shutdown
     print("Shutting down application...", file=sys.stderr)
+    try:
+        # Write buffered API key usage before the database goes away
+        from app.services.api_key_usage import api_key_usage_tracker
+        await api_key_usage_tracker.stop()
+    except Exception as e:
+        print(f"API key usage flush error: {e}", file=sys.stderr)
+    try:
+        from app.api.v1.endpoints.websocket import manager as websocket_manager
+        await websocket_manager.stop()
+    except Exception as e:
+        print(f"WebSocket fan-out shutdown error: {e}", file=sys.stderr)
+    try:
+        # Import progress events still queued for the Redis stream
+        from app.services.import_progress import import_progress_bus
+        await import_progress_bus.stop()
+    except Exception as e:
+        print(f"Import progress shutdown error: {e}", file=sys.stderr)
+    try:
+        # Write queued audit events (spilled to disk if the database is down)
+        from app.core.security_audit import audit_log_writer
+        await audit_log_writer.stop()
+    except Exception as e:
+        print(f"Audit log flush error: {e}", file=sys.stderr)
     try:
         await close_cache()
     except Exception as e:
@@ -224,6 +264,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         if logger:
             logger.warning(f"Database shutdown error: {e}")
+    try:
+        close_pdf_render_pool()
+    except Exception as e:
+        if logger:
+            logger.warning(f"PDF render pool shutdown error: {e}")
 
 
 def create_app() -> FastAPI:
@@ -277,104 +322,71 @@ def create_app() -> FastAPI:
 
     # CORS Middleware - MUST be added FIRST to handle preflight requests
     # Using enhanced CORS configuration with tightened security
-    setup_cors(app)
-
-    # Request logging middleware (after CORS to log all requests)
-    # Note: FastAPI executes middlewares in reverse order of addition
-    # So this middleware runs BEFORE CORS middleware (which was added first)
-    # We need to let errors propagate to CORS middleware so it can add headers
-    @app.middleware("http")
-    async def log_requests_middleware(request: Request, call_next):
-        try:
-            from app.core.logging import logger
-        except:
-            logger = None
-        from starlette.responses import Response
-        import time
-        start_time = time.time()
-        if logger:
-            logger.info(f"Incoming request: {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
-        try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            # Ensure response is a Response instance before accessing status_code
-            if logger:
-                if isinstance(response, Response):
-                    logger.info(f"Request completed: {request.method} {request.url.path} - {response.status_code} ({process_time:.4f}s)")
-                else:
-                    logger.info(f"Request completed: {request.method} {request.url.path} ({process_time:.4f}s)")
-            return response
-        except Exception as e:
-            process_time = time.time() - start_time
-            if logger:
-                logger.error(f"Request failed: {request.method} {request.url.path} - {str(e)} ({process_time:.4f}s)", exc_info=True)
-            # Re-raise the exception so CORS middleware can catch it and add headers
-            # The CORS middleware will handle the error response with proper headers
-            raise
+    # CORSMiddleware sits innermost; its "always add CORS headers" stage runs in the pipeline below
+    cors_stage = setup_cors(app, pipeline=True)
 
     # Compression Middleware (after CORS)
-    # Enhanced compression with Brotli support
+    # Pure ASGI: streamed responses are compressed chunk by chunk (zstd/Brotli/GZip)
     app.add_middleware(
         CompressionMiddleware,
         min_size=1024,  # Only compress responses > 1KB
         compress_level=6,  # Balance between speed and compression ratio
         use_brotli=True,  # Use Brotli if client supports it
+        use_zstd=True,  # Use zstd if client supports it and zstandard is installed
     )
 
     # Cache Headers Middleware
     app.add_middleware(CacheHeadersMiddleware, default_max_age=300)
 
-    # Request Size Limits Middleware (before CSRF to prevent large request processing)
-    app.add_middleware(
-        RequestSizeLimitMiddleware,
-        default_limit=10 * 1024 * 1024,  # 10 MB default
-        json_limit=1 * 1024 * 1024,  # 1 MB for JSON
-        file_upload_limit=50 * 1024 * 1024,  # 50 MB for file uploads
-    )
-
-    # API Versioning Middleware (after CORS, before other middleware)
-    setup_api_versioning(app, default_version="v1", supported_versions=["v1"])
-
-    # IP Whitelist Middleware (before CSRF, for admin endpoints)
-    setup_ip_whitelist(app, admin_paths=["/api/v1/admin"])
-
-    # Request Signing Middleware (optional, for enhanced API security)
-    if os.getenv("ENABLE_REQUEST_SIGNING", "").lower() == "true":
-        app.add_middleware(
-            RequestSigningMiddleware,
+    # Request/response middleware pipeline: one pure ASGI layer instead of a
+    # BaseHTTPMiddleware per concern. Stages run outermost first, in the order
+    # of the former middleware stack; MIDDLEWARE_DISABLED_STAGES turns stages off by name.
+    from app.core.tenancy import TenancyConfig
+    request_signing_enabled = os.getenv("ENABLE_REQUEST_SIGNING", "").lower() == "true"
+    csrf_enabled = not os.getenv("DISABLE_CSRF", "").lower() == "true"
+    pipeline_stages = [
+        # Timing and security headers on every response
+        SecurityHeadersStage(),
+        # CSRF Protection (skipped for webhooks and public endpoints)
+        CSRFStage(secret_key=settings.SECRET_KEY, cookie_name="csrf_token", enabled=csrf_enabled),
+        # Tenancy: extracts tenant ID from headers/query params when TENANCY_MODE is not 'single'
+        TenancyStage(header_name="X-Tenant-ID", query_param="tenant_id", enabled=TenancyConfig.is_enabled()),
+        # Request Signing (optional, for enhanced API security)
+        RequestSigningStage(
             secret_key=settings.SECRET_KEY,
             header_name="X-Signature",
             timestamp_header="X-Timestamp",
             max_age=300,  # 5 minutes
-        )
-        logger.info("Request signing enabled")
-
-    # Tenancy Middleware (conditionally enabled)
-    # This middleware extracts tenant ID from headers/query params
-    # Only active when TENANCY_MODE is not 'single'
-    from app.core.tenancy_middleware import TenancyMiddleware
-    from app.core.tenancy import TenancyConfig
-    if TenancyConfig.is_enabled():
-        app.add_middleware(
-            TenancyMiddleware,
-            header_name="X-Tenant-ID",
-            query_param="tenant_id",
-        )
-        if logger:
+            enabled=request_signing_enabled,
+        ),
+        # IP Whitelist (for admin endpoints)
+        setup_ip_whitelist(app, admin_paths=["/api/v1/admin"], pipeline=True),
+        # API Versioning
+        setup_api_versioning(app, default_version="v1", supported_versions=["v1"], pipeline=True),
+        # Request Size Limits (before routes to prevent large request processing)
+        RequestSizeLimitStage(
+            default_limit=10 * 1024 * 1024,  # 10 MB default
+            json_limit=1 * 1024 * 1024,  # 1 MB for JSON
+            file_upload_limit=50 * 1024 * 1024,  # 50 MB for file uploads
+        ),
+        # Request logging
+        RequestLoggingStage(),
+        # CORS headers on every response, OPTIONS preflight answered here
+        cors_stage,
+    ]
+    app.add_middleware(
+        MiddlewarePipeline,
+        stages=[stage for stage in pipeline_stages if stage is not None],
+        error_handler=http_exception_handler,
+    )
+    if logger:
+        if request_signing_enabled:
+            logger.info("Request signing enabled")
+        if TenancyConfig.is_enabled():
             logger.info(f"Tenancy middleware enabled (mode: {TenancyConfig.get_mode()})")
-
-    # CSRF Protection Middleware (after CORS, before routes)
-    # Skip CSRF for webhooks and public endpoints
-    if not os.getenv("DISABLE_CSRF", "").lower() == "true":
-        app.add_middleware(
-            CSRFMiddleware,
-            secret_key=settings.SECRET_KEY,
-            cookie_name="csrf_token",
-        )
-        if logger:
+        if csrf_enabled:
             logger.info("CSRF protection enabled")
-    else:
-        if logger:
+        else:
             logger.warning("CSRF protection is DISABLED - not recommended for production")
 
     # Rate Limiting (after CORS to allow preflight requests)
@@ -403,75 +415,11 @@ def create_app() -> FastAPI:
     from fastapi.exceptions import HTTPException as FastAPIHTTPException
     app.add_exception_handler(FastAPIHTTPException, http_exception_handler)
     app.add_exception_handler(AppException, app_exception_handler)
+    app.add_exception_handler(NotModified, not_modified_handler)
     app.add_exception_handler(PydanticValidationError, validation_exception_handler)
     app.add_exception_handler(SQLAlchemyError, database_exception_handler)
     app.add_exception_handler(Exception, general_exception_handler)
 
-    # Add security headers middleware
-    @app.middleware("http")
-    async def add_security_headers_middleware(request: Request, call_next):
-        import time
-        from datetime import datetime, timezone
-        
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        # Add timestamp headers
-        response.headers["X-Response-Time"] = f"{process_time:.4f}s"
-        response.headers["X-Process-Time"] = str(process_time)
-        response.headers["X-Timestamp"] = datetime.now(timezone.utc).isoformat()
-        
-        # Add security headers
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        
-        # Content Security Policy (strict in production, relaxed in development)
-        environment = os.getenv("ENVIRONMENT", "development")
-        
-        # SECURITY: Generate nonce for this request (unique per request)
-        # Nonces allow inline scripts/styles while maintaining strict CSP
-        import secrets
-        nonce = secrets.token_urlsafe(16)  # 16 bytes = 22 base64 characters
-        
-        # Store nonce in response header for frontend to use
-        response.headers["X-CSP-Nonce"] = nonce
-        
-        if environment == "production":
-            # SECURITY: Strict CSP with nonces for production
-            # Nonces allow inline scripts/styles while maintaining strict CSP
-            csp_policy = (
-                "default-src 'self'; "
-                f"script-src 'self' 'nonce-{nonce}'; "  # Nonce allows specific inline scripts
-                f"style-src 'self' 'nonce-{nonce}'; "  # Nonce allows specific inline styles
-                "img-src 'self' data: https:; "
-                "font-src 'self' data:; "
-                "connect-src 'self' https://api.stripe.com; "
-                "frame-ancestors 'none'; "
-                "base-uri 'self'; "
-                "form-action 'self';"
-            )
-        else:
-            # Relaxed CSP for development (nonces optional)
-            # In development, we can use unsafe-inline for convenience
-            # but still provide nonces for testing
-            csp_policy = (
-                "default-src 'self'; "
-                f"script-src 'self' 'unsafe-inline' 'unsafe-eval' 'nonce-{nonce}'; "  # Development: allow both
-                f"style-src 'self' 'unsafe-inline' 'nonce-{nonce}'; "  # Development: allow both
-                "img-src 'self' data: https:; "
-                "font-src 'self' data:; "
-                "connect-src 'self' https://api.stripe.com; "
-                "frame-ancestors 'none';"
-            )
-        response.headers["Content-Security-Policy"] = csp_policy
-        
-        return response
-
     # Custom OpenAPI schema
     def custom_openapi() -> dict:
         if app.openapi_schema:
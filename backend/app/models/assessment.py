@@ -11,9 +11,10 @@ Tables:
 - assessment_360_evaluators: Évaluateurs pour le 360° Feedback
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Boolean, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from datetime import datetime
 import enum
 
@@ -96,6 +97,10 @@ class AssessmentAnswer(Base):
     de la réponse (peut être JSON pour des réponses complexes).
     """
     __tablename__ = "assessment_answers"
+    __table_args__ = (
+        # Une seule réponse par question : cible du INSERT ... ON CONFLICT des réponses groupées
+        UniqueConstraint("assessment_id", "question_id", name="uq_assessment_answers_assessment_question"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     assessment_id = Column(Integer, ForeignKey("assessments.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -155,7 +160,7 @@ class AssessmentResult(Base):
 
     # Métadonnées
     generated_at = Column(DateTime(timezone=True), nullable=False, server_default='now()')
-    updated_at = Column(DateTime(timezone=True), nullable=False, server_default='now()')
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default='now()', onupdate=func.now())
 
     # Relations
     assessment = relationship("Assessment", back_populates="result")
@@ -0,0 +1,285 @@
+"""
+API Key Usage Tracking
+Verified-key cache and write-behind usage counters for API key authentication
+
+Authenticating an API key used to cost a key lookup, a usage UPDATE and
+commit, a user SELECT and an audit log INSERT per request. Instead:
+
+- verified keys are cached by key hash together with a snapshot of their
+  owner, and dropped as soon as the key or the user is changed through the
+  ORM (revocation, rotation, deactivation), on this worker and on the others
+- usage counts and last-used timestamps are aggregated in memory and written
+  in one batched UPDATE every API_KEY_USAGE_FLUSH_INTERVAL seconds (and on
+  shutdown); counts are additive, so each worker flushes its own deltas
+- API_KEY_USED audit events are aggregated: at most one per key per
+  API_KEY_AUDIT_WINDOW seconds, carrying the number of uses it covers
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, event, inspect, update
+
+from app.core.cache import LocalCacheTier, cache_backend
+from app.core.cache_invalidation import OrmCacheInvalidation
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.principal_cache import PrincipalSnapshot
+from app.models.api_key import APIKey
+from app.models.user import User
+
+
+# Keys published on the cache invalidation channel
+API_KEY_INVALIDATION_PREFIX = "api_key:"
+API_KEY_USER_INVALIDATION_PREFIX = "api_key:user:"
+
+
+@dataclass(frozen=True)
+class VerifiedAPIKey:
+    """An active API key and its owner, as verified against the database"""
+
+    api_key_id: int
+    name: str
+    expires_at: Optional[datetime]
+    principal: PrincipalSnapshot
+
+    @classmethod
+    def from_models(cls, api_key: APIKey, user: User) -> Optional["VerifiedAPIKey"]:
+        principal = PrincipalSnapshot.from_user(user, ())
+        if principal is None:
+            return None
+        return cls(api_key_id=api_key.id, name=api_key.name, expires_at=api_key.expires_at, principal=principal)
+
+    def is_expired(self) -> bool:
+        """Same rule as APIKey.is_expired"""
+        return bool(self.expires_at) and datetime.utcnow() > self.expires_at
+
+
+class VerifiedKeyCache:
+    """In-process LRU/TTL cache of VerifiedAPIKey by key hash"""
+
+    def __init__(self, ttl: int = settings.API_KEY_CACHE_TTL, max_entries: int = settings.API_KEY_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._entries = LocalCacheTier(ttl=ttl, max_entries=max_entries, max_item_bytes=None, sizeof=None)
+
+    def get(self, key_hash: str) -> Optional[VerifiedAPIKey]:
+        verified = self._entries.get(key_hash)
+        if verified is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return verified
+
+    def set(self, key_hash: str, verified: VerifiedAPIKey) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries.set(key_hash, verified)
+
+    def invalidate(self, key_hash: str) -> None:
+        if self._entries.delete(key_hash):
+            self.stats["invalidations"] += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        for key_hash, verified in self._entries.items():
+            if verified.principal.user_id == user_id:
+                self.invalidate(key_hash)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def apply_invalidation_keys(self, keys, pattern: Optional[str] = None) -> None:
+        """Apply invalidations published on the cache channel (this worker's ORM events or another worker)"""
+        if pattern == "*":
+            self.clear()
+            return
+        for key in keys:
+            if key.startswith(API_KEY_USER_INVALIDATION_PREFIX):
+                self.invalidate_user(int(key[len(API_KEY_USER_INVALIDATION_PREFIX):]))
+            elif key.startswith(API_KEY_INVALIDATION_PREFIX):
+                self.invalidate(key[len(API_KEY_INVALIDATION_PREFIX):])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "size": len(self._entries)}
+
+
+AuditWriter = Callable[[VerifiedAPIKey, int], Awaitable[Any]]
+
+
+async def write_api_key_used_event(verified: VerifiedAPIKey, uses: int) -> None:
+    """Write one aggregated API_KEY_USED audit event"""
+    from app.core.security_audit import SecurityAuditLogger, SecurityEventType
+
+    await SecurityAuditLogger.log_api_key_event(
+        db=None,
+        event_type=SecurityEventType.API_KEY_USED,
+        api_key_id=verified.api_key_id,
+        description=f"API key '{verified.name}' used",
+        user_id=verified.principal.user_id,
+        user_email=verified.principal.email,
+        metadata={"uses": uses, "window_seconds": settings.API_KEY_AUDIT_WINDOW},
+    )
+
+
+class APIKeyUsageTracker:
+    """Aggregates API key usage in memory and writes it in batches"""
+
+    def __init__(
+        self,
+        flush_interval: float = settings.API_KEY_USAGE_FLUSH_INTERVAL,
+        max_pending: int = settings.API_KEY_USAGE_MAX_PENDING,
+        audit_window: float = settings.API_KEY_AUDIT_WINDOW,
+        session_factory: Optional[Callable[[], Any]] = None,
+        audit_writer: AuditWriter = write_api_key_used_event,
+    ):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.audit_window = audit_window
+        self.session_factory = session_factory
+        self.audit_writer = audit_writer
+        self.stats = {"recorded": 0, "flushes": 0, "rows_written": 0, "flush_errors": 0, "audit_events": 0}
+        # api_key_id -> [uses not yet written, latest use]
+        self._pending: Dict[int, List[Any]] = {}
+        # api_key_id -> [uses not yet audited, monotonic time of the last event, key]
+        self._audit: Dict[int, List[Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._background: set = set()
+
+    def record(self, verified: VerifiedAPIKey) -> None:
+        """Count one use of a verified key; never touches the database"""
+        self.stats["recorded"] += 1
+        entry = self._pending.setdefault(verified.api_key_id, [0, None])
+        entry[0] += 1
+        entry[1] = datetime.utcnow()
+
+        audit = self._audit.setdefault(verified.api_key_id, [0, float("-inf"), verified])
+        audit[0] += 1
+        audit[2] = verified
+        now = time.monotonic()
+        if now - audit[1] >= self.audit_window:
+            self._spawn(self._emit_audit(verified, audit[0]))
+            audit[0], audit[1] = 0, now
+
+        self._ensure_flusher()
+        if len(self._pending) >= self.max_pending:
+            self._spawn(self.flush())
+
+    def _spawn(self, coroutine: Awaitable[Any]) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(coroutine)
+        except RuntimeError:
+            coroutine.close()
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _emit_audit(self, verified: VerifiedAPIKey, uses: int) -> None:
+        try:
+            await self.audit_writer(verified, uses)
+            self.stats["audit_events"] += 1
+        except Exception as e:
+            logger.warning(f"Could not write API key usage audit event: {e}")
+
+    def _ensure_flusher(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_periodically())
+        except RuntimeError:
+            pass
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _get_session_factory(self):
+        if self.session_factory is None:
+            from app.core.database import get_async_session_local
+            return get_async_session_local()
+        return self.session_factory
+
+    async def flush(self) -> int:
+        """Write pending usage in one batched UPDATE; returns the number of keys written"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        params = [
+            {"key_id": key_id, "uses": uses, "last_used": last_used}
+            for key_id, (uses, last_used) in pending.items()
+        ]
+        table = APIKey.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("key_id"))
+            .values(usage_count=table.c.usage_count + bindparam("uses"), last_used_at=bindparam("last_used"))
+        )
+        try:
+            session_factory = self._get_session_factory()
+            if session_factory is None:
+                raise RuntimeError("Database not initialized")
+            async with session_factory() as session:
+                await session.execute(statement, params)
+                await session.commit()
+        except Exception as e:
+            # Keep the counts for the next flush
+            for key_id, (uses, last_used) in pending.items():
+                entry = self._pending.setdefault(key_id, [0, last_used])
+                entry[0] += uses
+                entry[1] = max(entry[1], last_used) if entry[1] else last_used
+            self.stats["flush_errors"] += 1
+            logger.warning(f"Could not flush API key usage ({len(pending)} keys): {e}")
+            return 0
+        self.stats["flushes"] += 1
+        self.stats["rows_written"] += len(params)
+        return len(params)
+
+    async def stop(self) -> None:
+        """Stop the periodic flush, then write pending usage and audit counts"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        for uses, _, verified in list(self._audit.values()):
+            if uses:
+                await self._emit_audit(verified, uses)
+        self._audit.clear()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        await self.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "pending_keys": len(self._pending)}
+
+
+verified_key_cache = VerifiedKeyCache()
+api_key_usage_tracker = APIKeyUsageTracker()
+cache_backend.add_invalidation_hook(verified_key_cache.apply_invalidation_keys)
+
+
+verified_key_invalidation = OrmCacheInvalidation("api_key", verified_key_cache.apply_invalidation_keys)
+
+
+# ----------------------------------------------------------------------
+# ORM events: drop verified keys at flush, again after commit, then broadcast
+# ----------------------------------------------------------------------
+
+@event.listens_for(APIKey, "after_update")
+@event.listens_for(APIKey, "after_delete")
+def _invalidate_verified_key(mapper, connection, target: APIKey) -> None:
+    history = inspect(target).attrs.key_hash.history
+    hashes = {key_hash for key_hash in (*history.deleted, target.key_hash) if key_hash}
+    verified_key_invalidation.schedule(target, keys=[API_KEY_INVALIDATION_PREFIX + key_hash for key_hash in hashes])
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_verified_keys_of_user(mapper, connection, target: User) -> None:
+    verified_key_invalidation.schedule(target, keys=[f"{API_KEY_USER_INVALIDATION_PREFIX}{target.id}"])
@@ -0,0 +1,883 @@
+"""
+Contact Import Engine
+Streaming, chunked import of contacts from Excel files or ZIP archives (Excel + photos)
+
+The upload is never loaded in memory as a whole:
+- worksheet rows are iterated with openpyxl in read-only mode (legacy .xls
+  files, which openpyxl cannot open, still go through ImportService);
+- a ZIP archive is opened in place: only its directory is read, the Excel
+  entry is copied to a spooled temporary file and each photo is read when it
+  is uploaded;
+- companies and existing contacts are loaded once as (id, name) tuples into
+  in-memory indexes, so matching a row never queries the database.
+
+Rows are processed in chunks of CONTACT_IMPORT_CHUNK_SIZE: the photos of a
+chunk are uploaded by at most CONTACT_IMPORT_PHOTO_CONCURRENCY concurrent
+workers (boto3 is synchronous, so each upload runs in a thread), then new
+contacts are written with one bulk INSERT and existing ones with one bulk
+UPDATE. The import is committed once, after the last chunk.
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+import unicodedata
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime as dt
+from io import BytesIO
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException, InternalServerException
+from app.core.logging import logger
+from app.models.company import Company
+from app.models.contact import Contact
+from app.schemas.contact import ContactCreate
+from app.services.import_progress import import_progress_bus
+from app.services.import_service import ImportService
+from app.services.s3_service import S3Service
+
+# Excel entries of a ZIP larger than this are spooled to disk
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+PHOTO_FOLDER = 'contacts/photos'
+
+# Column names accepted for each field, in priority order
+FIELD_ALIASES: Dict[str, List[str]] = {
+    'first_name': [
+        'first_name', 'prénom', 'prenom', 'firstname', 'first name',
+        'nom', 'name', 'given_name', 'given name'
+    ],
+    'last_name': [
+        'last_name', 'nom', 'name', 'lastname', 'last name',
+        'surname', 'family_name', 'family name', 'nom de famille'
+    ],
+    'company_id': [
+        'company_id', 'id_entreprise', 'entreprise_id', 'company id',
+        'id company', 'id entreprise'
+    ],
+    'company_name': [
+        'company_name', 'company', 'entreprise', 'entreprise_name',
+        'nom_entreprise', 'company name', 'nom entreprise',
+        'société', 'societe', 'organisation', 'organization',
+        'firme', 'business', 'client'
+    ],
+    'photo_url': [
+        'photo_url', 'photo', 'photo url', 'url photo', 'image_url',
+        'image url', 'avatar', 'avatar_url', 'avatar url'
+    ],
+    'photo_filename': ['logo_filename', 'photo_filename', 'nom_fichier_photo'],
+    'position': [
+        'position', 'poste', 'job_title', 'job title', 'titre',
+        'fonction', 'role', 'titre du poste'
+    ],
+    'circle': ['circle', 'cercle', 'network', 'réseau', 'reseau'],
+    'linkedin': ['linkedin', 'linkedin_url', 'linkedin url', 'profil linkedin'],
+    'email': [
+        'email', 'courriel', 'e-mail', 'mail', 'adresse email',
+        'adresse courriel', 'email address'
+    ],
+    'phone': [
+        'phone', 'téléphone', 'telephone', 'tel', 'tél',
+        'phone_number', 'phone number', 'numéro de téléphone',
+        'numero de telephone', 'mobile', 'portable'
+    ],
+    'city': ['city', 'ville', 'cité', 'cite', 'localité', 'localite'],
+    'country': ['country', 'pays', 'nation', 'nationalité', 'nationalite'],
+    'region': ['region', 'région', 'zone', 'area', 'location', 'localisation'],
+    'birthday': [
+        'birthday', 'anniversaire', 'date de naissance',
+        'birth_date', 'birth date', 'dob'
+    ],
+    'language': ['language', 'langue', 'lang', 'idioma'],
+    'employee_id': [
+        'employee_id', 'id_employé', 'id_employe', 'employé_id',
+        'employe_id', 'employee id', 'id employee', 'responsable_id',
+        'responsable id', 'assigned_to_id', 'assigned to id'
+    ],
+}
+
+# ContactCreate fields stored on the contacts table, in a fixed order for bulk INSERT
+INSERT_COLUMNS = [name for name in ContactCreate.model_fields if name in Contact.__table__.columns]
+
+Row = Dict[str, Any]
+
+
+def normalize_filename(name: str) -> str:
+    """
+    Normalize a name for filename matching.
+    - Convert to lowercase
+    - Remove accents
+    - Replace spaces and special characters with underscores
+    - Remove multiple underscores
+    """
+    if not name:
+        return ""
+    # Convert to lowercase
+    name = name.lower().strip()
+    # Remove accents
+    name = unicodedata.normalize('NFD', name)
+    name = ''.join(char for char in name if unicodedata.category(char) != 'Mn')
+    # Replace spaces and special characters with underscores
+    name = re.sub(r'[^\w\-]', '_', name)
+    # Remove multiple underscores
+    name = re.sub(r'_+', '_', name)
+    # Remove leading/trailing underscores
+    name = name.strip('_')
+    return name
+
+
+def normalize_key(key: Any) -> str:
+    """Normalize a column name for matching (case and accent insensitive)"""
+    if not key:
+        return ''
+    normalized = unicodedata.normalize('NFD', str(key).lower().strip())
+    return ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
+
+
+def strip_legal_forms(name: str) -> str:
+    """Company name without its legal form (sarl, sa, sas, eurl)"""
+    return name.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
+
+
+def parse_region(region: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Try to extract city and country from a region field"""
+    if not region:
+        return None, None
+    region_str = str(region).strip()
+    if not region_str:
+        return None, None
+
+    # Common patterns: "City, Country" or "City - Country" or "City/Country"
+    for sep in (',', '-', '/', '|'):
+        if sep in region_str:
+            parts = [p.strip() for p in region_str.split(sep, 1)]
+            if len(parts) == 2:
+                return parts[0] or None, parts[1] or None
+
+    # If no separator, assume it's a city
+    return region_str, None
+
+
+def parse_birthday(raw: Optional[str]):
+    """Date of a birthday cell, None when it cannot be parsed"""
+    if not raw:
+        return None
+    try:
+        from dateutil import parser
+        return parser.parse(str(raw)).date()
+    except ImportError:
+        for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d.%m.%Y'):
+            try:
+                return dt.strptime(str(raw).strip(), fmt).date()
+            except ValueError:
+                continue
+    except (ValueError, TypeError, OverflowError):
+        pass
+    return None
+
+
+def parse_int(raw: Optional[str]) -> Optional[int]:
+    """Integer of an ID cell (handles float strings), None when invalid"""
+    try:
+        return int(float(str(raw)))
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+class FieldResolver:
+    """
+    Column lookup for every contact field, resolved once per file
+
+    Same rules as matching each row on its own: exact column names first,
+    then case and accent insensitive ones, first non-empty value wins.
+    """
+
+    def __init__(self, headers: Iterable[str]):
+        headers = list(headers)
+        present = set(headers)
+        by_normalized = {normalize_key(header): header for header in headers}
+        self.columns: Dict[str, List[str]] = {}
+        for name, aliases in FIELD_ALIASES.items():
+            columns = [alias for alias in aliases if alias in present]
+            columns += [by_normalized[normalize_key(alias)] for alias in aliases if normalize_key(alias) in by_normalized]
+            self.columns[name] = list(dict.fromkeys(columns))
+
+    def get(self, row: Row, name: str) -> Optional[str]:
+        for column in self.columns[name]:
+            value = row.get(column)
+            if value is not None:
+                value = str(value).strip()
+                if value:
+                    return value
+        return None
+
+
+class ExcelRows:
+    """
+    Data rows of the first worksheet, as dicts keyed by column header
+
+    Rows are read one at a time with openpyxl in read-only mode. Headers are
+    named like pandas does (blank headers become "Unnamed: <n>", duplicates
+    get a ".<n>" suffix) and fully empty rows are skipped. Files openpyxl
+    cannot open (.xls) are parsed by ImportService instead.
+    """
+
+    def __init__(self, source: BinaryIO):
+        self._workbook = None
+        self._rows: Iterator[Tuple[int, Row]]
+        self.warnings: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, Any]] = []
+        self.invalid_rows = 0
+
+        try:
+            import openpyxl
+            source.seek(0)
+            self._workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        except Exception as e:
+            logger.debug(f"openpyxl cannot read the workbook ({e}), falling back to pandas")
+            source.seek(0)
+            try:
+                result = ImportService.import_from_excel(file_content=source.read(), has_headers=True)
+            except Exception as read_error:
+                raise BadRequestException(f"Error reading Excel file: {str(read_error)}")
+            if not result or not isinstance(result.get('data'), list):
+                raise BadRequestException("Invalid Excel file format or empty file")
+            self.warnings = result.get('warnings') or []
+            self.errors = result.get('errors') or []
+            self.invalid_rows = result.get('invalid_rows', 0)
+            self.total = len(result['data'])
+            self.headers = list(result['data'][0].keys()) if result['data'] else []
+            self._rows = ((idx + 2, row) for idx, row in enumerate(result['data']))
+            return
+
+        sheet = self._workbook.worksheets[0]
+        cells = sheet.iter_rows(values_only=True)
+        header_row = next(cells, None) or ()
+        self.headers = self._header_names(header_row)
+        self.total = max((sheet.max_row or 1) - 1, 0)
+        self._rows = self._iter_sheet(cells)
+
+    @staticmethod
+    def _header_names(cells: Tuple[Any, ...]) -> List[str]:
+        names: List[str] = []
+        seen: Dict[str, int] = {}
+        for position, value in enumerate(cells):
+            name = f"Unnamed: {position}" if value is None or str(value).strip() == "" else str(value)
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            names.append(name)
+        return names
+
+    def _iter_sheet(self, cells: Iterator[Tuple[Any, ...]]) -> Iterator[Tuple[int, Row]]:
+        for row_number, values in enumerate(cells, start=2):
+            if all(value is None or (isinstance(value, str) and not value.strip()) for value in values):
+                continue
+            yield row_number, dict(zip(self.headers, values))
+
+    def __iter__(self) -> Iterator[Tuple[int, Row]]:
+        return self._rows
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+
+class PhotoArchive:
+    """Photos of a ZIP, indexed by lowercase and normalized file name, read on demand"""
+
+    def __init__(self, archive: zipfile.ZipFile, entries: Iterable[str]):
+        self._archive = archive
+        self._entries: Dict[str, str] = {}
+        self.count = 0
+        for entry in entries:
+            name = os.path.basename(entry)
+            self._entries[name.lower()] = entry
+            normalized = normalize_filename(name)
+            if normalized != name.lower():
+                self._entries[normalized] = entry
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def read(self, key: str) -> bytes:
+        return self._archive.read(self._entries[key])
+
+
+class PhotoUploadFile:
+    """UploadFile-like wrapper of a photo read from the archive"""
+
+    def __init__(self, filename: str, content: bytes):
+        self.filename = filename
+        lower = filename.lower()
+        if lower.endswith(('.jpg', '.jpeg')):
+            self.content_type = 'image/jpeg'
+        elif lower.endswith('.png'):
+            self.content_type = 'image/png'
+        else:
+            self.content_type = 'image/webp'
+        self.file = BytesIO(content)
+
+
+class CompanyNameIndex:
+    """
+    Company matching by name: exact, without legal form, then partial
+
+    Partial matching scans precomputed names and its result is memoized per
+    distinct company name, so a file naming the same companies on many rows
+    scans once per name.
+    """
+
+    EXACT = 'exact'
+    WITHOUT_LEGAL_FORM = 'without_legal_form'
+    PARTIAL = 'partial'
+
+    def __init__(self, companies: Iterable[Tuple[int, Optional[str]]]):
+        self.ids_by_name: Dict[str, int] = {}
+        self.names_by_id: Dict[int, str] = {}
+        for company_id, name in companies:
+            if name:
+                self.ids_by_name[name.lower().strip()] = company_id
+                self.names_by_id[company_id] = name
+        self._stored = [(name, strip_legal_forms(name), company_id) for name, company_id in self.ids_by_name.items()]
+        self._matches: Dict[str, Tuple[Optional[int], Optional[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids_by_name)
+
+    def match(self, company_name: str) -> Tuple[Optional[int], Optional[str]]:
+        """(company id, match kind), (None, None) when no company matches"""
+        normalized = company_name.strip().lower()
+        if normalized in self._matches:
+            return self._matches[normalized]
+
+        clean = strip_legal_forms(normalized)
+        match: Tuple[Optional[int], Optional[str]] = (None, None)
+        if normalized in self.ids_by_name:
+            match = (self.ids_by_name[normalized], self.EXACT)
+        elif clean and clean in self.ids_by_name:
+            match = (self.ids_by_name[clean], self.WITHOUT_LEGAL_FORM)
+        else:
+            for stored_name, stored_clean, stored_id in self._stored:
+                if clean and stored_clean and (clean in stored_clean or stored_clean in clean):
+                    match = (stored_id, self.PARTIAL)
+                    break
+            else:
+                for stored_name, stored_clean, stored_id in self._stored:
+                    if normalized in stored_name or stored_name in normalized:
+                        match = (stored_id, self.PARTIAL)
+                        break
+
+        self._matches[normalized] = match
+        return match
+
+
+class ExistingContactIndex:
+    """Existing contacts by email, name + email and name + company, for reimports"""
+
+    def __init__(self, contacts: Iterable[Tuple[int, str, str, Optional[str], Optional[int]]]):
+        self.by_email: Dict[str, int] = {}
+        self.by_name_email: Dict[Tuple[str, str, str], int] = {}
+        self.by_name_company: Dict[Tuple[str, str, int], int] = {}
+        self.count = 0
+        for contact_id, first_name, last_name, email, company_id in contacts:
+            first, last = first_name.lower().strip(), last_name.lower().strip()
+            if email:
+                email_lower = email.lower().strip()
+                self.by_email[email_lower] = contact_id
+                self.by_name_email[(first, last, email_lower)] = contact_id
+            if company_id:
+                self.by_name_company[(first, last, company_id)] = contact_id
+            self.count += 1
+
+    def find(self, first_name: str, last_name: str, email: Optional[str], company_id: Optional[int]) -> Tuple[Optional[int], Optional[str]]:
+        """(contact id, match reason) of the contact a row updates"""
+        email_lower = email.lower().strip() if email else None
+        first, last = first_name.lower().strip(), last_name.lower().strip()
+        if email_lower and email_lower in self.by_email:
+            return self.by_email[email_lower], f"email: {email_lower}"
+        if email_lower:
+            contact_id = self.by_name_email.get((first, last, email_lower))
+            if contact_id is not None:
+                return contact_id, f"name+email: {first_name} {last_name} + {email_lower}"
+        elif company_id:
+            contact_id = self.by_name_company.get((first, last, company_id))
+            if contact_id is not None:
+                return contact_id, f"name+company: {first_name} {last_name} + company_id:{company_id}"
+        return None, None
+
+
+@dataclass
+class PendingContact:
+    """A validated row waiting for its photo upload and database write"""
+
+    row: int
+    label: str
+    values: Dict[str, Any]
+    existing_id: Optional[int] = None
+    photo_candidates: List[str] = field(default_factory=list)
+    contact_id: Optional[int] = None
+
+
+class ContactImportEngine:
+    """Imports one uploaded file into the contacts of the current session"""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        user_id: Any,
+        import_id: str,
+        chunk_size: int = settings.CONTACT_IMPORT_CHUNK_SIZE,
+        photo_concurrency: int = settings.CONTACT_IMPORT_PHOTO_CONCURRENCY,
+        s3_service: Optional[Any] = None,
+    ):
+        self.db = db
+        self.user_id = str(user_id)
+        self.import_id = import_id
+        self.chunk_size = max(chunk_size, 1)
+        self.photo_concurrency = max(photo_concurrency, 1)
+        self.s3_service = s3_service
+        self.errors: List[Dict[str, Any]] = []
+        self.warnings: List[Dict[str, Any]] = []
+        self.contact_ids: List[int] = []
+        self.created = 0
+        self.updated = 0
+        self.with_photo = 0
+        self._archive: Optional[zipfile.ZipFile] = None
+        self._excel: Optional[BinaryIO] = None
+        self._photos: Optional[PhotoArchive] = None
+
+    def log(self, message: str, level: str = "info", data: Optional[Dict] = None) -> None:
+        import_progress_bus.log(self.import_id, message, level, data)
+
+    # ------------------------------------------------------------------
+    # Source
+    # ------------------------------------------------------------------
+
+    def _open(self, upload: BinaryIO, filename: str) -> BinaryIO:
+        """Excel stream of the upload; for a ZIP, also indexes its photos"""
+        upload.seek(0, os.SEEK_END)
+        size = upload.tell()
+        upload.seek(0)
+        file_ext = os.path.splitext(filename.lower())[1]
+        self.log(f"Fichier lu: {size} bytes, extension: {file_ext}", "info")
+        if file_ext != '.zip':
+            return upload
+
+        self.log("Détection d'un fichier ZIP, extraction en cours...", "info")
+        try:
+            self._archive = zipfile.ZipFile(upload, 'r')
+            excel_entry = None
+            photo_entries = []
+            for entry in self._archive.namelist():
+                entry_lower = entry.lower()
+                if entry_lower.endswith(EXCEL_EXTENSIONS):
+                    if excel_entry is None:
+                        excel_entry = entry
+                        self.log(f"Fichier Excel trouvé dans le ZIP: {entry}", "info")
+                    else:
+                        logger.warning(f"Multiple Excel files found in ZIP, using first: {entry}")
+                        self.log(f"Plusieurs fichiers Excel trouvés, utilisation du premier: {entry}", "warning")
+                elif entry_lower.endswith(PHOTO_EXTENSIONS):
+                    photo_entries.append(entry)
+            self._photos = PhotoArchive(self._archive, photo_entries)
+            self.log(f"Extraction ZIP terminée: {self._photos.count} photo(s) trouvée(s)", "info")
+
+            if excel_entry is None:
+                self.log("ERREUR: Aucun fichier Excel trouvé dans le ZIP", "error")
+                raise BadRequestException("No Excel file found in ZIP. Please include contacts.xlsx or contacts.xls")
+
+            self._excel = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            with self._archive.open(excel_entry) as entry_file:
+                shutil.copyfileobj(entry_file, self._excel)
+            self._excel.seek(0)
+        except BadRequestException:
+            raise
+        except zipfile.BadZipFile:
+            self.log("ERREUR: Format ZIP invalide", "error")
+            raise BadRequestException("Invalid ZIP file format")
+        except Exception as e:
+            self.log(f"ERREUR lors de l'extraction ZIP: {str(e)}", "error")
+            logger.error(f"Error extracting ZIP: {e}")
+            raise BadRequestException(f"Error processing ZIP file: {str(e)}")
+
+        logger.info(f"Opened Excel from ZIP with {self._photos.count} photos")
+        return self._excel
+
+    def close(self) -> None:
+        if self._excel is not None:
+            self._excel.close()
+            self._excel = None
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    # ------------------------------------------------------------------
+    # Import
+    # ------------------------------------------------------------------
+
+    async def run(self, upload: BinaryIO, filename: str) -> Dict[str, Any]:
+        """Import the upload; raises AppException on unreadable files or database errors"""
+        rows = None
+        try:
+            source = self._open(upload, filename or "")
+            self.log("Lecture du fichier Excel...", "info")
+            try:
+                rows = ExcelRows(source)
+            except BadRequestException as e:
+                self.log(f"ERREUR lors de la lecture Excel: {e.message}", "error")
+                raise
+            self.log(f"Fichier Excel ouvert: {rows.total} ligne(s) trouvée(s)", "info")
+            import_progress_bus.update_status(self.import_id, "processing", progress=0, total=rows.total)
+
+            companies = await self._load_companies()
+            existing = await self._load_existing_contacts()
+            self._init_storage()
+            fields = FieldResolver(rows.headers)
+
+            processed = 0
+            chunk: List[PendingContact] = []
+            for row_number, row in rows:
+                processed += 1
+                import_progress_bus.update_status(
+                    self.import_id, "processing", progress=processed, total=max(rows.total, processed)
+                )
+                try:
+                    pending = self._prepare_row(row_number, row, fields, companies, existing)
+                except Exception as e:
+                    self.log(f"Ligne {row_number}: Erreur lors de l'import - {str(e)}", "error", {"row": row_number, "error": str(e)})
+                    self.errors.append({'row': row_number, 'data': row, 'error': str(e)})
+                    logger.error(f"Error importing contact row {row_number}: {str(e)}")
+                    continue
+                if pending is not None:
+                    chunk.append(pending)
+                if len(chunk) >= self.chunk_size:
+                    await self._write_chunk(chunk)
+                    chunk = []
+            if chunk:
+                await self._write_chunk(chunk)
+
+            await self._commit()
+            return {
+                'total_rows': processed,
+                'valid_rows': len(self.contact_ids),
+                'created_rows': self.created,
+                'updated_rows': self.updated,
+                'invalid_rows': len(self.errors) + rows.invalid_rows,
+                'errors': self.errors + rows.errors,
+                'warnings': rows.warnings + self.warnings,
+                'photos_uploaded': self.with_photo if self._photos else 0,
+                'contact_ids': self.contact_ids,
+            }
+        finally:
+            if rows is not None:
+                rows.close()
+            self.close()
+
+    async def _load_companies(self) -> CompanyNameIndex:
+        self.log("Chargement des entreprises existantes...", "info")
+        try:
+            result = await self.db.execute(select(Company.id, Company.name))
+            companies = CompanyNameIndex(result.all())
+        except Exception as e:
+            self.log(f"ERREUR lors du chargement des entreprises: {str(e)}", "error")
+            logger.error(f"Error loading companies: {e}", exc_info=True)
+            raise InternalServerException("Error loading companies from database")
+        self.log(f"{len(companies)} entreprise(s) chargée(s) pour le matching", "info")
+        return companies
+
+    async def _load_existing_contacts(self) -> ExistingContactIndex:
+        self.log("Chargement des contacts existants pour détecter les doublons...", "info")
+        try:
+            result = await self.db.execute(
+                select(Contact.id, Contact.first_name, Contact.last_name, Contact.email, Contact.company_id)
+            )
+            existing = ExistingContactIndex(result.all())
+        except Exception as e:
+            self.log(f"ERREUR lors du chargement des contacts existants: {str(e)}", "error")
+            logger.error(f"Error loading existing contacts: {e}", exc_info=True)
+            raise InternalServerException("Error loading existing contacts from database")
+        self.log(f"{existing.count} contact(s) existant(s) chargé(s)", "info")
+        return existing
+
+    def _init_storage(self) -> None:
+        """S3 service for photo uploads, with a warning when photos cannot be uploaded"""
+        if self.s3_service is not None:
+            return
+        if S3Service.is_configured():
+            try:
+                self.s3_service = S3Service()
+                logger.info("S3Service initialized successfully for contact photo uploads")
+            except Exception as e:
+                logger.error(f"Failed to initialize S3Service: {e}", exc_info=True)
+                self.warnings.append({
+                    'row': 0,
+                    'type': 's3_init_failed',
+                    'message': f"⚠️ Impossible d'initialiser le service S3 pour l'upload des photos. Les contacts seront créés sans photos. Erreur: {str(e)}",
+                    'data': {'error_details': str(e)}
+                })
+        else:
+            logger.warning("S3 is not configured. Photos from ZIP will not be uploaded to S3.")
+            if self._photos:
+                self.warnings.append({
+                    'row': 0,
+                    'type': 's3_not_configured',
+                    'message': f"⚠️ S3 n'est pas configuré. {self._photos.count} photo(s) trouvée(s) dans le ZIP ne seront pas uploadées.",
+                    'data': {'photos_count': self._photos.count}
+                })
+
+    def _prepare_row(
+        self,
+        row_number: int,
+        row: Row,
+        fields: FieldResolver,
+        companies: CompanyNameIndex,
+        existing: ExistingContactIndex,
+    ) -> Optional[PendingContact]:
+        """Validate and map a row; None (with an error recorded) when it is skipped"""
+        first_name = fields.get(row, 'first_name') or ''
+        last_name = fields.get(row, 'last_name') or ''
+        label = f"{first_name} {last_name}"
+
+        if not first_name.strip() or not last_name.strip():
+            missing, error = (
+                ("Prénom", 'Le prénom est obligatoire') if not first_name.strip()
+                else ("Nom", 'Le nom est obligatoire')
+            )
+            self.log(f"Ligne {row_number}: {missing} manquant - contact ignoré", "warning", {"row": row_number, "contact": label})
+            self.errors.append({'row': row_number, 'data': row, 'error': error})
+            return None
+
+        company_id = None
+        company_id_raw = fields.get(row, 'company_id')
+        if company_id_raw:
+            company_id = parse_int(company_id_raw)
+        if not company_id:
+            company_name = fields.get(row, 'company_name')
+            if company_name:
+                company_id = self._match_company(row_number, company_name, label, companies)
+
+        city = fields.get(row, 'city')
+        country = fields.get(row, 'country')
+        if not city or not country:
+            parsed_city, parsed_country = parse_region(fields.get(row, 'region'))
+            city = city or parsed_city
+            country = country or parsed_country
+
+        employee_id = None
+        employee_id_raw = fields.get(row, 'employee_id')
+        if employee_id_raw:
+            employee_id = parse_int(employee_id_raw)
+            if employee_id is None:
+                self.warnings.append({
+                    'row': row_number,
+                    'type': 'invalid_employee_id',
+                    'message': f"ID employé invalide: '{employee_id_raw}'",
+                    'data': {'employee_id_raw': employee_id_raw}
+                })
+
+        email = fields.get(row, 'email')
+        photo_url = fields.get(row, 'photo_url')
+        photo_filename = fields.get(row, 'photo_filename')
+        contact_data = ContactCreate(
+            first_name=first_name.strip(),
+            last_name=last_name.strip(),
+            company_id=company_id,
+            position=fields.get(row, 'position'),
+            circle=fields.get(row, 'circle'),
+            linkedin=fields.get(row, 'linkedin'),
+            photo_url=photo_url,
+            photo_filename=photo_filename,
+            email=email,
+            phone=fields.get(row, 'phone'),
+            city=city,
+            country=country,
+            birthday=parse_birthday(fields.get(row, 'birthday')),
+            language=fields.get(row, 'language'),
+            employee_id=employee_id,
+        )
+
+        existing_id, match_reason = existing.find(first_name, last_name, email, company_id)
+        pending = PendingContact(
+            row=row_number,
+            label=label,
+            values=contact_data.model_dump(exclude_none=True, include=set(INSERT_COLUMNS)),
+            existing_id=existing_id,
+        )
+        if existing_id is not None:
+            self.log(
+                f"Ligne {row_number}: Contact existant trouvé ({match_reason}) - sera mis à jour", "info",
+                {"row": row_number, "match_reason": match_reason, "existing_id": existing_id},
+            )
+        if not photo_url and self._photos and self.s3_service:
+            pending.photo_candidates = self._photo_candidates(first_name, last_name, photo_filename)
+        return pending
+
+    def _match_company(self, row_number: int, company_name: str, label: str, companies: CompanyNameIndex) -> Optional[int]:
+        company_id, kind = companies.match(company_name)
+        if kind == CompanyNameIndex.WITHOUT_LEGAL_FORM:
+            self.warnings.append({
+                'row': row_number,
+                'type': 'company_match_without_legal_form',
+                'message': f"Entreprise '{company_name}' correspond à une entreprise existante (sans forme juridique)",
+                'data': {'company_name': company_name, 'matched_company_id': company_id}
+            })
+        elif kind == CompanyNameIndex.PARTIAL:
+            matched_name = companies.names_by_id.get(company_id)
+            self.warnings.append({
+                'row': row_number,
+                'type': 'company_partial_match',
+                'message': f"Entreprise '{company_name}' correspond partiellement à '{matched_name}' (ID: {company_id}). Veuillez vérifier.",
+                'data': {
+                    'company_name': company_name,
+                    'matched_company_name': matched_name,
+                    'matched_company_id': company_id,
+                    'contact': label.strip()
+                }
+            })
+        elif kind is None:
+            self.warnings.append({
+                'row': row_number,
+                'type': 'company_not_found',
+                'message': f"⚠️ Entreprise '{company_name}' non trouvée dans la base de données. Veuillez réviser et créer l'entreprise si nécessaire.",
+                'data': {
+                    'company_name': company_name,
+                    'contact': label.strip()
+                }
+            })
+        return company_id
+
+    def _photo_candidates(self, first_name: str, last_name: str, photo_filename: Optional[str]) -> List[str]:
+        """Archive keys to try for a contact: the Excel file name first, then name patterns"""
+        candidates: List[str] = []
+
+        def add(name: str) -> None:
+            for key in (name.lower(), normalize_filename(name)):
+                if key in self._photos:
+                    candidates.append(key)
+                    return
+
+        if photo_filename:
+            add(photo_filename)
+        first_normalized, last_normalized = normalize_filename(first_name), normalize_filename(last_name)
+        for ext in PHOTO_EXTENSIONS:
+            add(f"{first_normalized}_{last_normalized}{ext}")
+        for ext in PHOTO_EXTENSIONS:
+            add(f"{first_name.lower()}_{last_name.lower()}{ext}")
+        return list(dict.fromkeys(candidates))
+
+    # ------------------------------------------------------------------
+    # Chunk writes
+    # ------------------------------------------------------------------
+
+    async def _write_chunk(self, chunk: List[PendingContact]) -> None:
+        uploads = [pending for pending in chunk if pending.photo_candidates]
+        if uploads:
+            semaphore = asyncio.Semaphore(self.photo_concurrency)
+            await asyncio.gather(*(self._upload_photo(pending, semaphore) for pending in uploads))
+
+        inserts = [pending for pending in chunk if pending.existing_id is None]
+        updates = [pending for pending in chunk if pending.existing_id is not None]
+        try:
+            if inserts:
+                result = await self.db.execute(
+                    insert(Contact).returning(Contact.id, sort_by_parameter_order=True),
+                    [{column: pending.values.get(column) for column in INSERT_COLUMNS} for pending in inserts],
+                )
+                for pending, contact_id in zip(inserts, result.scalars().all()):
+                    pending.contact_id = contact_id
+            if updates:
+                await self.db.execute(
+                    update(Contact),
+                    [{'id': pending.existing_id, **pending.values} for pending in updates],
+                )
+        except Exception as e:
+            await self._fail_write(e)
+
+        for pending in chunk:
+            if pending.existing_id is not None:
+                pending.contact_id = pending.existing_id
+                self.updated += 1
+                self.log(
+                    f"Ligne {pending.row}: Contact mis à jour - {pending.label} (ID: {pending.existing_id})", "success",
+                    {"row": pending.row, "action": "updated", "contact_id": pending.existing_id},
+                )
+            else:
+                self.created += 1
+                self.log(
+                    f"Ligne {pending.row}: Nouveau contact créé - {pending.label}", "success",
+                    {"row": pending.row, "action": "created", "contact_id": pending.contact_id},
+                )
+            if pending.values.get('photo_url'):
+                self.with_photo += 1
+            self.contact_ids.append(pending.contact_id)
+        self.log(f"{len(self.contact_ids)} contact(s) enregistré(s)", "info")
+
+    async def _upload_photo(self, pending: PendingContact, semaphore: asyncio.Semaphore) -> None:
+        """Upload the first candidate photo that succeeds, one worker slot at a time"""
+        async with semaphore:
+            for key in pending.photo_candidates:
+                try:
+                    file_key = await asyncio.to_thread(self._upload_sync, key)
+                except Exception as e:
+                    logger.error(f"Failed to upload photo {key} for {pending.label}: {e}", exc_info=True)
+                    self.warnings.append({
+                        'row': pending.row,
+                        'type': 'photo_upload_error',
+                        'message': f"Erreur lors de l'upload de la photo '{key}' pour {pending.label}: {str(e)}",
+                        'data': {'contact': pending.label, 'pattern': key, 'error': str(e)}
+                    })
+                    continue
+                if file_key:
+                    pending.values['photo_url'] = file_key
+                    self.log(f"Ligne {pending.row}: Photo uploadée pour {pending.label}", "success", {"row": pending.row, "photo": key})
+                    return
+
+    def _upload_sync(self, key: str) -> Optional[str]:
+        """Read a photo from the archive and upload it (runs in a worker thread)"""
+        upload_result = self.s3_service.upload_file(
+            file=PhotoUploadFile(key, self._photos.read(key)),
+            folder=PHOTO_FOLDER,
+            user_id=self.user_id,
+        )
+        file_key = upload_result.get('file_key')
+        if file_key and not file_key.startswith(PHOTO_FOLDER):
+            if file_key.startswith('contacts/'):
+                file_key = file_key.replace('contacts/', f'{PHOTO_FOLDER}/', 1)
+            else:
+                file_key = f"{PHOTO_FOLDER}/{file_key}"
+        return file_key
+
+    async def _commit(self) -> None:
+        self.log(f"Sauvegarde de {len(self.contact_ids)} contact(s) dans la base de données...", "info")
+        if not self.contact_ids:
+            return
+        try:
+            await self.db.commit()
+        except Exception as e:
+            await self._fail_write(e)
+        self.log(
+            f"Sauvegarde réussie: {self.created} nouveau(x) contact(s), {self.updated} contact(s) mis à jour", "success"
+        )
+
+    async def _fail_write(self, error: Exception) -> None:
+        self.log(f"ERREUR lors de la sauvegarde: {str(error)}", "error")
+        logger.error(f"Error writing contacts to database: {error}", exc_info=True)
+        await self.db.rollback()
+        raise InternalServerException(f"Error saving contacts to database: {str(error)}")
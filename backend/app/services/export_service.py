@@ -1,21 +1,19 @@
 """
 Data Export Service
-Supports exporting data to CSV, Excel, JSON, and PDF formats
+Supports exporting data to CSV, Excel, JSON, NDJSON, Parquet, Arrow IPC, and PDF formats
+
+open_stream() is the streaming path: rows (a list, an iterator, or
+export_stream.stream_rows() over a query) are encoded chunk by chunk for a
+StreamingResponse. The export_to_* helpers build a whole file in memory
+with the same encoders, for callers that need a buffer.
 """
 
-import csv
 import json
 from typing import List, Dict, Any, Optional
-from io import StringIO, BytesIO
+from io import BytesIO
 from datetime import datetime
 from decimal import Decimal
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-
 try:
     from reportlab.lib.pagesizes import letter
     from reportlab.lib import colors
@@ -27,11 +25,58 @@ except ImportError:
     REPORTLAB_AVAILABLE = False
 
 from app.core.logging import logger
+from app.services.export_stream import (
+    OPENPYXL_AVAILABLE,
+    PYARROW_AVAILABLE,
+    ExportStream,
+    RowSource,
+    make_encoder,
+)
 
 
 class ExportService:
     """Service for exporting data to various formats"""
 
+    @staticmethod
+    async def open_stream(
+        rows: RowSource,
+        format: str,
+        headers: Optional[List[str]] = None,
+        filename: Optional[str] = None,
+        sheet_name: str = "Sheet1",
+        pretty: bool = True,
+        schema: Optional[Any] = None,
+    ) -> ExportStream:
+        """
+        Prepare a streaming export (csv, excel, json, ndjson, parquet or arrow)
+        
+        Args:
+            rows: Iterable or async iterable of dictionaries (see export_stream.stream_rows)
+            format: Export format
+            headers: Optional list of columns (first row keys if not provided)
+            filename: Optional filename (generates if not provided)
+            sheet_name: Excel sheet name
+            pretty: Whether to format JSON nicely
+            schema: Optional pyarrow.Schema for parquet/arrow (inferred from the first rows if not provided)
+            
+        Returns:
+            ExportStream to pass to a StreamingResponse (media_type, filename, content_disposition)
+        """
+        return await ExportStream.open(
+            rows, format, headers=headers, filename=filename, sheet_name=sheet_name, pretty=pretty, schema=schema
+        )
+
+    @staticmethod
+    def _encode(format: str, data: List[Dict[str, Any]], headers: Optional[List[str]], **options: Any) -> BytesIO:
+        encoder = make_encoder(format, headers, **options)
+        buffer = BytesIO()
+        buffer.write(encoder.start())
+        buffer.write(encoder.encode(data))
+        for chunk in encoder.finish():
+            buffer.write(chunk)
+        buffer.seek(0)
+        return buffer
+
     @staticmethod
     def export_to_csv(
         data: List[Dict[str, Any]],
@@ -52,35 +97,11 @@ class ExportService:
         if not data:
             raise ValueError("No data to export")
 
-        output = StringIO()
-        
         # Get headers from first item if not provided
         if headers is None:
             headers = list(data[0].keys())
         
-        writer = csv.DictWriter(output, fieldnames=headers, extrasaction='ignore')
-        writer.writeheader()
-        
-        for row in data:
-            # Convert complex types to strings
-            cleaned_row = {}
-            for key, value in row.items():
-                if key in headers:
-                    if isinstance(value, (datetime,)):
-                        cleaned_row[key] = value.isoformat()
-                    elif isinstance(value, (Decimal,)):
-                        cleaned_row[key] = str(value)
-                    elif isinstance(value, (dict, list)):
-                        cleaned_row[key] = json.dumps(value)
-                    elif value is None:
-                        cleaned_row[key] = ""
-                    else:
-                        cleaned_row[key] = str(value)
-            writer.writerow(cleaned_row)
-        
-        buffer = BytesIO()
-        buffer.write(output.getvalue().encode('utf-8'))
-        buffer.seek(0)
+        buffer = ExportService._encode("csv", data, headers)
         
         if filename is None:
             filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
@@ -95,7 +116,7 @@ class ExportService:
         sheet_name: str = "Sheet1"
     ) -> tuple[BytesIO, str]:
         """
-        Export data to Excel format (requires pandas)
+        Export data to Excel format (requires openpyxl)
         
         Args:
             data: List of dictionaries to export
@@ -106,31 +127,19 @@ class ExportService:
         Returns:
             Tuple of (BytesIO buffer, filename)
         """
-        if not PANDAS_AVAILABLE:
-            raise ImportError("pandas is required for Excel export. Install with: pip install pandas openpyxl")
+        if not OPENPYXL_AVAILABLE:
+            raise ImportError("openpyxl is required for Excel export. Install with: pip install openpyxl")
         
         if not data:
             raise ValueError("No data to export")
 
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        
-        # Reorder columns if headers provided
+        # Columns of every row, in first-seen order
+        columns = list(dict.fromkeys(key for row in data for key in row))
         if headers:
             # Only include headers that exist in data
-            available_headers = [h for h in headers if h in df.columns]
-            df = df[available_headers]
-        
-        # Convert complex types
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].apply(lambda x: json.dumps(x) if isinstance(x, (dict, list)) else x)
+            columns = [h for h in headers if h in columns]
         
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-        
-        buffer.seek(0)
+        buffer = ExportService._encode("excel", data, columns, sheet_name=sheet_name)
         
         if filename is None:
             filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -157,32 +166,73 @@ class ExportService:
         if not data:
             raise ValueError("No data to export")
 
-        # Convert complex types to JSON-serializable
-        serializable_data = []
-        for item in data:
-            cleaned_item = {}
-            for key, value in item.items():
-                if isinstance(value, (datetime,)):
-                    cleaned_item[key] = value.isoformat()
-                elif isinstance(value, (Decimal,)):
-                    cleaned_item[key] = float(value)
-                elif isinstance(value, (bytes,)):
-                    cleaned_item[key] = value.decode('utf-8', errors='ignore')
-                else:
-                    cleaned_item[key] = value
-            serializable_data.append(cleaned_item)
+        buffer = ExportService._encode("json", data, None, pretty=pretty)
         
-        if pretty:
-            json_str = json.dumps(serializable_data, indent=2, default=str, ensure_ascii=False)
-        else:
-            json_str = json.dumps(serializable_data, default=str, ensure_ascii=False)
+        if filename is None:
+            filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        buffer = BytesIO()
-        buffer.write(json_str.encode('utf-8'))
-        buffer.seek(0)
+        return buffer, filename
+
+    @staticmethod
+    def export_to_parquet(
+        data: List[Dict[str, Any]],
+        headers: Optional[List[str]] = None,
+        filename: Optional[str] = None,
+        schema: Optional[Any] = None
+    ) -> tuple[BytesIO, str]:
+        """
+        Export data to Parquet format (requires pyarrow)
+        
+        Args:
+            data: List of dictionaries to export
+            headers: Optional list of columns
+            filename: Optional filename
+            schema: Optional pyarrow.Schema (inferred from the data if not provided)
+            
+        Returns:
+            Tuple of (BytesIO buffer, filename)
+        """
+        return ExportService._export_columnar("parquet", data, headers, filename, schema)
+
+    @staticmethod
+    def export_to_arrow(
+        data: List[Dict[str, Any]],
+        headers: Optional[List[str]] = None,
+        filename: Optional[str] = None,
+        schema: Optional[Any] = None
+    ) -> tuple[BytesIO, str]:
+        """
+        Export data to Arrow IPC file format, readable as Feather (requires pyarrow)
+        
+        Args:
+            data: List of dictionaries to export
+            headers: Optional list of columns
+            filename: Optional filename
+            schema: Optional pyarrow.Schema (inferred from the data if not provided)
+            
+        Returns:
+            Tuple of (BytesIO buffer, filename)
+        """
+        return ExportService._export_columnar("arrow", data, headers, filename, schema)
+
+    @staticmethod
+    def _export_columnar(
+        format: str,
+        data: List[Dict[str, Any]],
+        headers: Optional[List[str]],
+        filename: Optional[str],
+        schema: Optional[Any]
+    ) -> tuple[BytesIO, str]:
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for Parquet/Arrow export. Install with: pip install pyarrow")
+        
+        if not data and schema is None:
+            raise ValueError("No data to export")
+        
+        buffer = ExportService._encode(format, data, headers, schema=schema)
         
         if filename is None:
-            filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
         
         return buffer, filename
 
@@ -338,9 +388,11 @@ class ExportService:
     @staticmethod
     def get_export_formats() -> List[str]:
         """Get list of available export formats"""
-        formats = ['csv', 'json']
-        if PANDAS_AVAILABLE:
+        formats = ['csv', 'json', 'ndjson']
+        if OPENPYXL_AVAILABLE:
             formats.append('excel')
+        if PYARROW_AVAILABLE:
+            formats.extend(['parquet', 'arrow'])
         if REPORTLAB_AVAILABLE:
             formats.append('pdf')
         return formats
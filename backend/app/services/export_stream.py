@@ -0,0 +1,529 @@
+"""
+Streaming Export Engine
+Encodes rows to CSV, JSON, NDJSON, XLSX, Parquet or Arrow IPC chunk by chunk
+
+Rows come from any iterable or async iterable of dicts, typically
+stream_rows(), which reads a query through a server-side cursor
+(AsyncSession.stream / stream_scalars with yield_per) so only one batch of
+rows is in memory at a time. Endpoints returning a StreamingResponse use
+stream_rows_in_own_session() so the cursor doesn't outlive their session. Encoded output is yielded in chunks of about
+EXPORT_STREAM_CHUNK_SIZE bytes, ready for a StreamingResponse.
+
+XLSX is written with a write-only openpyxl workbook, which spools rows to a
+temporary file: memory stays constant, and the finished file is streamed
+from disk once the last row has been written (a ZIP can't be sent before
+it is complete).
+
+Parquet and Arrow IPC (file format) are written one record batch per batch
+of rows (a Parquet row group each), keeping column types. Both writers only
+append, so their output is streamed as it is produced. The Arrow schema is
+taken from the `schema` option (see arrow_schema() for a query) or inferred
+from the first batch.
+"""
+
+import asyncio
+import csv
+import json
+import tempfile
+import textwrap
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from sqlalchemy import Select, types
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+Row = Dict[str, Any]
+RowSource = Union[Iterable[Row], AsyncIterator[Row]]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+EXTENSIONS = {"csv": "csv", "json": "json", "ndjson": "ndjson", "excel": "xlsx", "parquet": "parquet", "arrow": "arrow"}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+
+async def stream_rows(
+    db: AsyncSession,
+    statement: Select,
+    mapper: Optional[Callable[[Any], Row]] = None,
+    scalars: bool = False,
+    batch_size: int = settings.EXPORT_STREAM_BATCH_SIZE,
+) -> AsyncIterator[Row]:
+    """
+    Rows of `statement` read through a server-side cursor, `batch_size` at a
+    time. With scalars=True the entities are streamed (stream_scalars) and
+    `mapper` turns each one into a dict; otherwise rows are mappings
+    (passed to `mapper` when given, converted with dict() if not).
+    """
+    statement = statement.execution_options(yield_per=batch_size)
+    if scalars:
+        result = await db.stream_scalars(statement)
+    else:
+        result = (await db.stream(statement)).mappings()
+    try:
+        async for partition in result.partitions():
+            for item in partition:
+                yield mapper(item) if mapper else dict(item)
+    finally:
+        await result.close()
+
+
+async def stream_rows_in_own_session(
+    db: AsyncSession,
+    statement: Select,
+    **options: Any,
+) -> AsyncIterator[Row]:
+    """
+    stream_rows() on a new session bound to the same engine as `db`.
+
+    A StreamingResponse is consumed after the endpoint has returned, when the
+    request-scoped session from get_db may already be closed (FastAPI < 0.118
+    runs dependency teardown before the body is sent). The session is opened
+    on the first row and closed when the stream ends or is abandoned.
+    """
+    async with AsyncSession(db.bind, expire_on_commit=False) as session:
+        async for row in stream_rows(session, statement, **options):
+            yield row
+
+
+def arrow_type(column_type: Any) -> "pa.DataType":
+    """Arrow type of a SQLAlchemy column type (string when there is no better match)"""
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.SmallInteger):
+        return pa.int16()
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.Float):
+        return pa.float64()
+    if isinstance(column_type, types.Numeric):
+        if column_type.precision and column_type.scale is not None:
+            return pa.decimal128(column_type.precision, column_type.scale)
+        return pa.float64()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    if isinstance(column_type, types.LargeBinary):
+        return pa.binary()
+    return pa.string()
+
+
+def arrow_schema(statement: Select) -> "pa.Schema":
+    """Arrow schema of the rows stream_rows() reads from `statement` (without a mapper)"""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for Parquet/Arrow export. Install with: pip install pyarrow")
+    return pa.schema([pa.field(column.key, arrow_type(column.type)) for column in statement.selected_columns])
+
+
+def csv_value(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if value is None:
+        return ""
+    return str(value)
+
+
+def json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return value
+
+
+def xlsx_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # Excel has no time zones
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, (str, int, float, Decimal, bool, date)) or value is None:
+        return value
+    return str(value)
+
+
+class CsvEncoder:
+    blocking = False
+
+    def __init__(self, headers: List[str]):
+        self.headers = headers
+        self._buffer = StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def start(self) -> bytes:
+        self._writer.writerow(self.headers)
+        return self._drain()
+
+    def encode(self, rows: List[Row]) -> bytes:
+        headers = self.headers
+        self._writer.writerows([csv_value(row.get(header)) for header in headers] for row in rows)
+        return self._drain()
+
+    def finish(self) -> Iterator[bytes]:
+        return iter(())
+
+
+class JsonEncoder:
+    """A JSON array, optionally pretty printed like json.dumps(rows, indent=2)"""
+
+    blocking = False
+
+    def __init__(self, headers: Optional[List[str]] = None, pretty: bool = True):
+        self.headers = headers
+        self.pretty = pretty
+        self._first = True
+
+    def _dump(self, row: Row) -> str:
+        if self.headers is not None:
+            row = {header: row.get(header) for header in self.headers}
+        item = {key: json_value(value) for key, value in row.items()}
+        if self.pretty:
+            return textwrap.indent(json.dumps(item, indent=2, default=str, ensure_ascii=False), "  ")
+        return json.dumps(item, default=str, ensure_ascii=False)
+
+    def start(self) -> bytes:
+        return b"["
+
+    def encode(self, rows: List[Row]) -> bytes:
+        if not rows:
+            return b""
+        separator = ",\n" if self.pretty else ", "
+        lead = "\n" if self.pretty else ""
+        if not self._first:
+            lead = separator
+        self._first = False
+        return (lead + separator.join(self._dump(row) for row in rows)).encode("utf-8")
+
+    def finish(self) -> Iterator[bytes]:
+        yield b"\n]" if self.pretty and not self._first else b"]"
+
+
+class NdjsonEncoder(JsonEncoder):
+    """One compact JSON object per line"""
+
+    def __init__(self, headers: Optional[List[str]] = None):
+        super().__init__(headers, pretty=False)
+
+    def start(self) -> bytes:
+        return b""
+
+    def encode(self, rows: List[Row]) -> bytes:
+        return "".join(self._dump(row) + "\n" for row in rows).encode("utf-8")
+
+    def finish(self) -> Iterator[bytes]:
+        return iter(())
+
+
+class XlsxEncoder:
+    """Write-only workbook spooled to a temporary file"""
+
+    blocking = True
+
+    def __init__(self, headers: List[str], sheet_name: str = "Sheet1", chunk_size: int = settings.EXPORT_STREAM_CHUNK_SIZE):
+        if not OPENPYXL_AVAILABLE:
+            raise ImportError("openpyxl is required for Excel export. Install with: pip install openpyxl")
+        self.headers = headers
+        self.chunk_size = chunk_size
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title=sheet_name)
+
+    def start(self) -> bytes:
+        cells = []
+        for header in self.headers:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.font = Font(bold=True)
+            cells.append(cell)
+        self.sheet.append(cells)
+        return b""
+
+    def encode(self, rows: List[Row]) -> bytes:
+        headers = self.headers
+        for row in rows:
+            self.sheet.append([xlsx_value(row.get(header)) for header in headers])
+        return b""
+
+    def finish(self) -> Iterator[bytes]:
+        with tempfile.TemporaryFile() as output:
+            self.workbook.save(output)
+            output.seek(0)
+            while True:
+                chunk = output.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+class _ByteSink:
+    """Append-only file object handed to the Arrow writers, drained after each write"""
+
+    closed = False
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ArrowEncoder:
+    """Parquet or Arrow IPC file, one record batch per batch of rows"""
+
+    blocking = True
+
+    def __init__(self, fmt: str, headers: Optional[List[str]] = None, schema: Optional["pa.Schema"] = None):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for Parquet/Arrow export. Install with: pip install pyarrow")
+        self.format = fmt
+        self.headers = headers
+        self.schema = schema
+        self._sink = _ByteSink()
+        self._writer = None
+
+    def _infer_schema(self, rows: List[Row]) -> "pa.Schema":
+        inferred = pa.Table.from_pylist(rows).schema
+        fields = []
+        for name in self.headers or inferred.names:
+            index = inferred.get_field_index(name)
+            data_type = inferred.field(index).type if index >= 0 else pa.null()
+            if pa.types.is_null(data_type):
+                # No value in the first batch
+                data_type = pa.string()
+            elif pa.types.is_decimal(data_type):
+                # Precision inferred from the first values only
+                data_type = pa.decimal128(38, data_type.scale)
+            fields.append(pa.field(name, data_type))
+        return pa.schema(fields)
+
+    def _open(self) -> None:
+        sink = pa.PythonFile(self._sink, mode="w")
+        if self.format == "parquet":
+            self._writer = pq.ParquetWriter(sink, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(sink, self.schema)
+
+    def start(self) -> bytes:
+        return b""
+
+    def encode(self, rows: List[Row]) -> bytes:
+        if not rows:
+            return b""
+        if self.schema is None:
+            self.schema = self._infer_schema(rows)
+        if self._writer is None:
+            self._open()
+        self._writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=self.schema))
+        return self._sink.drain()
+
+    def finish(self) -> Iterator[bytes]:
+        if self._writer is None:
+            if self.schema is None:
+                self.schema = pa.schema([pa.field(name, pa.string()) for name in self.headers or []])
+            self._open()
+        self._writer.close()
+        yield self._sink.drain()
+
+
+def make_encoder(
+    fmt: str,
+    headers: Optional[List[str]],
+    sheet_name: str = "Sheet1",
+    pretty: bool = True,
+    chunk_size: int = settings.EXPORT_STREAM_CHUNK_SIZE,
+    schema: Optional["pa.Schema"] = None,
+):
+    if fmt == "csv":
+        return CsvEncoder(headers)
+    if fmt == "json":
+        return JsonEncoder(headers, pretty=pretty)
+    if fmt == "ndjson":
+        return NdjsonEncoder(headers)
+    if fmt == "excel":
+        return XlsxEncoder(headers, sheet_name=sheet_name, chunk_size=chunk_size)
+    if fmt in COLUMNAR_FORMATS:
+        return ArrowEncoder(fmt, headers, schema=schema)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+async def _aiter(rows: RowSource) -> AsyncIterator[Row]:
+    if hasattr(rows, "__aiter__"):
+        try:
+            async for row in rows:
+                yield row
+        finally:
+            # `async for` doesn't close an async generator it stops early
+            close = getattr(rows, "aclose", None)
+            if close is not None:
+                await close()
+    else:
+        for row in rows:
+            yield row
+
+
+class ExportStream:
+    """
+    An export ready to be streamed: the first row has already been read (so
+    a missing-data error surfaces before the response starts) and iterating
+    the stream yields the encoded chunks.
+    """
+
+    def __init__(
+        self,
+        fmt: str,
+        rows: AsyncIterator[Row],
+        first_row: Optional[Row],
+        headers: Optional[List[str]],
+        filename: str,
+        sheet_name: str = "Sheet1",
+        pretty: bool = True,
+        schema: Optional["pa.Schema"] = None,
+        batch_size: Optional[int] = None,
+        chunk_size: int = settings.EXPORT_STREAM_CHUNK_SIZE,
+    ):
+        if batch_size is None:
+            if fmt in COLUMNAR_FORMATS:
+                batch_size = settings.EXPORT_COLUMNAR_BATCH_SIZE
+            else:
+                batch_size = settings.EXPORT_STREAM_BATCH_SIZE
+        self.format = fmt
+        self.filename = filename
+        self.media_type = MEDIA_TYPES[fmt]
+        self.headers = headers
+        self.row_count = 0
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self._rows = rows
+        self._first_row = first_row
+        self._encoder = make_encoder(
+            fmt, headers, sheet_name=sheet_name, pretty=pretty, chunk_size=chunk_size, schema=schema
+        )
+
+    @classmethod
+    async def open(
+        cls,
+        rows: RowSource,
+        fmt: str,
+        headers: Optional[List[str]] = None,
+        filename: Optional[str] = None,
+        **options: Any,
+    ) -> "ExportStream":
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported format: {fmt}")
+        iterator = _aiter(rows)
+        first_row = await anext(iterator, None)
+        if first_row is None and headers is None and options.get("schema") is None:
+            raise ValueError("No data to export")
+        if headers is None and fmt in ("csv", "excel"):
+            headers = list(first_row.keys())
+        if filename is None:
+            filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{EXTENSIONS[fmt]}"
+        return cls(fmt, iterator, first_row, headers, filename, **options)
+
+    @property
+    def content_disposition(self) -> str:
+        return f"attachment; filename={self.filename}"
+
+    async def _run(self, method: Callable, *args: Any) -> Any:
+        if self._encoder.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def _batches(self) -> AsyncIterator[List[Row]]:
+        batch: List[Row] = [] if self._first_row is None else [self._first_row]
+        self._first_row = None
+        async for row in self._rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def aclose(self) -> None:
+        """Close the row source (and the session of stream_rows_in_own_session)"""
+        close = getattr(self._rows, "aclose", None)
+        if close is not None:
+            await close()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        encoder = self._encoder
+        pending = bytearray(await self._run(encoder.start))
+        try:
+            async for batch in self._batches():
+                self.row_count += len(batch)
+                pending += await self._run(encoder.encode, batch)
+                if len(pending) >= self.chunk_size:
+                    yield bytes(pending)
+                    pending.clear()
+        finally:
+            await self.aclose()
+
+        tail = encoder.finish()
+        try:
+            while True:
+                chunk = await self._run(next, tail, None)
+                if chunk is None:
+                    break
+                pending += chunk
+                if len(pending) >= self.chunk_size:
+                    yield bytes(pending)
+                    pending.clear()
+        finally:
+            close = getattr(tail, "close", None)
+            if close is not None:
+                close()
+        if pending:
+            yield bytes(pending)
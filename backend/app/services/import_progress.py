@@ -0,0 +1,308 @@
+"""
+Import Progress Bus
+Event-driven progress and log streaming for contact imports
+
+Each import keeps a bounded, sequence-numbered list of log events plus its
+latest status. SSE subscribers wait on an asyncio event that is set whenever
+something is published, instead of polling, and receive every event with its
+sequence number as the SSE id, so a reconnecting EventSource resumes after
+Last-Event-ID.
+
+Progress updates are coalesced: a status event is emitted when the status
+changes, when the import finishes, and otherwise at most every
+IMPORT_PROGRESS_STATUS_INTERVAL seconds.
+
+When Redis is configured, every event is also appended to a Redis stream
+(import_progress:<import_id>) with the sequence number as its stream id, so
+a subscriber connected to another worker reads the same events with XREAD
+and the same cursors. Finished imports are forgotten after
+IMPORT_PROGRESS_TTL seconds (here and in Redis), and abandoned ones after
+IMPORT_PROGRESS_IDLE_TTL.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime as dt
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from app.core.cache import cache_backend
+from app.core.config import settings
+from app.core.logging import logger
+
+
+STREAM_KEY_PREFIX = "import_progress:"
+FINAL_STATUSES = ("completed", "failed")
+
+Event = Tuple[int, Dict[str, Any]]
+
+
+def format_sse(payload: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    if event_id is None:
+        return f"data: {json.dumps(payload)}\n\n"
+    return f"id: {event_id}\ndata: {json.dumps(payload)}\n\n"
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    try:
+        return max(int(value), 0) if value else 0
+    except ValueError:
+        return 0
+
+
+class ImportProgress:
+    """Events and latest status of one import"""
+
+    def __init__(self, import_id: str, max_events: int = settings.IMPORT_PROGRESS_MAX_EVENTS):
+        self.import_id = import_id
+        self.events: Deque[Event] = deque(maxlen=max_events)
+        self.status: Dict[str, Any] = {}
+        self.status_seq = 0
+        self.seq = 0
+        self.updated_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self._status_emitted_at = float("-inf")
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def next_seq(self) -> int:
+        self.seq += 1
+        self.updated_at = time.monotonic()
+        return self.seq
+
+    def notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for the next publication; False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def events_after(self, cursor: int) -> List[Event]:
+        """Log events and the latest status newer than `cursor`, in sequence order"""
+        events = [event for event in self.events if event[0] > cursor]
+        if self.status_seq > cursor:
+            events.append((self.status_seq, {"type": "status", "data": dict(self.status)}))
+            events.sort(key=lambda event: event[0])
+        return events
+
+
+class ImportProgressBus:
+    """Publishes import logs and status to local and cross-worker subscribers"""
+
+    def __init__(
+        self,
+        ttl: int = settings.IMPORT_PROGRESS_TTL,
+        idle_ttl: int = settings.IMPORT_PROGRESS_IDLE_TTL,
+        status_interval: float = settings.IMPORT_PROGRESS_STATUS_INTERVAL,
+        keepalive: float = settings.IMPORT_PROGRESS_KEEPALIVE,
+    ):
+        self.ttl = ttl
+        self.idle_ttl = idle_ttl
+        self.status_interval = status_interval
+        self.keepalive = keepalive
+        self.imports: Dict[str, ImportProgress] = {}
+        self._created = asyncio.Event()
+        self._outbox: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def start(self, import_id: str) -> ImportProgress:
+        """Register a new import (replacing any previous one with the same id)"""
+        self.sweep()
+        progress = ImportProgress(import_id)
+        progress.status = {"status": "started", "progress": 0, "total": 0, "created_at": dt.now().isoformat()}
+        self.imports[import_id] = progress
+        self._created.set()
+        self._created = asyncio.Event()
+        return progress
+
+    def get(self, import_id: str) -> Optional[ImportProgress]:
+        return self.imports.get(import_id)
+
+    def log(self, import_id: str, message: str, level: str = "info", data: Optional[Dict] = None) -> None:
+        progress = self.imports.get(import_id) or self.start(import_id)
+        entry = {
+            "timestamp": dt.now().isoformat(),
+            "level": level,
+            "message": message,
+            "data": data or {},
+        }
+        seq = progress.next_seq()
+        progress.events.append((seq, entry))
+        self._publish(progress, seq, entry)
+
+    def update_status(
+        self,
+        import_id: str,
+        status: str,
+        progress: Optional[int] = None,
+        total: Optional[int] = None,
+    ) -> None:
+        state = self.imports.get(import_id) or self.start(import_id)
+        changed = state.status.get("status") != status
+        state.status.update({"status": status, "updated_at": dt.now().isoformat()})
+        if progress is not None:
+            state.status["progress"] = progress
+        if total is not None:
+            state.status["total"] = total
+
+        final = status in FINAL_STATUSES
+        now = time.monotonic()
+        if not (changed or final or now - state._status_emitted_at >= self.status_interval):
+            # Coalesced into the next status event
+            return
+        state._status_emitted_at = now
+        state.status_seq = state.next_seq()
+        if final:
+            state.finished_at = now
+        self._publish(state, state.status_seq, {"type": "status", "data": dict(state.status)}, final=final)
+
+    def _publish(self, progress: ImportProgress, seq: int, payload: Dict[str, Any], final: bool = False) -> None:
+        progress.notify()
+        if not cache_backend.redis_enabled:
+            return
+        if not self._ensure_writer():
+            return
+        self._outbox.put_nowait((progress.import_id, seq, payload, final))
+
+    # ------------------------------------------------------------------
+    # Redis stream writer (one task, so stream ids stay in order)
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self) -> bool:
+        if self._writer_task is not None and not self._writer_task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        self._outbox = asyncio.Queue()
+        self._writer_task = loop.create_task(self._write_streams())
+        return True
+
+    async def _write_streams(self) -> None:
+        while True:
+            import_id, seq, payload, final = await self._outbox.get()
+            key = f"{STREAM_KEY_PREFIX}{import_id}"
+            try:
+                pipe = cache_backend.redis_client.pipeline(transaction=False)
+                pipe.xadd(
+                    key,
+                    {"event": json.dumps(payload)},
+                    id=f"0-{seq}",
+                    maxlen=settings.IMPORT_PROGRESS_MAX_EVENTS * 2,
+                    approximate=True,
+                )
+                pipe.expire(key, self.ttl if final else self.idle_ttl)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Import progress stream write error ({import_id}): {e}")
+
+    async def stop(self) -> None:
+        """Write the events still queued for Redis, then stop the writer"""
+        if self._writer_task is None:
+            return
+        try:
+            while not self._outbox.empty() and not self._writer_task.done():
+                await asyncio.sleep(0.01)
+        finally:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+
+    # ------------------------------------------------------------------
+    # Subscribing
+    # ------------------------------------------------------------------
+
+    async def subscribe(self, import_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """SSE frames for an import, starting after Last-Event-ID"""
+        cursor = parse_last_event_id(last_event_id)
+        progress = self.imports.get(import_id)
+        if progress is None and cache_backend.redis_enabled:
+            # Running (or finished) on another worker
+            async for frame in self._subscribe_stream(import_id, cursor):
+                yield frame
+            return
+
+        while progress is None:
+            # The client may connect before the import is posted
+            created = self._created
+            try:
+                await asyncio.wait_for(created.wait(), timeout=self.keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+            progress = self.imports.get(import_id)
+
+        while True:
+            for seq, payload in progress.events_after(cursor):
+                yield format_sse(payload, seq)
+                cursor = seq
+            if progress.finished and cursor >= progress.seq:
+                yield format_sse({"type": "done"})
+                return
+            if not await progress.wait(self.keepalive):
+                yield ": keepalive\n\n"
+
+    async def _subscribe_stream(self, import_id: str, cursor: int) -> AsyncIterator[str]:
+        key = f"{STREAM_KEY_PREFIX}{import_id}"
+        while True:
+            response = await cache_backend.redis_client.xread(
+                {key: f"0-{cursor}"}, count=500, block=int(self.keepalive * 1000)
+            )
+            if not response:
+                yield ": keepalive\n\n"
+                continue
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+                    cursor = int(entry_id.split("-", 1)[1])
+                    payload = json.loads(fields.get(b"event") or fields.get("event"))
+                    yield format_sse(payload, cursor)
+                    if payload.get("type") == "status" and payload["data"].get("status") in FINAL_STATUSES:
+                        yield format_sse({"type": "done"})
+                        return
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def sweep(self) -> int:
+        """Forget imports finished more than `ttl` ago or idle for `idle_ttl`"""
+        now = time.monotonic()
+        expired = [
+            import_id
+            for import_id, progress in self.imports.items()
+            if (progress.finished and now - progress.finished_at >= self.ttl)
+            or now - progress.updated_at >= self.idle_ttl
+        ]
+        for import_id in expired:
+            del self.imports[import_id]
+        return len(expired)
+
+    def clear(self) -> None:
+        self.imports.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "imports": len(self.imports),
+            "running": sum(1 for progress in self.imports.values() if not progress.finished),
+            "stream_backlog": self._outbox.qsize() if self._outbox is not None else 0,
+        }
+
+
+import_progress_bus = ImportProgressBus()
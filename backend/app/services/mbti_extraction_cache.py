@@ -0,0 +1,159 @@
+"""
+MBTI Extraction Cache
+Deduplicates MBTI extractions from PDFs, screenshots and 16Personalities URLs
+
+Results are keyed by a SHA-256 of the uploaded file (or by the normalized
+profile URL) and stored with a TTL in Redis when available, with a bounded
+in-process copy so repeated uploads hit even without Redis. Concurrent
+identical requests share a single in-flight extraction. Failed extractions
+are never cached.
+"""
+
+import asyncio
+import copy
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.core.cache import LocalCacheTier, cache_backend
+from app.core.config import settings
+from app.core.logging import logger
+
+CACHE_KEY_PREFIX = "mbti_extraction"
+
+# Query parameters that never change the profile being rendered
+_IGNORED_QUERY_PARAMS = ("utm_", "fbclid", "gclid", "ref")
+
+
+def content_cache_key(kind: str, content: bytes) -> str:
+    """Cache key for an uploaded file ("pdf", "image", ...)"""
+    return f"{CACHE_KEY_PREFIX}:{kind}:{hashlib.sha256(content).hexdigest()}"
+
+
+def normalize_profile_url(url: str) -> str:
+    """
+    Normalize a profile URL so equivalent submissions share a cache entry.
+
+    Lowercases scheme and host, drops "www.", the fragment, tracking parameters
+    and trailing slashes, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith(_IGNORED_QUERY_PARAMS)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def url_cache_key(url: str) -> str:
+    """Cache key for a 16Personalities profile URL"""
+    normalized = normalize_profile_url(url)
+    return f"{CACHE_KEY_PREFIX}:url:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+
+class MBTIExtractionCache:
+    """TTL cache of extraction results with in-flight request coalescing"""
+
+    def __init__(
+        self,
+        ttl: int = settings.MBTI_EXTRACTION_CACHE_TTL,
+        max_entries: int = settings.MBTI_EXTRACTION_CACHE_MAX_ENTRIES,
+        backend: Any = cache_backend,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+        self._local = LocalCacheTier(ttl=ttl, max_entries=max_entries, max_item_bytes=None, sizeof=None)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._local.get(key)
+
+    def _set_local(self, key: str, value: Dict[str, Any]) -> None:
+        self._local.set(key, value)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached extraction result, or None"""
+        value = self._get_local(key)
+        if value is None:
+            value = await self.backend.get(key)
+            if value is not None:
+                self._set_local(key, value)
+        return copy.deepcopy(value) if value is not None else None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store an extraction result in both tiers"""
+        self._set_local(key, copy.deepcopy(value))
+        await self.backend.set(key, value, expire=self.ttl)
+
+    async def invalidate(self, key: str) -> None:
+        """Drop a cached extraction result"""
+        self._local.delete(key)
+        await self.backend.delete(key)
+
+    async def get_or_extract(
+        self,
+        key: str,
+        extract: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Return the cached result for `key` or run `extract` once.
+
+        Callers arriving while an extraction for the same key is running await
+        that extraction instead of starting their own. Each caller receives its
+        own copy of the result.
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["coalesced"] += 1
+            return copy.deepcopy(await asyncio.shield(in_flight))
+
+        self.stats["misses"] += 1
+        # The extraction runs in its own task so that a cancelled caller (client
+        # disconnect, timeout) does not cancel the callers coalesced onto it
+        task = asyncio.ensure_future(self._extract_and_store(key, extract))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._extraction_done(key, done))
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _extract_and_store(
+        self,
+        key: str,
+        extract: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        result = await extract()
+        try:
+            await self.set(key, result)
+        except Exception as e:
+            logger.warning(f"Could not cache MBTI extraction result: {e}")
+        return result
+
+    def _extraction_done(self, key: str, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Every caller may have been cancelled; keep the exception from being reported as unretrieved
+            task.exception()
+
+
+_mbti_extraction_cache: Optional[MBTIExtractionCache] = None
+
+
+def get_mbti_extraction_cache() -> MBTIExtractionCache:
+    """Return the process-wide MBTI extraction cache"""
+    global _mbti_extraction_cache
+    if _mbti_extraction_cache is None:
+        _mbti_extraction_cache = MBTIExtractionCache()
+    return _mbti_extraction_cache
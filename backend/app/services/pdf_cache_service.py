@@ -0,0 +1,294 @@
+"""
+PDF Cache Service
+
+Cache des PDF d'assessments adressé par contenu.
+
+La clé d'un PDF est un SHA-256 de (type de rapport, données des résultats,
+nom de l'utilisateur, version des templates/CSS). Tant que ces entrées ne
+changent pas, le PDF déjà rendu est resservi depuis le disque et la clé sert
+d'ETag : un téléchargement répété avec If-None-Match répond 304 sans rendu
+ni lecture du fichier.
+
+Invalidation :
+- implicite : une modification des résultats change la clé
+- explicite : la mise à jour ou la suppression d'un AssessmentResult supprime
+  les fichiers de cet assessment après le commit, hors de la boucle
+  d'événements (listener SQLAlchemy en bas de module) ; les écritures en SQL
+  brut appellent invalidate_pdf_cache()
+- taille : au-delà de PDF_CACHE_MAX_BYTES, les fichiers les moins récemment
+  servis sont supprimés
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+
+from app.core.cache import cache_backend
+from app.core.cache_invalidation import OrmCacheInvalidation
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.assessment import AssessmentResult
+
+# Clés publiées sur le canal d'invalidation du cache : pdf:<assessment_id>
+PDF_INVALIDATION_PREFIX = "pdf:"
+
+
+@lru_cache()
+def get_template_version() -> str:
+    """Version des templates : constante explicite + empreinte du CSS commun."""
+    from app.services.pdf_export_service import PDF_TEMPLATE_VERSION, get_common_css
+
+    css_hash = hashlib.sha256(get_common_css().encode("utf-8")).hexdigest()[:12]
+    return f"{PDF_TEMPLATE_VERSION}-{css_hash}"
+
+
+def compute_pdf_cache_key(
+    report_kind: str,
+    payload: Any,
+    user_name: Optional[str],
+    template_version: Optional[str] = None,
+) -> str:
+    """
+    Calcule la clé (et l'ETag) d'un PDF.
+
+    Le payload est sérialisé en JSON canonique (clés triées) pour que deux
+    résultats identiques produisent toujours la même clé.
+    """
+    canonical = json.dumps(
+        {
+            "kind": report_kind,
+            "payload": payload,
+            "user_name": user_name or "",
+            "template_version": template_version or get_template_version(),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def etag_for_key(cache_key: str) -> str:
+    """ETag fort dérivé de la clé de cache."""
+    return f'"{cache_key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vérifie un en-tête If-None-Match (liste d'ETags, préfixe W/ ou '*')."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+
+class PDFArtifactCache:
+    """
+    Stockage disque des PDF rendus.
+
+    Un répertoire par assessment ({cache_dir}/{assessment_id}/{key}.pdf) pour
+    pouvoir invalider tous les rendus d'un assessment d'un coup.
+
+    La date de modification d'un fichier est mise à jour à chaque lecture :
+    au-delà de `max_bytes`, les fichiers les plus anciens (LRU) sont supprimés.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 0):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._render_locks: dict[str, asyncio.Lock] = {}
+
+    def _path(self, assessment_id: int, cache_key: str) -> Path:
+        return self.cache_dir / str(assessment_id) / f"{cache_key}.pdf"
+
+    def _read(self, assessment_id: int, cache_key: str) -> Optional[bytes]:
+        path = self._path(assessment_id, cache_key)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return content
+
+    def _write(self, assessment_id: int, cache_key: str, content: bytes) -> None:
+        path = self._path(assessment_id, cache_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Écriture atomique : un lecteur concurrent ne voit jamais un PDF partiel
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        """Supprime les PDF les moins récemment servis tant que le cache dépasse max_bytes."""
+        if self.max_bytes <= 0:
+            return
+        files = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        files.sort(key=lambda item: item[0])
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats["evictions"] += 1
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass
+
+    async def get(self, assessment_id: int, cache_key: str) -> Optional[bytes]:
+        """Retourne le PDF en cache, ou None."""
+        return await asyncio.to_thread(self._read, assessment_id, cache_key)
+
+    async def put(self, assessment_id: int, cache_key: str, content: bytes) -> None:
+        """Enregistre un PDF rendu (une erreur disque ne fait pas échouer la requête)."""
+        try:
+            await asyncio.to_thread(self._write, assessment_id, cache_key, content)
+        except OSError as e:
+            logger.warning(f"Could not write PDF cache entry for assessment {assessment_id}: {e}")
+
+    async def get_or_render(
+        self,
+        assessment_id: int,
+        cache_key: str,
+        render: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        """
+        Retourne le PDF en cache ou le rend avec `render` puis le met en cache.
+
+        Les demandes simultanées d'un même PDF attendent un seul rendu.
+        """
+        content = await self.get(assessment_id, cache_key)
+        if content is not None:
+            self.stats["hits"] += 1
+            return content
+
+        lock = self._render_locks.setdefault(cache_key, asyncio.Lock())
+        try:
+            async with lock:
+                content = await self.get(assessment_id, cache_key)
+                if content is not None:
+                    self.stats["hits"] += 1
+                    return content
+                self.stats["misses"] += 1
+                content = await render()
+                await self.put(assessment_id, cache_key, content)
+                return content
+        finally:
+            if not lock.locked():
+                self._render_locks.pop(cache_key, None)
+
+    def invalidate(self, assessment_id: int) -> None:
+        """Supprime tous les PDF en cache d'un assessment."""
+        shutil.rmtree(self.cache_dir / str(assessment_id), ignore_errors=True)
+
+    def clear(self) -> None:
+        """Supprime tous les PDF en cache."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def apply_invalidation_keys(self, keys: Iterable[str], pattern: Optional[str] = None) -> None:
+        """
+        Applique des clés d'invalidation pdf:<assessment_id> (ou le pattern pdf:*).
+
+        Les suppressions de fichiers tournent dans le pool de threads quand
+        une boucle d'événements est active.
+        """
+        if pattern is not None and (pattern == "*" or pattern.startswith(PDF_INVALIDATION_PREFIX)):
+            remove = self.clear
+        else:
+            assessment_ids = [
+                int(key[len(PDF_INVALIDATION_PREFIX):]) for key in keys if key.startswith(PDF_INVALIDATION_PREFIX)
+            ]
+            if not assessment_ids:
+                return
+
+            def remove() -> None:
+                for assessment_id in assessment_ids:
+                    self.invalidate(assessment_id)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            remove()
+            return
+        loop.run_in_executor(None, remove)
+
+
+_pdf_cache: Optional[PDFArtifactCache] = None
+
+
+def get_pdf_cache() -> PDFArtifactCache:
+    """Retourne le cache PDF du processus."""
+    global _pdf_cache
+    if _pdf_cache is None:
+        cache_dir = settings.PDF_CACHE_DIR or os.path.join(tempfile.gettempdir(), "arise-pdf-cache")
+        _pdf_cache = PDFArtifactCache(cache_dir, max_bytes=settings.PDF_CACHE_MAX_BYTES)
+    return _pdf_cache
+
+
+def _apply_pdf_cache_invalidation(keys: Iterable[str], pattern: Optional[str] = None) -> None:
+    get_pdf_cache().apply_invalidation_keys(keys, pattern)
+
+
+# Appliquée après le commit seulement : une suppression de répertoire n'a pas
+# sa place dans un flush, et la clé des PDF change déjà avec les résultats
+pdf_cache_invalidation = OrmCacheInvalidation("pdf", _apply_pdf_cache_invalidation, at_flush=False)
+cache_backend.add_invalidation_hook(_apply_pdf_cache_invalidation)
+
+
+def invalidate_pdf_cache(session, *assessment_ids: int) -> None:
+    """
+    Supprime les PDF en cache d'assessments après le commit de `session`.
+
+    À appeler après une écriture en SQL brut sur assessment_results, que le
+    listener ORM ne voit pas.
+    """
+    pdf_cache_invalidation.schedule_in(
+        session, keys=[f"{PDF_INVALIDATION_PREFIX}{assessment_id}" for assessment_id in assessment_ids]
+    )
+
+
+# Champs d'AssessmentResult qui entrent dans le rendu des PDF
+# (report_url, modifié à la création d'un lien de partage, n'en fait pas partie)
+_RENDERED_RESULT_FIELDS = ("scores", "insights", "recommendations", "comparison_data")
+
+
+@event.listens_for(AssessmentResult, "after_update")
+def _invalidate_pdf_cache_on_result_update(mapper, connection, target: AssessmentResult) -> None:
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _RENDERED_RESULT_FIELDS):
+        invalidate_pdf_cache(object_session(target), target.assessment_id)
+
+
+@event.listens_for(AssessmentResult, "after_delete")
+def _invalidate_pdf_cache_on_result_delete(mapper, connection, target: AssessmentResult) -> None:
+    invalidate_pdf_cache(object_session(target), target.assessment_id)
@@ -18,6 +18,12 @@ except ImportError:
     WEASYPRINT_AVAILABLE = False
 
 
+# Version des templates HTML/CSS des rapports.
+# À incrémenter à chaque modification des générateurs HTML ci-dessous :
+# elle fait partie de la clé du cache des PDF (voir pdf_cache_service).
+PDF_TEMPLATE_VERSION = "1"
+
+
 def generate_assessment_pdf(
     assessment_type: str,
     results: Dict[str, Any],
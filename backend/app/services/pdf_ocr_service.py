@@ -4,13 +4,18 @@ Extracts MBTI results from PDF files using OpenAI Vision API
 """
 
 import os
+import re
+import asyncio
 import base64
 import io
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from pathlib import Path
 import logging
 import httpx
 
+from app.core.config import settings
+from app.services.ocr_rasterization import RasterizationStrategy, RasterizedPage, rasterize_page
+
 logger = logging.getLogger(__name__)
 
 # Try to import required libraries
@@ -60,58 +65,135 @@ OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "2000"))
 OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.3"))  # Lower temperature for structured extraction
 
 
+# Pages whose text layer is shorter than this are treated as scanned images
+# (no usable text), so they are always sent to the vision API
+OCR_MIN_TEXT_LAYER_CHARS = 40
+
+# Cheap text-layer pre-check: a page with a real text layer that matches none
+# of these is skipped before rasterization and vision calls
+MBTI_PAGE_PATTERN = re.compile(
+    r"\b[EI][SN][TF][JP](?:-[AT])?\b"
+    r"|introvert|extravert|extrovert|intuitive|observant|thinking|feeling"
+    r"|judging|prospecting|assertive|turbulent|personality|strengths|weaknesses"
+    r"|16personalities",
+    re.IGNORECASE,
+)
+
+
 class PDFOCRService:
     """Service for extracting MBTI results from PDF files using OCR"""
 
-    def __init__(self):
-        if not OPENAI_AVAILABLE:
-            raise ValueError("OpenAI library is not installed. Install it with: pip install openai")
-        if not OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY is not configured")
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        page_concurrency: int = settings.OCR_PAGE_CONCURRENCY,
+        raster_strategy: Optional[RasterizationStrategy] = None,
+    ):
+        """
+        Args:
+            client: Vision client exposing ``chat.completions.create`` (defaults to
+                AsyncOpenAI). Tests and benchmarks pass a local stub.
+            page_concurrency: Maximum number of pages extracted concurrently
+            raster_strategy: DPI / color / crop / encoding choices for PDF pages
+                (defaults to RasterizationStrategy.from_settings())
+        """
+        if client is None:
+            if not OPENAI_AVAILABLE:
+                raise ValueError("OpenAI library is not installed. Install it with: pip install openai")
+            if not OPENAI_API_KEY:
+                raise ValueError("OPENAI_API_KEY is not configured")
         if not PYMUPDF_AVAILABLE:
             raise ValueError("PyMuPDF (fitz) library is not installed. Install it with: pip install PyMuPDF")
         if not PIL_AVAILABLE:
             raise ValueError("PIL (Pillow) library is not installed. Install it with: pip install Pillow")
 
-        self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        self.client = client if client is not None else AsyncOpenAI(api_key=OPENAI_API_KEY)
         self.model = OPENAI_MODEL
         self.max_tokens = OPENAI_MAX_TOKENS
         self.temperature = OPENAI_TEMPERATURE
+        self.page_concurrency = max(1, page_concurrency)
+        self.raster_strategy = raster_strategy or RasterizationStrategy.from_settings()
 
-    def _convert_pdf_to_images(self, pdf_bytes: bytes) -> List[bytes]:
+    def _convert_pdf_to_images(self, pdf_bytes: bytes) -> List[RasterizedPage]:
         """
-        Convert PDF to images (one per page) using PyMuPDF (fitz)
-        Returns list of image bytes in PNG format
+        Convert every PDF page to an encoded image using PyMuPDF (fitz)
+        DPI, color mode, crop and encoding follow self.raster_strategy
         """
         try:
-            # Open PDF from bytes using PyMuPDF
             pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            image_bytes_list = []
-            page_count = len(pdf_document)
-            logger.info(f"PDF opened successfully, {page_count} pages found")
-            
-            for page_num in range(page_count):
-                page = pdf_document[page_num]
-                
-                # Render page to image (pixmap) at 200 DPI
-                # Matrix(2.78, 2.78) scales 72 DPI to 200 DPI (200/72 ≈ 2.78)
-                zoom = 200 / 72  # 200 DPI
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat, alpha=False)  # alpha=False for RGB
-                
-                # Convert pixmap to PNG bytes directly
-                img_bytes = pix.tobytes("png")
-                
-                # Ensure it's bytes
-                if isinstance(img_bytes, bytes):
-                    image_bytes_list.append(img_bytes)
-                else:
-                    image_bytes_list.append(bytes(img_bytes))
-            
-            pdf_document.close()
-            logger.info(f"Converted PDF to {len(image_bytes_list)} images using PyMuPDF")
-            return image_bytes_list
+            try:
+                pages = [
+                    rasterize_page(page, self.raster_strategy, self._has_text_layer(page.get_text("text")))
+                    for page in pdf_document
+                ]
+            finally:
+                pdf_document.close()
+            logger.info(
+                f"Converted PDF to {len(pages)} images "
+                f"({sum(len(page.image_bytes) for page in pages)} bytes)"
+            )
+            return pages
+        except Exception as e:
+            logger.error(f"Error converting PDF to images: {str(e)}", exc_info=True)
+            raise ValueError(f"Failed to convert PDF to images: {str(e)}. Make sure the PDF file is valid and PyMuPDF is installed.")
+
+    @staticmethod
+    def _has_text_layer(page_text: str) -> bool:
+        """Whether a page carries a usable text layer (as opposed to a scanned image)"""
+        return len((page_text or "").strip()) >= OCR_MIN_TEXT_LAYER_CHARS
+
+    @staticmethod
+    def _page_may_contain_mbti(page_text: str) -> bool:
+        """
+        Cheap text-layer pre-check for a PDF page.
+
+        Pages without a usable text layer (scans, flattened exports) cannot be
+        judged and are kept; pages with text are kept only if it mentions MBTI
+        content.
+        """
+        if not PDFOCRService._has_text_layer(page_text):
+            return True
+        return bool(MBTI_PAGE_PATTERN.search(page_text))
+
+    def _rasterize_candidate_pages(
+        self,
+        pdf_bytes: bytes,
+        on_page: Callable[[RasterizedPage], None],
+    ) -> int:
+        """
+        Rasterize only the pages that may contain MBTI results.
+
+        Runs in a worker thread (see extract_mbti_results) and hands each
+        RasterizedPage to `on_page` as soon as it is encoded, so
+        vision calls start while later pages are still being rasterized.
+        Returns the total page count. If the pre-check rejects every page, all
+        pages are rasterized so extraction still gets a chance on unusual
+        layouts.
+        """
+        try:
+            pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
+            try:
+                page_count = len(pdf_document)
+                page_texts = [pdf_document[page_num].get_text("text") for page_num in range(page_count)]
+                candidates = [
+                    page_num for page_num in range(page_count)
+                    if self._page_may_contain_mbti(page_texts[page_num])
+                ]
+                if not candidates:
+                    logger.info("Text-layer pre-check matched no page, rasterizing all pages")
+                    candidates = list(range(page_count))
+                elif len(candidates) < page_count:
+                    logger.info(f"Text-layer pre-check skipped {page_count - len(candidates)} of {page_count} pages")
+
+                for page_num in candidates:
+                    on_page(rasterize_page(
+                        pdf_document[page_num],
+                        self.raster_strategy,
+                        self._has_text_layer(page_texts[page_num]),
+                    ))
+                return page_count
+            finally:
+                pdf_document.close()
         except Exception as e:
             logger.error(f"Error converting PDF to images: {str(e)}", exc_info=True)
             raise ValueError(f"Failed to convert PDF to images: {str(e)}. Make sure the PDF file is valid and PyMuPDF is installed.")
@@ -590,18 +672,45 @@ Retournez UNIQUEMENT le JSON, sans texte avant ou après."""
         Returns structured data with MBTI type, dimensions, and insights
         """
         try:
-            # Convert PDF to images
-            images = self._convert_pdf_to_images(pdf_bytes)
-            
-            if not images:
+            # Extract data from pages concurrently, at most page_concurrency vision calls at once
+            loop = asyncio.get_running_loop()
+            semaphore = asyncio.Semaphore(self.page_concurrency)
+            page_tasks: List[asyncio.Task] = []
+
+            async def extract_page(page: RasterizedPage) -> Dict[str, Any]:
+                async with semaphore:
+                    logger.info(
+                        f"Processing page {page.page_number} ({page.image_format}, {page.dpi} DPI, "
+                        f"{len(page.image_bytes)} bytes)"
+                    )
+                    return await self._extract_text_from_image(page.image_bytes, page.page_number, page.image_format)
+
+            def schedule_page(page: RasterizedPage) -> None:
+                # Called from the rasterization thread
+                loop.call_soon_threadsafe(
+                    lambda: page_tasks.append(loop.create_task(extract_page(page)))
+                )
+
+            # Pre-check and rasterize pages in a worker thread (CPU-bound, keeps the event loop free).
+            # Pages scheduled by the thread are queued on the loop before this await resumes.
+            try:
+                page_count = await asyncio.to_thread(self._rasterize_candidate_pages, pdf_bytes, schedule_page)
+            except BaseException:
+                for task in page_tasks:
+                    task.cancel()
+                raise
+
+            if not page_tasks:
                 raise ValueError("No pages found in PDF")
+            logger.info(f"Extracting {len(page_tasks)} of {page_count} pages")
 
-            # Extract data from each page and merge results
-            all_extracted_data = []
-            for i, image_bytes in enumerate(images):
-                logger.info(f"Processing page {i + 1} of {len(images)}")
-                extracted_data = await self._extract_text_from_image(image_bytes, i + 1)
-                all_extracted_data.append(extracted_data)
+            # Tasks are in page order, so the merge below behaves as with serial extraction
+            try:
+                all_extracted_data = await asyncio.gather(*page_tasks)
+            except BaseException:
+                for task in page_tasks:
+                    task.cancel()
+                raise
 
             # Merge results from all pages (prefer non-null values)
             merged_result = {
@@ -0,0 +1,288 @@
+"""
+PDF Render Pool
+
+Pool borné de processus pour le rendu WeasyPrint.
+
+WeasyPrint est synchrone et gourmand en CPU : appelé directement dans un
+handler async, un rapport bloque toute la boucle d'événements du worker
+uvicorn. Le pool exécute le rendu dans des processus séparés, avec :
+
+- une file d'attente bornée (backpressure : 503 quand elle est pleine)
+- un timeout par job (504 quand il est dépassé)
+- un débit qui suit le nombre de cœurs au lieu de bloquer les autres requêtes
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import AppException
+from app.core.logging import logger
+
+
+class PDFRenderQueueFullError(AppException):
+    """503 - Too many PDF renders queued"""
+
+    def __init__(self, message: str = "PDF rendering is busy, please retry shortly"):
+        super().__init__(message, 503, {"retry_after": 5})
+
+
+class PDFRenderTimeoutError(AppException):
+    """504 - A PDF render exceeded its time budget"""
+
+    def __init__(self, message: str = "PDF rendering timed out"):
+        super().__init__(message, 504)
+
+
+def _render_assessment_pdf_bytes(
+    assessment_type: str,
+    results: Dict[str, Any],
+    user_name: str,
+    user_email: str,
+) -> bytes:
+    """Rendu exécuté dans un worker (fonction module-level pour être picklable)."""
+    from app.services.pdf_export_service import generate_assessment_pdf
+
+    return generate_assessment_pdf(
+        assessment_type=assessment_type,
+        results=results,
+        user_name=user_name,
+        user_email=user_email,
+    ).getvalue()
+
+
+def _render_table_pdf_bytes(
+    data: List[Dict[str, Any]],
+    headers: List[str],
+    title: str,
+) -> Tuple[bytes, str]:
+    """Rendu ReportLab d'un tableau (rapport Wellness partagé) dans un worker."""
+    from app.services.export_service import ExportService
+
+    pdf_buffer, filename = ExportService.export_to_pdf(data=data, headers=headers, title=title)
+    return pdf_buffer.getvalue(), filename
+
+
+class PDFRenderPool:
+    """
+    Pool de rendu PDF borné.
+
+    `max_workers` jobs s'exécutent en parallèle, au plus `queue_size` autres
+    attendent ; au-delà, `render` lève PDFRenderQueueFullError immédiatement
+    plutôt que d'empiler des requêtes qui expireraient de toute façon.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        queue_size: int = 16,
+        timeout: float = 60.0,
+        executor_type: str = "process",
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.executor_type = executor_type
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0}
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs soumis dont l'exécution n'est pas terminée (y compris après un timeout)"""
+        return self._in_flight
+
+    def _create_executor(self) -> Executor:
+        if self.executor_type == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="pdf-render",
+            )
+        # "spawn" évite de forker un processus qui porte déjà une boucle asyncio,
+        # des connexions DB et des threads
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    @staticmethod
+    def _terminate_executor(executor: Executor) -> None:
+        """
+        Arrête un executor en tuant ses processus.
+
+        Un job en cours dans un processus ne peut pas être annulé : sans
+        terminate(), un rendu bloqué garderait son worker indéfiniment.
+        Les futures des jobs encore en cours se terminent alors en
+        BrokenProcessPool.
+        """
+        terminate_workers = getattr(executor, "terminate_workers", None)  # Python >= 3.14
+        if terminate_workers is not None:
+            terminate_workers()
+            return
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        for process in processes:
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    async def _recycle_executor(self, executor: Executor) -> None:
+        """
+        Remplace l'executor après un timeout et tue ses processus.
+
+        Les nouveaux jobs partent sur un nouvel executor ; les jobs qui
+        tournaient sur l'ancien sont relancés par `render`.
+        """
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        if isinstance(executor, ProcessPoolExecutor):
+            await asyncio.to_thread(self._terminate_executor, executor)
+        else:
+            # Un thread ne peut pas être tué : son slot reste occupé jusqu'à la fin du job
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Tuple[Executor, "asyncio.Future[Any]"]:
+        """
+        Soumet un job et occupe un slot jusqu'à la fin réelle de son exécution
+        (et non jusqu'au timeout de l'appelant).
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        self._in_flight += 1
+        try:
+            job = executor.submit(fn, *args)
+        except BaseException:
+            self._in_flight -= 1
+            raise
+
+        def release(_job: Any) -> None:
+            loop.call_soon_threadsafe(self._release)
+
+        job.add_done_callback(release)
+        return executor, asyncio.wrap_future(job)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+
+    async def render(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Exécute `fn(*args)` dans le pool et attend son résultat.
+
+        Raises:
+            PDFRenderQueueFullError: si la file d'attente est pleine
+            PDFRenderTimeoutError: si le rendu dépasse `timeout`
+        """
+        # Pas d'await entre la vérification et la soumission : atomique sur la boucle
+        if self._in_flight >= self.max_workers + self.queue_size:
+            self.stats["rejected"] += 1
+            logger.warning(
+                f"PDF render queue full ({self._in_flight} jobs in flight), rejecting request"
+            )
+            raise PDFRenderQueueFullError()
+
+        executor, future = self._submit(fn, *args)
+        retried = False
+        while True:
+            try:
+                result = await asyncio.wait_for(future, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.stats["timed_out"] += 1
+                logger.error(f"PDF render exceeded {self.timeout}s, recycling render pool")
+                await self._recycle_executor(executor)
+                raise PDFRenderTimeoutError()
+            except BrokenProcessPool:
+                # Pool recyclé pendant ce job (timeout d'un autre rendu) : une seule relance
+                if retried or self._executor is executor:
+                    # Worker mort de lui-même : le prochain job repart sur un pool neuf
+                    with self._executor_lock:
+                        if self._executor is executor:
+                            self._executor = None
+                    self.stats["failed"] += 1
+                    raise
+                retried = True
+                executor, future = self._submit(fn, *args)
+                continue
+            except Exception:
+                self.stats["failed"] += 1
+                raise
+            self.stats["completed"] += 1
+            return result
+
+    async def render_assessment_pdf(
+        self,
+        assessment_type: str,
+        results: Dict[str, Any],
+        user_name: str,
+        user_email: str,
+    ) -> bytes:
+        """Rend le PDF d'un assessment dans le pool (voir generate_assessment_pdf)."""
+        return await self.render(
+            _render_assessment_pdf_bytes,
+            assessment_type,
+            results,
+            user_name,
+            user_email,
+        )
+
+    async def render_table_pdf(
+        self,
+        data: List[Dict[str, Any]],
+        headers: List[str],
+        title: str,
+    ) -> Tuple[bytes, str]:
+        """Rend un PDF tabulaire dans le pool (voir ExportService.export_to_pdf)."""
+        return await self.render(_render_table_pdf_bytes, data, headers, title)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Arrête les workers (appelé au shutdown de l'application).
+
+        Sans attente, les processus encore occupés sont tués.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        if not wait and isinstance(executor, ProcessPoolExecutor):
+            self._terminate_executor(executor)
+        else:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_render_pool: Optional[PDFRenderPool] = None
+
+
+def get_pdf_render_pool() -> PDFRenderPool:
+    """Retourne le pool de rendu PDF du processus (créé à la demande)."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = PDFRenderPool(
+            max_workers=settings.PDF_RENDER_WORKERS or None,
+            queue_size=settings.PDF_RENDER_QUEUE_SIZE,
+            timeout=settings.PDF_RENDER_TIMEOUT,
+        )
+    return _render_pool
+
+
+def close_pdf_render_pool() -> None:
+    """Arrête le pool de rendu PDF s'il a été créé."""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False)
+        _render_pool = None
@@ -0,0 +1,188 @@
+"""
+Compiled Permission Sets
+Per-user permission sets with wildcards resolved, cached with version stamps
+
+A user's permissions are compiled once into a CompiledPermissions object on
+which every check is a constant-time set lookup. Compiled sets are cached per
+process and stamped with two versions read before the database fetch:
+
+- a global version, bumped when roles, permissions or role_permissions change
+- a per-user version, bumped when that user's user_roles or user_permissions
+  change
+
+An entry is only served while both stamps still match, and a set compiled
+while a change was being committed is never stored, so invalidation cannot
+race with a concurrent compile. Versions are bumped by ORM events at flush
+and again after commit, and committed bumps are broadcast to other workers
+over the cache backend's invalidation channel.
+"""
+
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+
+from app.core.cache import LocalCacheTier, cache_backend
+from app.core.cache_invalidation import OrmCacheInvalidation
+from app.core.config import settings
+from app.models import Permission, Role, RolePermission, UserPermission, UserRole
+
+# Keys published on the cache invalidation channel
+GLOBAL_VERSION_KEY = "rbac:version"
+USER_VERSION_KEY_PREFIX = "rbac:user:"
+
+ALL_PERMISSIONS = "admin:*"
+
+Stamp = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class CompiledPermissions:
+    """A user's permission names with wildcards resolved for O(1) checks"""
+
+    names: FrozenSet[str]
+    all_access: bool
+    resource_wildcards: FrozenSet[str]
+
+    @classmethod
+    def compile(cls, names: Iterable[str]) -> "CompiledPermissions":
+        names = frozenset(names)
+        return cls(
+            names=names,
+            all_access=ALL_PERMISSIONS in names,
+            resource_wildcards=frozenset(name[:-2] for name in names if name.endswith(":*")),
+        )
+
+    def allows(self, permission_name: str) -> bool:
+        """
+        admin:* grants every permission and resource:* grants every
+        permission on that resource
+        """
+        if self.all_access or permission_name in self.names:
+            return True
+        resource, separator, _ = permission_name.partition(":")
+        return bool(separator) and resource in self.resource_wildcards
+
+    def allows_any(self, permission_names: Iterable[str]) -> bool:
+        return any(self.allows(name) for name in permission_names)
+
+    def allows_all(self, permission_names: Iterable[str]) -> bool:
+        return all(self.allows(name) for name in permission_names)
+
+
+class PermissionSetCache:
+    """Version-stamped, in-process cache of CompiledPermissions by user id"""
+
+    def __init__(
+        self,
+        ttl: int = settings.RBAC_PERMISSION_CACHE_TTL,
+        max_entries: int = settings.RBAC_PERMISSION_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.global_version = 0
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "discarded": 0}
+        self._sequence = itertools.count(1)
+        self._user_versions: Dict[int, int] = {}
+        # user id -> (stamp, compiled set)
+        self._entries = LocalCacheTier(ttl=ttl, max_entries=max_entries, max_item_bytes=None, sizeof=None)
+
+    def stamp(self, user_id: int) -> Stamp:
+        """Current versions for a user, to read before fetching from the database"""
+        return self.global_version, self._user_versions.get(user_id, 0)
+
+    def get(self, user_id: int) -> Optional[CompiledPermissions]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        stamp, compiled = entry
+        if stamp != self.stamp(user_id):
+            self._entries.delete(user_id)
+            self.stats["stale"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return compiled
+
+    def put(self, user_id: int, stamp: Stamp, compiled: CompiledPermissions) -> None:
+        """Store a compiled set unless a change happened since `stamp` was read"""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        if stamp != self.stamp(user_id):
+            self.stats["discarded"] += 1
+            return
+        self._entries.set(user_id, (stamp, compiled))
+
+    def bump_user(self, user_id: int) -> None:
+        self._user_versions[user_id] = next(self._sequence)
+        self._entries.delete(user_id)
+        if len(self._user_versions) > 2 * self.max_entries:
+            # Forgetting versions could let an in-flight compile match again:
+            # move every stamp forward instead
+            self._user_versions.clear()
+            self.bump_global()
+
+    def bump_global(self) -> None:
+        self.global_version = next(self._sequence)
+        self._entries.clear()
+
+    def clear(self) -> None:
+        self.bump_global()
+        self._user_versions.clear()
+
+    def apply_invalidation_keys(self, keys: Iterable[str], pattern: Optional[str] = None) -> None:
+        """Apply version bumps published on the cache channel (this worker's ORM events or another worker)"""
+        if pattern == "*":
+            self.bump_global()
+            return
+        for key in keys:
+            if key == GLOBAL_VERSION_KEY:
+                self.bump_global()
+            elif key.startswith(USER_VERSION_KEY_PREFIX):
+                self.bump_user(int(key[len(USER_VERSION_KEY_PREFIX):]))
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "global_version": self.global_version,
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+permission_set_cache = PermissionSetCache()
+cache_backend.add_invalidation_hook(permission_set_cache.apply_invalidation_keys)
+permission_invalidation = OrmCacheInvalidation("permission", permission_set_cache.apply_invalidation_keys)
+
+
+# ----------------------------------------------------------------------
+# ORM events: bump versions at flush, again after commit, then broadcast
+# ----------------------------------------------------------------------
+
+def _user_ids(target) -> Set[int]:
+    history = inspect(target).attrs.user_id.history
+    return {user_id for user_id in (target.user_id, *history.deleted) if user_id is not None}
+
+
+@event.listens_for(UserRole, "after_insert")
+@event.listens_for(UserRole, "after_update")
+@event.listens_for(UserRole, "after_delete")
+@event.listens_for(UserPermission, "after_insert")
+@event.listens_for(UserPermission, "after_update")
+@event.listens_for(UserPermission, "after_delete")
+def _bump_user_permission_version(mapper, connection, target) -> None:
+    permission_invalidation.schedule(target, keys=[f"{USER_VERSION_KEY_PREFIX}{user_id}" for user_id in _user_ids(target)])
+
+
+@event.listens_for(Role, "after_update")
+@event.listens_for(Role, "after_delete")
+@event.listens_for(Permission, "after_update")
+@event.listens_for(Permission, "after_delete")
+@event.listens_for(RolePermission, "after_insert")
+@event.listens_for(RolePermission, "after_update")
+@event.listens_for(RolePermission, "after_delete")
+def _bump_global_permission_version(mapper, connection, target) -> None:
+    permission_invalidation.schedule(target, keys=[GLOBAL_VERSION_KEY])
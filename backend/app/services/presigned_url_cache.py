@@ -0,0 +1,144 @@
+"""
+Presigned URL Cache
+Reuses S3 presigned GET URLs until shortly before they expire
+
+Signing a URL is a local but not free computation (boto3 builds and signs a
+request for each one), so listings that return many photos or files used to
+spend most of their time signing. URLs are cached per process, keyed by file
+key and lifetime, and served until PRESIGNED_URL_REFRESH_MARGIN seconds
+(capped at a fifth of the lifetime) before they expire. The cache is bounded
+to PRESIGNED_URL_CACHE_MAX_ENTRIES, least recently used first.
+
+get_urls_async() resolves a whole page at once: cache hits are returned
+directly and the misses are signed together in one worker thread, off the
+event loop.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.cache import LocalCacheTier
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.s3_service import S3Service
+
+
+Signer = Callable[[str, int], str]
+CacheKey = Tuple[str, int]
+
+
+class PresignedUrlCache:
+    """In-process LRU cache of presigned URLs by (file key, lifetime)"""
+
+    def __init__(
+        self,
+        max_entries: int = settings.PRESIGNED_URL_CACHE_MAX_ENTRIES,
+        refresh_margin: int = settings.PRESIGNED_URL_REFRESH_MARGIN,
+        s3_service: Optional[S3Service] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.refresh_margin = refresh_margin
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+        self._s3_service = s3_service
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Entries expire at the refresh point, on the signing clock
+        self._entries = LocalCacheTier(ttl=None, max_entries=max_entries, max_item_bytes=None, sizeof=None, clock=clock)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether URLs can be signed (an S3 service was given or S3 is configured)"""
+        return self._s3_service is not None or S3Service.is_configured()
+
+    def _service(self) -> S3Service:
+        if self._s3_service is None:
+            self._s3_service = S3Service()
+        return self._s3_service
+
+    def lookup(self, file_key: str, expires_in: int) -> Optional[str]:
+        """Cached URL still valid for longer than the refresh margin, or None"""
+        key = (file_key, expires_in)
+        with self._lock:
+            url = self._entries.get(key)
+            if url is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return url
+
+    def _store(self, file_key: str, expires_in: int, url: str, signed_at: float) -> None:
+        refresh_at = signed_at + expires_in - min(self.refresh_margin, expires_in / 5)
+        with self._lock:
+            self._entries.set((file_key, expires_in), url, refresh_at - self._clock())
+
+    def _sign(self, file_key: str, expires_in: int) -> str:
+        signed_at = self._clock()
+        url = self._service().generate_presigned_url(file_key, expiration=expires_in)
+        if url:
+            self._store(file_key, expires_in, url, signed_at)
+        return url
+
+    def get_url(self, file_key: str, expires_in: int = 3600) -> str:
+        """Presigned URL for one file key; signing errors are raised"""
+        url = self.lookup(file_key, expires_in)
+        if url is not None:
+            return url
+        return self._sign(file_key, expires_in)
+
+    def sign_many(self, file_keys: Iterable[str], expires_in: int) -> Dict[str, str]:
+        """Sign file keys in one go; keys that fail to sign are logged and left out"""
+        urls: Dict[str, str] = {}
+        for file_key in file_keys:
+            try:
+                url = self._sign(file_key, expires_in)
+            except Exception as e:
+                with self._lock:
+                    self.stats["errors"] += 1
+                logger.error(f"Failed to generate presigned URL for {file_key}: {e}")
+                continue
+            if url:
+                urls[file_key] = url
+        return urls
+
+    async def get_urls_async(self, file_keys: Iterable[str], expires_in: int = 3600) -> Dict[str, str]:
+        """
+        Presigned URLs for a page of file keys: cache hits are served
+        directly and the misses are signed in one worker thread. Keys that
+        fail to sign are missing from the result.
+        """
+        urls: Dict[str, str] = {}
+        misses: List[str] = []
+        for file_key in dict.fromkeys(file_keys):
+            url = self.lookup(file_key, expires_in)
+            if url is None:
+                misses.append(file_key)
+            else:
+                urls[file_key] = url
+        if misses:
+            urls.update(await asyncio.to_thread(self.sign_many, misses, expires_in))
+        return urls
+
+    def invalidate(self, file_key: str) -> None:
+        """Forget every URL of a file key (e.g. after the object is deleted)"""
+        with self._lock:
+            for key in [key for key in self._entries.keys() if key[0] == file_key]:
+                self._entries.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            **self.stats,
+        }
+
+
+presigned_url_cache = PresignedUrlCache()
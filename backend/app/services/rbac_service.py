@@ -5,10 +5,11 @@ Service for Role-Based Access Control operations
 
 from typing import List, Optional, Set
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, literal, union_all
 from sqlalchemy.orm import selectinload
 
 from app.models import User, Role, Permission, RolePermission, UserRole, UserPermission, TeamMember
+from app.services.permission_cache import ALL_PERMISSIONS, CompiledPermissions, permission_set_cache
 
 
 class RBACService:
@@ -27,41 +28,57 @@ class RBACService:
         )
         return list(result.scalars().all())
 
-    async def get_user_permissions(self, user_id: int) -> Set[str]:
+    async def get_compiled_permissions(self, user_id: int) -> CompiledPermissions:
         """
-        Get all permissions for a user (from roles + custom permissions).
+        Get the user's compiled permission set (cached, version-stamped).
         
-        Custom permissions override role-based permissions.
-        Superadmin role grants admin:* permission (all permissions).
+        Superadmins, role permissions and custom permissions are fetched in a
+        single query when the cached set is missing or stale.
         """
-        # Check if user has superadmin role (has all permissions)
-        has_superadmin = await self.has_role(user_id, "superadmin")
-        if has_superadmin:
-            return {"admin:*"}
+        compiled = permission_set_cache.get(user_id)
+        if compiled is not None:
+            return compiled
         
-        # Get permissions from roles
-        role_permissions_result = await self.db.execute(
-            select(Permission.name)
-            .join(RolePermission)
-            .join(Role)
-            .join(UserRole)
-            .where(UserRole.user_id == user_id)
-            .where(Role.is_active == True)
-        )
-        permissions = set(role_permissions_result.scalars().all())
-        
-        # Get custom permissions (override role permissions)
-        custom_permissions_result = await self.db.execute(
-            select(Permission.name)
-            .join(UserPermission)
-            .where(UserPermission.user_id == user_id)
+        # Read the versions before fetching so a concurrent change discards this set
+        stamp = permission_set_cache.stamp(user_id)
+        result = await self.db.execute(
+            union_all(
+                select(Role.slug.label("name"), literal("role").label("source"))
+                .join(UserRole)
+                .where(UserRole.user_id == user_id)
+                .where(Role.slug == "superadmin")
+                .where(Role.is_active == True),
+                select(Permission.name, literal("permission"))
+                .join(RolePermission)
+                .join(Role)
+                .join(UserRole)
+                .where(UserRole.user_id == user_id)
+                .where(Role.is_active == True),
+                select(Permission.name, literal("permission"))
+                .join(UserPermission)
+                .where(UserPermission.user_id == user_id),
+            )
         )
-        custom_permissions = set(custom_permissions_result.scalars().all())
+        rows = result.all()
         
-        # Combine: custom permissions override role permissions
-        permissions.update(custom_permissions)
+        # Superadmin role grants admin:* permission (all permissions)
+        if any(source == "role" for _, source in rows):
+            compiled = CompiledPermissions.compile([ALL_PERMISSIONS])
+        else:
+            # Custom permissions are combined with role permissions
+            compiled = CompiledPermissions.compile(name for name, source in rows)
+        permission_set_cache.put(user_id, stamp, compiled)
+        return compiled
+
+    async def get_user_permissions(self, user_id: int) -> Set[str]:
+        """
+        Get all permissions for a user (from roles + custom permissions).
         
-        return permissions
+        Custom permissions override role-based permissions.
+        Superadmin role grants admin:* permission (all permissions).
+        """
+        compiled = await self.get_compiled_permissions(user_id)
+        return set(compiled.names)
 
     async def has_permission(self, user_id: int, permission_name: str) -> bool:
         """
@@ -71,39 +88,18 @@ class RBACService:
         - admin:* grants all permissions
         - resource:* grants all permissions for that resource
         """
-        permissions = await self.get_user_permissions(user_id)
-        
-        # Check for exact match
-        if permission_name in permissions:
-            return True
-        
-        # Check for wildcard permissions
-        if "admin:*" in permissions:
-            # admin:* grants all permissions
-            return True
-        
-        # Check for resource-level wildcards (e.g., "users:*" grants "users:read", "users:create", etc.)
-        if ":" in permission_name:
-            resource, action = permission_name.split(":", 1)
-            resource_wildcard = f"{resource}:*"
-            if resource_wildcard in permissions:
-                return True
-        
-        return False
+        compiled = await self.get_compiled_permissions(user_id)
+        return compiled.allows(permission_name)
 
     async def has_any_permission(self, user_id: int, permission_names: List[str]) -> bool:
         """Check if user has any of the specified permissions"""
-        for permission_name in permission_names:
-            if await self.has_permission(user_id, permission_name):
-                return True
-        return False
+        compiled = await self.get_compiled_permissions(user_id)
+        return compiled.allows_any(permission_names)
 
     async def has_all_permissions(self, user_id: int, permission_names: List[str]) -> bool:
         """Check if user has all of the specified permissions"""
-        for permission_name in permission_names:
-            if not await self.has_permission(user_id, permission_name):
-                return False
-        return True
+        compiled = await self.get_compiled_permissions(user_id)
+        return compiled.allows_all(permission_names)
 
     async def has_role(self, user_id: int, role_slug: str) -> bool:
         """Check if user has a specific role"""
@@ -31,9 +31,17 @@ if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
 class S3Service:
     """Service for S3 file operations."""
 
-    def __init__(self):
-        """Initialize S3 service."""
-        if not s3_client:
+    def __init__(self, client=None, bucket: Optional[str] = None):
+        """
+        Initialize S3 service.
+
+        Args:
+            client: boto3 S3 client (defaults to the one configured from the environment)
+            bucket: Bucket name (defaults to AWS_S3_BUCKET)
+        """
+        self.client = client or s3_client
+        self.bucket = bucket or AWS_S3_BUCKET
+        if not self.client:
             raise ValueError("S3 client not configured. Please set AWS credentials.")
 
     def upload_file(
@@ -53,7 +61,7 @@ class S3Service:
         Returns:
             dict with file_key, url, size, and content_type
         """
-        if not AWS_S3_BUCKET:
+        if not self.bucket:
             raise ValueError("AWS_S3_BUCKET is not configured")
 
         # Generate unique file key
@@ -67,8 +75,8 @@ class S3Service:
 
         # Upload to S3
         try:
-            s3_client.put_object(
-                Bucket=AWS_S3_BUCKET,
+            self.client.put_object(
+                Bucket=self.bucket,
                 Key=file_key,
                 Body=file_content,
                 ContentType=file.content_type or "application/octet-stream",
@@ -102,11 +110,11 @@ class S3Service:
         Returns:
             True if successful, False otherwise
         """
-        if not AWS_S3_BUCKET:
+        if not self.bucket:
             raise ValueError("AWS_S3_BUCKET is not configured")
 
         try:
-            s3_client.delete_object(Bucket=AWS_S3_BUCKET, Key=file_key)
+            self.client.delete_object(Bucket=self.bucket, Key=file_key)
             return True
         except ClientError as e:
             raise ValueError(f"Failed to delete file from S3: {str(e)}")
@@ -126,13 +134,13 @@ class S3Service:
         Returns:
             Presigned URL string
         """
-        if not AWS_S3_BUCKET:
+        if not self.bucket:
             raise ValueError("AWS_S3_BUCKET is not configured")
 
         try:
-            url = s3_client.generate_presigned_url(
+            url = self.client.generate_presigned_url(
                 'get_object',
-                Params={'Bucket': AWS_S3_BUCKET, 'Key': file_key},
+                Params={'Bucket': self.bucket, 'Key': file_key},
                 ExpiresIn=expiration,
             )
             return url
@@ -149,11 +157,11 @@ class S3Service:
         Returns:
             dict with file metadata
         """
-        if not AWS_S3_BUCKET:
+        if not self.bucket:
             raise ValueError("AWS_S3_BUCKET is not configured")
 
         try:
-            response = s3_client.head_object(Bucket=AWS_S3_BUCKET, Key=file_key)
+            response = self.client.head_object(Bucket=self.bucket, Key=file_key)
             return {
                 "size": response.get("ContentLength", 0),
                 "content_type": response.get("ContentType", ""),
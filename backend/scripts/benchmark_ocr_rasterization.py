@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark OCR rasterization strategies on a corpus of MBTI reports.
+
+For each strategy, records per-page payload size (raw and base64), render
+time and, with --extract, extraction accuracy against expected results.
+
+Corpus layout: a directory of PDFs, each optionally accompanied by
+<name>.expected.json holding at least {"mbti_type": "INFP"} and optionally
+"dimension_preferences" ({"EI": {"E": 38, "I": 62}, ...}).
+Without --corpus, synthetic 16Personalities-like reports are generated.
+
+Usage:
+    python scripts/benchmark_ocr_rasterization.py --corpus ./samples
+    python scripts/benchmark_ocr_rasterization.py --corpus ./samples --extract   # needs OPENAI_API_KEY
+    python scripts/benchmark_ocr_rasterization.py --synthetic 5 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import fitz  # PyMuPDF
+
+from app.services.ocr_rasterization import (
+    LEGACY_STRATEGY,
+    RasterizationStrategy,
+    rasterize_page,
+)
+from app.services.pdf_ocr_service import PDFOCRService
+
+# Tolerance, in percentage points, for a dimension score to count as correct
+DIMENSION_TOLERANCE = 2
+
+STRATEGIES: Dict[str, RasterizationStrategy] = {
+    "legacy-png-200": LEGACY_STRATEGY,
+    "default": RasterizationStrategy(),
+    "jpeg-q70": RasterizationStrategy(image_format="jpeg", quality=70),
+    "grayscale-120": RasterizationStrategy(color_mode="grayscale", text_dpi=120),
+    "tight-budget": RasterizationStrategy(max_bytes=150 * 1024),
+}
+
+
+def build_synthetic_report(index: int) -> Tuple[bytes, Dict[str, Any]]:
+    """A colored result page plus a text appendix, with its expected result"""
+    introvert = 55 + index % 40
+    expected = {
+        "mbti_type": "INFP",
+        "dimension_preferences": {"EI": {"E": 100 - introvert, "I": introvert}},
+    }
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((72, 72), "Your personality type: INFP-T", fontsize=18)
+    page.insert_text((72, 110), f"Introverted {introvert}%  Extraverted {100 - introvert}%", fontsize=12)
+    page.draw_rect(fitz.Rect(72, 120, 72 + 4.5 * introvert, 136), color=(0.3, 0.5, 0.9), fill=(0.3, 0.5, 0.9))
+    for line in range(25):
+        page.insert_text((72, 170 + line * 18), "Mediators are true idealists, always looking for the hint of good.", fontsize=10)
+    appendix = document.new_page()
+    for line in range(40):
+        appendix.insert_text((72, 72 + line * 16), "Strengths and weaknesses of the INFP personality type.", fontsize=10)
+    pdf_bytes = document.tobytes()
+    document.close()
+    return pdf_bytes, expected
+
+
+def load_corpus(corpus: Optional[Path], synthetic: int) -> List[Tuple[str, bytes, Optional[Dict[str, Any]]]]:
+    if corpus is None:
+        return [(f"synthetic-{i}", *build_synthetic_report(i)) for i in range(synthetic)]
+    samples = []
+    for pdf_path in sorted(corpus.glob("*.pdf")):
+        expected_path = pdf_path.with_suffix(".expected.json")
+        expected = json.loads(expected_path.read_text(encoding="utf-8")) if expected_path.exists() else None
+        samples.append((pdf_path.name, pdf_path.read_bytes(), expected))
+    return samples
+
+
+def score_extraction(extracted: Dict[str, Any], expected: Dict[str, Any]) -> Dict[str, Any]:
+    """Type match plus share of expected dimension scores within tolerance"""
+    type_ok = (extracted.get("mbti_type") or "").upper()[:4] == expected["mbti_type"].upper()[:4]
+    checked = correct = 0
+    for dimension, values in (expected.get("dimension_preferences") or {}).items():
+        for letter, value in values.items():
+            checked += 1
+            got = (extracted.get("dimension_preferences") or {}).get(dimension, {}).get(letter)
+            if got is not None and abs(float(got) - float(value)) <= DIMENSION_TOLERANCE:
+                correct += 1
+    return {"type_ok": type_ok, "dimensions_ok": correct, "dimensions_checked": checked}
+
+
+async def benchmark_strategy(
+    name: str,
+    strategy: RasterizationStrategy,
+    samples: List[Tuple[str, bytes, Optional[Dict[str, Any]]]],
+    extract: bool,
+) -> Dict[str, Any]:
+    page_sizes: List[int] = []
+    render_times: List[float] = []
+    scores: List[Dict[str, Any]] = []
+
+    for sample_name, pdf_bytes, expected in samples:
+        document = fitz.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            for page in document:
+                has_text_layer = PDFOCRService._has_text_layer(page.get_text("text"))
+                rasterized = rasterize_page(page, strategy, has_text_layer)
+                page_sizes.append(len(rasterized.image_bytes))
+                render_times.append(rasterized.render_ms)
+        finally:
+            document.close()
+
+        if extract and expected:
+            service = PDFOCRService(raster_strategy=strategy)
+            try:
+                extracted = await service.extract_mbti_results(pdf_bytes)
+                scores.append(score_extraction(extracted, expected))
+            except Exception as e:
+                print(f"  {name} / {sample_name}: extraction failed: {e}")
+                scores.append({"type_ok": False, "dimensions_ok": 0, "dimensions_checked": 0})
+
+    result: Dict[str, Any] = {
+        "strategy": name,
+        "settings": asdict(strategy),
+        "pages": len(page_sizes),
+        "total_bytes": sum(page_sizes),
+        # base64 encodes every 3 bytes as 4 characters
+        "total_base64_bytes": sum(4 * -(-size // 3) for size in page_sizes),
+        "mean_page_bytes": int(statistics.mean(page_sizes)) if page_sizes else 0,
+        "max_page_bytes": max(page_sizes, default=0),
+        "mean_render_ms": round(statistics.mean(render_times), 1) if render_times else 0.0,
+        "p95_render_ms": round(sorted(render_times)[int(len(render_times) * 0.95) - 1], 1) if render_times else 0.0,
+    }
+    if scores:
+        checked = sum(score["dimensions_checked"] for score in scores)
+        result["type_accuracy"] = round(sum(score["type_ok"] for score in scores) / len(scores), 3)
+        result["dimension_accuracy"] = (
+            round(sum(score["dimensions_ok"] for score in scores) / checked, 3) if checked else None
+        )
+    return result
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    baseline = results[0]["total_bytes"] or 1
+    header = f"{'strategy':<16} {'pages':>5} {'KiB':>9} {'vs base':>8} {'b64 KiB':>9} {'ms/page':>8} {'p95 ms':>7} {'type':>6} {'dims':>6}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(
+            f"{result['strategy']:<16} {result['pages']:>5} {result['total_bytes'] / 1024:>9.1f} "
+            f"{result['total_bytes'] / baseline:>7.0%} {result['total_base64_bytes'] / 1024:>9.1f} "
+            f"{result['mean_render_ms']:>8.1f} {result['p95_render_ms']:>7.1f} "
+            f"{str(result.get('type_accuracy', '-')):>6} {str(result.get('dimension_accuracy', '-')):>6}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark OCR rasterization strategies")
+    parser.add_argument("--corpus", type=Path, help="Directory of sample PDFs (with optional .expected.json files)")
+    parser.add_argument("--synthetic", type=int, default=5, help="Number of synthetic reports when no corpus is given")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="Comma-separated strategy names")
+    parser.add_argument("--max-bytes", type=int, help="Override the byte budget of every non-legacy strategy")
+    parser.add_argument("--extract", action="store_true", help="Run real vision extraction to measure accuracy")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    samples = load_corpus(args.corpus, args.synthetic)
+    if not samples:
+        print("No samples found")
+        return
+
+    results = []
+    for name in args.strategies.split(","):
+        strategy = STRATEGIES[name.strip()]
+        if args.max_bytes is not None and strategy is not LEGACY_STRATEGY:
+            strategy = replace(strategy, max_bytes=args.max_bytes)
+        results.append(await benchmark_strategy(name.strip(), strategy, samples, args.extract))
+
+    print(f"{len(samples)} samples")
+    print_table(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -354,3 +354,87 @@ class TestAssessmentsEndpoint:
 
         assert response.status_code == 400
         assert "not completed yet" in response.json()["detail"].lower()
+
+
+@pytest.mark.api
+class TestSaveAnswersBatch:
+    """Test the batched answers endpoint (POST /{assessment_id}/answers)"""
+
+    @pytest.fixture
+    async def assessment(self, db_session, test_user: User) -> Assessment:
+        now = datetime.utcnow()
+        assessment = Assessment(
+            user_id=test_user.id,
+            assessment_type=AssessmentType.WELLNESS,
+            status=AssessmentStatus.IN_PROGRESS,
+            created_at=now,
+            updated_at=now,
+        )
+        db_session.add(assessment)
+        await db_session.commit()
+        await db_session.refresh(assessment)
+        return assessment
+
+    @pytest.mark.asyncio
+    async def test_upserts_answers_in_one_statement(self, db_session, test_user: User, assessment: Assessment):
+        """New answers are inserted, existing ones updated, last duplicate wins"""
+        from sqlalchemy import select
+        from app.api.v1.endpoints.assessments import (
+            AssessmentAnswersBatchRequest,
+            save_answers_batch,
+        )
+
+        assessment_id = assessment.id
+        db_session.add(AssessmentAnswer(
+            assessment_id=assessment.id,
+            question_id="wellness_q1",
+            answer_value="1",
+            answered_at=datetime.utcnow(),
+        ))
+        await db_session.commit()
+
+        request = AssessmentAnswersBatchRequest(answers=[
+            {"question_id": "wellness_q1", "answer_value": "5"},
+            {"question_id": "wellness_q2", "answer_value": "2"},
+            {"question_id": "wellness_q2", "answer_value": "3"},
+            {"question_id": "wellness_q3", "answer_value": ""},
+        ])
+        response = await save_answers_batch(
+            assessment_id=assessment_id,
+            request=request,
+            current_user=test_user,
+            db=db_session,
+        )
+
+        assert response.saved_count == 2
+        statuses = {item.question_id: item.status for item in response.results}
+        assert statuses == {"wellness_q1": "saved", "wellness_q2": "saved", "wellness_q3": "invalid"}
+
+        rows = (await db_session.execute(
+            select(AssessmentAnswer.question_id, AssessmentAnswer.answer_value)
+            .where(AssessmentAnswer.assessment_id == assessment_id)
+        )).all()
+        assert dict(rows) == {"wellness_q1": "5", "wellness_q2": "3"}
+
+    @pytest.mark.asyncio
+    async def test_rejects_completed_assessment(self, db_session, test_user: User, assessment: Assessment):
+        """A completed assessment cannot receive new answers"""
+        from fastapi import HTTPException
+        from app.api.v1.endpoints.assessments import (
+            AssessmentAnswersBatchRequest,
+            save_answers_batch,
+        )
+
+        assessment.status = AssessmentStatus.COMPLETED
+        await db_session.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await save_answers_batch(
+                assessment_id=assessment.id,
+                request=AssessmentAnswersBatchRequest(
+                    answers=[{"question_id": "wellness_q1", "answer_value": "4"}]
+                ),
+                current_user=test_user,
+                db=db_session,
+            )
+        assert exc_info.value.status_code == 400
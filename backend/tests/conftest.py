@@ -8,6 +8,11 @@ Provides:
 - Authentication helpers
 """
 
+import os
+
+# Audit events are written synchronously in tests (no lifespan writer task)
+os.environ.setdefault("AUDIT_ASYNC_WRITES", "false")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
@@ -16,6 +21,10 @@ from typing import Generator
 
 from app.main import app
 from app.core.database import Base, get_db
+from app.core.cache import cache_backend
+from app.core.principal_cache import principal_cache
+from app.services.permission_cache import permission_set_cache
+from app.services.api_key_usage import verified_key_cache
 from app.models.user import User
 from app.core.security import hash_password, create_access_token
 from datetime import timedelta
@@ -35,6 +44,17 @@ TestingSessionLocal = sessionmaker(
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_local_cache() -> Generator[None, None, None]:
+    """Each test gets an empty in-process cache tier (every test has its own database)"""
+    if cache_backend.local is not None:
+        cache_backend.local.clear()
+    principal_cache.clear()
+    permission_set_cache.clear()
+    verified_key_cache.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 async def db() -> Generator[AsyncSession, None, None]:
     """Create a test database session"""
@@ -0,0 +1,90 @@
+"""
+WebSocket Fan-out Load Testing
+Thousands of sockets spread over several workers sharing one fan-out bus
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.api.v1.endpoints.websocket import ConnectionManager
+from app.core.websocket_fanout import SLOW_CONSUMER_CLOSE_CODE, InProcessFanoutBus
+
+WORKERS = 4
+SOCKETS_PER_WORKER = 1000
+STALLED_PER_WORKER = 5
+MESSAGES = 20
+
+
+class LoadSocket:
+    """Counts frames; a stalled socket never completes a send"""
+
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.received = 0
+        self.last_index = -1
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.stalled:
+            await asyncio.Event().wait()
+        index = json.loads(text)["index"]
+        assert index == self.last_index + 1, "frames delivered out of order"
+        self.last_index = index
+        self.received += 1
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestWebSocketFanoutLoad:
+    """Broadcast to thousands of sockets held by several workers"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_to_thousands_of_sockets(self):
+        bus = InProcessFanoutBus()
+        managers = [ConnectionManager(bus=bus, queue_size=64, send_timeout=0.5) for _ in range(WORKERS)]
+        healthy, stalled = [], []
+        for worker, manager in enumerate(managers):
+            await manager.start()
+            for index in range(SOCKETS_PER_WORKER):
+                socket = LoadSocket(stalled=index < STALLED_PER_WORKER)
+                (stalled if socket.stalled else healthy).append(socket)
+                await manager.connect(socket, f"{worker}-{index}")
+
+        try:
+            started = time.perf_counter()
+            for index in range(MESSAGES):
+                await managers[0].broadcast({"type": "announcement", "index": index})
+            publish_time = time.perf_counter() - started
+
+            deadline = time.perf_counter() + 30
+            while any(socket.received < MESSAGES for socket in healthy):
+                assert time.perf_counter() < deadline, "broadcasts were not delivered in time"
+                await asyncio.sleep(0.01)
+            delivery_time = time.perf_counter() - started
+
+            while any(socket.close_code is None for socket in stalled):
+                assert time.perf_counter() < deadline, "stalled sockets were not evicted"
+                await asyncio.sleep(0.01)
+
+            total = WORKERS * SOCKETS_PER_WORKER
+            print(
+                f"\n{total} sockets, {MESSAGES} broadcasts: published in {publish_time * 1000:.1f}ms, "
+                f"delivered in {delivery_time * 1000:.1f}ms"
+            )
+            # Publishing only enqueues: stalled clients never slow the sender down
+            assert publish_time < 2.0
+            assert all(socket.close_code == SLOW_CONSUMER_CLOSE_CODE for socket in stalled)
+            assert sum(manager.stats["evicted"] for manager in managers) == WORKERS * STALLED_PER_WORKER
+            assert all(len(manager.clients) == SOCKETS_PER_WORKER - STALLED_PER_WORKER for manager in managers)
+        finally:
+            for manager in managers:
+                await manager.stop()
@@ -0,0 +1,157 @@
+"""
+Performance Tests for the assessment listing endpoint
+
+Benchmarks /assessments/my-assessments: the number of SQL statements must
+stay flat as the number of 360 evaluator records grows.
+"""
+
+import pytest
+import time
+import secrets
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.endpoints.assessments import list_assessments
+from app.models.assessment import (
+    Assessment,
+    AssessmentAnswer,
+    Assessment360Evaluator,
+    AssessmentStatus,
+    AssessmentType,
+    EvaluatorRole,
+)
+from app.models.user import User
+
+
+@contextmanager
+def count_queries(db: AsyncSession):
+    """Count SQL statements executed on the session's engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sync_engine = db.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def _seed_contributor(db: AsyncSession, coach: User, evaluator_count: int) -> None:
+    """Create `evaluator_count` completed 360 evaluations done by `coach`"""
+    now = datetime.now(timezone.utc)
+    for i in range(evaluator_count):
+        evaluated = User(
+            email=f"evaluated{i}@example.com",
+            hashed_password="not-a-real-hash",
+            first_name=f"Evaluated{i}",
+            last_name="User",
+            is_active=True,
+        )
+        db.add(evaluated)
+        await db.flush()
+
+        parent = Assessment(
+            user_id=evaluated.id,
+            assessment_type=AssessmentType.THREE_SIXTY_SELF,
+            status=AssessmentStatus.IN_PROGRESS,
+            created_at=now,
+            updated_at=now,
+        )
+        evaluator_assessment = Assessment(
+            user_id=evaluated.id,
+            assessment_type=AssessmentType.THREE_SIXTY_EVALUATOR,
+            status=AssessmentStatus.COMPLETED,
+            is_contributor_assessment=True,
+            processed_score={"total_score": 100 + i},
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+        )
+        db.add_all([parent, evaluator_assessment])
+        await db.flush()
+
+        db.add(Assessment360Evaluator(
+            assessment_id=parent.id,
+            evaluator_name="Coach",
+            evaluator_email=coach.email.upper(),
+            evaluator_role=EvaluatorRole.PEER,
+            invitation_token=secrets.token_urlsafe(16),
+            status=AssessmentStatus.COMPLETED,
+            evaluator_assessment_id=evaluator_assessment.id,
+            created_at=now,
+            updated_at=now,
+        ))
+        db.add_all([
+            AssessmentAnswer(
+                assessment_id=evaluator_assessment.id,
+                question_id=f"360_{q}",
+                answer_value="4",
+                answered_at=now,
+            )
+            for q in range(1, 4)
+        ])
+    await db.commit()
+
+
+@pytest.mark.performance
+class TestAssessmentListPerformance:
+    """Query count benchmark for list_assessments"""
+
+    @pytest.fixture
+    async def coach(self, db: AsyncSession) -> User:
+        now = datetime.now(timezone.utc)
+        user = User(
+            email="coach@example.com",
+            hashed_password="not-a-real-hash",
+            first_name="Coach",
+            last_name="User",
+            is_active=True,
+        )
+        db.add(user)
+        await db.flush()
+        for assessment_type in (AssessmentType.WELLNESS, AssessmentType.TKI):
+            assessment = Assessment(
+                user_id=user.id,
+                assessment_type=assessment_type,
+                status=AssessmentStatus.IN_PROGRESS,
+                created_at=now,
+                updated_at=now,
+            )
+            db.add(assessment)
+            await db.flush()
+            db.add(AssessmentAnswer(
+                assessment_id=assessment.id,
+                question_id=f"{assessment_type.value}_q1",
+                answer_value="3",
+                answered_at=now,
+            ))
+        await db.commit()
+        return user
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("evaluator_count", [1, 10, 50])
+    async def test_query_count_is_flat(self, db: AsyncSession, coach: User, evaluator_count: int):
+        """The listing runs the same number of queries for 1 or 50 evaluations"""
+        await _seed_contributor(db, coach, evaluator_count)
+
+        with count_queries(db) as statements:
+            start_time = time.time()
+            items = await list_assessments(current_user=coach, db=db)
+            elapsed_time = time.time() - start_time
+
+        assert len(statements) == 2
+        assert len(items) == 2 + evaluator_count
+        assert elapsed_time < 1.0
+
+        contributor_items = [item for item in items if item.is_contributor_assessment]
+        assert len(contributor_items) == evaluator_count
+        assert all(item.answer_count == 3 for item in contributor_items)
+        assert all(item.user_being_evaluated["name"].startswith("Evaluated") for item in contributor_items)
+
+        own_items = [item for item in items if not item.is_contributor_assessment]
+        assert {item.assessment_type for item in own_items} == {"wellness", "tki"}
+        assert all(item.answer_count == 1 for item in own_items)
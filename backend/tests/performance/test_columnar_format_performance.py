@@ -0,0 +1,99 @@
+"""
+Performance Tests for the Parquet / Arrow IPC formats
+
+Exports the same typed rows through every format (plus the former pandas
+DataFrame.to_excel path) and imports them back with ImportService,
+comparing time, file size and the Python types that come back.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from app.services.export_service import ExportService
+from app.services.import_service import ImportService
+
+ROWS = int(os.getenv("COLUMNAR_BENCHMARK_ROWS", "20000"))
+
+
+def make_rows(count: int):
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i,
+            "email": f"user{i}@example.com",
+            "score": (i % 1000) / 10,
+            "amount": Decimal(i % 5000) / 100,
+            "active": i % 3 == 0,
+            "created_at": started + timedelta(minutes=i),
+            "country": ("FR", "CA", "US", "BE")[i % 4],
+        }
+        for i in range(count)
+    ]
+
+
+def pandas_excel(data):
+    """Excel export as ExportService did it before the streaming engine"""
+    buffer = BytesIO()
+    frame = pd.DataFrame(data)
+    frame["created_at"] = frame["created_at"].dt.tz_localize(None)
+    frame.to_excel(buffer, index=False, engine="openpyxl")
+    buffer.seek(0)
+    return buffer, "export.xlsx"
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+@pytest.mark.performance
+class TestColumnarFormatPerformance:
+    """Parquet / Arrow versus the CSV and Excel paths"""
+
+    def test_export_and_import(self):
+        data = make_rows(ROWS)
+        exporters = {
+            "excel (pandas)": pandas_excel,
+            "excel": ExportService.export_to_excel,
+            "csv": ExportService.export_to_csv,
+            "parquet": ExportService.export_to_parquet,
+            "arrow": ExportService.export_to_arrow,
+        }
+        importers = {
+            "excel (pandas)": ImportService.import_from_excel,
+            "excel": ImportService.import_from_excel,
+            "csv": ImportService.import_from_csv,
+            "parquet": ImportService.import_from_parquet,
+            "arrow": ImportService.import_from_arrow,
+        }
+
+        results = {}
+        for name, export in exporters.items():
+            (buffer, _), export_time = timed(export, data)
+            content = buffer.getvalue()
+            imported, import_time = timed(importers[name], content)
+            assert imported["valid_rows"] == ROWS
+            results[name] = (export_time, import_time, len(content), imported["data"][1])
+            print(
+                f"{name:>15}: export {export_time * 1000:8.1f} ms  import {import_time * 1000:8.1f} ms  "
+                f"size {len(content) / 1024:8.1f} KiB"
+            )
+
+        # Typed round trip: no parsing needed after a Parquet / Arrow import
+        for name in ("parquet", "arrow"):
+            assert results[name][3] == data[1]
+        assert isinstance(results["csv"][3]["id"], str)
+
+        for name in ("parquet", "arrow"):
+            export_time, import_time, size, _ = results[name]
+            for baseline in ("excel (pandas)", "excel"):
+                assert export_time < results[baseline][0]
+                assert import_time < results[baseline][1]
+        assert results["parquet"][2] < results["csv"][2]
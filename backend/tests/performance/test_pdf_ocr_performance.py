@@ -0,0 +1,162 @@
+"""
+Performance Tests for MBTI PDF OCR extraction
+
+Uses a local stub of the vision client so page latency can be benchmarked
+offline, without an OpenAI key.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from app.services.ocr_rasterization import LEGACY_STRATEGY, RasterizationStrategy, rasterize_page
+from app.services.pdf_ocr_service import PDFOCRService
+
+
+class StubVisionClient:
+    """Mimics AsyncOpenAI.chat.completions.create with a fixed latency"""
+
+    def __init__(self, latency: float, page_data: dict):
+        self.latency = latency
+        self.page_data = page_data
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        message = SimpleNamespace(content=json.dumps(self.page_data))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _build_report(mbti_pages: int, filler_pages: int) -> bytes:
+    """Build a PDF with MBTI result pages followed by unrelated pages"""
+    document = fitz.open()
+    for i in range(mbti_pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"Your personality type: INFP-T (page {i + 1})")
+        page.insert_text((72, 100), "Introverted 62% - Intuitive 71% - Feeling 58% - Prospecting 66%")
+    for i in range(filler_pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"Terms of use and privacy notice, appendix section {i + 1} of this document.")
+    pdf_bytes = document.tobytes()
+    document.close()
+    return pdf_bytes
+
+
+PAGE_DATA = {
+    "mbti_type": "INFP-T",
+    "dimension_preferences": {
+        "EI": {"E": 38, "I": 62},
+        "SN": {"S": 29, "N": 71},
+        "TF": {"T": 42, "F": 58},
+        "JP": {"J": 34, "P": 66},
+    },
+    "strengths": ["Empathetic"],
+    "challenges": ["Self-critical"],
+}
+
+
+@pytest.mark.performance
+class TestPDFOCRPerformance:
+    """Benchmark concurrent page extraction against the serial baseline"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_extraction_beats_serial(self):
+        latency = 0.3
+        pdf_bytes = _build_report(mbti_pages=8, filler_pages=2)
+
+        serial_client = StubVisionClient(latency, PAGE_DATA)
+        serial_service = PDFOCRService(client=serial_client, page_concurrency=1)
+        start_time = time.perf_counter()
+        serial_result = await serial_service.extract_mbti_results(pdf_bytes)
+        serial_elapsed = time.perf_counter() - start_time
+
+        concurrent_client = StubVisionClient(latency, PAGE_DATA)
+        concurrent_service = PDFOCRService(client=concurrent_client, page_concurrency=4)
+        start_time = time.perf_counter()
+        concurrent_result = await concurrent_service.extract_mbti_results(pdf_bytes)
+        concurrent_elapsed = time.perf_counter() - start_time
+
+        # Filler pages are skipped by the text-layer pre-check
+        assert serial_client.calls == 8
+        assert concurrent_client.calls == 8
+        # Pages overlap, within the concurrency limit
+        assert 1 < concurrent_client.max_in_flight <= 4
+        # 8 pages at 4-way concurrency take about 2 latencies instead of 8,
+        # and vision calls overlap with rasterization of the remaining pages
+        assert concurrent_elapsed < serial_elapsed / 2
+        assert concurrent_result == serial_result
+        assert concurrent_result["mbti_type"] == "INFP"
+        assert concurrent_result["variant"] == "T"
+
+    @pytest.mark.asyncio
+    async def test_scanned_pages_are_not_skipped(self):
+        """Pages without a text layer cannot be pre-checked and are always sent"""
+        document = fitz.open()
+        for _ in range(3):
+            document.new_page()
+        pdf_bytes = document.tobytes()
+        document.close()
+
+        client = StubVisionClient(0.0, PAGE_DATA)
+        service = PDFOCRService(client=client)
+        await service.extract_mbti_results(pdf_bytes)
+
+        assert client.calls == 3
+
+
+@pytest.mark.performance
+class TestRasterizationPerformance:
+    """Payload size of the adaptive rasterization strategy against the legacy PNG renders"""
+
+    def _rasterize(self, pdf_bytes: bytes, strategy: RasterizationStrategy):
+        document = fitz.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            return [rasterize_page(page, strategy, has_text_layer=True) for page in document]
+        finally:
+            document.close()
+
+    def test_adaptive_pages_are_smaller_than_legacy_png(self):
+        pdf_bytes = _build_report(mbti_pages=3, filler_pages=0)
+
+        legacy_pages = self._rasterize(pdf_bytes, LEGACY_STRATEGY)
+        adaptive_pages = self._rasterize(pdf_bytes, RasterizationStrategy())
+
+        legacy_bytes = sum(len(page.image_bytes) for page in legacy_pages)
+        adaptive_bytes = sum(len(page.image_bytes) for page in adaptive_pages)
+        assert adaptive_bytes < legacy_bytes / 2
+        # Text-only pages are sent cropped and in grayscale
+        assert all(page.grayscale for page in adaptive_pages)
+        assert all(page.height < legacy_pages[0].height / 2 for page in adaptive_pages)
+
+    def test_byte_budget_is_respected(self):
+        document = fitz.open()
+        page = document.new_page()
+        for row in range(60):
+            page.draw_rect(
+                fitz.Rect(36, 36 + row * 12, 560, 46 + row * 12),
+                color=None,
+                fill=((row * 37 % 255) / 255, (row * 91 % 255) / 255, 0.6),
+            )
+        pdf_bytes = document.tobytes()
+        document.close()
+
+        strategy = RasterizationStrategy(max_bytes=60 * 1024)
+        rasterized = self._rasterize(pdf_bytes, strategy)[0]
+
+        assert len(rasterized.image_bytes) <= strategy.max_bytes
+        assert not rasterized.grayscale
+        assert rasterized.dpi >= strategy.min_dpi
@@ -25,3 +25,12 @@ async def test_readiness_check(client: AsyncClient) -> None:
     assert data["status"] == "ready"
     assert "timestamp" in data
 
+
+
+def test_optional_stats_sources_fail_independently() -> None:
+    """A stats module that can't be imported doesn't hide the core cache stats"""
+    from app.api.v1.endpoints import health
+
+    assert health._optional_stats_source("app.services.missing_stats_module", "stats") is None
+    assert health._optional_stats_source("app.core.principal_cache", "principal_cache") is health.principal_cache
+    assert health.CACHE_AVAILABLE and health.cache_backend is not None
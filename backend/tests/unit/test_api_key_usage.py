@@ -0,0 +1,133 @@
+"""
+Tests for the verified API key cache and write-behind usage tracking
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.api_key import get_user_from_api_key
+from app.models.api_key import APIKey
+from app.models.user import User
+from app.services import api_key_usage
+from app.services.api_key_service import APIKeyService
+from app.services.api_key_usage import APIKeyUsageTracker, verified_key_cache
+from tests.conftest import TestingSessionLocal, engine
+
+
+class StatementLog:
+    """Records SQL statements sent to the test engine"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement.lstrip().split()[0].upper())
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self)
+
+
+@pytest.fixture
+def tracker(monkeypatch) -> APIKeyUsageTracker:
+    events = []
+
+    async def audit_writer(verified, uses):
+        events.append((verified.api_key_id, uses))
+
+    tracker = APIKeyUsageTracker(flush_interval=3600, session_factory=TestingSessionLocal, audit_writer=audit_writer)
+    tracker.audit_events = events
+    monkeypatch.setattr(api_key_usage, "api_key_usage_tracker", tracker)
+    return tracker
+
+
+@pytest.fixture
+async def machine_key(db: AsyncSession):
+    now = datetime.now(timezone.utc)
+    user = User(email="machine@example.com", hashed_password="x", is_active=True, created_at=now, updated_at=now)
+    db.add(user)
+    await db.flush()
+    api_key, plaintext = await APIKeyService.create_api_key(db, user, "CI pipeline")
+    return api_key.id, plaintext
+
+
+@pytest.mark.unit
+class TestAPIKeyAuthenticationPath:
+    """get_user_from_api_key with the verified-key cache"""
+
+    @pytest.mark.asyncio
+    async def test_cached_key_needs_no_query_and_usage_is_batched(self, db, machine_key, tracker):
+        key_id, plaintext = machine_key
+        assert (await get_user_from_api_key(plaintext, db)).email == "machine@example.com"
+        db.expunge_all()
+
+        with StatementLog() as log:
+            for _ in range(5):
+                assert await get_user_from_api_key(plaintext, db) is not None
+        assert log.statements == []
+
+        # One audit event for the first use; later uses wait for the next window
+        await tracker.stop()
+        assert tracker.audit_events == [(key_id, 1), (key_id, 5)]
+        assert tracker.stats["rows_written"] == 1
+
+        async with TestingSessionLocal() as session:
+            stored = (await session.execute(select(APIKey).where(APIKey.id == key_id))).scalar_one()
+            assert stored.usage_count == 6
+            assert stored.last_used_at is not None
+
+    @pytest.mark.asyncio
+    async def test_revocation_takes_effect_immediately(self, db, machine_key, tracker):
+        key_id, plaintext = machine_key
+        user = await get_user_from_api_key(plaintext, db)
+        assert user is not None
+
+        await APIKeyService.revoke_api_key(db, key_id, user)
+        assert verified_key_cache.snapshot()["size"] == 0
+        assert await get_user_from_api_key(plaintext, db) is None
+
+    @pytest.mark.asyncio
+    async def test_user_deactivation_drops_cached_keys(self, db, machine_key, tracker):
+        _, plaintext = machine_key
+        user = await get_user_from_api_key(plaintext, db)
+        user.is_active = False
+        await db.commit()
+
+        assert await get_user_from_api_key(plaintext, db) is None
+
+
+@pytest.mark.unit
+class TestAPIKeyUsageTracker:
+    """Flush failures and batching"""
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_counts(self, db, machine_key):
+        key_id, _ = machine_key
+        await db.commit()
+
+        def broken_factory():
+            raise ConnectionError("database unavailable")
+
+        async def no_audit(verified, uses):
+            pass
+
+        tracker = APIKeyUsageTracker(flush_interval=3600, session_factory=broken_factory, audit_writer=no_audit)
+        verified = api_key_usage.VerifiedAPIKey(api_key_id=key_id, name="CI", expires_at=None, principal=None)
+        tracker.record(verified)
+        tracker.record(verified)
+
+        assert await tracker.flush() == 0
+        assert tracker.stats["flush_errors"] == 1
+
+        tracker.session_factory = TestingSessionLocal
+        assert await tracker.flush() == 1
+        async with TestingSessionLocal() as session:
+            stored = (await session.execute(select(APIKey).where(APIKey.id == key_id))).scalar_one()
+            assert stored.usage_count == 2
+        await tracker.stop()
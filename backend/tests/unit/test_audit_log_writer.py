@@ -0,0 +1,133 @@
+"""
+Tests for the batched security audit writer
+"""
+
+import asyncio
+import glob
+import os
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.core import security_audit
+from app.core.security_audit import (
+    AuditLogWriter,
+    SecurityAuditLog,
+    SecurityAuditLogger,
+    SecurityEventType,
+)
+from tests.conftest import TestingSessionLocal, engine
+
+
+class InsertCounter:
+    """Counts INSERT round trips sent to the test engine"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT"):
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self)
+
+
+async def _stored_count() -> int:
+    async with TestingSessionLocal() as session:
+        return (await session.execute(select(func.count(SecurityAuditLog.id)))).scalar_one()
+
+
+def _broken_factory():
+    raise ConnectionError("database unavailable")
+
+
+@pytest.fixture
+def writer(db, tmp_path, monkeypatch) -> AuditLogWriter:
+    writer = AuditLogWriter(
+        queue_size=100,
+        batch_size=50,
+        flush_interval=0.01,
+        spill_dir=str(tmp_path),
+        session_factory=TestingSessionLocal,
+    )
+    monkeypatch.setattr(security_audit, "audit_log_writer", writer)
+    return writer
+
+
+async def _log(description: str, severity: str = "info", **kwargs):
+    return await SecurityAuditLogger.log_event(
+        event_type=SecurityEventType.DATA_ACCESSED,
+        description=description,
+        user_id=1,
+        severity=severity,
+        metadata={"resource": "contacts"},
+        **kwargs,
+    )
+
+
+@pytest.mark.unit
+class TestAuditLogWriter:
+    """Queueing, batching and spill-to-disk"""
+
+    @pytest.mark.asyncio
+    async def test_events_are_inserted_in_one_batch(self, writer):
+        writer.start()
+        results = [await _log(f"event {index}") for index in range(20)]
+        assert all(result.id is None for result in results)
+
+        with InsertCounter() as counter:
+            await writer.stop()
+        assert counter.count == 1
+        assert writer.stats["batches"] == 1
+        assert await _stored_count() == 20
+
+        async with TestingSessionLocal() as session:
+            stored = (await session.execute(select(SecurityAuditLog).limit(1))).scalar_one()
+            assert stored.event_metadata == {"resource": "contacts"}
+            assert stored.timestamp is not None
+
+    @pytest.mark.asyncio
+    async def test_critical_and_explicit_sync_events_skip_the_queue(self, db, writer):
+        writer.start()
+        critical = await _log("breach", severity="critical", db=db)
+        forced = await _log("forced", sync=True, db=db)
+        assert critical.id is not None and forced.id is not None
+        assert writer.stats["queued"] == 0
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_spilled_then_replayed(self, writer):
+        writer.session_factory = _broken_factory
+        writer.start()
+        for index in range(3):
+            await _log(f"event {index}")
+        await writer.stop()
+
+        assert writer.stats["write_errors"] == 1
+        assert writer.stats["spilled"] == 3
+        assert len(glob.glob(os.path.join(writer.spill_dir, "*.jsonl"))) == 1
+        assert await _stored_count() == 0
+
+        writer.session_factory = TestingSessionLocal
+        assert await writer.replay_spilled() == 3
+        assert glob.glob(os.path.join(writer.spill_dir, "*")) == []
+        assert await _stored_count() == 3
+
+    @pytest.mark.asyncio
+    async def test_full_queue_spills_instead_of_blocking(self, writer):
+        writer.queue_size = 2
+        writer._queue = asyncio.Queue(maxsize=2)
+        for index in range(5):
+            writer.enqueue({"timestamp": security_audit.datetime.now(), "event_type": "data_accessed",
+                            "severity": "info", "description": f"event {index}", "success": "unknown"})
+        assert writer.stats["spilled"] == 3
+
+        await writer.stop()
+        assert await _stored_count() == 2
+        assert await writer.replay_spilled() == 3
+        assert await _stored_count() == 5
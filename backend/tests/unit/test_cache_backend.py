@@ -0,0 +1,360 @@
+"""
+Unit tests for the two-tier cache backend
+"""
+
+import asyncio
+import json
+import random
+import time
+import zlib
+
+import pytest
+
+from app.core.cache import CacheBackend, LocalCacheTier, StampedeGuard, cached, parse_namespace_limits
+from app.core.config import settings
+
+
+@pytest.fixture
+def backend() -> CacheBackend:
+    """Backend without Redis: the in-process tier is the only tier"""
+    cache = CacheBackend()
+    cache.use_redis = False
+    cache.redis_client = None
+    return cache
+
+
+class TestLocalCacheTier:
+    """Test the in-process LRU/TTL tier"""
+
+    def test_per_namespace_limits(self):
+        tier = LocalCacheTier(ttl=60, max_entries=2, namespace_limits={"themes": 1})
+        for i in range(3):
+            tier.set(f"query:{i}", b"x", 60)
+        tier.set("themes:a", b"x", 60)
+        tier.set("themes:b", b"x", 60)
+
+        # The busy namespace evicts its own least recently used keys only
+        assert tier.get("query:0") is None
+        assert tier.get("query:1") == b"x"
+        assert tier.get("themes:a") is None
+        assert tier.get("themes:b") == b"x"
+        assert tier.sizes() == {"query": 2, "themes": 1}
+        assert tier.evictions == {"query": 1, "themes": 1}
+
+    def test_lru_order_and_ttl(self, monkeypatch):
+        tier = LocalCacheTier(ttl=10, max_entries=2)
+        tier.set("users:a", b"a", 60)
+        tier.set("users:b", b"b", 60)
+        tier.get("users:a")
+        tier.set("users:c", b"c", 60)
+        assert tier.get("users:a") == b"a"
+        assert tier.get("users:b") is None
+
+        # Entries live for min(expire, local ttl)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+        assert tier.get("users:a") is None
+
+    def test_oversized_values_are_skipped(self):
+        tier = LocalCacheTier(ttl=60, max_item_bytes=4)
+        assert tier.set("query:big", b"12345", 60) is False
+        assert tier.get("query:big") is None
+
+    def test_clear_pattern(self):
+        tier = LocalCacheTier(ttl=60)
+        tier.set("teams:list:1", b"x", 60)
+        tier.set("teams:list:2", b"x", 60)
+        tier.set("teams:get:1", b"x", 60)
+        assert tier.clear_pattern("teams:list:*") == 2
+        assert tier.get("teams:get:1") == b"x"
+
+    def test_parse_namespace_limits(self):
+        assert parse_namespace_limits("query=2000, tag=500,bad,x=y") == {"query": 2000, "tag": 500}
+        assert parse_namespace_limits("") == {}
+
+
+class TestTwoTierCacheBackend:
+    """Test CacheBackend with the in-process tier"""
+
+    @pytest.mark.asyncio
+    async def test_caches_without_redis(self, backend: CacheBackend):
+        assert await backend.set("plans:list", [{"id": 1, "name": "Pro"}], expire=300) is True
+        assert await backend.get("plans:list") == [{"id": 1, "name": "Pro"}]
+        assert await backend.get("plans:missing") is None
+
+        stats = backend.stats()["plans"]
+        assert stats["local_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["local_size"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hits_return_independent_copies(self, backend: CacheBackend):
+        await backend.set("themes:active", {"colors": ["red"]})
+        first = await backend.get("themes:active")
+        first["colors"].append("blue")
+        assert await backend.get("themes:active") == {"colors": ["red"]}
+
+    @pytest.mark.asyncio
+    async def test_delete_and_clear_pattern(self, backend: CacheBackend):
+        await backend.set("users:1", {"id": 1})
+        await backend.set("users:2", {"id": 2})
+        assert await backend.delete("users:1") is True
+        assert await backend.get("users:1") is None
+        assert await backend.clear_pattern("users:*") == 1
+        assert await backend.get("users:2") is None
+
+    def test_invalidation_messages_from_other_workers(self, backend: CacheBackend):
+        backend.local.set("users:1", b"x", 60)
+        backend.local.set("teams:list:1", b"x", 60)
+
+        # Own messages are ignored: the local tier is already up to date
+        backend.handle_invalidation_message(json.dumps({"origin": backend.instance_id, "keys": ["users:1"]}))
+        assert backend.local.get("users:1") == b"x"
+
+        backend.handle_invalidation_message(json.dumps({"origin": "other", "keys": ["users:1"]}))
+        backend.handle_invalidation_message(json.dumps({"origin": "other", "pattern": "teams:*"}))
+        backend.handle_invalidation_message(b"not json")
+        assert backend.local.get("users:1") is None
+        assert backend.local.get("teams:list:1") is None
+
+    @pytest.mark.asyncio
+    async def test_cached_decorator_uses_local_tier(self, backend: CacheBackend, monkeypatch):
+        from app.core import cache as cache_module
+
+        monkeypatch.setattr(cache_module, "cache_backend", backend)
+        monkeypatch.setattr(cache_module, "stampede_guard", StampedeGuard(backend))
+        calls = 0
+
+        @cached(expire=60, key_prefix="plans")
+        async def list_plans(active: bool):
+            nonlocal calls
+            calls += 1
+            return [{"active": active}]
+
+        assert await list_plans(True) == [{"active": True}]
+        assert await list_plans(True) == [{"active": True}]
+        assert calls == 1
+
+        await list_plans.invalidate_all()
+        await list_plans(True)
+        assert calls == 2
+
+
+class SharedRedisStandIn:
+    """Backend shared by two StampedeGuards, as two workers share Redis"""
+
+    redis_enabled = True
+
+    def __init__(self):
+        self.store = {}
+        self.locks = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=300, compress=True):
+        self.store[key] = value
+        return True
+
+    async def acquire_lock(self, name, ttl_ms):
+        if name in self.locks:
+            return None
+        self.locks[name] = "token"
+        return "token"
+
+    async def release_lock(self, name, token):
+        if self.locks.get(name) == token:
+            del self.locks[name]
+
+
+class TestStampedeGuard:
+    """Test single-flight recomputation, early refresh and stale-while-revalidate"""
+
+    @staticmethod
+    def _counting_compute(result="fresh", delay=0.05):
+        calls = {"count": 0}
+
+        async def compute():
+            calls["count"] += 1
+            await asyncio.sleep(delay)
+            return f"{result}-{calls['count']}"
+
+        return compute, calls
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_compute_once(self, backend: CacheBackend):
+        guard = StampedeGuard(backend)
+        compute, calls = self._counting_compute()
+
+        results = await asyncio.gather(*(guard.get_or_compute("plans:hot", compute) for _ in range(20)))
+
+        assert results == ["fresh-1"] * 20
+        assert calls["count"] == 1
+        assert guard.stats["coalesced"] == 19
+        assert guard.recomputations_avoided == 19
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self, backend: CacheBackend):
+        guard = StampedeGuard(backend)
+        compute, calls = self._counting_compute()
+
+        leader = asyncio.create_task(guard.get_or_compute("plans:hot", compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(guard.get_or_compute("plans:hot", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await asyncio.gather(*followers) == ["fresh-1"] * 3
+        assert leader.cancelled()
+        assert calls["count"] == 1
+        assert guard._in_flight == {}
+        assert await backend.get("plans:hot") == "fresh-1"
+
+    @pytest.mark.asyncio
+    async def test_other_worker_waits_for_lock_holder(self):
+        shared = SharedRedisStandIn()
+        worker_a, worker_b = StampedeGuard(shared), StampedeGuard(shared)
+        worker_b.LOCK_POLL_SECONDS = 0.01
+        compute, calls = self._counting_compute(delay=0.1)
+
+        results = await asyncio.gather(
+            worker_a.get_or_compute("plans:hot", compute),
+            worker_b.get_or_compute("plans:hot", compute),
+        )
+
+        assert results == ["fresh-1", "fresh-1"]
+        assert calls["count"] == 1
+        assert worker_b.stats["lock_waits_served"] == 1
+        assert shared.locks == {}
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self, backend: CacheBackend, monkeypatch):
+        guard = StampedeGuard(backend)
+        compute, calls = self._counting_compute(delay=0.01)
+        assert await guard.get_or_compute("theme:active", compute, expire=60, stale_ttl=30) == "fresh-1"
+
+        # Past the logical expiry, still within the stale window
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 70)
+        results = await asyncio.gather(
+            *(guard.get_or_compute("theme:active", compute, expire=60, stale_ttl=30) for _ in range(5))
+        )
+        assert results == ["fresh-1"] * 5
+        assert guard.stats["stale_served"] == 5
+
+        await asyncio.gather(*guard._background)
+        assert calls["count"] == 2
+        assert await guard.get_or_compute("theme:active", compute, expire=60, stale_ttl=30) == "fresh-2"
+
+    @pytest.mark.asyncio
+    async def test_early_refresh_before_expiry(self, backend: CacheBackend, monkeypatch):
+        guard = StampedeGuard(backend)
+        compute, calls = self._counting_compute(delay=0.02)
+        await guard.get_or_compute("plans:list", compute, expire=5, early_refresh_beta=1.0)
+
+        # ln(rand) is very negative: the refresh window covers the whole TTL
+        monkeypatch.setattr(random, "random", lambda: 1e-300)
+        assert await guard.get_or_compute("plans:list", compute, expire=5, early_refresh_beta=1.0) == "fresh-1"
+        await asyncio.gather(*guard._background)
+
+        assert guard.stats["early_refreshes"] == 1
+        assert calls["count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_are_shared_and_not_cached(self, backend: CacheBackend):
+        guard = StampedeGuard(backend)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("database unavailable")
+
+        results = await asyncio.gather(
+            *(guard.get_or_compute("users:1", failing) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await backend.get("users:1") is None
+
+
+class TestTagIndex:
+    """Test tag-based invalidation without Redis"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_tagging_keeps_every_entry(self, backend: CacheBackend):
+        from app.core.cache_enhanced import EnhancedCache
+
+        cache = EnhancedCache(backend)
+        await asyncio.gather(
+            *(cache.cache_query_result(f"hash{i}", {"i": i}, tags=["contacts"]) for i in range(50))
+        )
+        await cache.cache_query_result("other", {"i": -1}, tags=["users"])
+
+        assert await cache.invalidate_by_tags(["contacts"]) == 50
+        assert await backend.get("query:hash0") is None
+        assert await backend.get("query:other") == {"i": -1}
+        # The tag itself is gone
+        assert await cache.invalidate_by_tags(["contacts"]) == 0
+
+    @pytest.mark.asyncio
+    async def test_local_tag_index_is_pruned(self, backend: CacheBackend, monkeypatch):
+        monkeypatch.setattr(CacheBackend, "LOCAL_TAG_PRUNE_SIZE", 3)
+        for i in range(3):
+            await backend.set(f"query:{i}", i)
+            await backend.add_tags(f"query:{i}", ["users"])
+        backend.local.delete("query:0")
+        await backend.set("query:3", 3)
+        await backend.add_tags("query:3", ["users"])
+
+        assert backend._local_tags["users"] == {"query:1", "query:2", "query:3"}
+
+
+class TagRedisStandIn:
+    """Records the tag commands sent to Redis"""
+
+    def __init__(self, eval_result):
+        self.eval_result = eval_result
+        self.calls = []
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def sadd(self, key, member):
+        self.calls.append(("sadd", key, member))
+
+    def expire(self, key, ttl):
+        self.calls.append(("expire", key, ttl))
+
+    async def execute(self):
+        return []
+
+    async def eval(self, script, numkeys, *keys):
+        self.calls.append(("eval", numkeys, keys))
+        return self.eval_result
+
+    async def delete(self, *keys):
+        self.calls.append(("delete", keys))
+        return len(keys)
+
+
+class TestRedisTagIndex:
+    """Tag sets don't reuse the key names of the former string index"""
+
+    @pytest.mark.asyncio
+    async def test_tag_sets_and_legacy_index(self, backend: CacheBackend, monkeypatch):
+        monkeypatch.setattr(settings, "CACHE_PUBSUB_INVALIDATION", False)
+        # A former tag:{tag} value: compressed list of query hashes
+        legacy = b"zlib:" + zlib.compress(backend._dumps(["old1", "old2"]))
+        redis = TagRedisStandIn([[b"query:new"], [legacy]])
+        backend.use_redis = True
+        backend.redis_client = redis
+
+        await backend.add_tags("query:new", ["contacts"])
+        assert ("sadd", "tagset:contacts", "query:new") in redis.calls
+
+        assert await backend.invalidate_tags(["contacts"]) == 3
+        assert ("eval", 2, ("tagset:contacts", "tag:contacts")) in redis.calls
+        assert ("delete", ("query:old1", "query:old2")) in redis.calls
@@ -2,6 +2,8 @@
 Unit tests for enhanced cache utilities
 """
 
+from typing import Optional
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from app.core.cache_enhanced import EnhancedCache, cache_query, enhanced_cache
@@ -60,16 +62,19 @@ class TestEnhancedCache:
         
         assert success is True
         mock_cache_backend.set.assert_called()
+        mock_cache_backend.add_tags.assert_awaited_once_with("query:query_hash_123", ["users"], 600)
     
     @pytest.mark.asyncio
     async def test_invalidate_by_tags(self, cache, mock_cache_backend):
         """Test invalidating cache by tags"""
-        mock_cache_backend.get.return_value = ["query_hash_1", "query_hash_2"]
+        mock_cache_backend.invalidate_tags = AsyncMock(return_value=2)
         
         invalidated = await cache.invalidate_by_tags(["users"])
         
-        assert invalidated >= 0
-        assert mock_cache_backend.delete.call_count >= 2
+        assert invalidated == 2
+        # One backend call for the whole tag, not one delete per entry
+        mock_cache_backend.invalidate_tags.assert_awaited_once_with(["users"])
+        mock_cache_backend.delete.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_warm_cache(self, cache, mock_cache_backend):
@@ -91,3 +96,85 @@ class TestEnhancedCache:
         assert results["key1"] is True
         assert results["key2"] is True
 
+    def test_app_instance_shares_the_reported_stampede_guard(self):
+        """Stampede stats of enhanced_cache.get_or_set show up in the health check"""
+        from app.core.cache import stampede_guard
+
+        assert enhanced_cache.stampede_guard is stampede_guard
+
+
+
+class TestCacheQueryKeys:
+    """Test semantic cache keys of cache_query"""
+    
+    @pytest.fixture
+    def backend(self, monkeypatch):
+        """Backend without Redis, shared by cache_query and enhanced_cache"""
+        from app.core import cache_enhanced
+        from app.core.cache import CacheBackend
+        
+        backend = CacheBackend()
+        backend.use_redis = False
+        backend.redis_client = None
+        monkeypatch.setattr(cache_enhanced, "cache_backend", backend)
+        monkeypatch.setattr(cache_enhanced, "enhanced_cache", EnhancedCache(backend))
+        return backend
+    
+    @pytest.mark.asyncio
+    async def test_key_ignores_request_session_and_user(self, backend):
+        from fastapi import Depends, Query
+        from app.core.pagination import PaginationParams
+        from app.core.cache_enhanced import cache_query_stats
+        
+        calls = 0
+        
+        @cache_query(expire=60, tags=["contacts"], key_params=["pagination"])
+        async def list_items(
+            request: object,
+            db: object = Depends(lambda: None),
+            current_user: object = Depends(lambda: None),
+            pagination: PaginationParams = Depends(lambda: None),
+            circle: Optional[str] = Query(None),
+        ):
+            nonlocal calls
+            calls += 1
+            return [PaginationParams(page=pagination.page, page_size=pagination.page_size)]
+        
+        assert list_items.cache_key_params == ["pagination", "circle"]
+        
+        first = await list_items(object(), object(), object(), PaginationParams(page=1), "inner")
+        # New request, session and user objects: same declared parameters hit the cache
+        second = await list_items(object(), object(), object(), PaginationParams(page=1), "inner")
+        # Another page is another entry
+        await list_items(object(), object(), object(), PaginationParams(page=2), "inner")
+        
+        assert calls == 2
+        assert first == [PaginationParams(page=1)]
+        assert second == [{"page": 1, "page_size": 20}]
+        stats = cache_query_stats()[f"{__name__}.{list_items.__qualname__}"]
+        assert stats == {"hits": 1, "misses": 2, "hit_ratio": 0.333}
+    
+    @pytest.mark.asyncio
+    async def test_user_scope_separates_principals(self, backend):
+        from types import SimpleNamespace
+        
+        @cache_query(expire=60, scope="user")
+        async def my_items(current_user: object, limit: int = 10):
+            return {"owner": current_user.id, "limit": limit}
+        
+        alice, bob = SimpleNamespace(id=1), SimpleNamespace(id=2)
+        assert await my_items(alice) == {"owner": 1, "limit": 10}
+        assert await my_items(bob) == {"owner": 2, "limit": 10}
+        assert await my_items(current_user=alice) == {"owner": 1, "limit": 10}
+    
+    def test_invalid_declarations(self):
+        with pytest.raises(ValueError):
+            cache_query(scope="everyone")
+        with pytest.raises(ValueError):
+            @cache_query(scope="user")
+            async def no_principal(limit: int = 10):
+                return []
+        with pytest.raises(ValueError):
+            @cache_query(key_params=["missing"])
+            async def unknown_param(limit: int = 10):
+                return []
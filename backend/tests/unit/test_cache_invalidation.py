@@ -0,0 +1,85 @@
+"""
+Tests for the shared ORM-driven cache invalidation helper
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache_backend
+from app.core.cache_invalidation import OrmCacheInvalidation
+from app.models import User
+
+NOW = datetime.now(timezone.utc)
+
+
+class RecordingCache:
+    """Records the invalidations it is asked to apply"""
+
+    def __init__(self):
+        self.applied = []
+
+    def apply_invalidation_keys(self, keys, pattern=None):
+        self.applied.append((sorted(keys), pattern))
+
+
+class PublishRecorder:
+    """Stands in for the Redis client of cache_backend"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def publish(self, channel, message):
+        self.messages.append(json.loads(message))
+
+
+recording_cache = RecordingCache()
+invalidation = OrmCacheInvalidation("test", recording_cache.apply_invalidation_keys)
+
+
+@pytest.fixture
+def redis_stand_in(monkeypatch):
+    client = PublishRecorder()
+    monkeypatch.setattr(cache_backend, "use_redis", True)
+    monkeypatch.setattr(cache_backend, "redis_client", client)
+    return client
+
+
+def _user(email: str) -> User:
+    return User(email=email, hashed_password="x", is_active=True, created_at=NOW, updated_at=NOW)
+
+
+@pytest.mark.unit
+class TestOrmCacheInvalidation:
+    """Flush-time, commit-time and broadcast steps"""
+
+    @pytest.mark.asyncio
+    async def test_applied_at_flush_and_after_commit_then_broadcast(self, db: AsyncSession, redis_stand_in):
+        recording_cache.applied.clear()
+        user = _user("inv@example.com")
+        db.add(user)
+        invalidation.schedule(user, keys=["test:b", "test:a"])
+        invalidation.schedule(user, pattern="test:*")
+        assert recording_cache.applied == [(["test:a", "test:b"], None), ([], "test:*")]
+
+        await db.commit()
+        await asyncio.sleep(0)
+        assert recording_cache.applied[2:] == [(["test:a", "test:b"], None), ([], "test:*")]
+        published = [(message.get("keys"), message.get("pattern")) for message in redis_stand_in.messages]
+        assert published == [(["test:a", "test:b"], None), (None, "test:*")]
+
+    @pytest.mark.asyncio
+    async def test_rollback_discards_pending_invalidations(self, db: AsyncSession, redis_stand_in):
+        recording_cache.applied.clear()
+        user = _user("rollback@example.com")
+        db.add(user)
+        invalidation.schedule(user, keys=["test:a"])
+        await db.rollback()
+
+        await db.commit()
+        await asyncio.sleep(0)
+        assert recording_cache.applied == [(["test:a"], None)]
+        assert redis_stand_in.messages == []
@@ -0,0 +1,130 @@
+"""
+Tests for the Parquet / Arrow IPC export and import formats
+"""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import select
+
+from app.models.contact import Contact
+from app.services.export_service import ExportService
+from app.services.export_stream import ExportStream, arrow_schema, stream_rows
+from app.services.import_service import ImportService
+
+ROWS = [
+    {
+        "id": i,
+        "name": f"Row {i}",
+        "score": i / 4,
+        "amount": Decimal(f"{i}.25"),
+        "active": i % 2 == 0,
+        "created": datetime(2024, 5, 1, i % 24, tzinfo=timezone.utc),
+        "note": None if i < 5 else f"note {i}",
+    }
+    for i in range(30)
+]
+
+
+async def collect(stream: ExportStream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+@pytest.mark.unit
+class TestColumnarExport:
+    """Record batches written by the streaming engine"""
+
+    @pytest.mark.asyncio
+    async def test_parquet_row_groups_and_types(self):
+        stream = await ExportStream.open(ROWS, "parquet", batch_size=4, chunk_size=1)
+        chunks = [chunk async for chunk in stream]
+        assert len(chunks) > 2
+        assert stream.filename.endswith(".parquet")
+
+        parquet_file = pq.ParquetFile(BytesIO(b"".join(chunks)))
+        assert parquet_file.metadata.num_row_groups == 8
+        schema = parquet_file.schema_arrow
+        assert schema.field("id").type == pa.int64()
+        assert schema.field("created").type == pa.timestamp("us", tz="UTC")
+        # All-null in the first batch: written as strings
+        assert schema.field("note").type == pa.string()
+        assert parquet_file.read().to_pylist() == ROWS
+
+    @pytest.mark.asyncio
+    async def test_arrow_ipc_with_headers(self):
+        stream = await ExportStream.open(iter(ROWS), "arrow", headers=["name", "id"], batch_size=10)
+        reader = pa.ipc.open_file(await collect(stream))
+        assert reader.num_record_batches == 3
+        assert reader.read_all().to_pylist()[1] == {"name": "Row 1", "id": 1}
+
+    @pytest.mark.asyncio
+    async def test_empty_export_uses_the_schema(self, db):
+        statement = select(Contact.id, Contact.first_name, Contact.birthday, Contact.created_at)
+        schema = arrow_schema(statement)
+        assert schema.types == [pa.int64(), pa.string(), pa.date32(), pa.timestamp("us", tz="UTC")]
+
+        stream = await ExportStream.open(stream_rows(db, statement), "parquet", schema=schema)
+        table = pq.read_table(BytesIO(await collect(stream)))
+        assert table.num_rows == 0
+        assert table.schema.equals(schema)
+
+    def test_buffered_exports(self):
+        buffer, filename = ExportService.export_to_arrow(ROWS[:3])
+        assert filename.endswith(".arrow")
+        assert pa.ipc.open_file(buffer.getvalue()).read_all().num_rows == 3
+        with pytest.raises(ValueError, match="No data to export"):
+            ExportService.export_to_parquet([])
+        assert {"parquet", "arrow"} <= set(ExportService.get_export_formats())
+
+
+@pytest.mark.unit
+class TestColumnarImport:
+    """Batched, typed import"""
+
+    def test_parquet_round_trip_keeps_types(self):
+        buffer, _ = ExportService.export_to_parquet(ROWS)
+        result = ImportService.import_from_parquet(buffer.getvalue(), batch_size=7)
+        assert (result["total_rows"], result["valid_rows"], result["invalid_rows"]) == (30, 30, 0)
+        assert result["data"] == ROWS
+
+    def test_schema_casts_and_reports_bad_values(self):
+        rows = [
+            {"id": "1", "birthday": "1990-01-02", "email": "a@example.com"},
+            {"id": "two", "birthday": "1991-02-03", "email": "b@example.com"},
+            {"id": "3", "birthday": "1992-03-04", "email": None},
+            {"id": "4", "birthday": None, "email": "d@example.com", "extra": "ignored"},
+        ]
+        buffer, _ = ExportService.export_to_arrow(rows, headers=["id", "birthday", "email", "extra"])
+        schema = pa.schema([("id", pa.int64()), ("birthday", pa.date32()), ("email", pa.string())])
+
+        result = ImportService.import_from_arrow(
+            buffer.getvalue(),
+            schema=schema,
+            required=["email"],
+            validator=lambda row: (row["birthday"] is not None, "Birthday is required"),
+        )
+        assert result["data"] == [{"id": 1, "birthday": date(1990, 1, 2), "email": "a@example.com"}]
+        assert [(error["row"], error["error"]) for error in result["errors"]] == [
+            (2, "Invalid value for id: expected int64"),
+            (3, "Missing required value: email"),
+            (4, "Birthday is required"),
+        ]
+        assert result["errors"][0]["data"]["id"] == "two"
+
+    def test_arrow_stream_format_and_errors(self):
+        table = pa.Table.from_pylist(ROWS[:5])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        assert ImportService.import_from_arrow(sink.getvalue().to_pybytes())["valid_rows"] == 5
+
+        with pytest.raises(ValueError, match="Missing columns: email"):
+            ImportService.import_from_arrow(sink.getvalue().to_pybytes(), required=["email"])
+        with pytest.raises(ValueError, match="Failed to read Parquet file"):
+            ImportService.import_from_parquet(b"not parquet")
+        with pytest.raises(ValueError, match="Failed to read Arrow file"):
+            ImportService.import_from_arrow(b"not arrow")
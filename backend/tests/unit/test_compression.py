@@ -110,3 +110,143 @@ class TestCompressionMiddleware:
         response = client.get("/test")  # No Accept-Encoding header
         assert response.status_code == 200
         # Should not compress if client doesn't accept it
+
+
+def _asgi_get(app, path="/", accept_encoding="gzip"):
+    """Run one GET through an ASGI app; returns (start message, body chunks)"""
+    import asyncio
+
+    messages = []
+    received = []
+
+    async def receive():
+        if received:
+            # The client never disconnects
+            await asyncio.Event().wait()
+        received.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    chunks = [message.get("body", b"") for message in messages[1:]]
+    return start, chunks
+
+
+def _header(start, name):
+    for key, value in start["headers"]:
+        if key.decode().lower() == name:
+            return value.decode()
+    return None
+
+
+class TestEncodingNegotiation:
+    """Accept-Encoding parsing with q-values"""
+
+    def test_q_values(self):
+        from app.core.compression import negotiate_encoding
+
+        available = ["zstd", "br", "gzip"]
+        assert negotiate_encoding("gzip, br", available) == "br"
+        assert negotiate_encoding("br;q=0.5, gzip;q=0.9", available) == "gzip"
+        assert negotiate_encoding("br;q=0, gzip;q=0", available) is None
+        assert negotiate_encoding("*;q=0.1, br;q=0", ["br", "gzip"]) == "gzip"
+        assert negotiate_encoding("identity", available) is None
+        assert negotiate_encoding("zstd, br", ["br", "gzip"]) == "br"
+
+
+class TestStreamingCompression:
+    """Pure ASGI behaviour of CompressionMiddleware"""
+
+    def test_streaming_response_is_compressed_incrementally(self):
+        import gzip
+        from fastapi.responses import StreamingResponse
+        from app.core.compression import CompressionMiddleware
+
+        lines = [f'{{"row": {index}, "value": "{"x" * 50}"}}\n'.encode() for index in range(2000)]
+
+        async def app(scope, receive, send):
+            async def rows():
+                for line in lines:
+                    yield line
+            await StreamingResponse(rows(), media_type="application/x-ndjson; charset=utf-8")(scope, receive, send)
+
+        middleware = CompressionMiddleware(app, use_brotli=False)
+        # application/x-ndjson is not in the compressible list: passthrough
+        start, chunks = _asgi_get(middleware)
+        assert _header(start, "content-encoding") is None
+
+        async def json_app(scope, receive, send):
+            async def rows():
+                for line in lines:
+                    yield line
+            await StreamingResponse(rows(), media_type="application/json")(scope, receive, send)
+
+        start, chunks = _asgi_get(CompressionMiddleware(json_app, use_brotli=False))
+        assert _header(start, "content-encoding") == "gzip"
+        assert _header(start, "content-length") is None
+        assert "Accept-Encoding" in _header(start, "vary")
+        assert gzip.decompress(b"".join(chunks)) == b"".join(lines)
+
+    def test_large_body_is_compressed_off_the_loop(self):
+        import threading
+        import brotli
+        from fastapi.responses import Response
+        from app.core import compression
+
+        threads = set()
+        original = compression.compress_body
+
+        def recording(data, encoding, level):
+            threads.add(threading.get_ident())
+            return original(data, encoding, level)
+
+        body = b'{"data": "' + b"y" * 400_000 + b'"}'
+        app = compression.CompressionMiddleware(Response(body, media_type="application/json"), offload_size=100_000)
+        compression.compress_body = recording
+        try:
+            start, chunks = _asgi_get(app, accept_encoding="br")
+        finally:
+            compression.compress_body = original
+        assert _header(start, "content-encoding") == "br"
+        assert brotli.decompress(b"".join(chunks)) == body
+        assert threading.get_ident() not in threads
+
+    def test_event_streams_and_errors_pass_through(self):
+        from fastapi.responses import Response
+        from app.core.compression import CompressionMiddleware
+
+        stream = Response("data: x\n\n" * 500, media_type="text/event-stream")
+        start, _ = _asgi_get(CompressionMiddleware(stream))
+        assert _header(start, "content-encoding") is None
+
+        error = Response('{"detail": "' + "e" * 5000 + '"}', status_code=500, media_type="application/json")
+        start, _ = _asgi_get(CompressionMiddleware(error))
+        assert _header(start, "content-encoding") is None
+
+    def test_cacheable_paths_reuse_compressed_variants(self):
+        import gzip
+        from fastapi.responses import Response
+        from app.core.compression import CompressedVariantCache, CompressionMiddleware
+
+        cache = CompressedVariantCache()
+        body = b'{"theme": "' + b"z" * 5000 + b'"}'
+        app = CompressionMiddleware(
+            Response(body, media_type="application/json"),
+            cache_paths=["/api/v1/themes"],
+            variant_cache=cache,
+        )
+        for _ in range(3):
+            start, chunks = _asgi_get(app, path="/api/v1/themes/active")
+            assert gzip.decompress(b"".join(chunks)) == body
+            assert _header(start, "content-length") == str(len(chunks[0]))
+        _asgi_get(app, path="/api/v1/users")
+        assert cache.stats == {"hits": 2, "misses": 1}
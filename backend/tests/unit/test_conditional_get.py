@@ -0,0 +1,178 @@
+"""
+Tests for validators, conditional GET and the pure ASGI cache headers middleware
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+from app.core.cache_headers import CacheHeadersMiddleware
+from app.core.conditional import (
+    NotModified,
+    Validator,
+    conditional,
+    etag_matches,
+    http_date,
+    not_modified_handler,
+)
+from app.core.database import get_db
+
+
+UPDATED_AT = datetime(2026, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+@pytest.mark.unit
+class TestValidator:
+    """Precondition evaluation"""
+
+    def test_etag_comparison_is_weak(self):
+        assert etag_matches('"abc"', 'W/"abc"')
+        assert etag_matches('W/"x", W/"abc"', '"abc"')
+        assert etag_matches("*", 'W/"abc"')
+        assert not etag_matches('"abd"', 'W/"abc"')
+        assert not etag_matches(None, 'W/"abc"')
+
+    def test_version_parts_make_the_etag(self):
+        assert Validator.for_version(1, UPDATED_AT).etag == Validator.for_version(1, UPDATED_AT).etag
+        assert Validator.for_version(1, UPDATED_AT).etag != Validator.for_version(2, UPDATED_AT).etag
+
+    def test_if_modified_since_at_second_granularity(self):
+        validator = Validator(last_modified=UPDATED_AT)
+        assert validator.is_fresh(None, http_date(UPDATED_AT))
+        assert not validator.is_fresh(None, http_date(UPDATED_AT - timedelta(seconds=1)))
+        assert not validator.is_fresh(None, "not a date")
+
+    def test_if_none_match_takes_precedence(self):
+        validator = Validator.for_version(1, last_modified=UPDATED_AT)
+        assert not validator.is_fresh('"other"', http_date(UPDATED_AT))
+
+
+def make_app(calls):
+    app = FastAPI()
+    app.add_exception_handler(NotModified, not_modified_handler)
+    app.add_middleware(CacheHeadersMiddleware, default_max_age=300)
+
+    async def item_validator(item_id: int):
+        calls.append("validator")
+        return Validator.for_version("item", item_id, UPDATED_AT, last_modified=UPDATED_AT)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int, _validator=Depends(conditional(item_validator))):
+        calls.append("handler")
+        return {"id": item_id, "payload": "x" * 100}
+
+    @app.get("/items/{item_id}/rows")
+    async def stream_rows(item_id: int, _validator=Depends(conditional(item_validator))):
+        async def rows():
+            for index in range(3):
+                yield f"{index}\n".encode()
+        return StreamingResponse(rows(), media_type="text/plain")
+
+    @app.get("/plain-stream")
+    async def plain_stream():
+        async def rows():
+            yield b"a"
+            yield b"b"
+        return StreamingResponse(rows(), media_type="text/plain")
+
+    @app.get("/plain")
+    async def plain():
+        return {"message": "test"}
+
+    return app
+
+
+@pytest.mark.unit
+class TestConditionalGet:
+    """304 answered before the handler runs"""
+
+    def test_not_modified_skips_the_handler(self):
+        calls = []
+        client = TestClient(make_app(calls))
+
+        response = client.get("/items/1")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        assert response.headers["last-modified"] == http_date(UPDATED_AT)
+        assert calls == ["validator", "handler"]
+
+        calls.clear()
+        response = client.get("/items/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert "content-length" not in response.headers or response.headers["content-length"] == "0"
+        assert calls == ["validator"]
+
+        response = client.get("/items/1", headers={"If-Modified-Since": http_date(UPDATED_AT)})
+        assert response.status_code == 304
+
+        response = client.get("/items/2", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_streaming_responses_carry_the_validator(self):
+        client = TestClient(make_app([]))
+        response = client.get("/items/1/rows")
+        assert response.text == "0\n1\n2\n"
+        assert response.headers["etag"].startswith('W/"')
+
+        response = client.get("/items/1/rows", headers={"If-None-Match": response.headers["etag"]})
+        assert response.status_code == 304
+
+        # No validator: streamed through without an ETag
+        response = client.get("/plain-stream")
+        assert response.text == "ab"
+        assert "etag" not in response.headers
+        assert "max-age=300" in response.headers["cache-control"]
+
+    def test_body_etag_fallback(self):
+        client = TestClient(make_app([]))
+        response = client.get("/plain")
+        etag = response.headers["etag"]
+        assert response.headers["vary"] == "Accept, Accept-Encoding"
+
+        response = client.get("/plain", headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == 304
+        assert response.content == b""
+
+
+@pytest.mark.unit
+class TestEndpointValidators:
+    """Real endpoints answering 304 from their version token"""
+
+    @pytest.mark.asyncio
+    async def test_active_theme(self, db):
+        from app.api.v1.endpoints import themes
+        from app.models.theme import Theme
+
+        theme = Theme(name="Brand", display_name="Brand", config={"mode": "dark"}, is_active=True, created_by=1)
+        db.add(theme)
+        await db.commit()
+
+        app = FastAPI()
+        app.add_exception_handler(NotModified, not_modified_handler)
+        app.add_middleware(CacheHeadersMiddleware)
+        app.include_router(themes.router, prefix="/themes")
+        app.dependency_overrides[get_db] = lambda: db
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/themes/active")
+            assert response.status_code == 200
+            etag = response.headers["etag"]
+
+            response = await client.get("/themes/active", headers={"If-None-Match": etag})
+            assert response.status_code == 304
+
+            theme.display_name = "Brand 2"
+            theme.updated_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+            await db.commit()
+
+            response = await client.get("/themes/active", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.json()["display_name"] == "Brand 2"
+            assert response.headers["etag"] != etag
@@ -0,0 +1,171 @@
+"""
+Tests for the streaming, chunked contact import engine
+"""
+
+import threading
+import time
+import zipfile
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import select
+
+from app.core.exceptions import BadRequestException
+from app.models.company import Company
+from app.models.contact import Contact
+from app.services.contact_import import CompanyNameIndex, ContactImportEngine, ExcelRows
+
+
+def workbook_bytes(rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def zip_bytes(entries):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in entries.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+class RecordingS3:
+    """Records uploads and the highest number running at once"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.uploaded = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def upload_file(self, file, folder, user_id=None):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+            self.uploaded.append((file.filename, file.file.read()))
+        return {"file_key": f"{folder}/{user_id}/{file.filename}"}
+
+
+@pytest.mark.unit
+class TestExcelRows:
+    """Header naming and row iteration"""
+
+    def test_headers_and_empty_rows(self):
+        source = BytesIO(workbook_bytes([
+            ["Prénom", "Nom", None, "Nom"],
+            ["Ada", "Lovelace", None, "x"],
+            [None, None, None, None],
+            ["Alan", "Turing", None, None],
+        ]))
+        rows = ExcelRows(source)
+        assert rows.headers == ["Prénom", "Nom", "Unnamed: 2", "Nom.1"]
+        assert [number for number, _ in rows] == [2, 4]
+        rows.close()
+
+    def test_unreadable_file_is_a_bad_request(self):
+        with pytest.raises(BadRequestException):
+            ExcelRows(BytesIO(b"not a workbook"))
+
+
+@pytest.mark.unit
+class TestCompanyNameIndex:
+    """Matching order and memoization"""
+
+    def test_match_kinds(self):
+        index = CompanyNameIndex([(1, "Acme"), (2, "Globex Corporation"), (3, None)])
+        assert index.match(" ACME ") == (1, CompanyNameIndex.EXACT)
+        assert index.match("Acme SARL") == (1, CompanyNameIndex.WITHOUT_LEGAL_FORM)
+        assert index.match("Globex") == (2, CompanyNameIndex.PARTIAL)
+        assert index.match("Initech") == (None, None)
+        assert len(index) == 2
+
+    def test_partial_matches_are_memoized(self):
+        index = CompanyNameIndex([(1, "Globex Corporation")])
+        index.match("Globex")
+        index._stored = []
+        assert index.match("globex") == (1, CompanyNameIndex.PARTIAL)
+
+
+@pytest.mark.unit
+class TestContactImportEngine:
+    """End-to-end imports against the test database"""
+
+    @pytest.mark.asyncio
+    async def test_creates_and_updates_in_chunks(self, db):
+        db.add_all([Company(id=1, name="Acme"), Company(id=2, name="Globex Corporation")])
+        db.add(Contact(first_name="Grace", last_name="Hopper", email="grace@example.com"))
+        await db.commit()
+
+        source = BytesIO(workbook_bytes([
+            ["Prénom", "Nom de famille", "Entreprise", "Email", "Région"],
+            ["Ada", "Lovelace", "Acme SARL", None, "London, UK"],
+            ["Grace", "Hopper", "Globex", "GRACE@example.com", None],
+            [None, "Nobody", None, None, None],
+            ["Alan", "Turing", "Initech", "alan@example.com", None],
+            ["Linus", "Torvalds", "acme", None, None],
+        ]))
+        engine = ContactImportEngine(db, 1, "import-chunks", chunk_size=2)
+        result = await engine.run(source, "contacts.xlsx")
+
+        assert result["total_rows"] == 5
+        assert (result["valid_rows"], result["created_rows"], result["updated_rows"]) == (4, 3, 1)
+        assert result["invalid_rows"] == 1
+        assert result["errors"][0]["row"] == 4
+        assert [warning["type"] for warning in result["warnings"]] == [
+            "company_match_without_legal_form",
+            "company_partial_match",
+            "company_not_found",
+        ]
+        assert result["photos_uploaded"] == 0
+
+        contacts = {
+            contact.last_name: contact
+            for contact in (await db.execute(select(Contact))).scalars().all()
+        }
+        assert len(contacts) == 4
+        assert contacts["Lovelace"].company_id == 1
+        assert (contacts["Lovelace"].city, contacts["Lovelace"].country) == ("London", "UK")
+        assert contacts["Hopper"].company_id == 2
+        assert contacts["Turing"].company_id is None
+        assert result["contact_ids"][1] == contacts["Hopper"].id
+
+    @pytest.mark.asyncio
+    async def test_zip_photos_are_uploaded_by_a_bounded_pool(self, db):
+        names = [f"person{index}" for index in range(6)]
+        archive = zip_bytes({
+            "contacts.xlsx": workbook_bytes(
+                [["first_name", "last_name", "photo_filename"]]
+                + [[name, "Doe", f"{name}.png" if index == 0 else None] for index, name in enumerate(names)]
+            ),
+            **{f"photos/{name}_doe.jpg": name.encode() for name in names},
+            "photos/person0.png": b"from-excel",
+        })
+        s3 = RecordingS3()
+        engine = ContactImportEngine(db, 7, "import-zip", chunk_size=4, photo_concurrency=2, s3_service=s3)
+        result = await engine.run(archive, "contacts.zip")
+
+        assert result["created_rows"] == 6
+        assert result["photos_uploaded"] == 6
+        assert len(s3.uploaded) == 6
+        assert 1 < s3.max_running <= 2
+        assert ("person0.png", b"from-excel") in s3.uploaded
+
+        photo_urls = (await db.execute(select(Contact.photo_url))).scalars().all()
+        assert all(url.startswith("contacts/photos/7/") for url in photo_urls)
+
+    @pytest.mark.asyncio
+    async def test_zip_without_workbook_is_rejected(self, db):
+        engine = ContactImportEngine(db, 1, "import-empty-zip")
+        with pytest.raises(BadRequestException):
+            await engine.run(zip_bytes({"photos/a.jpg": b"a"}), "contacts.zip")
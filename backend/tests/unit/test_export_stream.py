@@ -0,0 +1,168 @@
+"""
+Tests for the streaming export engine
+"""
+
+import csv
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import select
+
+from app.api.v1.endpoints.commercial.contacts import CONTACT_EXPORT_HEADERS, export_contacts
+from app.models.company import Company
+from app.models.contact import Contact
+from app.services.export_service import ExportService
+from app.services.export_stream import ExportStream, stream_rows, stream_rows_in_own_session
+
+ROWS = [
+    {"id": 1, "name": "Ada", "amount": Decimal("12.50"), "created": datetime(2024, 5, 1, 9, 30)},
+    {"id": 2, "name": "Grace Hopper, RADM", "amount": None, "created": datetime(2024, 5, 2, tzinfo=timezone.utc)},
+    {"id": 3, "name": "Zoë \"Z\"", "amount": Decimal("0"), "created": datetime(2024, 5, 3)},
+]
+
+
+async def collect(stream: ExportStream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+async def async_rows(rows):
+    for row in rows:
+        yield row
+
+
+@pytest.mark.unit
+class TestExportEncoders:
+    """Output of each format"""
+
+    @pytest.mark.asyncio
+    async def test_pretty_json_matches_json_dumps(self):
+        rows = [{"id": i, "name": f"row {i}", "tags": ["a", "b"], "meta": {"x": i}} for i in range(7)]
+        stream = await ExportStream.open(rows, "json", batch_size=3, chunk_size=16)
+        assert await collect(stream) == json.dumps(rows, indent=2, ensure_ascii=False).encode("utf-8")
+        assert stream.row_count == 7
+
+    @pytest.mark.asyncio
+    async def test_compact_json_and_ndjson(self):
+        rows = [{"id": 1, "amount": Decimal("1.5")}, {"id": 2, "amount": None}]
+        stream = await ExportStream.open(rows, "json", pretty=False)
+        assert json.loads(await collect(stream)) == [{"id": 1, "amount": 1.5}, {"id": 2, "amount": None}]
+
+        stream = await ExportStream.open(async_rows(rows), "ndjson", headers=["id"])
+        assert (await collect(stream)).decode().splitlines() == ['{"id": 1}', '{"id": 2}']
+        assert stream.media_type == "application/x-ndjson"
+
+    @pytest.mark.asyncio
+    async def test_csv(self):
+        stream = await ExportStream.open(async_rows(ROWS), "csv", batch_size=2, chunk_size=1)
+        chunks = [chunk async for chunk in stream]
+        assert len(chunks) > 1
+        lines = list(csv.reader(StringIO(b"".join(chunks).decode("utf-8"))))
+        assert lines[0] == ["id", "name", "amount", "created"]
+        assert lines[2] == ["2", "Grace Hopper, RADM", "", "2024-05-02T00:00:00+00:00"]
+        assert lines[3][1] == 'Zoë "Z"'
+
+    @pytest.mark.asyncio
+    async def test_xlsx(self):
+        rows = ROWS + [{"id": 4, "name": "Dict", "amount": {"a": 1}, "created": date(2024, 5, 4)}]
+        stream = await ExportStream.open(rows, "excel", filename="rows.xlsx", chunk_size=512)
+        chunks = [chunk async for chunk in stream]
+        assert len(chunks) > 1
+        assert stream.content_disposition == "attachment; filename=rows.xlsx"
+
+        sheet = load_workbook(BytesIO(b"".join(chunks))).active
+        values = list(sheet.values)
+        assert values[0] == ("id", "name", "amount", "created")
+        assert sheet["A1"].font.bold
+        assert values[2][3] == datetime(2024, 5, 2)
+        assert values[4][2] == '{"a": 1}'
+
+    @pytest.mark.asyncio
+    async def test_no_data(self):
+        with pytest.raises(ValueError, match="No data to export"):
+            await ExportStream.open([], "csv")
+        with pytest.raises(ValueError, match="Unsupported format"):
+            await ExportStream.open(ROWS, "yaml")
+
+        # Explicit headers: header-only file
+        stream = await ExportStream.open(async_rows([]), "csv", headers=["a", "b"])
+        assert await collect(stream) == b"a,b\r\n"
+
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_closes_its_source(self):
+        closed = []
+
+        async def source():
+            try:
+                for row in ROWS * 100:
+                    yield row
+            finally:
+                closed.append(True)
+
+        stream = await ExportStream.open(source(), "csv", batch_size=1, chunk_size=1)
+        chunks = stream.__aiter__()
+        await anext(chunks)
+        assert closed == []
+        await chunks.aclose()
+        assert closed == [True]
+
+    def test_buffered_exports_use_the_same_encoders(self):
+        buffer, filename = ExportService.export_to_json(ROWS[:1])
+        assert filename.endswith(".json")
+        assert json.loads(buffer.getvalue())[0]["amount"] == 12.5
+
+        buffer, _ = ExportService.export_to_excel([{"a": 1}, {"b": 2}], headers=["b"])
+        assert list(load_workbook(buffer).active.values) == [("b",), (None,), (2,)]
+
+
+@pytest.mark.unit
+class TestStreamRows:
+    """Rows read from the database in batches"""
+
+    @pytest.mark.asyncio
+    async def test_stream_rows_in_batches(self, db):
+        db.add(Company(id=1, name="Acme"))
+        db.add_all([
+            Contact(first_name=f"First {i}", last_name=f"Last {i}", company_id=1 if i % 2 else None)
+            for i in range(25)
+        ])
+        await db.commit()
+
+        rows = [row async for row in stream_rows(db, select(Contact.id, Contact.first_name).order_by(Contact.id), batch_size=4)]
+        assert len(rows) == 25
+        assert rows[0] == {"id": 1, "first_name": "First 0"}
+
+        names = [
+            name async for name in stream_rows(
+                db, select(Contact).order_by(Contact.id), mapper=lambda c: c.last_name, scalars=True, batch_size=7
+            )
+        ]
+        assert names[-1] == "Last 24"
+
+        # Own session: usable after the request's session is closed
+        rows = stream_rows_in_own_session(db, select(Contact.id).order_by(Contact.id), batch_size=4)
+        await db.close()
+        assert [row["id"] async for row in rows] == list(range(1, 26))
+
+    @pytest.mark.asyncio
+    async def test_contacts_export(self, db, test_user):
+        db.add(Company(id=1, name="Acme"))
+        db.add(Contact(first_name="Ada", last_name="Lovelace", company_id=1, employee_id=test_user.id,
+                       birthday=date(1815, 12, 10)))
+        await db.commit()
+
+        response = await export_contacts(format="excel", db=db, current_user=test_user)
+        content = b"".join([chunk async for chunk in response.body_iterator])
+        values = list(load_workbook(BytesIO(content)).active.values)
+        assert values[0] == tuple(CONTACT_EXPORT_HEADERS)
+        row = dict(zip(values[0], values[1]))
+        assert (row["Entreprise"], row["Employé"], row["Anniversaire"]) == ("Acme", "Test User", "1815-12-10")
+
+        await db.execute(Contact.__table__.delete())
+        await db.commit()
+        response = await export_contacts(format="csv", db=db, current_user=test_user)
+        content = b"".join([chunk async for chunk in response.body_iterator])
+        assert content.decode("utf-8").splitlines() == [",".join(CONTACT_EXPORT_HEADERS)]
@@ -0,0 +1,86 @@
+"""
+Tests for the event-driven import progress bus
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.import_progress import ImportProgressBus
+
+
+def parse(frame: str):
+    """(id, payload) of an SSE frame; keepalive comments give (None, None)"""
+    if frame.startswith(":"):
+        return None, None
+    event_id = None
+    for line in frame.strip().splitlines():
+        if line.startswith("id: "):
+            event_id = int(line[4:])
+        elif line.startswith("data: "):
+            payload = json.loads(line[6:])
+    return event_id, payload
+
+
+async def collect(bus: ImportProgressBus, import_id: str, last_event_id=None):
+    return [parse(frame) async for frame in bus.subscribe(import_id, last_event_id)]
+
+
+@pytest.mark.unit
+class TestImportProgressBus:
+    """Streaming, resumption and retention"""
+
+    @pytest.mark.asyncio
+    async def test_subscriber_is_woken_by_events(self):
+        bus = ImportProgressBus(keepalive=5)
+        subscriber = asyncio.create_task(collect(bus, "imp-1"))
+        await asyncio.sleep(0)
+
+        bus.start("imp-1")
+        bus.log("imp-1", "Fichier lu")
+        await asyncio.sleep(0)
+        bus.update_status("imp-1", "processing", progress=0, total=2)
+        bus.log("imp-1", "Ligne 1 importée")
+        bus.update_status("imp-1", "completed", progress=2, total=2)
+
+        frames = await asyncio.wait_for(subscriber, timeout=1)
+        ids = [event_id for event_id, _ in frames if event_id is not None]
+        assert ids == sorted(ids)
+        assert frames[0][1]["message"] == "Fichier lu"
+        assert frames[-2][1] == {"type": "status", "data": frames[-2][1]["data"]}
+        assert frames[-2][1]["data"]["status"] == "completed"
+        assert frames[-1] == (None, {"type": "done"})
+
+    @pytest.mark.asyncio
+    async def test_resume_after_last_event_id(self):
+        bus = ImportProgressBus()
+        bus.start("imp-2")
+        for index in range(3):
+            bus.log("imp-2", f"log {index}")
+        bus.update_status("imp-2", "completed", progress=3, total=3)
+
+        first = await collect(bus, "imp-2")
+        resumed = await collect(bus, "imp-2", last_event_id=str(first[1][0]))
+        assert [payload.get("message") for _, payload in resumed[:2]] == ["log 2", None]
+        assert resumed[-1] == (None, {"type": "done"})
+
+    def test_progress_updates_are_coalesced(self):
+        bus = ImportProgressBus(status_interval=60)
+        progress = bus.start("imp-3")
+        bus.update_status("imp-3", "processing", progress=0, total=1000)
+        for row in range(1, 1000):
+            bus.update_status("imp-3", "processing", progress=row, total=1000)
+        assert progress.seq == 1
+        assert progress.status["progress"] == 999
+
+        bus.update_status("imp-3", "completed", progress=1000, total=1000)
+        assert progress.seq == 2 and progress.finished
+
+    def test_finished_imports_expire(self):
+        bus = ImportProgressBus(ttl=0)
+        bus.start("done")
+        bus.update_status("done", "completed")
+        bus.start("running")
+        assert bus.get("done") is None
+        assert bus.get("running") is not None
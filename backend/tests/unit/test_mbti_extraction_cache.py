@@ -0,0 +1,151 @@
+"""
+Tests for the MBTI extraction cache
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.mbti_extraction_cache import (
+    MBTIExtractionCache,
+    content_cache_key,
+    normalize_profile_url,
+    url_cache_key,
+)
+
+
+class InMemoryBackend:
+    """Stands in for the Redis CacheBackend"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=300, compress=True):
+        self.store[key] = value
+        return True
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+        return True
+
+
+RESULT = {"mbti_type": "INFP", "dimension_preferences": {"EI": {"E": 38, "I": 62}}}
+
+
+@pytest.mark.unit
+class TestMBTIExtractionCacheKeys:
+    """Test cache key derivation"""
+
+    def test_equivalent_urls_share_a_key(self):
+        base = url_cache_key("https://www.16personalities.com/profiles/abc123")
+        assert url_cache_key("HTTPS://16Personalities.com/profiles/abc123/") == base
+        assert url_cache_key("https://www.16personalities.com/profiles/abc123?utm_source=mail#traits") == base
+        assert url_cache_key("https://www.16personalities.com/profiles/xyz789") != base
+
+    def test_normalize_keeps_meaningful_query(self):
+        assert (
+            normalize_profile_url("https://16personalities.com/p?b=2&a=1&utm_medium=x")
+            == "https://16personalities.com/p?a=1&b=2"
+        )
+
+    def test_content_key_depends_on_kind_and_bytes(self):
+        assert content_cache_key("pdf", b"abc") == content_cache_key("pdf", b"abc")
+        assert content_cache_key("pdf", b"abc") != content_cache_key("pdf", b"abd")
+        assert content_cache_key("pdf", b"abc") != content_cache_key("image:png", b"abc")
+
+
+@pytest.mark.unit
+class TestMBTIExtractionCache:
+    """Test caching, coalescing and expiry"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_extract_once(self):
+        cache = MBTIExtractionCache(ttl=60, backend=InMemoryBackend())
+        calls = 0
+
+        async def extract():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return dict(RESULT)
+
+        results = await asyncio.gather(*(cache.get_or_extract("key", extract) for _ in range(5)))
+
+        assert results == [RESULT] * 5
+        assert calls == 1
+        assert cache.stats == {"hits": 0, "misses": 1, "coalesced": 4}
+
+        # Later requests are hits and callers cannot mutate the cached copy
+        results[0]["mbti_type"] = "ESTJ"
+        assert await cache.get_or_extract("key", extract) == RESULT
+        assert calls == 1
+        assert cache.stats["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_coalesced_callers(self):
+        cache = MBTIExtractionCache(ttl=60, backend=InMemoryBackend())
+        calls = 0
+
+        async def extract():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return dict(RESULT)
+
+        first = asyncio.create_task(cache.get_or_extract("key", extract))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache.get_or_extract("key", extract)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await asyncio.gather(*waiters) == [RESULT] * 2
+        assert first.cancelled()
+        assert calls == 1
+        assert await cache.get("key") == RESULT
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self):
+        cache = MBTIExtractionCache(ttl=60, backend=InMemoryBackend())
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("vision call failed")
+
+        results = await asyncio.gather(
+            *(cache.get_or_extract("key", failing) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert calls == 1
+        assert all(isinstance(r, ValueError) for r in results)
+
+        async def succeeding():
+            return dict(RESULT)
+
+        assert await cache.get_or_extract("key", succeeding) == RESULT
+
+    @pytest.mark.asyncio
+    async def test_shared_backend_and_expiry(self):
+        backend = InMemoryBackend()
+        first = MBTIExtractionCache(ttl=60, backend=backend)
+        await first.set("key", RESULT)
+
+        # Another worker process sees the entry through the shared backend
+        second = MBTIExtractionCache(ttl=60, backend=backend)
+        assert await second.get("key") == RESULT
+
+        local_only = MBTIExtractionCache(ttl=0, backend=InMemoryBackend())
+        local_only._set_local("key", RESULT)
+        assert local_only._get_local("key") is None
+
+    @pytest.mark.asyncio
+    async def test_local_tier_is_bounded(self):
+        cache = MBTIExtractionCache(ttl=60, max_entries=2, backend=InMemoryBackend())
+        for key in ("a", "b", "c"):
+            cache._set_local(key, RESULT)
+        assert cache._local.keys() == ["b", "c"]
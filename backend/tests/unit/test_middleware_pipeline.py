@@ -0,0 +1,153 @@
+"""
+Tests for the pure ASGI middleware pipeline
+"""
+
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.pipeline import MiddlewarePipeline, Stage
+
+
+class RecordingStage(Stage):
+    def __init__(self, name, events, short_circuit=None, enabled=True):
+        super().__init__(enabled)
+        self.name = name
+        self.events = events
+        self.short_circuit = short_circuit
+
+    async def on_request(self, request: Request) -> Optional[PlainTextResponse]:
+        self.events.append(f"{self.name}:request")
+        if self.short_circuit == "response":
+            return PlainTextResponse("stopped", status_code=418)
+        if self.short_circuit == "raise":
+            raise HTTPException(status_code=403, detail=f"{self.name} says no")
+        return None
+
+    def on_response(self, request, status, headers):
+        self.events.append(f"{self.name}:response:{status}")
+        headers.append("x-stages", self.name)
+
+    def on_finish(self, request, exc):
+        self.events.append(f"{self.name}:finish:{type(exc).__name__ if exc else None}")
+
+
+def make_app(stages, **kwargs):
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b"a"
+            yield b"b"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(MiddlewarePipeline, stages=stages, **kwargs)
+    return app
+
+
+@pytest.mark.unit
+class TestMiddlewarePipeline:
+    """Ordering, short-circuits and configuration"""
+
+    def test_hooks_nest_like_a_middleware_stack(self):
+        events = []
+        client = TestClient(make_app([RecordingStage("outer", events), RecordingStage("inner", events)]))
+        response = client.get("/stream")
+        assert response.text == "ab"
+        assert response.headers.get_list("x-stages") == ["inner", "outer"]
+        assert events == [
+            "outer:request", "inner:request",
+            "inner:response:200", "outer:response:200",
+            "inner:finish:None", "outer:finish:None",
+        ]
+
+    def test_short_circuit_skips_inner_stages_and_the_app(self):
+        events = []
+        stages = [
+            RecordingStage("outer", events),
+            RecordingStage("gate", events, short_circuit="response"),
+            RecordingStage("inner", events),
+        ]
+        response = TestClient(make_app(stages)).get("/ok")
+        assert response.status_code == 418
+        assert response.headers.get_list("x-stages") == ["outer"]
+        assert "inner:request" not in events
+        assert "gate:finish:None" in events
+
+    def test_http_exceptions_use_the_error_handler(self):
+        async def handler(request, exc):
+            return PlainTextResponse(f"handled {exc.detail}", status_code=exc.status_code)
+
+        stages = [RecordingStage("gate", [], short_circuit="raise")]
+        response = TestClient(make_app(stages)).get("/ok")
+        assert (response.status_code, response.json()) == (403, {"detail": "gate says no"})
+
+        response = TestClient(make_app(stages, error_handler=handler)).get("/ok")
+        assert response.text == "handled gate says no"
+
+    def test_app_errors_reach_on_finish(self):
+        events = []
+        client = TestClient(make_app([RecordingStage("only", events)]), raise_server_exceptions=False)
+        assert client.get("/boom").status_code == 500
+        assert events[-1] == "only:finish:RuntimeError"
+
+    def test_stages_are_enabled_by_configuration(self):
+        events = []
+        pipeline = MiddlewarePipeline(
+            None,
+            [RecordingStage("a", events), RecordingStage("b", events, enabled=False), RecordingStage("c", events)],
+            disabled=["c"],
+        )
+        assert pipeline.stage_names == ["a"]
+
+
+@pytest.mark.unit
+class TestPipelineStages:
+    """Stages behave like the middleware they replace"""
+
+    def test_csrf_and_versioning(self):
+        from app.core.api_versioning import APIVersioningStage
+        from app.core.csrf import CSRFStage
+
+        app = FastAPI()
+
+        @app.post("/form")
+        async def form():
+            return {"ok": True}
+
+        app.add_middleware(MiddlewarePipeline, stages=[CSRFStage("secret"), APIVersioningStage()])
+        client = TestClient(app)
+
+        response = client.post("/form")
+        assert response.status_code == 403
+        assert "x-api-version" not in response.headers
+
+        token = client.get("/form").cookies["csrf_token"]
+        response = client.post("/form", headers={"X-CSRF-Token": token}, cookies={"csrf_token": token})
+        assert response.status_code == 200
+        assert response.headers["x-api-version"] == "v1"
+
+    def test_cors_stage_answers_preflight(self):
+        from app.core.cors import CORSHeadersStage
+
+        stage = CORSHeadersStage(["https://app.example.com"], ["Content-Type"], is_production=True)
+        client = TestClient(make_app([stage]))
+        response = client.options("/ok", headers={"Origin": "https://app.example.com"})
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == "https://app.example.com"
+        assert response.headers["access-control-max-age"] == "3600"
+
+        response = client.get("/ok", headers={"Origin": "https://app.example.com"})
+        assert response.headers["access-control-allow-credentials"] == "true"
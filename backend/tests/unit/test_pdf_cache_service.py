@@ -0,0 +1,159 @@
+"""
+Tests for the content-addressed PDF cache
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.assessment import Assessment, AssessmentResult, AssessmentStatus, AssessmentType
+from app.models.user import User
+from app.services import pdf_cache_service
+from app.services.pdf_cache_service import (
+    PDFArtifactCache,
+    compute_pdf_cache_key,
+    etag_for_key,
+    etag_matches,
+    invalidate_pdf_cache,
+)
+
+
+async def wait_until_removed(cache: PDFArtifactCache, assessment_id: int, key: str) -> bool:
+    """Directory removals run in the thread pool after commit"""
+    for _ in range(100):
+        if await cache.get(assessment_id, key) is None:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def pdf_cache(tmp_path, monkeypatch) -> PDFArtifactCache:
+    cache = PDFArtifactCache(str(tmp_path))
+    monkeypatch.setattr(pdf_cache_service, "_pdf_cache", cache)
+    return cache
+
+
+@pytest.mark.unit
+class TestPDFCacheKey:
+    """Test cache key derivation"""
+
+    def test_key_is_stable_across_dict_order(self):
+        key_a = compute_pdf_cache_key("tki", {"scores": {"a": 1, "b": 2}}, "Jane Doe", "v1")
+        key_b = compute_pdf_cache_key("tki", {"scores": {"b": 2, "a": 1}}, "Jane Doe", "v1")
+        assert key_a == key_b
+
+    def test_key_changes_with_inputs(self):
+        base = compute_pdf_cache_key("tki", {"scores": {"a": 1}}, "Jane Doe", "v1")
+        assert compute_pdf_cache_key("tki", {"scores": {"a": 2}}, "Jane Doe", "v1") != base
+        assert compute_pdf_cache_key("tki", {"scores": {"a": 1}}, "John Doe", "v1") != base
+        assert compute_pdf_cache_key("tki", {"scores": {"a": 1}}, "Jane Doe", "v2") != base
+        assert compute_pdf_cache_key("mbti", {"scores": {"a": 1}}, "Jane Doe", "v1") != base
+
+    def test_etag_matching(self):
+        etag = etag_for_key("abc")
+        assert etag_matches('"abc"', etag)
+        assert etag_matches('W/"abc", "def"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"def"', etag)
+        assert not etag_matches(None, etag)
+
+
+@pytest.mark.unit
+class TestPDFArtifactCache:
+    """Test disk storage, single rendering and invalidation"""
+
+    @pytest.mark.asyncio
+    async def test_renders_once_for_concurrent_requests(self, pdf_cache: PDFArtifactCache):
+        renders = 0
+
+        async def render() -> bytes:
+            nonlocal renders
+            renders += 1
+            await asyncio.sleep(0.05)
+            return b"%PDF-cached"
+
+        results = await asyncio.gather(
+            *(pdf_cache.get_or_render(1, "key", render) for _ in range(5))
+        )
+
+        assert results == [b"%PDF-cached"] * 5
+        assert renders == 1
+        assert pdf_cache.stats == {"hits": 4, "misses": 1, "evictions": 0}
+        assert await pdf_cache.get(1, "key") == b"%PDF-cached"
+
+    @pytest.mark.asyncio
+    async def test_invalidated_when_results_change(self, db: AsyncSession, pdf_cache: PDFArtifactCache):
+        now = datetime.utcnow()
+        user = User(email="pdf@example.com", hashed_password="x", is_active=True)
+        db.add(user)
+        await db.flush()
+        assessment = Assessment(
+            user_id=user.id,
+            assessment_type=AssessmentType.TKI,
+            status=AssessmentStatus.COMPLETED,
+            created_at=now,
+            updated_at=now,
+        )
+        db.add(assessment)
+        await db.flush()
+        result = AssessmentResult(
+            assessment_id=assessment.id,
+            user_id=user.id,
+            scores={"total_score": 30},
+            generated_at=now,
+            updated_at=now,
+        )
+        db.add(result)
+        await db.commit()
+        assessment_id = assessment.id
+
+        await pdf_cache.put(assessment_id, "key", b"%PDF")
+
+        # Share links only touch report_url: cached PDFs are kept
+        result.report_url = "share-token"
+        await db.commit()
+        assert await pdf_cache.get(assessment_id, "key") == b"%PDF"
+
+        # New scores: kept until the commit, then every cached PDF of the
+        # assessment is dropped
+        result.scores = {"total_score": 25}
+        await db.flush()
+        assert await pdf_cache.get(assessment_id, "key") == b"%PDF"
+        await db.rollback()
+        assert await pdf_cache.get(assessment_id, "key") == b"%PDF"
+
+        result.scores = {"total_score": 25}
+        await db.commit()
+        assert await wait_until_removed(pdf_cache, assessment_id, "key")
+
+    @pytest.mark.asyncio
+    async def test_raw_sql_writes_invalidate_after_commit(self, db: AsyncSession, pdf_cache: PDFArtifactCache):
+        await pdf_cache.put(7, "key", b"%PDF")
+        await pdf_cache.put(8, "key", b"%PDF")
+
+        invalidate_pdf_cache(db, 7, 8)
+        assert await pdf_cache.get(7, "key") == b"%PDF"
+        await db.commit()
+        assert await wait_until_removed(pdf_cache, 7, "key")
+        assert await wait_until_removed(pdf_cache, 8, "key")
+
+    @pytest.mark.asyncio
+    async def test_least_recently_served_files_are_evicted(self, tmp_path):
+        cache = PDFArtifactCache(str(tmp_path), max_bytes=250)
+        for assessment_id in (1, 2):
+            await cache.put(assessment_id, "key", b"x" * 100)
+        # Older files on disk, but assessment 1 was just served
+        for assessment_id, mtime in ((1, 1_000), (2, 2_000)):
+            os.utime(tmp_path / str(assessment_id) / "key.pdf", (mtime, mtime))
+        assert await cache.get(1, "key") is not None
+
+        await cache.put(3, "key", b"x" * 100)
+        assert await cache.get(2, "key") is None
+        assert not (tmp_path / "2").exists()
+        assert await cache.get(1, "key") is not None
+        assert await cache.get(3, "key") is not None
+        assert cache.stats["evictions"] == 1
@@ -0,0 +1,113 @@
+"""
+Tests for the PDF render pool
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.pdf_render_pool import (
+    PDFRenderPool,
+    PDFRenderQueueFullError,
+    PDFRenderTimeoutError,
+)
+
+
+def _slow_render(delay: float) -> bytes:
+    time.sleep(delay)
+    return b"%PDF-1.7"
+
+
+@pytest.mark.unit
+class TestPDFRenderPool:
+    """Test the bounded PDF render pool"""
+
+    @pytest.mark.asyncio
+    async def test_render_in_process_pool(self):
+        """Jobs run in worker processes and return their bytes"""
+        pool = PDFRenderPool(max_workers=1, queue_size=1, timeout=30)
+        try:
+            assert await pool.render(bytes, 3) == b"\x00\x00\x00"
+            assert pool.stats["completed"] == 1
+            assert pool.in_flight == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """The loop keeps running other work while a render is in progress"""
+        pool = PDFRenderPool(max_workers=1, queue_size=0, timeout=5, executor_type="thread")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        try:
+            assert await pool.render(_slow_render, 0.2) == b"%PDF-1.7"
+        finally:
+            ticker_task.cancel()
+            pool.shutdown()
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self):
+        """Jobs beyond workers + queue size are rejected immediately"""
+        pool = PDFRenderPool(max_workers=1, queue_size=1, timeout=5, executor_type="thread")
+        try:
+            results = await asyncio.gather(
+                *(pool.render(_slow_render, 0.1) for _ in range(3)),
+                return_exceptions=True,
+            )
+        finally:
+            pool.shutdown()
+
+        rejected = [r for r in results if isinstance(r, PDFRenderQueueFullError)]
+        assert len(rejected) == 1
+        assert rejected[0].status_code == 503
+        assert pool.stats == {"completed": 2, "failed": 0, "rejected": 1, "timed_out": 0}
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """A job exceeding the timeout raises a 504 error and keeps its slot until it really ends"""
+        pool = PDFRenderPool(max_workers=1, queue_size=0, timeout=0.05, executor_type="thread")
+        try:
+            with pytest.raises(PDFRenderTimeoutError) as exc_info:
+                await pool.render(_slow_render, 0.3)
+            assert exc_info.value.status_code == 504
+            assert pool.stats["timed_out"] == 1
+            # A thread can't be killed: its slot is only freed once the job returns
+            assert pool.in_flight == 1
+            with pytest.raises(PDFRenderQueueFullError):
+                await pool.render(_slow_render, 0)
+            await asyncio.sleep(0.4)
+            assert pool.in_flight == 0
+        finally:
+            pool.shutdown(wait=False)
+
+    @pytest.mark.asyncio
+    async def test_timeout_terminates_worker_processes(self):
+        """No worker of the recycled pool survives a timeout; other jobs are retried"""
+        pool = PDFRenderPool(max_workers=2, queue_size=0, timeout=3)
+        try:
+            hung = asyncio.create_task(pool.render(time.sleep, 60))
+            await asyncio.sleep(1)
+            # Started on the same pool, still running when the hung job times out
+            victim = asyncio.create_task(pool.render(time.sleep, 2.5))
+            await asyncio.sleep(0.5)
+            workers = list(pool._executor._processes.values())
+            assert len(workers) == 2
+
+            with pytest.raises(PDFRenderTimeoutError):
+                await hung
+            assert not any(worker.is_alive() for worker in workers)
+
+            assert await victim is None
+            assert pool.stats["completed"] == 1
+            assert pool.in_flight == 0
+        finally:
+            pool.shutdown(wait=False)
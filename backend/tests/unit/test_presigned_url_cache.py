@@ -0,0 +1,114 @@
+"""
+Tests for the presigned URL cache
+
+URLs are signed by a real boto3 client configured for a local S3-compatible
+endpoint (a MinIO stand-in): presigning is computed locally, so no server
+needs to be running.
+"""
+
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import pytest
+
+from app.services.presigned_url_cache import PresignedUrlCache
+from app.services.s3_service import S3Service
+
+
+class CountingS3Service(S3Service):
+    """S3Service on a local endpoint that counts signatures and their threads"""
+
+    def __init__(self):
+        client = boto3.client(
+            "s3",
+            aws_access_key_id="minioadmin",
+            aws_secret_access_key="minioadmin",
+            region_name="us-east-1",
+            endpoint_url="http://127.0.0.1:9000",
+        )
+        super().__init__(client=client, bucket="media")
+        self.signed = []
+        self.threads = set()
+
+    def generate_presigned_url(self, file_key, expiration=3600):
+        self.signed.append(file_key)
+        self.threads.add(threading.get_ident())
+        return super().generate_presigned_url(file_key, expiration=expiration)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def s3():
+    return CountingS3Service()
+
+
+@pytest.mark.unit
+class TestPresignedUrlCache:
+    """Reuse, refresh and batch signing"""
+
+    def test_urls_are_reused_until_the_refresh_margin(self, s3):
+        clock = Clock()
+        cache = PresignedUrlCache(refresh_margin=600, s3_service=s3, clock=clock)
+
+        url = cache.get_url("contacts/photos/1/a.jpg", expires_in=3600)
+        parsed = urlparse(url)
+        assert parsed.path == "/media/contacts/photos/1/a.jpg"
+        assert any(name.endswith("Signature") for name in parse_qs(parsed.query))
+        assert cache.get_url("contacts/photos/1/a.jpg", expires_in=3600) == url
+        assert len(s3.signed) == 1
+
+        # Another lifetime is another URL
+        cache.get_url("contacts/photos/1/a.jpg", expires_in=60)
+        assert len(s3.signed) == 2
+
+        clock.now += 3600 - 600
+        cache.get_url("contacts/photos/1/a.jpg", expires_in=3600)
+        assert len(s3.signed) == 3
+        assert cache.stats["hits"] == 1
+
+    def test_entries_are_bounded(self, s3):
+        cache = PresignedUrlCache(max_entries=2, s3_service=s3)
+        for name in ("a", "b", "c"):
+            cache.get_url(name)
+        cache.get_url("a")
+        assert s3.signed == ["a", "b", "c", "a"]
+        assert cache.snapshot()["entries"] == 2
+
+    def test_invalidate(self, s3):
+        cache = PresignedUrlCache(s3_service=s3)
+        cache.get_url("a")
+        cache.invalidate("a")
+        cache.get_url("a")
+        assert s3.signed == ["a", "a"]
+
+    @pytest.mark.asyncio
+    async def test_page_misses_are_signed_in_one_batch_off_the_loop(self, s3):
+        cache = PresignedUrlCache(s3_service=s3)
+        cache.get_url("photo-0")
+        s3.threads.clear()
+
+        keys = [f"photo-{index}" for index in range(50)] + ["photo-1"]
+        urls = await cache.get_urls_async(keys)
+        assert set(urls) == set(keys)
+        assert len(s3.signed) == 50
+        assert len(s3.threads) == 1 and threading.get_ident() not in s3.threads
+
+        again = await cache.get_urls_async(keys)
+        assert again == urls
+        assert len(s3.signed) == 50
+
+    @pytest.mark.asyncio
+    async def test_signing_errors_leave_the_key_out(self):
+        service = S3Service(client=CountingS3Service().client, bucket=None)
+        service.bucket = None
+        cache = PresignedUrlCache(s3_service=service)
+        assert await cache.get_urls_async(["a"]) == {}
+        assert cache.stats["errors"] == 1
@@ -0,0 +1,171 @@
+"""
+Tests for the authenticated principal cache used by get_current_user
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import CacheBackend
+from app.core.principal_cache import PrincipalCache, PrincipalSnapshot, principal_cache
+from app.core.security import create_access_token
+from app.dependencies import get_current_user, is_superadmin
+from app.models import Role, User, UserRole
+from tests.conftest import engine
+
+
+def _credentials(user: User) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": user.email}))
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the test engine"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self)
+
+    @property
+    def selects(self):
+        return [statement for statement in self.statements if statement.lstrip().upper().startswith("SELECT")]
+
+
+@pytest.fixture
+async def principal_user(db: AsyncSession) -> User:
+    now = datetime.now(timezone.utc)
+    user = User(
+        email="principal@example.com",
+        hashed_password="x",
+        first_name="Pat",
+        last_name="Cache",
+        is_active=True,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.mark.unit
+class TestGetCurrentUserCache:
+    """get_current_user served from the principal cache"""
+
+    @pytest.mark.asyncio
+    async def test_second_request_issues_no_select(self, db: AsyncSession, principal_user: User):
+        credentials = _credentials(principal_user)
+        await get_current_user(credentials, db)
+        db.expunge_all()
+
+        with StatementCounter() as counter:
+            user = await get_current_user(credentials, db)
+            assert await is_superadmin(user, db) is False
+        assert counter.selects == []
+        assert user.first_name == "Pat"
+        assert principal_cache.stats["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cached_user_can_still_be_updated(self, db: AsyncSession, principal_user: User):
+        credentials = _credentials(principal_user)
+        await get_current_user(credentials, db)
+        db.expunge_all()
+
+        user = await get_current_user(credentials, db)
+        user.first_name = "Renamed"
+        await db.commit()
+
+        # The update invalidated the entry: the next request reads the new row
+        db.expunge_all()
+        assert (await get_current_user(credentials, db)).first_name == "Renamed"
+
+    @pytest.mark.asyncio
+    async def test_deactivation_is_seen_immediately(self, db: AsyncSession, principal_user: User):
+        credentials = _credentials(principal_user)
+        await get_current_user(credentials, db)
+
+        user = (await db.execute(select(User).where(User.email == principal_user.email))).scalar_one()
+        user.is_active = False
+        await db.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_user(credentials, db)
+        assert exc_info.value.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_role_assignment_refreshes_role_slugs(self, db: AsyncSession, principal_user: User):
+        credentials = _credentials(principal_user)
+        user = await get_current_user(credentials, db)
+        user_id = user.id
+        assert principal_cache.role_slugs(user_id) == frozenset()
+
+        now = datetime.now(timezone.utc)
+        role = Role(name="Superadmin", slug="superadmin", is_active=True, created_at=now, updated_at=now)
+        db.add(role)
+        await db.flush()
+        db.add(UserRole(user_id=user_id, role_id=role.id, created_at=now))
+        await db.commit()
+        assert principal_cache.role_slugs(user_id) is None
+
+        user = await get_current_user(credentials, db)
+        assert principal_cache.role_slugs(user_id) == frozenset({"superadmin"})
+        assert await is_superadmin(user, db) is True
+
+
+@pytest.mark.unit
+class TestPrincipalCache:
+    """PrincipalCache bookkeeping"""
+
+    @staticmethod
+    def _snapshot(user_id: int, email: str) -> PrincipalSnapshot:
+        return PrincipalSnapshot(user_id=user_id, email=email, is_active=True, columns={}, role_slugs=frozenset())
+
+    def test_lru_bound_and_ttl(self, monkeypatch):
+        import time
+
+        cache = PrincipalCache(ttl=30, max_entries=2)
+        for user_id, email in enumerate(("a@x.io", "b@x.io", "c@x.io")):
+            cache.set(email, self._snapshot(user_id, email))
+        assert cache.get("a@x.io") is None
+        assert cache.role_slugs(0) is None
+        assert cache.get("c@x.io") is not None
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+        assert cache.get("c@x.io") is None
+
+    def test_disabled_with_zero_ttl(self):
+        cache = PrincipalCache(ttl=0)
+        cache.set("a@x.io", self._snapshot(1, "a@x.io"))
+        assert cache.get("a@x.io") is None
+
+    def test_invalidations_from_other_workers(self):
+        cache = PrincipalCache(ttl=30)
+        backend = CacheBackend()
+        backend.use_redis = False
+        backend.add_invalidation_hook(cache.apply_invalidation_keys)
+        cache.set("a@x.io", self._snapshot(1, "a@x.io"))
+        cache.set("b@x.io", self._snapshot(2, "b@x.io"))
+        cache.set("c@x.io", self._snapshot(3, "c@x.io"))
+
+        backend.handle_invalidation_message(json.dumps({"origin": "other", "keys": ["principal:a@x.io"]}))
+        backend.handle_invalidation_message(json.dumps({"origin": "other", "keys": ["principal:user:2"]}))
+        assert cache.get("a@x.io") is None
+        assert cache.get("b@x.io") is None
+        assert cache.get("c@x.io") is not None
+
+        backend.handle_invalidation_message(json.dumps({"origin": "other", "pattern": "principal:*"}))
+        assert cache.get("c@x.io") is None
@@ -0,0 +1,150 @@
+"""
+Tests for compiled, version-stamped permission sets in RBACService
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Permission, Role, RolePermission, User, UserPermission, UserRole
+from app.services.permission_cache import CompiledPermissions, PermissionSetCache, permission_set_cache
+from app.services.rbac_service import RBACService
+from tests.conftest import engine
+
+NOW = datetime.now(timezone.utc)
+
+
+class SelectCounter:
+    """Counts SELECT statements sent to the test engine"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self)
+
+
+async def _user(db: AsyncSession, email: str) -> int:
+    user = User(email=email, hashed_password="x", is_active=True, created_at=NOW, updated_at=NOW)
+    db.add(user)
+    await db.flush()
+    return user.id
+
+
+async def _role(db: AsyncSession, slug: str, permissions) -> int:
+    role = Role(name=slug.title(), slug=slug, is_active=True, created_at=NOW, updated_at=NOW)
+    db.add(role)
+    await db.flush()
+    for permission_id in permissions:
+        db.add(RolePermission(role_id=role.id, permission_id=permission_id, created_at=NOW))
+    await db.flush()
+    return role.id
+
+
+async def _permission(db: AsyncSession, name: str) -> int:
+    resource, action = name.split(":", 1)
+    permission = Permission(resource=resource, action=action, name=name, created_at=NOW)
+    db.add(permission)
+    await db.flush()
+    return permission.id
+
+
+@pytest.mark.unit
+class TestCompiledPermissions:
+    """Wildcard resolution"""
+
+    def test_wildcards(self):
+        compiled = CompiledPermissions.compile(["users:read", "teams:*"])
+        assert compiled.allows("users:read")
+        assert not compiled.allows("users:delete")
+        assert compiled.allows("teams:delete")
+        assert not compiled.allows("teams")
+        assert compiled.allows_any(["users:delete", "teams:create"])
+        assert not compiled.allows_all(["users:delete", "teams:create"])
+
+        assert CompiledPermissions.compile(["admin:*"]).allows("invoices:delete")
+
+    def test_stale_compile_is_not_stored(self):
+        cache = PermissionSetCache(ttl=60)
+        stamp = cache.stamp(1)
+        # A role assignment is flushed while the set is being compiled
+        cache.bump_user(1)
+        cache.put(1, stamp, CompiledPermissions.compile(["users:read"]))
+        assert cache.get(1) is None
+        assert cache.stats["discarded"] == 1
+
+        cache.put(1, cache.stamp(1), CompiledPermissions.compile(["users:read"]))
+        cache.bump_global()
+        assert cache.get(1) is None
+
+
+@pytest.mark.unit
+class TestRBACServicePermissionCache:
+    """RBACService checks served from the compiled set"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_checks_take_one_fetch(self, db: AsyncSession):
+        read_id = await _permission(db, "users:read")
+        wildcard_id = await _permission(db, "teams:*")
+        user_id = await _user(db, "rbac@example.com")
+        role_id = await _role(db, "manager", [read_id, wildcard_id])
+        db.add(UserRole(user_id=user_id, role_id=role_id, created_at=NOW))
+        await db.commit()
+        service = RBACService(db)
+
+        with SelectCounter() as counter:
+            assert await service.has_any_permission(user_id, ["invoices:read", "teams:delete"])
+            assert not await service.has_all_permissions(user_id, ["users:read", "users:delete", "teams:list"])
+            assert await service.has_permission(user_id, "users:read")
+        assert counter.count == 1
+        assert await service.get_user_permissions(user_id) == {"users:read", "teams:*"}
+
+    @pytest.mark.asyncio
+    async def test_superadmin_gets_all_permissions(self, db: AsyncSession):
+        user_id = await _user(db, "root@example.com")
+        role_id = await _role(db, "superadmin", [])
+        db.add(UserRole(user_id=user_id, role_id=role_id, created_at=NOW))
+        await db.commit()
+
+        service = RBACService(db)
+        assert await service.get_user_permissions(user_id) == {"admin:*"}
+        assert await service.has_permission(user_id, "billing:refund")
+
+    @pytest.mark.asyncio
+    async def test_changes_invalidate_compiled_sets(self, db: AsyncSession):
+        read_id = await _permission(db, "users:read")
+        delete_id = await _permission(db, "users:delete")
+        export_id = await _permission(db, "reports:export")
+        alice = await _user(db, "alice@example.com")
+        bob = await _user(db, "bob@example.com")
+        role_id = await _role(db, "member", [read_id])
+        db.add_all([
+            UserRole(user_id=alice, role_id=role_id, created_at=NOW),
+            UserRole(user_id=bob, role_id=role_id, created_at=NOW),
+        ])
+        await db.commit()
+        service = RBACService(db)
+        assert not await service.has_permission(alice, "reports:export")
+        assert not await service.has_permission(bob, "users:delete")
+
+        # A custom permission only invalidates its user
+        db.add(UserPermission(user_id=alice, permission_id=export_id, created_at=NOW))
+        await db.commit()
+        assert permission_set_cache.get(bob) is not None
+        assert await service.has_permission(alice, "reports:export")
+
+        # A role permission change invalidates everyone
+        db.add(RolePermission(role_id=role_id, permission_id=delete_id, created_at=NOW))
+        await db.commit()
+        assert permission_set_cache.get(bob) is None
+        assert await service.has_permission(bob, "users:delete")
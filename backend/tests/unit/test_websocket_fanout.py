@@ -0,0 +1,129 @@
+"""
+Tests for WebSocket send queues and cross-worker fan-out
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.api.v1.endpoints.websocket import ConnectionManager
+from app.core.cache import cache_backend
+from app.core.websocket_fanout import SLOW_CONSUMER_CLOSE_CODE, InProcessFanoutBus
+
+
+class FakeWebSocket:
+    """Records frames; `blocked` makes every send hang like a stalled client"""
+
+    def __init__(self, blocked: bool = False):
+        self.blocked = blocked
+        self.frames = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.frames.append(json.loads(text))
+
+    async def send_json(self, message):
+        self.frames.append(message)
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+
+
+async def settle(condition, timeout: float = 2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out waiting for delivery"
+        await asyncio.sleep(0.001)
+
+
+@pytest.fixture
+async def workers():
+    bus = InProcessFanoutBus()
+    managers = [ConnectionManager(bus=bus, queue_size=4, send_timeout=0.05) for _ in range(2)]
+    for manager in managers:
+        await manager.start()
+    yield managers
+    for manager in managers:
+        await manager.stop()
+
+
+@pytest.mark.unit
+class TestConnectionManagerFanout:
+    """Delivery across two managers sharing a bus"""
+
+    @pytest.mark.asyncio
+    async def test_personal_message_reaches_every_worker(self, workers):
+        first, second = workers
+        here, there, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await first.connect(here, "42")
+        await second.connect(there, "42")
+        await second.connect(other, "7")
+
+        await first.send_personal_message({"type": "notification", "data": {"id": 1}}, "42")
+        await settle(lambda: here.frames and there.frames)
+        assert there.frames == [{"type": "notification", "data": {"id": 1}}]
+        assert other.frames == []
+        assert second.stats["received"] == 1
+
+    @pytest.mark.asyncio
+    async def test_room_and_broadcast_exclusions(self, workers):
+        first, second = workers
+        sender, neighbour, remote = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        for manager, websocket, user_id in ((first, sender, "1"), (first, neighbour, "2"), (second, remote, "3")):
+            await manager.connect(websocket, user_id)
+            await manager.join_room(websocket, "lobby")
+
+        await first.send_to_room({"type": "message"}, "lobby", exclude_websocket=sender)
+        await first.broadcast({"type": "announcement"}, exclude_user_id="3")
+        await settle(lambda: len(neighbour.frames) == 2 and remote.frames)
+        assert sender.frames == [{"type": "announcement"}]
+        assert remote.frames == [{"type": "message"}]
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_is_evicted_without_delaying_others(self, workers):
+        first, second = workers
+        stalled, healthy = FakeWebSocket(blocked=True), FakeWebSocket()
+        await second.connect(stalled, "1")
+        await second.connect(healthy, "2")
+        await second.join_room(stalled, "lobby")
+
+        for index in range(8):
+            await first.broadcast({"index": index})
+            await asyncio.sleep(0.001)
+        await settle(lambda: len(healthy.frames) == 8)
+        await settle(lambda: stalled.close_code is not None)
+
+        assert stalled.close_code == SLOW_CONSUMER_CLOSE_CODE
+        assert second.stats["evicted"] == 1
+        assert stalled not in second.clients
+        assert "1" not in second.active_connections
+        assert "lobby" not in second.rooms
+        # The endpoint's own cleanup after the close is a no-op
+        second.disconnect(stalled, "1")
+
+    @pytest.mark.asyncio
+    async def test_manager_that_was_never_started_still_publishes(self, monkeypatch):
+        class PublishRecorder:
+            def __init__(self):
+                self.messages = []
+
+            async def publish(self, channel, message):
+                self.messages.append(json.loads(message))
+
+        client = PublishRecorder()
+        monkeypatch.setattr(cache_backend, "use_redis", True)
+        monkeypatch.setattr(cache_backend, "redis_client", client)
+
+        manager = ConnectionManager()
+        await manager.send_personal_message({"type": "notification"}, "42")
+
+        assert [(message["scope"], message["target"]) for message in client.messages] == [("user", "42")]
+        assert json.loads(client.messages[0]["text"]) == {"type": "notification"}
+        assert manager.stats["published"] == 1